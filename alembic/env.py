@@ -17,7 +17,7 @@ if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
 # add your model's MetaData object here
-from app.models import user, base_model, user_session, product, category # noqa
+from app.models import user, base_model, user_session, product, category, conversation_message, rate_limit_bucket, brand # noqa
 # for 'autogenerate' support
 # from myapp import mymodel
 # target_metadata = mymodel.Base.metadata
@@ -0,0 +1,373 @@
+"""
+Audio preprocessing for AIBIN voice interactions.
+Decodes, resamples and trims silence from voice clips with vectorized NumPy before STT.
+"""
+
+import asyncio
+import logging
+import math
+import struct
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Any, Optional, List, Tuple
+
+import numpy as np
+
+from ..config.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+INT16_SCALE = 32768.0
+
+# Zero crossings of the windowed-sinc kernel on each side; 8 keeps aliasing far below speech levels
+RESAMPLE_ZERO_CROSSINGS = 8
+# Transition band headroom below the output Nyquist frequency
+RESAMPLE_ROLLOFF = 0.95
+# Output samples resampled per vectorized block, bounding the gathered tap matrix
+RESAMPLE_BLOCK = 16384
+# Floor for frame energies so digital silence does not produce -inf
+MIN_ENERGY_DB = -100.0
+
+
+def _parse_wav(data: bytes) -> Tuple[memoryview, int, int, int, int]:
+    """Locate the sample data of a RIFF/WAVE file without copying it."""
+    if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise ValueError("Audio is not a RIFF/WAVE file")
+
+    view = memoryview(data)
+    fmt = None
+    offset = 12
+    while offset + 8 <= len(data):
+        chunk_id = data[offset:offset + 4]
+        size = int.from_bytes(data[offset + 4:offset + 8], "little")
+        body = offset + 8
+        if chunk_id == b"fmt ":
+            audio_format, channels, rate = struct.unpack_from("<HHI", data, body)
+            bits = struct.unpack_from("<H", data, body + 14)[0]
+            if audio_format == WAVE_FORMAT_EXTENSIBLE:
+                audio_format = struct.unpack_from("<H", data, body + 24)[0]
+            fmt = (audio_format, channels, rate, bits)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("WAV data chunk precedes its format chunk")
+            # Streaming writers leave the size unset (0 or 0xFFFFFFFF); take what is there
+            end = len(data) if size in (0, 0xFFFFFFFF) else min(body + size, len(data))
+            return (view[body:end], *fmt)
+        offset = body + size + (size & 1)
+
+    raise ValueError("WAV file has no data chunk")
+
+
+def decode_audio(audio_data: bytes, format: str = "wav", sample_rate: Optional[int] = None) -> Tuple[np.ndarray, int]:
+    """
+    Decode a clip into mono samples.
+
+    Mono 16-bit audio is returned as an int16 view over `audio_data` (no
+    copy); float WAVs and multi-channel audio are returned as float32.
+
+    Args:
+        audio_data: WAV file, or raw 16-bit little-endian mono PCM
+        format: "wav" or "pcm"
+        sample_rate: Rate of raw PCM (defaults to STT_SAMPLE_RATE)
+
+    Returns:
+        (samples, sample rate)
+
+    Raises:
+        ValueError: For unsupported formats or encodings
+    """
+    if format == "pcm":
+        if len(audio_data) % 2:
+            raise ValueError("PCM audio must contain whole 16-bit samples")
+        return np.frombuffer(audio_data, dtype="<i2"), sample_rate or settings.STT_SAMPLE_RATE
+    if format != "wav":
+        raise ValueError(f"Unsupported audio format '{format}'. Supported: wav, pcm")
+
+    payload, audio_format, channels, rate, bits = _parse_wav(audio_data)
+    if (audio_format, bits) == (WAVE_FORMAT_PCM, 16):
+        dtype = np.dtype("<i2")
+    elif (audio_format, bits) == (WAVE_FORMAT_IEEE_FLOAT, 32):
+        dtype = np.dtype("<f4")
+    else:
+        raise ValueError(f"Unsupported WAV encoding (format {audio_format}, {bits}-bit); use 16-bit PCM or 32-bit float")
+    if channels < 1:
+        raise ValueError("WAV file has no channels")
+
+    frame_bytes = dtype.itemsize * channels
+    samples = np.frombuffer(payload, dtype=dtype, count=len(payload) // frame_bytes * channels)
+    if channels > 1:
+        samples = to_float32(samples).reshape(-1, channels).mean(axis=1)
+    return samples, rate
+
+
+def to_float32(samples: np.ndarray) -> np.ndarray:
+    """Scale int16 samples to float32 in [-1, 1); float32 input is returned as is."""
+    if samples.dtype == np.float32:
+        return samples
+    return samples.astype(np.float32) * np.float32(1.0 / INT16_SCALE)
+
+
+def to_int16(samples: np.ndarray) -> np.ndarray:
+    """Convert float32 samples to int16 with clipping; int16 input is returned as is."""
+    if samples.dtype == np.int16:
+        return samples
+    return np.clip(samples * INT16_SCALE, -INT16_SCALE, INT16_SCALE - 1).astype(np.int16)
+
+
+@lru_cache(maxsize=16)
+def _resample_filter(up: int, down: int) -> Tuple[np.ndarray, int]:
+    """
+    Polyphase windowed-sinc filter bank for resampling by up/down.
+
+    Returns:
+        (taps of shape (up, 2 * half), half) - row p filters outputs whose
+        input position has fractional part p / up
+    """
+    cutoff = min(1.0, up / down) * RESAMPLE_ROLLOFF
+    half_width = RESAMPLE_ZERO_CROSSINGS / cutoff
+    half = int(math.ceil(half_width)) + 1
+
+    # Distance (in input samples) from each output position to each tap
+    offsets = np.arange(up, dtype=np.float64)[:, None] / up + (half - 1 - np.arange(2 * half))[None, :]
+    window = np.where(
+        np.abs(offsets) < half_width,
+        0.5 + 0.5 * np.cos(np.pi * offsets / half_width),
+        0.0
+    )
+    taps = np.sinc(cutoff * offsets) * window
+    taps /= taps.sum(axis=1, keepdims=True)
+    return taps.astype(np.float32), half
+
+
+def resample(samples: np.ndarray, from_rate: int, to_rate: int) -> np.ndarray:
+    """
+    Resample float32 audio with a polyphase windowed-sinc filter.
+
+    Each output sample is the dot product of one filter phase with the input
+    samples around its position; outputs are computed a block at a time as
+    a single gather and row-wise dot product, so there is no Python loop per
+    sample. The kernel low-passes at the lower Nyquist frequency, so
+    downsampling does not alias.
+    """
+    if from_rate == to_rate or not len(samples):
+        return samples
+
+    divisor = math.gcd(from_rate, to_rate)
+    up, down = to_rate // divisor, from_rate // divisor
+    taps, half = _resample_filter(up, down)
+
+    padded = np.pad(to_float32(samples), (half, half + 1))
+    tap_offsets = np.arange(2 * half) + 1
+    output_count = -(-len(samples) * up // down)
+    output = np.empty(output_count, dtype=np.float32)
+
+    for start in range(0, output_count, RESAMPLE_BLOCK):
+        positions = np.arange(start, min(start + RESAMPLE_BLOCK, output_count), dtype=np.int64) * down
+        base, phase = np.divmod(positions, up)
+        window = padded[base[:, None] + tap_offsets[None, :]]
+        output[start:start + len(positions)] = np.einsum("ij,ij->i", window, taps[phase])
+
+    return output
+
+
+def _runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Start (inclusive) and end (exclusive) indices of the True runs in a boolean array."""
+    edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def detect_speech(samples: np.ndarray, sample_rate: int) -> List[Tuple[int, int]]:
+    """
+    Find speech segments with an energy and zero-crossing VAD.
+
+    Frames are AUDIO_VAD_FRAME_MS long. The noise floor is the 10th
+    percentile frame energy (capped at AUDIO_VAD_MAX_NOISE_FLOOR_DB so a clip
+    that is all speech is not trimmed). A frame is speech when it is
+    AUDIO_VAD_THRESHOLD_DB above the floor, or half that with a high
+    zero-crossing rate (unvoiced consonants like "s" and "f" are quiet but
+    noisy). Pauses shorter than AUDIO_VAD_MIN_SILENCE_MS are bridged, bursts
+    shorter than AUDIO_VAD_MIN_SPEECH_MS dropped, and segments padded by
+    AUDIO_VAD_PADDING_MS so onsets are not clipped.
+
+    Returns:
+        (start, end) sample ranges of speech, in order
+    """
+    frame_length = max(1, sample_rate * settings.AUDIO_VAD_FRAME_MS // 1000)
+    frame_count = len(samples) // frame_length
+    if frame_count == 0:
+        return []
+
+    # Non-overlapping frames as a view over the samples
+    frames = to_float32(samples[:frame_count * frame_length]).reshape(frame_count, frame_length)
+    power = np.einsum("ij,ij->i", frames, frames) / frame_length
+    energy_db = 10.0 * np.log10(np.maximum(power, 10.0 ** (MIN_ENERGY_DB / 10.0)))
+    signs = np.signbit(frames)
+    zero_crossing_rate = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frame_length - 1 or 1)
+
+    noise_floor = min(float(np.percentile(energy_db, 10)), settings.AUDIO_VAD_MAX_NOISE_FLOOR_DB)
+    threshold = settings.AUDIO_VAD_THRESHOLD_DB
+    speech = (energy_db > noise_floor + threshold) | (
+        (energy_db > noise_floor + threshold / 2) & (zero_crossing_rate > settings.AUDIO_VAD_ZCR_THRESHOLD)
+    )
+
+    frame_ms = 1000 * frame_length / sample_rate
+    min_silence = int(math.ceil(settings.AUDIO_VAD_MIN_SILENCE_MS / frame_ms))
+    min_speech = int(math.ceil(settings.AUDIO_VAD_MIN_SPEECH_MS / frame_ms))
+    padding = int(math.ceil(settings.AUDIO_VAD_PADDING_MS / frame_ms))
+
+    # Bridge short pauses between words, then drop isolated clicks
+    starts, ends = _runs(~speech)
+    inner = (starts > 0) & (ends < frame_count) & (ends - starts < min_silence)
+    for start, end in zip(starts[inner], ends[inner]):
+        speech[start:end] = True
+    starts, ends = _runs(speech)
+    keep = ends - starts >= min_speech
+    starts = np.maximum(starts[keep] - padding, 0)
+    ends = np.minimum(ends[keep] + padding, frame_count)
+
+    segments: List[Tuple[int, int]] = []
+    for start, end in zip(starts * frame_length, ends * frame_length):
+        if segments and start <= segments[-1][1]:
+            segments[-1] = (segments[-1][0], int(end))
+        else:
+            segments.append((int(start), int(end)))
+    if segments and segments[-1][1] == frame_count * frame_length:
+        # Keep the partial frame at the end of the clip with the last segment
+        segments[-1] = (segments[-1][0], len(samples))
+    return segments
+
+
+@dataclass
+class PreprocessedAudio:
+    """Canonical-rate 16-bit mono speech, ready for an STT engine."""
+    samples: np.ndarray
+    sample_rate: int
+    segments: List[Tuple[int, int]] = field(default_factory=list)
+    details: Dict[str, Any] = field(default_factory=dict)
+
+    def pcm_bytes(self) -> bytes:
+        return self.samples.tobytes()
+
+    @property
+    def has_speech(self) -> bool:
+        return len(self.samples) > 0
+
+
+def preprocess_audio(
+    audio_data: bytes,
+    format: str = "wav",
+    sample_rate: Optional[int] = None,
+    target_rate: Optional[int] = None,
+    vad: Optional[bool] = None
+) -> PreprocessedAudio:
+    """
+    Decode a clip, resample it to the STT rate and keep only the speech.
+
+    Speech segments are concatenated, dropping leading and trailing silence
+    and long pauses. When the clip is already 16-bit mono at the target rate
+    and contains one segment, the result is a view over `audio_data`.
+    """
+    started = time.perf_counter()
+    target_rate = target_rate or settings.STT_SAMPLE_RATE
+    vad = settings.AUDIO_VAD_ENABLED if vad is None else vad
+
+    samples, source_rate = decode_audio(audio_data, format, sample_rate)
+    if source_rate != target_rate:
+        samples = resample(to_float32(samples), source_rate, target_rate)
+
+    segments = detect_speech(samples, target_rate) if vad else [(0, len(samples))]
+    if len(segments) == 1:
+        speech = samples[segments[0][0]:segments[0][1]]
+    else:
+        speech = np.concatenate([samples[start:end] for start, end in segments]) if segments else samples[:0]
+    speech = to_int16(speech)
+
+    return PreprocessedAudio(
+        samples=speech,
+        sample_rate=target_rate,
+        segments=segments,
+        details={
+            "source_sample_rate": source_rate,
+            "sample_rate": target_rate,
+            "input_seconds": len(samples) / target_rate,
+            "speech_seconds": len(speech) / target_rate,
+            "segments": len(segments),
+            "processing_time": time.perf_counter() - started,
+        }
+    )
+
+
+class AudioPreprocessor:
+    """
+    Audio preprocessing stage in front of speech-to-text.
+
+    Voice clips arrive at mixed sample rates with long leading and trailing
+    silence; recognition cost is proportional to audio length, so clips are
+    resampled and trimmed first. The NumPy work runs in a worker thread to
+    keep the event loop free.
+    """
+
+    def __init__(self):
+        # Metrics
+        self.clips_processed = 0
+        self.clips_failed = 0
+        self.input_seconds = 0.0
+        self.speech_seconds = 0.0
+        self.total_time = 0.0
+
+    async def preprocess(
+        self,
+        audio_data: bytes,
+        format: str = "wav",
+        sample_rate: Optional[int] = None,
+        target_rate: Optional[int] = None
+    ) -> PreprocessedAudio:
+        """
+        Preprocess a clip off the event loop.
+
+        Raises:
+            ValueError: For unsupported formats or encodings
+        """
+        try:
+            result = await asyncio.to_thread(preprocess_audio, audio_data, format, sample_rate, target_rate)
+        except ValueError:
+            self.clips_failed += 1
+            raise
+
+        self.clips_processed += 1
+        self.input_seconds += result.details["input_seconds"]
+        self.speech_seconds += result.details["speech_seconds"]
+        self.total_time += result.details["processing_time"]
+        logger.debug(
+            f"Audio preprocessed: {result.details['input_seconds']:.2f}s at {result.details['source_sample_rate']} Hz "
+            f"-> {result.details['speech_seconds']:.2f}s of speech in {result.details['processing_time']:.3f}s"
+        )
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get preprocessing statistics."""
+        return {
+            "vad_enabled": settings.AUDIO_VAD_ENABLED,
+            "clips_processed": self.clips_processed,
+            "clips_failed": self.clips_failed,
+            "input_seconds": self.input_seconds,
+            "speech_seconds": self.speech_seconds,
+            "trimmed_ratio": 1 - self.speech_seconds / self.input_seconds if self.input_seconds else 0.0,
+            "average_time": self.total_time / self.clips_processed if self.clips_processed else 0.0
+        }
+
+
+_audio_preprocessor: Optional[AudioPreprocessor] = None
+
+
+def get_audio_preprocessor() -> AudioPreprocessor:
+    """Get the process-wide audio preprocessor."""
+    global _audio_preprocessor
+    if _audio_preprocessor is None:
+        _audio_preprocessor = AudioPreprocessor()
+    return _audio_preprocessor
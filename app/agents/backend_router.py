@@ -0,0 +1,215 @@
+"""
+Backend health tracking and routing for AIBIN AI agents.
+EWMA latency/error tracking, circuit breaking and failover between LLM backends.
+"""
+
+import logging
+import time
+from typing import Dict, Any, List, Optional, TYPE_CHECKING
+
+from ..config.config import settings
+from ..utils.exceptions import BackendUnavailableError
+
+if TYPE_CHECKING:
+    from .llm_client import LLMClient
+
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+class BackendHealth:
+    """
+    Health of one LLM backend/model.
+
+    Tracks exponentially weighted moving averages of latency and error rate
+    and runs a circuit breaker: after repeated failures the circuit opens and
+    calls fail immediately instead of waiting for the provider timeout. Once
+    the reset period passes, a single probe call is let through (half-open);
+    its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, name: str, model: str):
+        self.name = name
+        self.model = model
+        self.alpha = settings.LLM_EWMA_ALPHA
+        self.failure_threshold = settings.LLM_CIRCUIT_FAILURE_THRESHOLD
+        self.error_rate_threshold = settings.LLM_CIRCUIT_ERROR_RATE_THRESHOLD
+        self.reset_seconds = settings.LLM_CIRCUIT_RESET_SECONDS
+
+        self.ewma_latency: Optional[float] = None
+        self.ewma_error_rate = 0.0
+        self.consecutive_failures = 0
+        self.samples = 0
+
+        self.state = CIRCUIT_CLOSED
+        self.opened_at: Optional[float] = None
+        self._probe_in_flight = False
+
+        # Metrics
+        self.successes = 0
+        self.failures = 0
+        self.short_circuited = 0
+        self.times_opened = 0
+
+    def allow_request(self) -> bool:
+        """Check whether a call may go to the backend, moving open circuits to half-open when due."""
+        if self.state == CIRCUIT_CLOSED:
+            return True
+
+        if self.state == CIRCUIT_OPEN:
+            if time.monotonic() - (self.opened_at or 0.0) < self.reset_seconds:
+                return False
+            self.state = CIRCUIT_HALF_OPEN
+            self._probe_in_flight = False
+
+        # Half-open: let exactly one probe through
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def ensure_available(self):
+        """Raise BackendUnavailableError if the circuit is open."""
+        if not self.allow_request():
+            self.short_circuited += 1
+            raise BackendUnavailableError(
+                f"{self.name} is temporarily unavailable (circuit open)",
+                details={"backend": self.name, "circuit": self.state, "retry_after": self.retry_after}
+            )
+
+    def record_success(self, latency: float):
+        """Record a successful call and its latency."""
+        self.successes += 1
+        self._update(latency, failed=False)
+        self.consecutive_failures = 0
+        if self.state != CIRCUIT_CLOSED:
+            logger.info(f"{self.name} circuit closed after successful probe")
+        self.state = CIRCUIT_CLOSED
+        self._probe_in_flight = False
+
+    def record_failure(self, latency: float):
+        """Record a failed call, opening the circuit when thresholds are crossed."""
+        self.failures += 1
+        self._update(latency, failed=True)
+        self.consecutive_failures += 1
+
+        if self.state == CIRCUIT_HALF_OPEN or self._should_open():
+            self._open()
+
+    def release_probe(self):
+        """Give back a half-open probe that ended without reaching the backend."""
+        self._probe_in_flight = False
+
+    def _update(self, latency: float, failed: bool):
+        self.samples += 1
+        self.ewma_latency = latency if self.ewma_latency is None else (
+            self.alpha * latency + (1 - self.alpha) * self.ewma_latency
+        )
+        self.ewma_error_rate = self.alpha * (1.0 if failed else 0.0) + (1 - self.alpha) * self.ewma_error_rate
+
+    def _should_open(self) -> bool:
+        if self.state != CIRCUIT_CLOSED:
+            return False
+        if self.consecutive_failures >= self.failure_threshold:
+            return True
+        # Error rate only counts once there are enough samples to be meaningful
+        return self.samples >= self.failure_threshold and self.ewma_error_rate >= self.error_rate_threshold
+
+    def _open(self):
+        self.state = CIRCUIT_OPEN
+        self.opened_at = time.monotonic()
+        self._probe_in_flight = False
+        self.times_opened += 1
+        logger.warning(
+            f"{self.name} circuit opened: {self.consecutive_failures} consecutive failures, "
+            f"error rate {self.ewma_error_rate:.2f}"
+        )
+
+    @property
+    def retry_after(self) -> int:
+        if self.state != CIRCUIT_OPEN or self.opened_at is None:
+            return 1
+        return max(1, int(self.reset_seconds - (time.monotonic() - self.opened_at)))
+
+    @property
+    def is_healthy(self) -> bool:
+        """Closed circuit with latency under the routing threshold."""
+        if self.state == CIRCUIT_OPEN and time.monotonic() - (self.opened_at or 0.0) < self.reset_seconds:
+            return False
+        if self.state != CIRCUIT_CLOSED:
+            # Due for a probe; usable, but not preferred over a healthy backend
+            return False
+        return self.ewma_latency is None or self.ewma_latency <= settings.LLM_ROUTER_LATENCY_THRESHOLD_SECONDS
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get latency, error rate and circuit statistics."""
+        return {
+            "model": self.model,
+            "circuit": self.state,
+            "ewma_latency": self.ewma_latency,
+            "ewma_error_rate": self.ewma_error_rate,
+            "consecutive_failures": self.consecutive_failures,
+            "successes": self.successes,
+            "failures": self.failures,
+            "short_circuited": self.short_circuited,
+            "times_opened": self.times_opened
+        }
+
+
+class BackendRouter:
+    """
+    Chooses which LLM backend serves text chat.
+
+    The preferred backend is used while it is healthy. When its circuit is
+    open or its EWMA latency is over the threshold, healthy alternatives are
+    tried first, ordered by EWMA latency. Unhealthy backends stay at the end
+    of the list so a request still has somewhere to go (and half-open
+    circuits get their probe).
+    """
+
+    def __init__(self, backends: Dict[str, "LLMClient"]):
+        self.backends = {name: client for name, client in backends.items() if client is not None}
+
+        # Metrics
+        self.routed: Dict[str, int] = {name: 0 for name in self.backends}
+        self.rerouted = 0
+        self.fallbacks = 0
+
+    def candidates(self, preferred: str) -> List["LLMClient"]:
+        """Get backends to try for a request, best first."""
+        if not settings.LLM_ROUTING_ENABLED or preferred not in self.backends:
+            return [self.backends[preferred]] if preferred in self.backends else list(self.backends.values())
+
+        preferred_client = self.backends[preferred]
+        others = [client for name, client in self.backends.items() if name != preferred]
+        healthy = sorted(
+            (client for client in others if client.health.is_healthy),
+            key=lambda client: client.health.ewma_latency or 0.0
+        )
+        unhealthy = [client for client in others if not client.health.is_healthy]
+
+        if preferred_client.health.is_healthy or not healthy:
+            return [preferred_client] + healthy + unhealthy
+        return healthy + [preferred_client] + unhealthy
+
+    def record_route(self, preferred: str, chosen: "LLMClient", attempt: int):
+        """Record which backend ended up serving a request."""
+        self.routed[chosen.agent_name] = self.routed.get(chosen.agent_name, 0) + 1
+        if attempt > 0:
+            self.fallbacks += 1
+        elif chosen is not self.backends.get(preferred):
+            self.rerouted += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get routing statistics and per-backend health."""
+        return {
+            "enabled": settings.LLM_ROUTING_ENABLED,
+            "routed": dict(self.routed),
+            "rerouted": self.rerouted,
+            "fallbacks": self.fallbacks,
+            "backends": {name: client.health.get_stats() for name, client in self.backends.items()}
+        }
@@ -9,24 +9,68 @@ from datetime import datetime
 import uuid
 import asyncio
 import logging
+import time
+import functools
+import inspect
 from contextlib import asynccontextmanager
 
-from ..schemas.ai_schemas import AIRequest, AIResponse, ConversationMessage
+from ..schemas.ai_schemas import (
+    AIRequest, AIResponse, ConversationMessage, VisualAnalysisRequest, VisualAnalysisResponse
+)
 from ..config.config import settings
+from ..utils.exceptions import BackendOverloadedError
+from ..utils.metrics import interaction_context, observe_agent_request, get_latency_percentiles
+from .conversation_store import ConversationStore, get_conversation_store
 
 
 logger = logging.getLogger(__name__)
 
 
+def returns_error_response(description: str):
+    """
+    Decorator for async request handlers of agents and services.
+    
+    An unexpected exception is logged and answered with
+    `self.build_error_response(request, conversation_id, description, error)`
+    so the caller still gets a response. BackendOverloadedError always
+    propagates: the API answers it with 503 and Retry-After, and backend
+    routing fails over on it.
+    """
+    def decorator(handler):
+        signature = inspect.signature(handler)
+        
+        @functools.wraps(handler)
+        async def wrapper(self, request, *args, **kwargs):
+            try:
+                return await handler(self, request, *args, **kwargs)
+            except BackendOverloadedError:
+                raise
+            except Exception as e:
+                logger.error(f"{description} failed: {e}")
+                arguments = signature.bind(self, request, *args, **kwargs).arguments
+                return self.build_error_response(request, arguments.get("conversation_id"), description, e)
+        
+        return wrapper
+    return decorator
+
+
 class BaseAgent(ABC):
     """
     Abstract base class for all AI agents.
     Provides common functionality for conversation management, error handling, and logging.
     """
     
-    def __init__(self, agent_name: str):
+    def __init__(
+        self,
+        agent_name: str,
+        conversation_store: Optional[ConversationStore] = None,
+        history_namespace: Optional[str] = None
+    ):
         self.agent_name = agent_name
-        self.conversation_history: Dict[str, List[ConversationMessage]] = {}
+        # Shared, bounded history store; conversations are namespaced by agent unless
+        # several agents serve the same conversations (see LLMClient)
+        self.conversation_store = conversation_store or get_conversation_store()
+        self.history_namespace = history_namespace or agent_name
         self.agent_id = str(uuid.uuid4())
         
         # Performance tracking
@@ -52,46 +96,58 @@ class BaseAgent(ABC):
             return request.conversation_id
         return f"{self.agent_name}_{request.user_id}_{uuid.uuid4().hex[:8]}"
     
-    def add_to_conversation(self, conversation_id: str, message: ConversationMessage):
+    async def add_to_conversation(self, conversation_id: str, message: ConversationMessage):
         """Add message to conversation history."""
         if not settings.ENABLE_CONVERSATION_CONTEXT:
             return
         
-        if conversation_id not in self.conversation_history:
-            self.conversation_history[conversation_id] = []
-        
-        self.conversation_history[conversation_id].append(message)
-        
-        # Limit conversation history
-        if len(self.conversation_history[conversation_id]) > settings.MAX_CONVERSATION_HISTORY:
-            self.conversation_history[conversation_id] = self.conversation_history[conversation_id][-settings.MAX_CONVERSATION_HISTORY:]
+        try:
+            await self.conversation_store.append(self.history_namespace, conversation_id, message)
+        except Exception as e:
+            # History is best-effort and must not fail the request
+            logger.warning(f"Failed to store conversation message for {self.agent_name}: {e}")
     
-    def get_conversation_history(self, conversation_id: str) -> List[ConversationMessage]:
+    async def get_conversation_history(
+        self, 
+        conversation_id: str, 
+        limit: Optional[int] = None
+    ) -> List[ConversationMessage]:
         """Get conversation history for a conversation ID."""
-        return self.conversation_history.get(conversation_id, [])
+        try:
+            return await self.conversation_store.get_history(self.history_namespace, conversation_id, limit)
+        except Exception as e:
+            logger.warning(f"Failed to load conversation history for {self.agent_name}: {e}")
+            return []
     
-    def clear_conversation(self, conversation_id: str):
-        """Clear conversation history for a conversation ID."""
-        if conversation_id in self.conversation_history:
-            del self.conversation_history[conversation_id]
+    async def clear_conversation(self, conversation_id: str):
+        """Clear conversation history (and its rolling summary) for a conversation ID."""
+        await self.conversation_store.clear(self.history_namespace, conversation_id)
+        await self.conversation_store.clear(f"{self.history_namespace}:summary", conversation_id)
     
     @asynccontextmanager
     async def track_request(self, request: AIRequest):
-        """Context manager for tracking request metrics."""
-        start_time = datetime.utcnow()
+        """
+        Context manager for tracking request metrics.
+        Records the request latency in the agent/model/interaction type histogram and
+        labels LLM calls made inside the block with the request's interaction type.
+        """
+        started = time.monotonic()
         self.request_count += 1
         
         try:
-            yield
+            with interaction_context(request.interaction_type):
+                yield
         finally:
-            processing_time = (datetime.utcnow() - start_time).total_seconds()
+            processing_time = time.monotonic() - started
             self.total_processing_time += processing_time
-            
-            logger.info(
-                f"Agent {self.agent_name} processed request in {processing_time:.2f}s | "
-                f"Total requests: {self.request_count} | "
-                f"Avg processing time: {self.total_processing_time / self.request_count:.2f}s"
+            observe_agent_request(
+                self.agent_name,
+                getattr(self, "model_name", None),
+                request.interaction_type,
+                processing_time
             )
+            
+            logger.debug(f"Agent {self.agent_name} processed request in {processing_time:.2f}s")
     
     async def validate_request(self, request: AIRequest) -> bool:
         """Validate incoming request."""
@@ -122,10 +178,36 @@ class BaseAgent(ABC):
             metadata={"error": True, "error_message": error_message}
         )
     
+    def build_error_response(
+        self,
+        request: AIRequest,
+        conversation_id: Optional[str],
+        description: str,
+        error: Exception
+    ) -> AIResponse:
+        """Create the error response for a failed handler (see `returns_error_response`)."""
+        conversation_id = conversation_id or self.get_conversation_id(request)
+        if isinstance(request, VisualAnalysisRequest):
+            return VisualAnalysisResponse(
+                message=f"I apologize, but I couldn't analyze the image: {str(error)}",
+                interaction_type="visual_analysis",
+                conversation_id=conversation_id,
+                confidence=0.0,
+                analysis_results={"error": str(error)},
+                metadata={"error": True, "error_message": str(error)}
+            )
+        return self.create_error_response(conversation_id, f"{description} failed: {str(error)}", request.interaction_type)
+    
     async def get_agent_stats(self) -> Dict[str, Any]:
         """Get agent statistics."""
         avg_processing_time = self.total_processing_time / self.request_count if self.request_count > 0 else 0
         
+        try:
+            active_conversations = await self.conversation_store.count_conversations(self.history_namespace)
+        except Exception as e:
+            logger.warning(f"Failed to count conversations for {self.agent_name}: {e}")
+            active_conversations = 0
+        
         return {
             "agent_name": self.agent_name,
             "agent_id": self.agent_id,
@@ -133,11 +215,11 @@ class BaseAgent(ABC):
             "total_tokens_used": self.total_tokens_used,
             "total_processing_time": self.total_processing_time,
             "average_processing_time": avg_processing_time,
-            "active_conversations": len(self.conversation_history),
+            "latency_percentiles": get_latency_percentiles(self.agent_name),
+            "active_conversations": active_conversations,
             "uptime": datetime.utcnow().isoformat(),
         }
     
     async def cleanup(self):
         """Cleanup agent resources."""
-        logger.info(f"Cleaning up agent {self.agent_name}")
-        self.conversation_history.clear()
\ No newline at end of file
+        logger.info(f"Cleaning up agent {self.agent_name}")
\ No newline at end of file
@@ -0,0 +1,160 @@
+"""
+Bulkhead concurrency limiter for AIBIN AI agents.
+Caps in-flight calls per LLM backend with a bounded, prioritized wait queue.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Optional, Tuple, AsyncIterator
+
+from ..utils.exceptions import BackendOverloadedError
+from ..utils.metrics import observe_queue_wait, count_queue_rejection
+
+
+logger = logging.getLogger(__name__)
+
+# Priority lanes; lower values are served first
+PRIORITY_HIGH = 0  # Interactive voice/multimodal turns
+PRIORITY_NORMAL = 1  # Regular chat and agent flows
+PRIORITY_LOW = 2  # Background work and health probes
+
+PRIORITY_NAMES = {PRIORITY_HIGH: "high", PRIORITY_NORMAL: "normal", PRIORITY_LOW: "low"}
+
+
+class Bulkhead:
+    """
+    Per-backend concurrency limiter.
+
+    At most `max_concurrency` calls run at once. Further callers wait in a
+    priority queue of at most `max_queue` entries; a full queue or a caller
+    waiting past its queue deadline fails fast with BackendOverloadedError
+    instead of piling up until the backend timeout. Released slots are handed
+    directly to the highest-priority waiter (FIFO within a lane).
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+
+        self._active = 0
+        self._queue: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+        # Metrics
+        self.admitted = 0
+        self.queued = 0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+        self.peak_queue_depth = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.admitted_by_priority: Dict[str, int] = {lane: 0 for lane in PRIORITY_NAMES.values()}
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, waiter in self._queue if not waiter.done())
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_NORMAL, timeout: Optional[float] = None) -> AsyncIterator[None]:
+        """Hold a concurrency slot for the duration of the block."""
+        await self.acquire(priority, timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, priority: int = PRIORITY_NORMAL, timeout: Optional[float] = None):
+        """
+        Take a concurrency slot, waiting in the priority queue if needed.
+
+        Args:
+            priority: Priority lane (PRIORITY_HIGH, PRIORITY_NORMAL or PRIORITY_LOW)
+            timeout: Queue deadline in seconds; defaults to the bulkhead's queue timeout
+
+        Raises:
+            BackendOverloadedError: If the queue is full or the deadline passes
+        """
+        if self._active < self.max_concurrency and self.queue_depth == 0:
+            self._active += 1
+            self._record_admission(priority, 0.0)
+            return
+
+        if self.queue_depth >= self.max_queue:
+            self.rejected_full += 1
+            count_queue_rejection(self.name, "queue_full")
+            logger.warning(f"{self.name} bulkhead queue full ({self.max_queue}), rejecting request")
+            raise BackendOverloadedError(
+                f"{self.name} is overloaded, please retry shortly",
+                details={"backend": self.name, "reason": "queue_full", "retry_after": 1}
+            )
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._sequence), waiter))
+        self.queued += 1
+        self.peak_queue_depth = max(self.peak_queue_depth, self.queue_depth)
+
+        deadline = self.queue_timeout if timeout is None else timeout
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(waiter, timeout=deadline)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was handed over as the deadline fired; keep it
+                self._record_admission(priority, time.monotonic() - started)
+                return
+            self.rejected_timeout += 1
+            count_queue_rejection(self.name, "queue_timeout")
+            logger.warning(f"{self.name} bulkhead queue deadline of {deadline}s exceeded")
+            raise BackendOverloadedError(
+                f"{self.name} is busy, request waited {deadline}s without a free slot",
+                details={"backend": self.name, "reason": "queue_timeout", "retry_after": max(1, int(deadline))}
+            )
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was handed to a caller that went away; pass it on
+                self.release()
+            raise
+
+        self._record_admission(priority, time.monotonic() - started)
+
+    def release(self):
+        """Release a slot, handing it to the next live waiter if there is one."""
+        while self._queue:
+            _, _, waiter = heapq.heappop(self._queue)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    def _record_admission(self, priority: int, wait_time: float):
+        lane = PRIORITY_NAMES.get(priority, str(priority))
+        self.admitted += 1
+        self.admitted_by_priority[lane] = self.admitted_by_priority.get(lane, 0) + 1
+        self.total_wait_time += wait_time
+        self.max_wait_time = max(self.max_wait_time, wait_time)
+        observe_queue_wait(self.name, lane, wait_time)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get concurrency, queue depth and wait time metrics."""
+        return {
+            "enabled": True,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+            "active": self._active,
+            "queue_depth": self.queue_depth,
+            "peak_queue_depth": self.peak_queue_depth,
+            "admitted": self.admitted,
+            "admitted_by_priority": dict(self.admitted_by_priority),
+            "queued": self.queued,
+            "rejected_full": self.rejected_full,
+            "rejected_timeout": self.rejected_timeout,
+            "avg_wait_time": self.total_wait_time / self.admitted if self.admitted else 0.0,
+            "max_wait_time": self.max_wait_time
+        }
@@ -0,0 +1,304 @@
+"""
+Context window management for AIBIN AI agents.
+Packs conversation history under a token budget and folds older turns into a rolling summary.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Set, Tuple, TYPE_CHECKING
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, AIMessage
+
+from ..schemas.ai_schemas import ConversationMessage
+from ..config.config import settings
+
+try:
+    import tiktoken
+except ImportError:  # Listed in requirements; fall back to a character heuristic without it
+    tiktoken = None
+
+if TYPE_CHECKING:
+    from .llm_client import LLMClient
+
+
+logger = logging.getLogger(__name__)
+
+# Per-message framing overhead (role markers, separators) in chat formats
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+class TokenCounter:
+    """
+    Local token counter.
+    Uses tiktoken's cl100k_base encoding. tiktoken downloads the encoding on
+    first use, so when it is missing or cannot be loaded (e.g. offline) the
+    counter estimates ~4 characters per token, which is close enough for
+    budgeting Llama-family prompts.
+    """
+
+    def __init__(self, encoding_name: str = "cl100k_base"):
+        self._encoding = None
+        if tiktoken is not None:
+            try:
+                self._encoding = tiktoken.get_encoding(encoding_name)
+            except Exception as e:
+                logger.warning(f"tiktoken encoding {encoding_name} unavailable, using heuristic: {e}")
+
+    @property
+    def exact(self) -> bool:
+        return self._encoding is not None
+
+    def count(self, text: str) -> int:
+        """Count tokens in a text."""
+        if not text:
+            return 0
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return max(1, (len(text) + 3) // 4)
+
+    def count_message(self, text: str) -> int:
+        """Count tokens for a chat message including framing overhead."""
+        return self.count(text) + MESSAGE_OVERHEAD_TOKENS
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Keep the beginning of a text within `max_tokens`."""
+        if max_tokens <= 0:
+            return ""
+        if self._encoding is not None:
+            tokens = self._encoding.encode(text, disallowed_special=())
+            if len(tokens) <= max_tokens:
+                return text
+            return self._encoding.decode(tokens[:max_tokens]) + "..."
+        max_chars = max_tokens * 4
+        return text if len(text) <= max_chars else text[:max_chars] + "..."
+
+
+_token_counter: Optional[TokenCounter] = None
+
+
+def get_token_counter() -> TokenCounter:
+    """Get the shared token counter."""
+    global _token_counter
+    if _token_counter is None:
+        _token_counter = TokenCounter()
+    return _token_counter
+
+
+def get_context_budget(interaction_type: str) -> int:
+    """Get the total prompt token budget for an interaction type."""
+    budgets = {
+        "voice_chat": settings.CONTEXT_VOICE_TOKEN_BUDGET,
+        "multimodal": settings.CONTEXT_VOICE_TOKEN_BUDGET,
+    }
+    return budgets.get(interaction_type, settings.CONTEXT_TOKEN_BUDGET)
+
+
+class ContextWindowManager:
+    """
+    Builds token-budgeted prompts for an LLM client.
+
+    The newest MAX_CONVERSATION_HISTORY turns are included verbatim while they
+    fit the budget. Older turns are represented by a rolling summary kept in
+    the conversation store under the `<history namespace>:summary` namespace.
+    The store keeps CONVERSATION_STORE_MAX_MESSAGES turns, more than the
+    window, so turns are summarized before they are evicted. When turns fall
+    out of the window that the summary does not cover yet, the summary is
+    regenerated in the background at low priority, so the request path never
+    waits for it and prompt size stays flat as the conversation grows.
+    """
+
+    def __init__(self, client: "LLMClient"):
+        self.client = client
+        self.counter = get_token_counter()
+        self.summary_namespace = f"{client.history_namespace}:summary"
+        self._summarizing: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+        # Metrics
+        self.prompts_built = 0
+        self.turns_dropped = 0
+        self.summaries_generated = 0
+        self.summary_failures = 0
+
+    async def build_messages(
+        self,
+        conversation_id: str,
+        system_prompt: str,
+        message: str,
+        interaction_type: str
+    ) -> List[BaseMessage]:
+        """
+        Build the prompt: system prompt (plus rolling summary), packed history and the current message.
+        """
+        self.prompts_built += 1
+        current = HumanMessage(content=message)
+
+        if not settings.ENABLE_CONVERSATION_CONTEXT:
+            return [SystemMessage(content=system_prompt), current]
+
+        history = await self.client.get_conversation_history(conversation_id)
+        summary = await self._get_summary(conversation_id)
+        summarized_through = self._summarized_through(summary)
+
+        # Turns the summary already covers never go into the prompt verbatim
+        unsummarized = [
+            msg for msg in history
+            if msg.role in ("user", "assistant")
+            and (summarized_through is None or msg.timestamp > summarized_through)
+        ]
+
+        system_content = system_prompt
+        if summary:
+            system_content += f"\n\nSummary of the earlier conversation:\n{summary.content}"
+
+        budget = get_context_budget(interaction_type)
+        remaining = budget - self.counter.count_message(system_content) - self.counter.count_message(message)
+
+        # Only the newest turns are candidates for the prompt; older ones go to the summary
+        window_start = max(0, len(unsummarized) - settings.MAX_CONVERSATION_HISTORY)
+        packed, overflow = self._pack(unsummarized[window_start:], remaining)
+        overflow = unsummarized[:window_start] + overflow
+        if overflow:
+            self.turns_dropped += len(overflow)
+            self._schedule_summary(conversation_id, summary, overflow)
+
+        messages: List[BaseMessage] = [SystemMessage(content=system_content)]
+        for msg in packed:
+            if msg.role == "user":
+                messages.append(HumanMessage(content=msg.content))
+            else:
+                messages.append(AIMessage(content=msg.content))
+        messages.append(current)
+        return messages
+
+    def _pack(
+        self,
+        history: List[ConversationMessage],
+        budget: int
+    ) -> Tuple[List[ConversationMessage], List[ConversationMessage]]:
+        """Fit the newest messages into the budget; return (packed oldest-first, overflow oldest-first)."""
+        packed: List[ConversationMessage] = []
+        used = 0
+
+        for index in range(len(history) - 1, -1, -1):
+            msg = history[index]
+            cost = self.counter.count_message(msg.content)
+            if used + cost <= budget:
+                packed.append(msg)
+                used += cost
+                continue
+
+            # The newest turn is kept truncated if it alone exceeds the budget;
+            # its full text still goes to the summary with the older turns
+            if not packed and budget > MESSAGE_OVERHEAD_TOKENS:
+                packed.append(msg.model_copy(update={
+                    "content": self.counter.truncate(msg.content, budget - MESSAGE_OVERHEAD_TOKENS)
+                }))
+            return list(reversed(packed)), history[:index + 1]
+
+        return list(reversed(packed)), []
+
+    async def _get_summary(self, conversation_id: str) -> Optional[ConversationMessage]:
+        try:
+            summaries = await self.client.conversation_store.get_history(
+                self.summary_namespace, conversation_id, limit=1
+            )
+        except Exception as e:
+            logger.warning(f"Failed to load conversation summary for {self.client.agent_name}: {e}")
+            return None
+        return summaries[-1] if summaries else None
+
+    @staticmethod
+    def _summarized_through(summary: Optional[ConversationMessage]) -> Optional[datetime]:
+        if not summary or not summary.metadata or not summary.metadata.get("summarized_through"):
+            return None
+        try:
+            return datetime.fromisoformat(summary.metadata["summarized_through"])
+        except (TypeError, ValueError):
+            return None
+
+    def _schedule_summary(
+        self,
+        conversation_id: str,
+        summary: Optional[ConversationMessage],
+        overflow: List[ConversationMessage]
+    ):
+        """Fold overflow turns into the summary off the request path (one job per conversation)."""
+        if not settings.CONTEXT_SUMMARY_ENABLED or conversation_id in self._summarizing:
+            return
+
+        self._summarizing.add(conversation_id)
+        task = asyncio.create_task(self._refresh_summary(conversation_id, summary, overflow))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refresh_summary(
+        self,
+        conversation_id: str,
+        summary: Optional[ConversationMessage],
+        overflow: List[ConversationMessage]
+    ):
+        from .bulkhead import PRIORITY_LOW
+
+        try:
+            transcript = "\n".join(f"{msg.role}: {msg.content}" for msg in overflow)
+            transcript = self.counter.truncate(transcript, settings.CONTEXT_SUMMARY_INPUT_TOKENS)
+            previous = summary.content if summary else "(none)"
+
+            prompt = f"""Update the running summary of a shopping assistant conversation.
+
+Previous summary:
+{previous}
+
+New turns to fold in:
+{transcript}
+
+Write an updated summary in at most {settings.CONTEXT_SUMMARY_MAX_TOKENS} tokens. Keep user preferences, budgets, Projects and locations mentioned, and open questions. Do not add anything that was not said."""
+
+            response = await self.client.invoke_llm(
+                [
+                    SystemMessage(content="You summarize conversations concisely and factually."),
+                    HumanMessage(content=prompt)
+                ],
+                priority=PRIORITY_LOW
+            )
+            content = response.content if isinstance(response.content, str) else str(response.content)
+
+            await self.client.conversation_store.append(
+                self.summary_namespace,
+                conversation_id,
+                ConversationMessage(
+                    role="system",
+                    content=self.counter.truncate(content.strip(), settings.CONTEXT_SUMMARY_MAX_TOKENS),
+                    metadata={
+                        "summarized_through": overflow[-1].timestamp.isoformat(),
+                        "summarized_messages": len(overflow) + (
+                            (summary.metadata or {}).get("summarized_messages", 0) if summary else 0
+                        )
+                    }
+                )
+            )
+            self.summaries_generated += 1
+        except Exception as e:
+            self.summary_failures += 1
+            logger.warning(f"Conversation summary refresh failed for {self.client.agent_name}: {e}")
+        finally:
+            self._summarizing.discard(conversation_id)
+
+    async def close(self):
+        """Cancel pending summary jobs."""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get context window statistics."""
+        return {
+            "exact_token_counts": self.counter.exact,
+            "prompts_built": self.prompts_built,
+            "turns_dropped": self.turns_dropped,
+            "summaries_generated": self.summaries_generated,
+            "summary_failures": self.summary_failures,
+            "pending_summaries": len(self._summarizing)
+        }
@@ -0,0 +1,408 @@
+"""
+Conversation store for AIBIN AI agents.
+Provides pluggable, bounded storage for agent conversation history.
+"""
+
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, List, Set, Tuple, Deque
+
+from ..schemas.ai_schemas import ConversationMessage
+from ..config.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+# Approximate per-message bookkeeping overhead used for the memory cap
+MESSAGE_OVERHEAD_BYTES = 200
+
+
+class ConversationStore(ABC):
+    """
+    Abstract conversation store.
+    History is keyed by (namespace, conversation_id). The namespace is the agent's
+    history namespace: the LLM clients share "llm_chat", other agents use their
+    own name, and rolling summaries are stored under "<namespace>:summary".
+    """
+
+    def __init__(self, max_messages: Optional[int] = None, ttl_seconds: Optional[int] = None):
+        # Keep more than the prompt window so turns leaving it can still be summarized
+        self.max_messages = max_messages or max(settings.CONVERSATION_STORE_MAX_MESSAGES, settings.MAX_CONVERSATION_HISTORY)
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.CONVERSATION_TTL_SECONDS
+
+    @abstractmethod
+    async def append(self, namespace: str, conversation_id: str, message: ConversationMessage):
+        """Append a message to a conversation."""
+        pass
+
+    @abstractmethod
+    async def get_history(
+        self,
+        namespace: str,
+        conversation_id: str,
+        limit: Optional[int] = None
+    ) -> List[ConversationMessage]:
+        """Get conversation history, oldest first, optionally limited to the last N messages."""
+        pass
+
+    @abstractmethod
+    async def clear(self, namespace: Optional[str], conversation_id: str):
+        """Clear a conversation in one namespace, or in every namespace when namespace is None."""
+        pass
+
+    @abstractmethod
+    async def count_conversations(self, namespace: Optional[str] = None) -> int:
+        """Count stored conversations."""
+        pass
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """Get store statistics."""
+        return {
+            "backend": self.__class__.__name__,
+            "max_messages": self.max_messages,
+            "ttl_seconds": self.ttl_seconds,
+            "conversations": await self.count_conversations()
+        }
+
+    async def close(self):
+        """Release store resources."""
+        pass
+
+
+class _ConversationBuffer:
+    """Ring buffer of messages for a single conversation."""
+
+    __slots__ = ("messages", "size_bytes", "last_access")
+
+    def __init__(self, max_messages: int):
+        self.messages: Deque[Tuple[ConversationMessage, int]] = deque(maxlen=max_messages)
+        self.size_bytes = 0
+        self.last_access = time.monotonic()
+
+
+class InMemoryConversationStore(ConversationStore):
+    """
+    In-process conversation store.
+    Each conversation is a fixed-size ring buffer; conversations are evicted
+    by TTL and in LRU order when the conversation count or memory cap is exceeded.
+    """
+
+    def __init__(
+        self,
+        max_messages: Optional[int] = None,
+        ttl_seconds: Optional[int] = None,
+        max_conversations: Optional[int] = None,
+        max_bytes: Optional[int] = None
+    ):
+        super().__init__(max_messages, ttl_seconds)
+        self.max_conversations = max_conversations or settings.CONVERSATION_STORE_MAX_CONVERSATIONS
+        self.max_bytes = max_bytes or settings.CONVERSATION_STORE_MAX_BYTES
+
+        self._conversations: "OrderedDict[Tuple[str, str], _ConversationBuffer]" = OrderedDict()
+        self._namespaces: Dict[str, Set[str]] = {}
+        self._total_bytes = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _message_size(message: ConversationMessage) -> int:
+        return len(message.content) + MESSAGE_OVERHEAD_BYTES
+
+    def _is_expired(self, buffer: _ConversationBuffer, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - buffer.last_access > self.ttl_seconds
+
+    def _remove(self, key: Tuple[str, str]):
+        buffer = self._conversations.pop(key, None)
+        if buffer is None:
+            return
+
+        self._total_bytes -= buffer.size_bytes
+        namespace, conversation_id = key
+        namespaces = self._namespaces.get(conversation_id)
+        if namespaces is not None:
+            namespaces.discard(namespace)
+            if not namespaces:
+                del self._namespaces[conversation_id]
+
+    def _get_buffer(self, key: Tuple[str, str]) -> Optional[_ConversationBuffer]:
+        buffer = self._conversations.get(key)
+        if buffer is None:
+            return None
+
+        now = time.monotonic()
+        if self._is_expired(buffer, now):
+            self._remove(key)
+            return None
+
+        buffer.last_access = now
+        self._conversations.move_to_end(key)
+        return buffer
+
+    def _evict(self):
+        """Evict expired conversations, then least recently used ones until within limits."""
+        now = time.monotonic()
+
+        # The LRU end holds the oldest access times, so expired entries are at the front
+        while self._conversations:
+            key, buffer = next(iter(self._conversations.items()))
+            if not self._is_expired(buffer, now):
+                break
+            self._remove(key)
+            self.evictions += 1
+
+        while self._conversations and (
+            len(self._conversations) > self.max_conversations or self._total_bytes > self.max_bytes
+        ):
+            key = next(iter(self._conversations))
+            self._remove(key)
+            self.evictions += 1
+
+    async def append(self, namespace: str, conversation_id: str, message: ConversationMessage):
+        key = (namespace, conversation_id)
+        buffer = self._get_buffer(key)
+        if buffer is None:
+            buffer = _ConversationBuffer(self.max_messages)
+            self._conversations[key] = buffer
+            self._namespaces.setdefault(conversation_id, set()).add(namespace)
+
+        # A full ring buffer drops its oldest message on append
+        if len(buffer.messages) == buffer.messages.maxlen:
+            _, dropped_size = buffer.messages[0]
+            buffer.size_bytes -= dropped_size
+            self._total_bytes -= dropped_size
+
+        size = self._message_size(message)
+        buffer.messages.append((message, size))
+        buffer.size_bytes += size
+        self._total_bytes += size
+
+        self._evict()
+
+    async def get_history(
+        self,
+        namespace: str,
+        conversation_id: str,
+        limit: Optional[int] = None
+    ) -> List[ConversationMessage]:
+        buffer = self._get_buffer((namespace, conversation_id))
+        if buffer is None:
+            return []
+
+        messages = [message for message, _ in buffer.messages]
+        if limit is not None:
+            return messages[-limit:] if limit > 0 else []
+        return messages
+
+    async def clear(self, namespace: Optional[str], conversation_id: str):
+        if namespace is not None:
+            self._remove((namespace, conversation_id))
+            return
+
+        for stored_namespace in list(self._namespaces.get(conversation_id, ())):
+            self._remove((stored_namespace, conversation_id))
+
+    async def count_conversations(self, namespace: Optional[str] = None) -> int:
+        if namespace is None:
+            return len(self._conversations)
+        return sum(1 for stored_namespace, _ in self._conversations if stored_namespace == namespace)
+
+    async def get_stats(self) -> Dict[str, Any]:
+        stats = await super().get_stats()
+        stats.update({
+            "max_conversations": self.max_conversations,
+            "total_bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions
+        })
+        return stats
+
+    async def close(self):
+        self._conversations.clear()
+        self._namespaces.clear()
+        self._total_bytes = 0
+
+
+class PostgresConversationStore(ConversationStore):
+    """
+    PostgreSQL-backed conversation store.
+    History survives restarts and is shared by all uvicorn workers.
+    """
+
+    # Minimum seconds between opportunistic TTL sweeps
+    PRUNE_INTERVAL_SECONDS = 300
+
+    def __init__(self, max_messages: Optional[int] = None, ttl_seconds: Optional[int] = None):
+        super().__init__(max_messages, ttl_seconds)
+
+        # Imported lazily so the in-memory backend never touches the database engine
+        from ..db.database import SessionLocal
+        self._session_factory = SessionLocal
+        self._last_prune = 0.0
+
+    def _cutoff(self) -> Optional[datetime]:
+        if self.ttl_seconds <= 0:
+            return None
+        return datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+
+    async def append(self, namespace: str, conversation_id: str, message: ConversationMessage):
+        from sqlalchemy import select, delete
+        from ..models.conversation_message import ConversationMessageRecord
+
+        async with self._session_factory() as db:
+            db.add(ConversationMessageRecord(
+                namespace=namespace,
+                conversation_id=conversation_id,
+                role=message.role,
+                content=message.content,
+                message_metadata=message.metadata,
+                created_at=message.timestamp
+            ))
+            await db.flush()
+
+            # Keep only the newest max_messages for this conversation
+            keep_ids = (
+                select(ConversationMessageRecord.id)
+                .where(
+                    ConversationMessageRecord.namespace == namespace,
+                    ConversationMessageRecord.conversation_id == conversation_id
+                )
+                .order_by(ConversationMessageRecord.created_at.desc())
+                .limit(self.max_messages)
+            )
+            await db.execute(
+                delete(ConversationMessageRecord)
+                .where(
+                    ConversationMessageRecord.namespace == namespace,
+                    ConversationMessageRecord.conversation_id == conversation_id,
+                    ConversationMessageRecord.id.not_in(keep_ids)
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+
+        if time.monotonic() - self._last_prune > self.PRUNE_INTERVAL_SECONDS:
+            await self.prune_expired()
+
+    async def get_history(
+        self,
+        namespace: str,
+        conversation_id: str,
+        limit: Optional[int] = None
+    ) -> List[ConversationMessage]:
+        from sqlalchemy import select
+        from ..models.conversation_message import ConversationMessageRecord
+
+        if limit is not None and limit <= 0:
+            return []
+
+        query = (
+            select(ConversationMessageRecord)
+            .where(
+                ConversationMessageRecord.namespace == namespace,
+                ConversationMessageRecord.conversation_id == conversation_id
+            )
+            .order_by(ConversationMessageRecord.created_at.desc())
+            .limit(min(limit, self.max_messages) if limit is not None else self.max_messages)
+        )
+        cutoff = self._cutoff()
+        if cutoff is not None:
+            query = query.where(ConversationMessageRecord.created_at >= cutoff)
+
+        async with self._session_factory() as db:
+            result = await db.execute(query)
+            records = result.scalars().all()
+
+        return [
+            ConversationMessage(
+                role=record.role,
+                content=record.content,
+                timestamp=record.created_at,
+                metadata=record.message_metadata
+            )
+            for record in reversed(records)
+        ]
+
+    async def clear(self, namespace: Optional[str], conversation_id: str):
+        from sqlalchemy import delete
+        from ..models.conversation_message import ConversationMessageRecord
+
+        statement = delete(ConversationMessageRecord).where(
+            ConversationMessageRecord.conversation_id == conversation_id
+        )
+        if namespace is not None:
+            statement = statement.where(ConversationMessageRecord.namespace == namespace)
+
+        async with self._session_factory() as db:
+            await db.execute(statement)
+            await db.commit()
+
+    async def count_conversations(self, namespace: Optional[str] = None) -> int:
+        from sqlalchemy import select, func, distinct
+        from ..models.conversation_message import ConversationMessageRecord
+
+        query = select(func.count(distinct(ConversationMessageRecord.conversation_id)))
+        if namespace is not None:
+            query = query.where(ConversationMessageRecord.namespace == namespace)
+        cutoff = self._cutoff()
+        if cutoff is not None:
+            query = query.where(ConversationMessageRecord.created_at >= cutoff)
+
+        async with self._session_factory() as db:
+            result = await db.execute(query)
+            return result.scalar() or 0
+
+    async def prune_expired(self) -> int:
+        """Delete messages older than the TTL."""
+        from sqlalchemy import delete
+        from ..models.conversation_message import ConversationMessageRecord
+
+        self._last_prune = time.monotonic()
+        cutoff = self._cutoff()
+        if cutoff is None:
+            return 0
+
+        try:
+            async with self._session_factory() as db:
+                result = await db.execute(
+                    delete(ConversationMessageRecord).where(ConversationMessageRecord.created_at < cutoff)
+                )
+                await db.commit()
+                return result.rowcount or 0
+        except Exception as e:
+            logger.warning(f"Conversation store prune failed: {e}")
+            return 0
+
+
+def create_conversation_store(backend: Optional[str] = None) -> ConversationStore:
+    """Create a conversation store for the configured backend."""
+    backend = (backend or settings.CONVERSATION_STORE_BACKEND).lower()
+
+    if backend == "memory":
+        return InMemoryConversationStore()
+    if backend == "postgres":
+        return PostgresConversationStore()
+
+    raise ValueError(f"Unknown conversation store backend: {backend}. Must be one of: memory, postgres")
+
+
+_store: Optional[ConversationStore] = None
+
+
+def get_conversation_store() -> ConversationStore:
+    """Get the process-wide conversation store."""
+    global _store
+    if _store is None:
+        _store = create_conversation_store()
+        logger.info(f"Conversation store initialized: {_store.__class__.__name__}")
+    return _store
+
+
+async def close_conversation_store():
+    """Close and drop the process-wide conversation store."""
+    global _store
+    if _store is not None:
+        await _store.close()
+        _store = None
@@ -0,0 +1,491 @@
+"""
+Product embedding index for AIBIN AI agents.
+Local CPU embeddings in a memory-mapped matrix with top-k cosine search.
+"""
+
+import asyncio
+import logging
+import math
+import re
+import tempfile
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, List, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from ..models.product import Product
+from ..config.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+# Long descriptions add little signal beyond their opening and cost embedding time
+MAX_DESCRIPTION_CHARS = 2000
+
+
+class Embedder(ABC):
+    """
+    Local text embedder.
+
+    Implementations return one L2-normalized float32 row per text. Embedders
+    whose dimensions are term weights (e.g. hashed TF) set `weight_by_idf`
+    so the index applies inverse document frequencies to queries.
+    """
+
+    name: str = "embedder"
+    weight_by_idf: bool = False
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts into a (len(texts), dim) float32 matrix."""
+
+
+class HashedTfidfEmbedder(Embedder):
+    """
+    Hashed term-frequency embedder (the "hashing trick").
+
+    Word unigrams and bigrams are hashed into `dim` signed buckets with
+    sublinear TF weighting. No vocabulary is stored, so new products never
+    require refitting; IDF weighting is applied at query time by the index.
+    """
+
+    name = "hashed_tfidf"
+    weight_by_idf = True
+
+    def __init__(self, dim: int = 512, use_bigrams: bool = True):
+        super().__init__(dim)
+        self.use_bigrams = use_bigrams
+
+    def _features(self, text: str) -> Counter:
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        features = Counter(tokens)
+        if self.use_bigrams:
+            features.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+        return features
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, count in self._features(text).items():
+                h = zlib.crc32(feature.encode("utf-8"))
+                sign = 1.0 if h & 0x80000000 else -1.0
+                vectors[row, h % self.dim] += sign * (1.0 + math.log(count))
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+
+EMBEDDERS = {
+    "hashed_tfidf": HashedTfidfEmbedder,
+}
+
+
+def create_embedder(backend: Optional[str] = None, dim: Optional[int] = None) -> Embedder:
+    """Create the configured embedder."""
+    backend = backend or settings.EMBEDDING_BACKEND
+    if backend not in EMBEDDERS:
+        raise ValueError(f"Unknown embedding backend '{backend}'. Available: {', '.join(EMBEDDERS)}")
+    return EMBEDDERS[backend](dim=dim or settings.EMBEDDING_DIM)
+
+
+def product_text(product: Product) -> str:
+    """Text embedded for a product; the name is repeated to weight it above the description."""
+    parts = [product.name or "", product.name or "", product.short_description or ""]
+    if product.description:
+        parts.append(product.description[:MAX_DESCRIPTION_CHARS])
+    return " ".join(parts)
+
+
+class EmbeddingIndex:
+    """
+    Process-wide semantic index over product text.
+
+    Vectors live in a float32 matrix backed by a memory-mapped temporary file,
+    so a large catalog is held in the page cache rather than on the Python
+    heap. Rows are updated in place when a product changes and recycled when
+    one is deleted. Search is a brute-force matrix-vector product (BLAS) over
+    all rows; when IVF is enabled and the catalog is large enough, rows are
+    partitioned around k-means centroids and only the closest partitions are
+    scanned.
+
+    Each worker keeps its own index. Product writes update the local index
+    immediately and a background sync picks up changes made by other workers.
+    Search results are re-read from the database, so a row that is briefly
+    stale never surfaces a deleted or inactive product.
+    """
+
+    def __init__(
+        self,
+        embedder: Optional[Embedder] = None,
+        directory: Optional[str] = None,
+        initial_capacity: int = 1024
+    ):
+        self.embedder = embedder or create_embedder()
+        self.dim = self.embedder.dim
+        self.directory = directory or settings.EMBEDDING_INDEX_DIR or None
+
+        self._file = None
+        self._capacity = 0
+        self._vectors: Optional[np.memmap] = None
+        self._allocate(initial_capacity)
+
+        self._ids: List[Optional[UUID]] = []
+        self._rows: Dict[UUID, int] = {}
+        self._free: List[int] = []
+        self._doc_freq = np.zeros(self.dim, dtype=np.float64)
+
+        # IVF partitioning
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments = np.full(self._capacity, -1, dtype=np.int32)
+        self._trained_size = 0
+
+        # Sync watermark: newest updated_at synced, and the updated_at each product was indexed at
+        self._watermark: Optional[datetime] = None
+        self._versions: Dict[UUID, datetime] = {}
+        self._training = False
+        self._changed_during_training: set = set()
+        self._synced = False
+        self._sync_lock = asyncio.Lock()
+
+        # Metrics
+        self.searches = 0
+        self.ivf_searches = 0
+        self.upserts = 0
+        self.removals = 0
+        self.syncs = 0
+        self.last_search_time: Optional[float] = None
+
+    # Storage
+
+    def _allocate(self, capacity: int):
+        """Create (or grow into) a memory-mapped matrix with room for `capacity` rows."""
+        new_file = tempfile.NamedTemporaryFile(prefix="product_embeddings_", suffix=".f32", dir=self.directory)
+        new_vectors = np.memmap(new_file, dtype=np.float32, mode="w+", shape=(capacity, self.dim))
+        if self._vectors is not None:
+            new_vectors[:self._capacity] = self._vectors
+            del self._vectors
+            self._file.close()
+        self._file = new_file
+        self._vectors = new_vectors
+        self._capacity = capacity
+
+    def _ensure_capacity(self, rows: int):
+        if rows <= self._capacity:
+            return
+        capacity = self._capacity
+        while capacity < rows:
+            capacity *= 2
+        self._allocate(capacity)
+        assignments = np.full(capacity, -1, dtype=np.int32)
+        assignments[:len(self._assignments)] = self._assignments
+        self._assignments = assignments
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def ready(self) -> bool:
+        """True once the initial sync has completed."""
+        return self._synced
+
+    # Updates
+
+    def upsert_vectors(self, product_ids: List[UUID], vectors: np.ndarray):
+        """Insert or replace pre-computed vectors."""
+        for product_id, vector in zip(product_ids, vectors):
+            row = self._rows.get(product_id)
+            if row is not None:
+                self._doc_freq -= self._vectors[row] != 0
+            elif self._free:
+                row = self._free.pop()
+            else:
+                row = len(self._ids)
+                self._ensure_capacity(row + 1)
+                self._ids.append(None)
+
+            self._vectors[row] = vector
+            self._doc_freq += vector != 0
+            self._ids[row] = product_id
+            self._rows[product_id] = row
+            if self._centroids is not None:
+                self._assignments[row] = int(np.argmax(self._centroids @ vector))
+            if self._training:
+                self._changed_during_training.add(row)
+            self.upserts += 1
+
+    def upsert_product(self, product: Product):
+        """Embed and index one product (or drop it when it is deleted)."""
+        if product.is_deleted:
+            self.remove(product.id)
+            return
+        self.upsert_vectors([product.id], self.embedder.embed([product_text(product)]))
+        self._versions[product.id] = product.updated_at
+
+    def remove(self, product_id: UUID):
+        """Remove a product from the index; its row is reused by the next insert."""
+        row = self._rows.pop(product_id, None)
+        if row is None:
+            return
+        self._doc_freq -= self._vectors[row] != 0
+        self._vectors[row] = 0.0
+        self._ids[row] = None
+        self._assignments[row] = -1
+        self._versions.pop(product_id, None)
+        self._free.append(row)
+        if self._training:
+            self._changed_during_training.add(row)
+        self.removals += 1
+
+    # Search
+
+    def _query_vector(self, query: str) -> Optional[np.ndarray]:
+        vector = self.embedder.embed([query])[0]
+        if self.embedder.weight_by_idf:
+            vector = vector * (np.log((1.0 + len(self._rows)) / (1.0 + self._doc_freq)) + 1.0).astype(np.float32)
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return None
+        return vector / norm
+
+    def search(
+        self,
+        query: str,
+        k: int = 10,
+        min_similarity: Optional[float] = None
+    ) -> List[Tuple[UUID, float]]:
+        """
+        Find the products most similar to a query.
+
+        Returns:
+            (product_id, cosine similarity) pairs, best first
+        """
+        if not self._rows or k <= 0:
+            return []
+        vector = self._query_vector(query)
+        if vector is None:
+            return []
+
+        started = time.perf_counter()
+        size = len(self._ids)
+        rows = None
+        if self._centroids is not None:
+            probes = min(settings.EMBEDDING_IVF_PROBES, len(self._centroids))
+            nearest = np.argpartition(-(self._centroids @ vector), probes - 1)[:probes]
+            rows = np.flatnonzero(np.isin(self._assignments[:size], nearest))
+            scores = self._vectors[rows] @ vector
+            self.ivf_searches += 1
+        else:
+            scores = self._vectors[:size] @ vector
+
+        k = min(k, len(scores))
+        if k == 0:
+            return []
+        best = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        best = best[np.argsort(-scores[best], kind="stable")]
+
+        threshold = settings.EMBEDDING_MIN_SIMILARITY if min_similarity is None else min_similarity
+        results = []
+        for index in best:
+            score = float(scores[index])
+            if score < threshold:
+                break
+            product_id = self._ids[rows[index] if rows is not None else index]
+            if product_id is not None:
+                results.append((product_id, score))
+
+        self.searches += 1
+        self.last_search_time = time.perf_counter() - started
+        return results
+
+    # IVF
+
+    def _needs_training(self) -> bool:
+        """Whether partitions should be (re)trained: the catalog reached the threshold or doubled since the last training."""
+        if not settings.EMBEDDING_IVF_ENABLED or len(self._rows) < settings.EMBEDDING_IVF_MIN_ROWS:
+            return False
+        return self._centroids is None or len(self._rows) >= 2 * self._trained_size
+
+    async def _train_ivf(self):
+        """
+        Retrain partitions in a worker thread.
+
+        Rows inserted, replaced or removed while k-means runs are reassigned
+        against the new centroids once it finishes.
+        """
+        live = np.array(sorted(self._rows.values()), dtype=np.int64)
+        self._training = True
+        self._changed_during_training = set()
+        try:
+            centroids, assignments = await asyncio.to_thread(self._fit_partitions, self._vectors, live)
+        finally:
+            self._training = False
+
+        self._centroids = centroids
+        self._assignments[:] = -1
+        self._assignments[:len(assignments)] = assignments
+        for row in self._changed_during_training:
+            self._assignments[row] = (
+                int(np.argmax(centroids @ self._vectors[row])) if self._ids[row] is not None else -1
+            )
+        self._changed_during_training = set()
+        self._trained_size = len(live)
+        logger.info(f"Embedding index IVF trained: {len(centroids)} lists over {len(live)} products")
+
+    @staticmethod
+    def _fit_partitions(
+        vectors: np.ndarray,
+        live: np.ndarray,
+        iterations: int = 10,
+        sample_size: int = 20000
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Spherical k-means on a sample of the live rows; returns centroids and each row's nearest centroid."""
+        lists = settings.EMBEDDING_IVF_LISTS or max(1, int(math.sqrt(len(live))))
+        rng = np.random.default_rng(0)
+
+        sample = vectors[rng.choice(live, size=min(sample_size, len(live)), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=min(lists, len(sample)), replace=False)].copy()
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(len(centroids)):
+                members = sample[labels == c]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    norm = np.linalg.norm(centroid)
+                    if norm > 0:
+                        centroids[c] = centroid / norm
+
+        assignments = np.full(int(live.max()) + 1 if len(live) else 0, -1, dtype=np.int32)
+        for start in range(0, len(live), 10000):
+            chunk = live[start:start + 10000]
+            assignments[chunk] = np.argmax(vectors[chunk] @ centroids.T, axis=1)
+        return centroids, assignments
+
+    # Sync
+
+    async def sync(self, batch_size: Optional[int] = None) -> int:
+        """
+        Index products created, updated or soft-deleted since the last sync.
+
+        `updated_at` is not a commit sequence: a transaction can commit after
+        a later one with an older timestamp. Each sync therefore re-scans
+        EMBEDDING_SYNC_OVERLAP_SECONDS behind the watermark and skips products
+        already indexed at their current `updated_at`.
+
+        Returns:
+            Number of products processed
+        """
+        from sqlalchemy import select, tuple_
+        from ..db.database import SessionLocal
+
+        batch_size = batch_size or settings.EMBEDDING_SYNC_BATCH_SIZE
+        processed = 0
+
+        async with self._sync_lock:
+            since = None
+            if self._watermark is not None:
+                since = self._watermark - timedelta(seconds=settings.EMBEDDING_SYNC_OVERLAP_SECONDS)
+
+            async with SessionLocal() as db:
+                cursor: Optional[Tuple[datetime, UUID]] = None
+                while True:
+                    query = select(Product).order_by(Product.updated_at.asc(), Product.id.asc()).limit(batch_size)
+                    if cursor is not None:
+                        query = query.where(tuple_(Product.updated_at, Product.id) > tuple_(*cursor))
+                    elif since is not None:
+                        query = query.where(Product.updated_at >= since)
+                    result = await db.execute(query)
+                    Projects = list(result.scalars().all())
+                    if not Projects:
+                        break
+                    cursor = (Projects[-1].updated_at, Projects[-1].id)
+
+                    changed = [product for product in Projects if self._versions.get(product.id) != product.updated_at]
+                    live = [product for product in changed if not product.is_deleted]
+                    for product in changed:
+                        if product.is_deleted:
+                            self.remove(product.id)
+
+                    if live:
+                        # Embedding is CPU-bound; keep it off the event loop
+                        vectors = await asyncio.to_thread(
+                            self.embedder.embed, [product_text(product) for product in live]
+                        )
+                        self.upsert_vectors([product.id for product in live], vectors)
+                        for product in live:
+                            self._versions[product.id] = product.updated_at
+
+                    if self._watermark is None or cursor[0] > self._watermark:
+                        self._watermark = cursor[0]
+                    processed += len(changed)
+                    if len(Projects) < batch_size:
+                        break
+
+            if self._needs_training():
+                await self._train_ivf()
+
+            self._synced = True
+            self.syncs += 1
+
+        if processed:
+            logger.info(f"Embedding index synced {processed} Projects ({len(self._rows)} indexed)")
+        return processed
+
+    async def run(self, interval_seconds: Optional[int] = None):
+        """Sync forever, once per interval."""
+        interval = interval_seconds or settings.EMBEDDING_SYNC_INTERVAL_SECONDS
+        while True:
+            try:
+                await self.sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Embedding index sync failed: {e}")
+
+            await asyncio.sleep(interval)
+
+    def close(self):
+        """Release the memory-mapped file."""
+        if self._vectors is not None:
+            del self._vectors
+            self._vectors = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index statistics."""
+        return {
+            "embedder": self.embedder.name,
+            "dim": self.dim,
+            "indexed": len(self._rows),
+            "capacity": self._capacity,
+            "ready": self._synced,
+            "ivf_lists": len(self._centroids) if self._centroids is not None else 0,
+            "searches": self.searches,
+            "ivf_searches": self.ivf_searches,
+            "upserts": self.upserts,
+            "removals": self.removals,
+            "syncs": self.syncs,
+            "last_search_time": self.last_search_time
+        }
+
+
+_embedding_index: Optional[EmbeddingIndex] = None
+
+
+def get_embedding_index() -> EmbeddingIndex:
+    """Get the process-wide product embedding index."""
+    global _embedding_index
+    if _embedding_index is None:
+        _embedding_index = EmbeddingIndex()
+    return _embedding_index
@@ -0,0 +1,286 @@
+"""
+Fast-path intent router for AIBIN AI agents.
+Answers trivial and structured queries deterministically, without an LLM call.
+"""
+
+import re
+import uuid
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Tuple
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..schemas.ai_schemas import AIRequest, AIResponse
+from ..models.product import Product, Projectstatus
+from ..services.product_service import Projectservice
+
+
+logger = logging.getLogger(__name__)
+
+# Interaction types the fast path may answer; voice and multimodal keep their own styling
+FAST_PATH_INTERACTION_TYPES = {"general_chat", "product_search", "product_details"}
+
+GREETING_PATTERN = re.compile(
+    r"^\s*(hi|hello|hey|hiya|good\s+(morning|afternoon|evening)|greetings)( there)?\s*[!.?]*\s*$",
+    re.IGNORECASE
+)
+THANKS_PATTERN = re.compile(r"^\s*(thanks|thank\s+you|thx|cheers)( (so|very) much)?\s*[!.]*\s*$", re.IGNORECASE)
+GOODBYE_PATTERN = re.compile(r"^\s*(bye|goodbye|see\s+you|see\s+ya)( later)?\s*[!.]*\s*$", re.IGNORECASE)
+UUID_PATTERN = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", re.IGNORECASE)
+
+# Groups: currency symbol, amount, thousands suffix, currency word
+PRICE = r"([$€£])?\s*(\d+(?:[.,]\d+)?)\s*(k\b)?\s*(dollars?\b|usd\b|bucks\b|euros?\b)?"
+PRICE_BETWEEN_PATTERN = re.compile(rf"\bbetween\s+{PRICE}\s+(?:and|to|-)\s+{PRICE}", re.IGNORECASE)
+PRICE_MAX_PATTERN = re.compile(rf"\b(?:under|below|less\s+than|cheaper\s+than|up\s+to|max(?:imum)?)\s+{PRICE}", re.IGNORECASE)
+PRICE_MIN_PATTERN = re.compile(rf"\b(?:over|above|more\s+than|at\s+least|min(?:imum)?)\s+{PRICE}", re.IGNORECASE)
+
+# A bare number ("under 5 minutes") is only a price next to a currency marker or one of these
+PRICE_KEYWORD_PATTERN = re.compile(r"\b(?:pric(?:e[ds]?|ing)|cost(?:s|ing)?|budget|cheap(?:er|est)?)\b", re.IGNORECASE)
+
+# Questions and policy phrasing need an actual answer, not a product list
+QUESTION_PATTERN = re.compile(
+    r"\?\s*$|^\s*(?:what|which|who|why|how|is|are|does|do|did|where|when|will|would|should|could)\b",
+    re.IGNORECASE
+)
+POLICY_PATTERN = re.compile(
+    r"\b(?:fees?|returns?|refunds?|polic(?:y|ies)|shipping|delivery|warrant(?:y|ies)|exchanges?|tax(?:es)?)\b",
+    re.IGNORECASE
+)
+
+# Filler words stripped from a structured search to leave the product terms
+SEARCH_FILLER = {
+    "show", "me", "find", "search", "for", "look", "looking", "i", "want", "need", "some", "any",
+    "please", "can", "you", "get", "list", "all", "the", "a", "an", "with", "price", "priced",
+    "cost", "costing", "that", "are", "is", "of", "in", "items", "products", "projects", "dollars", "usd",
+    "budget", "prices", "pricing", "costs", "cheap", "cheaper", "cheapest", "bucks", "euros", "euro", "dollar"
+}
+
+# Keyword table for frequent navigation questions: (keywords, answer)
+FAQ_ANSWERS: List[Tuple[Tuple[str, ...], str]] = [
+    (("exit", "way out"), "Exits are marked with illuminated green signs on every floor. Follow them to the nearest exit, or open the map to get a route."),
+    (("restroom", "toilet", "bathroom", "washroom"), "Restrooms are located near the elevator cores on every floor. Open the map for turn-by-turn directions to the closest one."),
+    (("elevator", "lift"), "Elevators are in the central atrium and at both ends of the building. The map shows the one nearest to you."),
+    (("parking", "car park"), "Parking is available on the lower levels; take any elevator down to level P. The map shows entrances and payment stations."),
+    (("opening hours", "open today", "closing time", "what time do you close"), "Opening hours can vary by store. Check the store page for today's hours."),
+]
+FAQ_MAX_WORDS = 8
+
+
+@dataclass
+class FastPathMatch:
+    """A recognized intent with the parameters extracted from the message."""
+    intent: str
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+def _parse_price(amount: str, thousands: Optional[str]) -> float:
+    value = float(amount.replace(",", ""))
+    return value * 1000 if thousands else value
+
+
+def _has_currency(match: re.Match, first_group: int = 1) -> bool:
+    """Whether a PRICE match starting at first_group carries a currency symbol or word."""
+    return bool(match.group(first_group) or match.group(first_group + 3))
+
+
+def _singular(term: str) -> str:
+    """Naive singular so "bags" matches "Leather Bag" and "watches" matches "Watch"."""
+    if term.endswith(("ches", "shes", "xes", "sses")):
+        return term[:-2]
+    if len(term) > 3 and term.endswith("s") and not term.endswith("ss"):
+        return term[:-1]
+    return term
+
+
+class FastPathRouter:
+    """
+    Deterministic router in front of the agents.
+
+    Greetings and frequent navigation questions are answered from tables;
+    product-by-id lookups and price-filtered searches are converted straight
+    into Projectservice queries. Anything not matched with confidence (or a
+    structured query with no results) returns None and goes to the LLM.
+    """
+
+    def __init__(self, max_results: int = 5, max_words: int = 12):
+        self.max_results = max_results
+        self.max_words = max_words
+
+        # Metrics
+        self.hits: Dict[str, int] = {}
+        self.misses = 0
+        self.fallthroughs = 0
+
+    def match(self, message: str) -> Optional[FastPathMatch]:
+        """Classify a message, or return None when the LLM is needed."""
+        text = message.strip()
+        if not text:
+            return None
+
+        if GREETING_PATTERN.match(text):
+            return FastPathMatch("greeting")
+        if THANKS_PATTERN.match(text):
+            return FastPathMatch("thanks")
+        if GOODBYE_PATTERN.match(text):
+            return FastPathMatch("goodbye")
+
+        uuid_match = UUID_PATTERN.search(text)
+        if uuid_match:
+            return FastPathMatch("product_lookup", {"product_id": UUID(uuid_match.group().lower())})
+
+        words = text.split()
+        lowered = text.lower()
+
+        policy = bool(POLICY_PATTERN.search(text))
+
+        if len(words) <= FAQ_MAX_WORDS and not policy:
+            for keywords, answer in FAQ_ANSWERS:
+                if any(re.search(rf"\b{re.escape(keyword)}\b", lowered) for keyword in keywords):
+                    return FastPathMatch("faq", {"answer": answer})
+
+        if len(words) <= self.max_words and not policy and not QUESTION_PATTERN.search(text):
+            price_filter = self._match_price_filter(text)
+            if price_filter:
+                return FastPathMatch("price_search", price_filter)
+
+        return None
+
+    def _match_price_filter(self, text: str) -> Optional[Dict[str, Any]]:
+        min_price = max_price = None
+        remainder = text
+        has_keyword = bool(PRICE_KEYWORD_PATTERN.search(text))
+
+        between = PRICE_BETWEEN_PATTERN.search(text)
+        if between and (has_keyword or _has_currency(between, 1) or _has_currency(between, 5)):
+            low = _parse_price(between.group(2), between.group(3))
+            high = _parse_price(between.group(6), between.group(7))
+            min_price, max_price = min(low, high), max(low, high)
+            remainder = remainder.replace(between.group(0), " ")
+        elif not between:
+            upper = PRICE_MAX_PATTERN.search(text)
+            if upper and (has_keyword or _has_currency(upper)):
+                max_price = _parse_price(upper.group(2), upper.group(3))
+                remainder = remainder.replace(upper.group(0), " ")
+            lower = PRICE_MIN_PATTERN.search(text)
+            if lower and (has_keyword or _has_currency(lower)):
+                min_price = _parse_price(lower.group(2), lower.group(3))
+                remainder = remainder.replace(lower.group(0), " ")
+
+        if min_price is None and max_price is None:
+            return None
+
+        terms = [
+            word for word in re.findall(r"[a-zA-Z][a-zA-Z'-]*", remainder.lower())
+            if word not in SEARCH_FILLER
+        ]
+        terms = [_singular(term) for term in terms]
+
+        return {
+            "search_query": " ".join(terms) or None,
+            "min_price": min_price,
+            "max_price": max_price
+        }
+
+    async def handle(self, request: AIRequest, db: Optional[AsyncSession]) -> Optional[AIResponse]:
+        """
+        Answer a request on the fast path.
+
+        Returns:
+            The response, or None when the request should go to the LLM
+        """
+        if request.interaction_type not in FAST_PATH_INTERACTION_TYPES:
+            return None
+
+        fast_match = self.match(request.message)
+        if fast_match is None:
+            self.misses += 1
+            return None
+
+        start_time = datetime.utcnow()
+        try:
+            message = await self._answer(fast_match, db)
+        except Exception as e:
+            logger.warning(f"Fast path {fast_match.intent} failed, using LLM: {e}")
+            message = None
+
+        if message is None:
+            self.fallthroughs += 1
+            return None
+
+        self.hits[fast_match.intent] = self.hits.get(fast_match.intent, 0) + 1
+        return AIResponse(
+            message=message,
+            interaction_type=request.interaction_type,
+            conversation_id=request.conversation_id or f"fast_path_{request.user_id}_{uuid.uuid4().hex[:8]}",
+            confidence=0.95,
+            tokens_used=0,
+            processing_time=(datetime.utcnow() - start_time).total_seconds(),
+            model_used="fast_path",
+            metadata={"fast_path": fast_match.intent}
+        )
+
+    async def _answer(self, fast_match: FastPathMatch, db: Optional[AsyncSession]) -> Optional[str]:
+        intent = fast_match.intent
+        if intent == "greeting":
+            return "Hello! I can help you find stores and Projects, check prices, or get directions. What are you looking for?"
+        if intent == "thanks":
+            return "You're welcome! Let me know if there's anything else I can help you find."
+        if intent == "goodbye":
+            return "Goodbye! Enjoy your visit."
+        if intent == "faq":
+            return fast_match.params["answer"]
+        if db is None:
+            return None
+        if intent == "product_lookup":
+            return await self._answer_product_lookup(fast_match.params["product_id"], db)
+        if intent == "price_search":
+            return await self._answer_price_search(fast_match.params, db)
+        return None
+
+    async def _answer_product_lookup(self, product_id: UUID, db: AsyncSession) -> Optional[str]:
+        product = await Projectservice(db).get_product_by_id(product_id)
+        if product is None:
+            return None
+
+        description = product.ai_summary if product.has_fresh_ai_summary else (
+            product.short_description or product.description
+        )
+        message = f"{product.name} - ${product.price:,.2f}"
+        if description:
+            message += f"\n\n{description}"
+        return message
+
+    async def _answer_price_search(self, params: Dict[str, Any], db: AsyncSession) -> Optional[str]:
+        query = Projectservice(db).get_Projects_query(
+            search_query=params["search_query"],
+            min_price=params["min_price"],
+            max_price=params["max_price"],
+            status=Projectstatus.ACTIVE,
+            sort_by="price",
+            sort_order="asc"
+        )
+        result = await db.execute(query.limit(self.max_results))
+        Projects: List[Product] = list(result.scalars().all())
+        if not Projects:
+            # Let the LLM suggest alternatives instead of a bare "no results"
+            return None
+
+        message = f"Found {len(Projects)} matching Projects:\n"
+        for i, product in enumerate(Projects, 1):
+            message += f"{i}. {product.name} - ${product.price:,.2f}\n"
+        return message.rstrip()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get fast-path hit statistics."""
+        total_hits = sum(self.hits.values())
+        total = total_hits + self.misses + self.fallthroughs
+        return {
+            "hits": dict(self.hits),
+            "total_hits": total_hits,
+            "misses": self.misses,
+            "fallthroughs": self.fallthroughs,
+            "hit_rate": total_hits / total if total else 0.0
+        }
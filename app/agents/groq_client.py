@@ -9,9 +9,11 @@ from typing import Dict, Any, Optional, List
 from datetime import datetime
 
 from langchain_groq import ChatGroq
-from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
+from langchain_core.messages import HumanMessage, SystemMessage
 
-from .base_agent import BaseAgent
+from .llm_client import LLMClient
+from .base_agent import returns_error_response
+from .bulkhead import PRIORITY_LOW
 from ..schemas.ai_schemas import AIRequest, AIResponse, ConversationMessage
 from ..config.config import settings
 
@@ -19,14 +21,20 @@ from ..config.config import settings
 logger = logging.getLogger(__name__)
 
 
-class GroqClient(BaseAgent):
+class GroqClient(LLMClient):
     """
     Groq client for fast text-based LLM interactions.
     Optimized for quick responses and conversation handling.
     """
     
     def __init__(self):
-        super().__init__("groq_client")
+        super().__init__(
+            "groq_client",
+            settings.GROQ_MODEL,
+            settings.GROQ_TEMPERATURE,
+            max_concurrency=settings.GROQ_MAX_CONCURRENCY,
+            max_queue=settings.GROQ_MAX_QUEUE
+        )
         
         if not settings.GROQ_API_KEY:
             raise ValueError("GROQ_API_KEY environment variable is required")
@@ -39,96 +47,77 @@ class GroqClient(BaseAgent):
             max_tokens=settings.GROQ_MAX_TOKENS,
             timeout=settings.GROQ_TIMEOUT
         )
+        self.probe_client = self.client.model_copy(update={"max_tokens": 1})
         
         logger.info(f"Initialized Groq client with model: {settings.GROQ_MODEL}")
     
+    @returns_error_response("Groq processing")
     async def process_request(self, request: AIRequest) -> AIResponse:
         """Process request using Groq LLM."""
         async with self.track_request(request):
-            try:
-                if not await self.validate_request(request):
-                    return self.create_error_response(
-                        self.get_conversation_id(request),
-                        "Invalid request format",
-                        request.interaction_type
-                    )
-                
-                conversation_id = self.get_conversation_id(request)
-                
-                # Build message history
-                messages = await self._build_message_history(conversation_id, request)
-                
-                # Track start time
-                start_time = datetime.utcnow()
-                
-                # Generate response - simplified without custom callbacks
-                response = await self.client.ainvoke(messages)
-                
-                # Calculate processing time
-                processing_time = (datetime.utcnow() - start_time).total_seconds()
-                
-                # Extract response content
-                response_content = response.content if hasattr(response, 'content') else str(response)
-                
-                # Update conversation history
-                self.add_to_conversation(
-                    conversation_id,
-                    ConversationMessage(role="user", content=request.message)
-                )
-                self.add_to_conversation(
-                    conversation_id,
-                    ConversationMessage(role="assistant", content=response_content)
-                )
-                
-                # Estimate token usage (since we can't get exact counts without callbacks)
-                estimated_tokens = len(response_content.split()) + len(request.message.split())
-                self.total_tokens_used += estimated_tokens
-                
-                return AIResponse(
-                    message=response_content,
-                    interaction_type=request.interaction_type,
-                    conversation_id=conversation_id,
-                    confidence=0.85,
-                    tokens_used=estimated_tokens,
-                    processing_time=processing_time,
-                    model_used=settings.GROQ_MODEL,
-                    metadata={
-                        "groq_model": settings.GROQ_MODEL,
-                        "temperature": settings.GROQ_TEMPERATURE,
-                        "max_tokens": settings.GROQ_MAX_TOKENS,
-                        "estimated_tokens": True
-                    }
-                )
-                
-            except Exception as e:
-                logger.error(f"Groq processing error: {e}")
+            if not await self.validate_request(request):
                 return self.create_error_response(
                     self.get_conversation_id(request),
-                    f"Groq processing error: {str(e)}",
+                    "Invalid request format",
                     request.interaction_type
                 )
+            
+            conversation_id = self.get_conversation_id(request)
+            
+            # Build message history
+            messages = await self._build_message_history(conversation_id, request)
+            
+            # Track start time
+            start_time = datetime.utcnow()
+            
+            # Generate response, served from the response cache when possible
+            response = await self.invoke_llm(messages, priority=self.get_priority(request))
+            
+            # Calculate processing time
+            processing_time = (datetime.utcnow() - start_time).total_seconds()
+            
+            # Extract response content
+            response_content = response.content if hasattr(response, 'content') else str(response)
+            
+            # Update conversation history
+            await self.add_to_conversation(
+                conversation_id,
+                ConversationMessage(role="user", content=request.message)
+            )
+            await self.add_to_conversation(
+                conversation_id,
+                ConversationMessage(role="assistant", content=response_content)
+            )
+            
+            # Token usage as reported by the model
+            tokens_used, estimated_tokens = self.get_token_usage(response, request.message, response_content)
+            self.total_tokens_used += tokens_used
+            
+            return AIResponse(
+                message=response_content,
+                interaction_type=request.interaction_type,
+                conversation_id=conversation_id,
+                confidence=0.85,
+                tokens_used=tokens_used,
+                processing_time=processing_time,
+                model_used=settings.GROQ_MODEL,
+                metadata={
+                    "groq_model": settings.GROQ_MODEL,
+                    "temperature": settings.GROQ_TEMPERATURE,
+                    "max_tokens": settings.GROQ_MAX_TOKENS,
+                    "estimated_tokens": estimated_tokens
+                }
+            )
     
     async def _build_message_history(self, conversation_id: str, request: AIRequest) -> List:
-        """Build message history for LLM context."""
-        messages = []
-        
-        # Add system message based on interaction type
-        system_prompt = self._get_system_prompt(request.interaction_type)
-        messages.append(SystemMessage(content=system_prompt))
-        
-        # Add conversation history
-        if settings.ENABLE_CONVERSATION_CONTEXT:
-            history = self.get_conversation_history(conversation_id)
-            for msg in history[-5:]:  # Last 5 messages for context
-                if msg.role == "user":
-                    messages.append(HumanMessage(content=msg.content))
-                elif msg.role == "assistant":
-                    messages.append(AIMessage(content=msg.content))
-        
-        # Add current message
-        messages.append(HumanMessage(content=request.message))
-        
-        return messages
+        """Build the token-budgeted prompt for LLM context."""
+        # History is packed under the interaction's token budget; older turns come from the rolling summary
+        return await self.context_window.build_messages(
+            conversation_id,
+            self._get_system_prompt(request.interaction_type),
+            request.message,
+            request.interaction_type
+        )
     
     def _get_system_prompt(self, interaction_type: str) -> str:
         """Get system prompt based on interaction type."""
@@ -170,16 +159,18 @@ class GroqClient(BaseAgent):
         return prompts.get(interaction_type, prompts["general_chat"])
     
     async def health_check(self) -> Dict[str, Any]:
-        """Check Groq service health."""
+        """
+        Check Groq service health with a one-token generation.
+        Called by the health prober, which runs in every worker process.
+        """
         try:
-            # Simple health check without custom callbacks
             test_messages = [
                 SystemMessage(content="You are a helpful assistant."),
                 HumanMessage(content="Hello")
             ]
             
             start_time = datetime.utcnow()
-            response = await self.client.ainvoke(test_messages)
+            response = await self.probe_llm(test_messages)
             processing_time = (datetime.utcnow() - start_time).total_seconds()
             
             return {
@@ -202,7 +193,51 @@ class GroqClient(BaseAgent):
     async def generate_product_summary(self, product_data: Dict[str, Any]) -> str:
         """Generate AI summary for product."""
         try:
-            prompt = f"""Create a compelling product summary for this luxury item:
+            messages = self._build_product_summary_messages(product_data)
+            
+            response = await self.invoke_llm(messages)
+            return response.content if hasattr(response, 'content') else str(response)
+            
+        except Exception as e:
+            logger.error(f"Product summary generation failed: {e}")
+            return self._fallback_product_summary(product_data)
+    
+    async def generate_product_summaries(
+        self, 
+        Projects_data: List[Dict[str, Any]], 
+        max_concurrency: Optional[int] = None
+    ) -> List[Optional[str]]:
+        """
+        Generate AI summaries for many Projects in one batch.
+        
+        Each item goes through `invoke_llm` in the low-priority bulkhead lane,
+        so it takes its own backend slot and is subject to the circuit breaker,
+        response cache and metrics; at most `max_concurrency` items are in
+        flight. Failed items come back as None so callers can retry them later
+        instead of storing a fallback summary.
+        """
+        if not Projects_data:
+            return []
+        
+        semaphore = asyncio.Semaphore(max_concurrency or settings.AI_SUMMARY_MAX_CONCURRENCY)
+        
+        async def summarize(data: Dict[str, Any]) -> Optional[str]:
+            async with semaphore:
+                try:
+                    response = await self.invoke_llm(
+                        self._build_product_summary_messages(data),
+                        priority=PRIORITY_LOW
+                    )
+                except Exception as e:
+                    logger.warning(f"Product summary generation failed for {data.get('name', 'Unknown')}: {e}")
+                    return None
+            return response.content if hasattr(response, 'content') else str(response)
+        
+        return list(await asyncio.gather(*(summarize(data) for data in Projects_data)))
+    
+    def _build_product_summary_messages(self, product_data: Dict[str, Any]) -> List:
+        """Build the copywriting prompt for a product summary."""
+        prompt = f"""Create a compelling product summary for this luxury item:
             
             Product: {product_data.get('name', 'Unknown')}
             Brand: {product_data.get('brand', 'Unknown')}
@@ -211,15 +246,12 @@ class GroqClient(BaseAgent):
             Condition: {product_data.get('condition', 'Unknown')}
             
             Create a 2-3 sentence summary that highlights the key features, luxury appeal, and value proposition."""
-            
-            messages = [
-                SystemMessage(content="You are a luxury product copywriter."),
-                HumanMessage(content=prompt)
-            ]
-            
-            response = await self.client.ainvoke(messages)
-            return response.content if hasattr(response, 'content') else str(response)
-            
-        except Exception as e:
-            logger.error(f"Product summary generation failed: {e}")
-            return f"Premium {product_data.get('brand', '')} {product_data.get('name', 'item')} - a luxury addition to your collection."
\ No newline at end of file
+        
+        return [
+            SystemMessage(content="You are a luxury product copywriter."),
+            HumanMessage(content=prompt)
+        ]
+    
+    def _fallback_product_summary(self, product_data: Dict[str, Any]) -> str:
+        """Static summary used when generation fails."""
+        return f"Premium {product_data.get('brand', '')} {product_data.get('name', 'item')} - a luxury addition to your collection."
\ No newline at end of file
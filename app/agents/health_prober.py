@@ -0,0 +1,218 @@
+"""
+Background health prober for AIBIN AI agents.
+Probes each backend once per interval and serves a cached health snapshot.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Any, Optional, List
+
+from ..config.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+# Backends each agent needs; agent health is derived from these without extra LLM calls
+AGENT_DEPENDENCIES: Dict[str, List[str]] = {
+    "groq_client": ["groq"],
+    "ollama_client": ["ollama"],
+    "product_agent": ["groq", "database"],
+    "recommendation_agent": ["groq", "database"],
+    "voice_agent": ["ollama"],
+}
+
+
+class HealthProber:
+    """
+    Probes the Groq and Ollama backends and the database in the background.
+
+    Each cycle sends one single-token generation per backend and stores the
+    results with a timestamp. Health endpoints read the cached snapshot
+    instead of running live generations, and see a `stale` flag when the last
+    probe is older than the staleness threshold.
+
+    The prober is per process: with N workers, each backend receives N
+    probes per interval, so size HEALTH_PROBE_INTERVAL_SECONDS accordingly.
+    """
+
+    def __init__(self, interval_seconds: Optional[int] = None, stale_after_seconds: Optional[int] = None):
+        self.interval = interval_seconds or settings.HEALTH_PROBE_INTERVAL_SECONDS
+        self.stale_after = stale_after_seconds or settings.HEALTH_PROBE_STALE_AFTER_SECONDS
+
+        self._backends: Dict[str, Dict[str, Any]] = {}
+        self._checked_at: Optional[datetime] = None
+        self._checked_monotonic: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+        # Metrics
+        self.probe_count = 0
+        self.probe_failures = 0
+        self.last_probe_duration: Optional[float] = None
+
+    async def run(self):
+        """Probe forever, once per interval."""
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.probe_failures += 1
+                logger.error(f"Health probe failed: {e}")
+
+            await asyncio.sleep(self.interval)
+
+    async def refresh(self):
+        """Run one probe cycle; concurrent callers share the same cycle."""
+        started_waiting = time.monotonic()
+        async with self._lock:
+            if self._checked_monotonic is not None and self._checked_monotonic >= started_waiting:
+                # Another caller finished a probe while we waited
+                return
+            await self._probe_once()
+
+    async def _probe_once(self):
+        from .registry import get_agent_registry
+
+        registry = get_agent_registry()
+        started = time.monotonic()
+
+        groq_health, ollama_health, database_health = await asyncio.gather(
+            self._probe_client(registry.groq_client, settings.GROQ_MODEL),
+            self._probe_client(registry.ollama_client, settings.OLLAMA_MODEL),
+            self._probe_database()
+        )
+
+        self._backends = {
+            "groq": groq_health,
+            "ollama": ollama_health,
+            "database": database_health,
+        }
+        self._checked_at = datetime.utcnow()
+        self._checked_monotonic = time.monotonic()
+        self.last_probe_duration = self._checked_monotonic - started
+        self.probe_count += 1
+
+        logger.info(
+            f"Health probe completed in {self.last_probe_duration:.2f}s: "
+            + ", ".join(f"{name}={health['status']}" for name, health in self._backends.items())
+        )
+
+    async def _probe_client(self, client, model: str) -> Dict[str, Any]:
+        if client is None:
+            return {
+                "status": "not_available",
+                "error": "Client not initialized",
+                "model": model,
+                "last_check": datetime.utcnow().isoformat()
+            }
+        try:
+            return await client.health_check()
+        except Exception as e:
+            return {
+                "status": "unhealthy",
+                "error": str(e),
+                "model": model,
+                "last_check": datetime.utcnow().isoformat()
+            }
+
+    async def _probe_database(self) -> Dict[str, Any]:
+        from sqlalchemy import text
+        from ..db.database import SessionLocal
+
+        started = time.monotonic()
+        try:
+            async with SessionLocal() as db:
+                await db.execute(text("SELECT 1"))
+            return {
+                "status": "healthy",
+                "response_time": time.monotonic() - started,
+                "last_check": datetime.utcnow().isoformat()
+            }
+        except Exception as e:
+            return {
+                "status": "unhealthy",
+                "error": str(e),
+                "last_check": datetime.utcnow().isoformat()
+            }
+
+    async def get_snapshot(self) -> Dict[str, Any]:
+        """
+        Get the cached backend health.
+        Probes inline only when no probe has completed yet (cold start).
+        """
+        if self._checked_monotonic is None:
+            await self.refresh()
+        if self._checked_monotonic is None:
+            return {"backends": {}, "checked_at": None, "age_seconds": None, "stale": True}
+
+        age = time.monotonic() - self._checked_monotonic
+        return {
+            "backends": dict(self._backends),
+            "checked_at": self._checked_at.isoformat() if self._checked_at else None,
+            "age_seconds": age,
+            "stale": age > self.stale_after
+        }
+
+    async def get_health_summary(self) -> Dict[str, Any]:
+        """Get per-agent health derived from the cached backend snapshot."""
+        snapshot = await self.get_snapshot()
+        backends = snapshot["backends"]
+
+        summary = {
+            "overall_status": "unknown",
+            "healthy_agents": 0,
+            "total_agents": 0,
+            "agent_health": {},
+            "checked_at": snapshot["checked_at"],
+            "stale": snapshot["stale"]
+        }
+
+        from .registry import get_agent_registry
+
+        for agent_name, _ in get_agent_registry().get_agents():
+            dependencies = AGENT_DEPENDENCIES.get(agent_name, [])
+            statuses = {name: backends.get(name, {}).get("status", "unknown") for name in dependencies}
+            healthy = all(status == "healthy" for status in statuses.values())
+
+            summary["agent_health"][agent_name] = {
+                "status": "healthy" if healthy else "unhealthy",
+                "dependencies": statuses,
+                "last_check": snapshot["checked_at"]
+            }
+            summary["total_agents"] += 1
+            if healthy:
+                summary["healthy_agents"] += 1
+
+        if summary["healthy_agents"] == summary["total_agents"]:
+            summary["overall_status"] = "healthy"
+        elif summary["healthy_agents"] > 0:
+            summary["overall_status"] = "partial"
+        else:
+            summary["overall_status"] = "unhealthy"
+
+        return summary
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get prober statistics."""
+        return {
+            "interval": self.interval,
+            "stale_after": self.stale_after,
+            "probe_count": self.probe_count,
+            "probe_failures": self.probe_failures,
+            "last_probe_duration": self.last_probe_duration,
+            "checked_at": self._checked_at.isoformat() if self._checked_at else None
+        }
+
+
+_health_prober: Optional[HealthProber] = None
+
+
+def get_health_prober() -> HealthProber:
+    """Get the process-wide health prober."""
+    global _health_prober
+    if _health_prober is None:
+        _health_prober = HealthProber()
+    return _health_prober
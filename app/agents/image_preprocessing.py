@@ -0,0 +1,250 @@
+"""
+Image preprocessing for AIBIN visual analysis.
+Normalizes uploads (EXIF orientation, downscale, JPEG re-encode) in a process pool.
+"""
+
+import asyncio
+import base64
+import io
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple, Union
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Optional dependency; images are passed through unchanged
+    Image = None
+    ImageOps = None
+
+from ..config.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+EXIF_ORIENTATION = 0x0112
+
+# dHash grid: 9x8 grayscale pixels give 8x8 = 64 horizontal gradient bits
+DHASH_SIZE = 8
+
+
+def difference_hash(image: "Image.Image") -> int:
+    """
+    64-bit difference hash (dHash) of an image.
+
+    Each bit records whether a pixel is brighter than its right neighbour on
+    a 9x8 grayscale thumbnail, so re-encodes, resizes and small crops of the
+    same photo land within a few bits of each other.
+    """
+    pixels = list(image.convert("L").resize((DHASH_SIZE + 1, DHASH_SIZE), Image.Resampling.BOX).getdata())
+    value = 0
+    for row in range(DHASH_SIZE):
+        offset = row * (DHASH_SIZE + 1)
+        for column in range(DHASH_SIZE):
+            value = (value << 1) | (pixels[offset + column] > pixels[offset + column + 1])
+    return value
+
+
+def _open_source(image: Union[bytes, str, Path]) -> Tuple[Union[Path, io.BytesIO], Optional[bytes], int]:
+    """Get a Pillow-readable source for raw bytes, base64 text or a file path, with the decoded bytes and size."""
+    if isinstance(image, Path):
+        return image, None, image.stat().st_size
+    data = base64.b64decode(image) if isinstance(image, str) else image
+    return io.BytesIO(data), data, len(data)
+
+
+def image_dhash(image: Union[bytes, str, Path]) -> int:
+    """
+    dHash of an image without normalizing it.
+
+    Runs in a worker process. Only a 9x8 thumbnail is needed, so JPEGs are
+    decoded at 1/8 scale where possible.
+    """
+    source, _, _ = _open_source(image)
+    with Image.open(source) as original:
+        if original.format == "JPEG":
+            original.draft("L", (DHASH_SIZE * 8, DHASH_SIZE * 8))
+        return difference_hash(ImageOps.exif_transpose(original))
+
+
+def normalize_image(image: Union[bytes, str, Path], max_side: int, quality: int) -> Tuple[bytes, Dict[str, Any]]:
+    """
+    Decode, orient, downscale and re-encode an image as JPEG.
+
+    Runs in a worker process, so it only takes and returns picklable values.
+    `image` is raw bytes, base64 text (decoded here, off the event loop) or
+    the path of a spooled upload, which is decoded straight from the file.
+    The original is returned when re-encoding would not make it smaller.
+
+    Returns:
+        (image bytes, details) - details include the image's 64-bit dHash
+    """
+    started = time.perf_counter()
+    source, data, original_size = _open_source(image)
+
+    with Image.open(source) as original:
+        original_format = original.format
+        original_dimensions = original.size
+        rotated = original.getexif().get(EXIF_ORIENTATION, 1) != 1
+        if original_format == "JPEG":
+            # Let the JPEG decoder scale down by 1/2-1/8 while decoding instead of decoding full size
+            original.draft("RGB", (max_side, max_side))
+        oriented = ImageOps.exif_transpose(original)
+
+        if oriented.mode in ("RGBA", "LA", "P"):
+            # JPEG has no alpha; flatten transparent images onto white
+            rgba = oriented.convert("RGBA")
+            flattened = Image.new("RGB", rgba.size, (255, 255, 255))
+            flattened.paste(rgba, mask=rgba.getchannel("A"))
+            oriented = flattened
+        elif oriented.mode != "RGB":
+            oriented = oriented.convert("RGB")
+
+        oriented.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+        dhash = difference_hash(oriented)
+        output = io.BytesIO()
+        oriented.save(output, format="JPEG", quality=quality, optimize=True)
+        normalized = output.getvalue()
+        dimensions = oriented.size
+
+    resized = dimensions != original_dimensions
+    if len(normalized) >= original_size and not resized and not rotated and original_format == "JPEG":
+        # Already small and upright: re-encoding would only lose quality
+        normalized = image.read_bytes() if isinstance(image, Path) else data
+        dimensions = original_dimensions
+
+    return normalized, {
+        "original_bytes": original_size,
+        "normalized_bytes": len(normalized),
+        "original_dimensions": list(original_dimensions),
+        "normalized_dimensions": list(dimensions),
+        "original_format": original_format,
+        "dhash": dhash,
+        "decode_encode_time": time.perf_counter() - started,
+    }
+
+
+@dataclass
+class PreprocessedImage:
+    """Result of the preprocessing stage."""
+    data: Optional[bytes]
+    details: Dict[str, Any] = field(default_factory=dict)
+
+
+class ImagePreprocessor:
+    """
+    Process-pool image normalization stage for the visual model.
+
+    LLaVA downsamples its input internally, so full-resolution phone photos
+    only cost transfer, base64 and decode time. Images are normalized to
+    IMAGE_MAX_SIDE pixels on the long side in worker processes, keeping the
+    CPU-bound decode/resize/encode off the event loop. When Pillow is not
+    installed or an image cannot be decoded, the original is used.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or settings.IMAGE_PREPROCESS_WORKERS
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+        # Metrics
+        self.images_processed = 0
+        self.images_failed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.total_time = 0.0
+
+    @property
+    def available(self) -> bool:
+        return settings.IMAGE_PREPROCESS_ENABLED and Image is not None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Spawned workers do not inherit the event loop, sockets or threads of this process
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def preprocess(self, image: Union[bytes, str, Path]) -> PreprocessedImage:
+        """
+        Normalize an image (raw bytes, base64, or a spooled upload path).
+
+        Returns:
+            The normalized bytes, or data=None when the original should be used
+        """
+        if not self.available:
+            return PreprocessedImage(data=None, details={"skipped": True})
+
+        started = time.perf_counter()
+        try:
+            data, details = await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(),
+                normalize_image,
+                image,
+                settings.IMAGE_MAX_SIDE,
+                settings.IMAGE_JPEG_QUALITY
+            )
+        except Exception as e:
+            self.images_failed += 1
+            logger.warning(f"Image preprocessing failed, using original: {e}")
+            return PreprocessedImage(data=None, details={"skipped": True, "error": str(e)})
+
+        elapsed = time.perf_counter() - started
+        details["total_time"] = elapsed
+        self.images_processed += 1
+        self.bytes_in += details["original_bytes"]
+        self.bytes_out += details["normalized_bytes"]
+        self.total_time += elapsed
+
+        logger.debug(
+            f"Image normalized {details['original_dimensions']} -> {details['normalized_dimensions']}, "
+            f"{details['original_bytes']} -> {details['normalized_bytes']} bytes in {elapsed:.3f}s"
+        )
+        return PreprocessedImage(data=data, details=details)
+
+    async def dhash(self, image: Union[bytes, str, Path]) -> Optional[int]:
+        """
+        Perceptual hash of an image for the visual cache, for when it was not normalized.
+
+        Computed in the worker pool even when IMAGE_PREPROCESS_ENABLED is off.
+        Returns None without Pillow or when the image cannot be decoded.
+        """
+        if Image is None:
+            return None
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), image_dhash, image)
+        except Exception as e:
+            logger.warning(f"Image hashing failed: {e}")
+            return None
+
+    def shutdown(self):
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get preprocessing statistics."""
+        return {
+            "available": self.available,
+            "images_processed": self.images_processed,
+            "images_failed": self.images_failed,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "average_time": self.total_time / self.images_processed if self.images_processed else 0.0
+        }
+
+
+_image_preprocessor: Optional[ImagePreprocessor] = None
+
+
+def get_image_preprocessor() -> ImagePreprocessor:
+    """Get the process-wide image preprocessor."""
+    global _image_preprocessor
+    if _image_preprocessor is None:
+        _image_preprocessor = ImagePreprocessor()
+    return _image_preprocessor
@@ -0,0 +1,366 @@
+"""
+Base LLM client for AIBIN AI agents.
+Common invocation path shared by the Groq and Ollama clients.
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, List, AsyncIterator, Tuple
+from datetime import datetime
+
+from langchain_core.messages import BaseMessage
+
+from .base_agent import BaseAgent
+from .bulkhead import Bulkhead, PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL
+from .backend_router import BackendHealth
+from .context_window import ContextWindowManager
+from .response_cache import LLMResponseCache, build_cache_key, is_cache_hit, mark_cache_hit
+from .single_flight import SingleFlight
+from ..schemas.ai_schemas import AIRequest, ConversationMessage
+from ..config.config import settings
+from ..utils.exceptions import BackendOverloadedError
+from ..utils.rate_limiter import get_admission_controller
+from ..utils.metrics import observe_llm_call
+
+
+logger = logging.getLogger(__name__)
+
+# Chat is routed to whichever backend is healthiest, so all backends share one history
+LLM_HISTORY_NAMESPACE = "llm_chat"
+
+
+class LLMClient(BaseAgent):
+    """
+    Base class for agents that wrap a LangChain chat model.
+    Subclasses set `self.client` to the chat model and call `invoke_llm`
+    instead of `self.client.ainvoke` so every call goes through the response
+    cache, identical concurrent calls are coalesced, in-flight calls to the
+    backend are capped by its bulkhead and failures feed its circuit breaker.
+    They also set `self.probe_client` to a copy of the chat model capped at
+    one output token, used by `probe_llm`.
+    """
+
+    # Interaction types served ahead of regular chat when the backend is saturated
+    HIGH_PRIORITY_INTERACTIONS = {"voice_chat", "multimodal"}
+
+    def __init__(
+        self,
+        agent_name: str,
+        model_name: str,
+        temperature: float,
+        max_concurrency: int = 0,
+        max_queue: int = 0
+    ):
+        super().__init__(agent_name, history_namespace=LLM_HISTORY_NAMESPACE)
+        self.client = None
+        self.probe_client = None
+        self.model_name = model_name
+        self.temperature = temperature
+        self.response_cache: Optional[LLMResponseCache] = (
+            LLMResponseCache() if settings.LLM_CACHE_ENABLED else None
+        )
+        self.single_flight: Optional[SingleFlight] = (
+            SingleFlight(agent_name) if settings.LLM_SINGLE_FLIGHT_ENABLED else None
+        )
+        self.bulkhead: Optional[Bulkhead] = (
+            Bulkhead(agent_name, max_concurrency, max_queue, settings.LLM_QUEUE_TIMEOUT_SECONDS)
+            if settings.LLM_BULKHEAD_ENABLED and max_concurrency > 0 else None
+        )
+        self.health = BackendHealth(agent_name, model_name)
+        self.context_window = ContextWindowManager(self)
+
+    def get_priority(self, request: AIRequest) -> int:
+        """Get the bulkhead priority lane for a request."""
+        if request.interaction_type in self.HIGH_PRIORITY_INTERACTIONS:
+            return PRIORITY_HIGH
+        return PRIORITY_NORMAL
+
+    @asynccontextmanager
+    async def backend_slot(self, priority: int = PRIORITY_NORMAL) -> AsyncIterator[None]:
+        """Hold a bulkhead slot for this backend (no-op when the bulkhead is disabled)."""
+        if not self.bulkhead:
+            yield
+            return
+        async with self.bulkhead.slot(priority):
+            yield
+
+    async def invoke_llm(
+        self,
+        messages: List[BaseMessage],
+        use_cache: bool = True,
+        priority: int = PRIORITY_NORMAL
+    ) -> BaseMessage:
+        """
+        Invoke the chat model.
+        Repeated prompts are served from the response cache and identical
+        concurrent prompts share one in-flight call, which waits for a
+        bulkhead slot in the given priority lane. Only the caller that made
+        the call gets its token usage; coalesced callers get a zero-usage copy.
+
+        Raises:
+            BackendOverloadedError: If no bulkhead slot frees up in time
+            BackendUnavailableError: If the backend's circuit breaker is open
+        """
+        request_key = build_cache_key(self.model_name, self.temperature, messages)
+
+        cache_key = None
+        if (
+            request_key
+            and use_cache
+            and self.response_cache
+            and self.response_cache.should_cache(self.temperature)
+        ):
+            cache_key = request_key
+            cached_response = self.response_cache.get(cache_key)
+            if cached_response is not None:
+                logger.debug(f"{self.agent_name} response cache hit")
+                return cached_response
+
+        if request_key and self.single_flight:
+            return await self.single_flight.do(
+                request_key,
+                lambda: self._invoke_and_cache(messages, cache_key, priority),
+                follower_result=mark_cache_hit
+            )
+
+        return await self._invoke_and_cache(messages, cache_key, priority)
+
+    async def probe_llm(self, messages: List[BaseMessage]) -> BaseMessage:
+        """
+        Send a health probe that generates a single token.
+        Skips the response cache and single-flight so every probe reaches the
+        backend, in the low-priority bulkhead lane.
+        """
+        return await self._invoke_and_cache(messages, None, PRIORITY_LOW, client=self.probe_client)
+
+    async def _invoke_and_cache(
+        self,
+        messages: List[BaseMessage],
+        cache_key: Optional[str],
+        priority: int = PRIORITY_NORMAL,
+        client=None
+    ) -> BaseMessage:
+        """Call the chat model (or the given one) and store the response under the cache key."""
+        self.health.ensure_available()
+        started = time.monotonic()
+        try:
+            async with self.backend_slot(priority):
+                started = time.monotonic()
+                response = await (client or self.client).ainvoke(messages)
+        except (BackendOverloadedError, asyncio.CancelledError):
+            # Never reached the backend (or was abandoned); not a backend failure
+            self.health.release_probe()
+            raise
+        except Exception:
+            self.health.record_failure(time.monotonic() - started)
+            observe_llm_call(self.agent_name, self.model_name, time.monotonic() - started, "error")
+            raise
+        self.health.record_success(time.monotonic() - started)
+        observe_llm_call(
+            self.agent_name,
+            self.model_name,
+            time.monotonic() - started,
+            "success",
+            getattr(response, "usage_metadata", None)
+        )
+        await self.record_model_usage(response)
+
+        if cache_key:
+            self.response_cache.set(cache_key, response)
+
+        return response
+
+    async def stream_llm(
+        self,
+        messages: List[BaseMessage],
+        use_cache: bool = True,
+        priority: int = PRIORITY_NORMAL
+    ) -> AsyncIterator[BaseMessage]:
+        """
+        Stream the chat model response chunk by chunk.
+        A cached response is replayed as a single chunk; a completed stream populates the cache.
+        """
+        cache_key = None
+        if use_cache and self.response_cache and self.response_cache.should_cache(self.temperature):
+            cache_key = build_cache_key(self.model_name, self.temperature, messages)
+            if cache_key:
+                cached_response = self.response_cache.get(cache_key)
+                if cached_response is not None:
+                    yield cached_response
+                    return
+
+        self.health.ensure_available()
+        aggregated = None
+        started = time.monotonic()
+        try:
+            async with self.backend_slot(priority):
+                started = time.monotonic()
+                async for chunk in self.client.astream(messages):
+                    aggregated = chunk if aggregated is None else aggregated + chunk
+                    yield chunk
+        except BackendOverloadedError:
+            self.health.release_probe()
+            raise
+        except Exception:
+            self.health.record_failure(time.monotonic() - started)
+            observe_llm_call(self.agent_name, self.model_name, time.monotonic() - started, "error")
+            raise
+        except BaseException:
+            # Consumer stopped reading or was cancelled mid-stream
+            self.health.release_probe()
+            raise
+        self.health.record_success(time.monotonic() - started)
+        observe_llm_call(
+            self.agent_name,
+            self.model_name,
+            time.monotonic() - started,
+            "success",
+            getattr(aggregated, "usage_metadata", None)
+        )
+
+        if aggregated is not None:
+            await self.record_model_usage(aggregated)
+
+        if cache_key and aggregated is not None:
+            self.response_cache.set(cache_key, aggregated)
+
+    async def stream_request(
+        self,
+        request: AIRequest,
+        history_content: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a chat request as events.
+
+        Yields `token` events as content arrives and a final `done` event with
+        conversation, timing and token metadata. The completed turn is written
+        to conversation history once the stream finishes.
+
+        Args:
+            request: AI request to stream
+            history_content: Optional user message to record instead of the prompt
+        """
+        async with self.track_request(request):
+            conversation_id = self.get_conversation_id(request)
+
+            if not await self.validate_request(request):
+                yield {
+                    "event": "error",
+                    "data": {"conversation_id": conversation_id, "error_message": "Invalid request format"}
+                }
+                return
+
+            messages = await self._build_message_history(conversation_id, request)
+
+            start_time = datetime.utcnow()
+            time_to_first_token = None
+            content_parts: List[str] = []
+            aggregated = None
+
+            try:
+                async for chunk in self.stream_llm(messages, priority=self.get_priority(request)):
+                    aggregated = chunk if aggregated is None else aggregated + chunk
+                    text = chunk.content if isinstance(chunk.content, str) else str(chunk.content)
+                    if not text:
+                        continue
+
+                    if time_to_first_token is None:
+                        time_to_first_token = (datetime.utcnow() - start_time).total_seconds()
+                    content_parts.append(text)
+                    yield {"event": "token", "data": {"content": text}}
+            except Exception as e:
+                logger.error(f"{self.agent_name} streaming error: {e}")
+                yield {
+                    "event": "error",
+                    "data": {"conversation_id": conversation_id, "error_message": str(e)}
+                }
+                return
+
+            processing_time = (datetime.utcnow() - start_time).total_seconds()
+            response_content = "".join(content_parts)
+
+            # Record the completed turn
+            await self.add_to_conversation(
+                conversation_id,
+                ConversationMessage(role="user", content=history_content or request.message)
+            )
+            await self.add_to_conversation(
+                conversation_id,
+                ConversationMessage(role="assistant", content=response_content)
+            )
+
+            tokens_used, estimated_tokens = self.get_token_usage(aggregated, request.message, response_content)
+            self.total_tokens_used += tokens_used
+
+            yield {
+                "event": "done",
+                "data": {
+                    "message": response_content,
+                    "conversation_id": conversation_id,
+                    "interaction_type": request.interaction_type,
+                    "model_used": self.model_name,
+                    "processing_time": processing_time,
+                    "time_to_first_token": time_to_first_token,
+                    "tokens_used": tokens_used,
+                    "estimated_tokens": estimated_tokens
+                }
+            }
+
+    def get_token_usage(
+        self,
+        response: Optional[BaseMessage],
+        prompt_text: str,
+        response_content: str
+    ) -> Tuple[int, bool]:
+        """
+        Get the token count for a response.
+        Uses the usage metadata reported by the model and falls back to a
+        word-count estimate only when the provider did not report usage.
+        Responses served from the response cache used no tokens.
+
+        Returns:
+            Tuple of (tokens used, whether the count is estimated)
+        """
+        if is_cache_hit(response):
+            return 0, False
+        usage_metadata = getattr(response, "usage_metadata", None)
+        if usage_metadata and usage_metadata.get("total_tokens"):
+            return usage_metadata["total_tokens"], False
+        return len(response_content.split()) + len(prompt_text.split()), True
+
+    async def record_model_usage(self, response: BaseMessage):
+        """Charge the model's admission token bucket with a real call's usage."""
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        usage_metadata = getattr(response, "usage_metadata", None)
+        if usage_metadata:
+            await get_admission_controller().record_model_usage(
+                self.model_name,
+                usage_metadata.get("total_tokens", 0)
+            )
+
+    async def get_agent_stats(self) -> Dict[str, Any]:
+        """Get agent statistics including response cache metrics."""
+        stats = await super().get_agent_stats()
+        stats["model"] = self.model_name
+        stats["response_cache"] = (
+            self.response_cache.get_stats() if self.response_cache else {"enabled": False}
+        )
+        stats["single_flight"] = (
+            self.single_flight.get_stats() if self.single_flight else {"enabled": False}
+        )
+        stats["bulkhead"] = (
+            self.bulkhead.get_stats() if self.bulkhead else {"enabled": False}
+        )
+        stats["backend_health"] = self.health.get_stats()
+        stats["context_window"] = self.context_window.get_stats()
+        return stats
+
+    async def cleanup(self):
+        """Cleanup client resources."""
+        await super().cleanup()
+        await self.context_window.close()
+        if self.response_cache:
+            self.response_cache.clear()
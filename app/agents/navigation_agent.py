@@ -12,11 +12,13 @@ from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_
 
-from .base_agent import BaseAgent
+from .base_agent import BaseAgent, returns_error_response
 from .groq_client import GroqClient
+from .step_graph import StepGraph
+from .embedding_index import get_embedding_index
 from ..schemas.ai_schemas import AIRequest, AIResponse
-from ..models.Navigation import Navigation, Projectstatus
-from ..services.Navigation_service import Projectservice
+from ..models.product import Product, Projectstatus
+from ..services.product_service import Projectservice
 from ..config.config import settings
 
 
@@ -29,51 +31,47 @@ class NavigationAgent(BaseAgent):
     Handles Navigation search, details, and general Navigation-related questions.
     """
     
-    def __init__(self, db: AsyncSession):
+    def __init__(self, groq_client: Optional[GroqClient] = None):
         super().__init__("Navigation_agent")
-        self.db = db
-        self.groq_client = GroqClient()
-        self.Navigation_service = Projectservice(db)
+        # Shared Groq client from the agent registry when available
+        self.groq_client = groq_client or GroqClient()
         
         logger.info("Initialized Navigation Agent with Groq integration")
     
-    async def process_request(self, request: AIRequest) -> AIResponse:
-        """Process Navigation-related request."""
+    @returns_error_response("Navigation query")
+    async def process_request(self, request: AIRequest, db: Optional[AsyncSession] = None) -> AIResponse:
+        """Process Navigation-related request using the per-request database session."""
         async with self.track_request(request):
-            try:
-                if not await self.validate_request(request):
-                    return self.create_error_response(
-                        self.get_conversation_id(request),
-                        "Invalid request format",
-                        request.interaction_type
-                    )
-                
-                conversation_id = self.get_conversation_id(request)
-                
-                # Route based on interaction type
-                if request.interaction_type == "Navigation_search":
-                    return await self._handle_Navigation_search(request, conversation_id)
-                elif request.interaction_type == "Navigation_details":
-                    return await self._handle_Navigation_details(request, conversation_id)
-                else:
-                    return await self._handle_general_Navigation_query(request, conversation_id)
-                
-            except Exception as e:
-                logger.error(f"Navigation agent error: {e}")
+            if not await self.validate_request(request):
                 return self.create_error_response(
                     self.get_conversation_id(request),
-                    f"Navigation query failed: {str(e)}",
+                    "Invalid request format",
                     request.interaction_type
                 )
-    
-    async def _handle_Navigation_search(self, request: AIRequest, conversation_id: str) -> AIResponse:
-        """Handle Navigation search requests."""
-        try:
-            start_time = datetime.utcnow()
             
-            # Enhanced search prompt
-            search_prompt = f"""Help me search for Projects based on: "{request.message}"
+            conversation_id = self.get_conversation_id(request)
             
+            # Route based on interaction type
+            if request.interaction_type == "Navigation_search":
+                return await self._handle_Navigation_search(request, conversation_id, db)
+            elif request.interaction_type == "Navigation_details":
+                return await self._handle_Navigation_details(request, conversation_id, db)
+            else:
+                return await self._handle_general_Navigation_query(request, conversation_id)
+    
+    @returns_error_response("Navigation search")
+    async def _handle_Navigation_search(
+        self, 
+        request: AIRequest, 
+        conversation_id: str, 
+        db: Optional[AsyncSession]
+    ) -> AIResponse:
+        """Handle Navigation search requests."""
+        start_time = datetime.utcnow()
+        
+        # Enhanced search prompt
+        search_prompt = f"""Help me search for Projects based on: "{request.message}"
+        
 As a luxury Indoor Navigation expert, analyze this search query and provide:
 1. Interpreted search intent
 2. Suggested search terms
@@ -82,69 +80,73 @@ As a luxury Indoor Navigation expert, analyze this search query and provide:
 5. Quality and authenticity factors
 
 Be specific and helpful in guiding the search."""
-            
-            # Get AI analysis
-            groq_request = AIRequest(
-                message=search_prompt,
-                interaction_type="Navigation_search",
-                user_id=request.user_id,
-                conversation_id=conversation_id
-            )
-            
-            ai_response = await self.groq_client.process_request(groq_request)
-            
-            # Perform actual Navigation search
-            Projects = await self._search_Projects(request.message)
-            
-            # Format response with search results
-            response_message = f"{ai_response.message}\n\n"
-            if Projects:
-                response_message += f"Found {len(Projects)} matching Projects:\n"
-                for i, Navigation in enumerate(Projects[:3], 1):
-                    response_message += f"{i}. {Navigation.name} - ${Navigation.price}\n"
-            else:
-                response_message += "No Projects found matching your search criteria."
-            
-            processing_time = (datetime.utcnow() - start_time).total_seconds()
-            
-            return AIResponse(
-                message=response_message,
-                interaction_type=request.interaction_type,
-                conversation_id=conversation_id,
-                confidence=ai_response.confidence,
-                processing_time=processing_time,
-                model_used="groq+database",
-                metadata={
-                    "Projects_found": len(Projects),
-                    "search_query": request.message,
-                    "groq_tokens": ai_response.tokens_used
-                }
-            )
-            
-        except Exception as e:
-            logger.error(f"Navigation search error: {e}")
-            return self.create_error_response(
-                conversation_id,
-                f"Navigation search failed: {str(e)}",
-                request.interaction_type
-            )
+        
+        # Get AI analysis
+        groq_request = AIRequest(
+            message=search_prompt,
+            interaction_type="Navigation_search",
+            user_id=request.user_id,
+            conversation_id=conversation_id
+        )
+        
+        # AI analysis and the database search are independent, so run them concurrently
+        flow = await (
+            StepGraph("Navigation_search")
+            .add_step("analysis", lambda: self.groq_client.process_request(groq_request), kind="llm")
+            .add_step("Projects", lambda: self._search_Projects(request.message, db), kind="db")
+            .run()
+        )
+        ai_response = flow["analysis"]
+        Projects = flow["Projects"]
+        
+        # Format response with search results
+        response_message = f"{ai_response.message}\n\n"
+        if Projects:
+            response_message += f"Found {len(Projects)} matching Projects:\n"
+            for i, product in enumerate(Projects[:3], 1):
+                response_message += f"{i}. {product.name} - ${product.price}\n"
+        else:
+            response_message += "No Projects found matching your search criteria."
+        
+        processing_time = (datetime.utcnow() - start_time).total_seconds()
+        
+        return AIResponse(
+            message=response_message,
+            interaction_type=request.interaction_type,
+            conversation_id=conversation_id,
+            confidence=ai_response.confidence,
+            processing_time=processing_time,
+            model_used="groq+database",
+            metadata={
+                "Projects_found": len(Projects),
+                "search_query": request.message,
+                "groq_tokens": ai_response.tokens_used,
+                "estimated_tokens": (ai_response.metadata or {}).get("estimated_tokens", False),
+                "step_timings": flow.get_timings()
+            }
+        )
     
-    async def _handle_Navigation_details(self, request: AIRequest, conversation_id: str) -> AIResponse:
+    @returns_error_response("Navigation details")
+    async def _handle_Navigation_details(
+        self, 
+        request: AIRequest, 
+        conversation_id: str, 
+        db: Optional[AsyncSession]
+    ) -> AIResponse:
         """Handle Navigation detail requests."""
-        try:
-            # Extract Navigation ID from message if present
-            Navigation_id = self._extract_Navigation_id(request.message)
-            
-            if Navigation_id:
-                Navigation = await self.Navigation_service.get_Navigation_by_id(Navigation_id)
-                if Navigation:
-                    return await self._generate_Navigation_details_response(
-                        Navigation, request, conversation_id
-                    )
-            
-            # If no specific Navigation ID, use AI to help
-            detail_prompt = f"""Help with Navigation details for: "{request.message}"
-            
+        # Extract Navigation ID from message if present
+        Navigation_id = self._extract_Navigation_id(request.message)
+        
+        if Navigation_id and db is not None:
+            product = await Projectservice(db).get_product_by_id(Navigation_id)
+            if product:
+                return await self._generate_Navigation_details_response(
+                    product, request, conversation_id
+                )
+        
+        # If no specific Navigation ID, use AI to help
+        detail_prompt = f"""Help with Navigation details for: "{request.message}"
+        
 As a luxury Indoor Navigation expert, provide guidance on:
 1. What specific Navigation information they might need
 2. How to find detailed specifications
@@ -152,39 +154,34 @@ As a luxury Indoor Navigation expert, provide guidance on:
 4. Authentication and quality factors
 
 Be helpful and informative."""
-            
-            groq_request = AIRequest(
-                message=detail_prompt,
-                interaction_type="Navigation_details",
-                user_id=request.user_id,
-                conversation_id=conversation_id
-            )
-            
-            ai_response = await self.groq_client.process_request(groq_request)
-            
-            return AIResponse(
-                message=ai_response.message,
-                interaction_type=request.interaction_type,
-                conversation_id=conversation_id,
-                confidence=ai_response.confidence,
-                model_used="groq",
-                metadata={"groq_tokens": ai_response.tokens_used}
-            )
-            
-        except Exception as e:
-            logger.error(f"Navigation details error: {e}")
-            return self.create_error_response(
-                conversation_id,
-                f"Navigation details failed: {str(e)}",
-                request.interaction_type
-            )
+        
+        groq_request = AIRequest(
+            message=detail_prompt,
+            interaction_type="Navigation_details",
+            user_id=request.user_id,
+            conversation_id=conversation_id
+        )
+        
+        ai_response = await self.groq_client.process_request(groq_request)
+        
+        return AIResponse(
+            message=ai_response.message,
+            interaction_type=request.interaction_type,
+            conversation_id=conversation_id,
+            confidence=ai_response.confidence,
+            model_used="groq",
+            metadata={
+                "groq_tokens": ai_response.tokens_used,
+                "estimated_tokens": (ai_response.metadata or {}).get("estimated_tokens", False)
+            }
+        )
     
+    @returns_error_response("General Navigation query")
     async def _handle_general_Navigation_query(self, request: AIRequest, conversation_id: str) -> AIResponse:
         """Handle general Navigation queries."""
-        try:
-            # Build context-aware prompt
-            general_prompt = f"""Answer this Navigation-related question: "{request.message}"
-            
+        # Build context-aware prompt
+        general_prompt = f"""Answer this Navigation-related question: "{request.message}"
+        
 As AIBIN's Navigation expert, provide helpful information about:
 - Navigation categories and types
 - Luxury brand knowledge
@@ -193,42 +190,44 @@ As AIBIN's Navigation expert, provide helpful information about:
 - General Navigation information
 
 Be conversational, helpful, and knowledgeable."""
-            
-            groq_request = AIRequest(
-                message=general_prompt,
-                interaction_type="general_chat",
-                user_id=request.user_id,
-                conversation_id=conversation_id
-            )
-            
-            ai_response = await self.groq_client.process_request(groq_request)
-            
-            return AIResponse(
-                message=ai_response.message,
-                interaction_type=request.interaction_type,
-                conversation_id=conversation_id,
-                confidence=ai_response.confidence,
-                model_used="groq",
-                metadata={"groq_tokens": ai_response.tokens_used}
-            )
-            
-        except Exception as e:
-            logger.error(f"General Navigation query error: {e}")
-            return self.create_error_response(
-                conversation_id,
-                f"General Navigation query failed: {str(e)}",
-                request.interaction_type
-            )
+        
+        groq_request = AIRequest(
+            message=general_prompt,
+            interaction_type="general_chat",
+            user_id=request.user_id,
+            conversation_id=conversation_id
+        )
+        
+        ai_response = await self.groq_client.process_request(groq_request)
+        
+        return AIResponse(
+            message=ai_response.message,
+            interaction_type=request.interaction_type,
+            conversation_id=conversation_id,
+            confidence=ai_response.confidence,
+            model_used="groq",
+            metadata={
+                "groq_tokens": ai_response.tokens_used,
+                "estimated_tokens": (ai_response.metadata or {}).get("estimated_tokens", False)
+            }
+        )
     
-    async def _search_Projects(self, search_query: str) -> List[Navigation]:
-        """Search Projects using the Navigation service."""
+    async def _search_Projects(self, search_query: str, db: Optional[AsyncSession]) -> List[Product]:
+        """Search Projects semantically, falling back to a substring search via the Navigation service."""
+        if db is None:
+            return []
+        
         try:
-            query = self.Navigation_service.get_Projects_query(
+            Projects = await self._semantic_search_Projects(search_query, db)
+            if Projects:
+                return Projects
+            
+            query = Projectservice(db).get_Projects_query(
                 search_query=search_query,
                 status=Projectstatus.ACTIVE
             )
             
-            result = await self.db.execute(query.limit(10))
+            result = await db.execute(query.limit(10))
             Projects = result.scalars().all()
             
             return list(Projects)
@@ -237,26 +236,68 @@ Be conversational, helpful, and knowledgeable."""
             logger.error(f"Navigation search error: {e}")
             return []
     
+    async def _semantic_search_Projects(self, search_query: str, db: AsyncSession) -> List[Product]:
+        """Rank Projects by embedding similarity; empty when the index is unavailable or nothing matches."""
+        if not settings.EMBEDDING_INDEX_ENABLED:
+            return []
+        
+        index = get_embedding_index()
+        if not index.ready:
+            return []
+        
+        matches = index.search(search_query, k=10)
+        if not matches:
+            return []
+        
+        ranked_ids = [product_id for product_id, _ in matches]
+        result = await db.execute(
+            select(Product).where(
+                and_(
+                    Product.id.in_(ranked_ids),
+                    Product.is_deleted == False,
+                    Product.status == Projectstatus.ACTIVE
+                )
+            )
+        )
+        by_id = {product.id: product for product in result.scalars().all()}
+        return [by_id[product_id] for product_id in ranked_ids if product_id in by_id]
+    
     async def _generate_Navigation_details_response(
         self, 
-        Navigation: Navigation, 
+        product: Product, 
         request: AIRequest, 
         conversation_id: str
     ) -> AIResponse:
         """Generate detailed Navigation information response."""
         try:
-            # Use Groq to generate enhanced Navigation description
+            # Serve the summary kept fresh by the background refresh job
+            if product.has_fresh_ai_summary:
+                return AIResponse(
+                    message=product.ai_summary,
+                    interaction_type=request.interaction_type,
+                    conversation_id=conversation_id,
+                    confidence=0.9,
+                    model_used="database",
+                    metadata={
+                        "Navigation_id": str(product.id),
+                        "Navigation_name": product.name,
+                        "Navigation_price": product.price,
+                        "summary_source": "stored"
+                    }
+                )
+            
+            # Summary missing or stale - fall back to live generation with Groq
             Navigation_data = {
-                "name": Navigation.name,
-                "price": Navigation.price,
-                "category": Navigation.category.name if Navigation.category else None,
-                "description": Navigation.description,
-                "condition": Navigation.condition.value if Navigation.condition else None,
-                "quantity": Navigation.quantity,
-                "is_featured": Navigation.is_featured
+                "name": product.name,
+                "price": product.price,
+                "category": product.category.name if product.category else None,
+                "description": product.description,
+                "condition": product.condition.value if product.condition else None,
+                "quantity": product.quantity,
+                "is_featured": product.is_featured
             }
             
-            summary = await self.groq_client.generate_Navigation_summary(Navigation_data)
+            summary = await self.groq_client.generate_product_summary(Navigation_data)
             
             return AIResponse(
                 message=summary,
@@ -265,9 +306,10 @@ Be conversational, helpful, and knowledgeable."""
                 confidence=0.9,
                 model_used="groq+database",
                 metadata={
-                    "Navigation_id": str(Navigation.id),
-                    "Navigation_name": Navigation.name,
-                    "Navigation_price": Navigation.price
+                    "Navigation_id": str(product.id),
+                    "Navigation_name": product.name,
+                    "Navigation_price": product.price,
+                    "summary_source": "live"
                 }
             )
             
@@ -294,14 +336,16 @@ Be conversational, helpful, and knowledgeable."""
         except Exception:
             return None
     
-    async def health_check(self) -> Dict[str, Any]:
+    async def health_check(self, db: Optional[AsyncSession] = None) -> Dict[str, Any]:
         """Check the health of the Navigation agent."""
         try:
             groq_health = await self.groq_client.health_check()
             
-            # Test database connection
-            db_test = await self.db.execute(select(Navigation).limit(1))
-            db_healthy = db_test is not None
+            # Test database connection when a session is provided
+            db_healthy = True
+            if db is not None:
+                db_test = await db.execute(select(Product).limit(1))
+                db_healthy = db_test is not None
             
             return {
                 "status": "healthy" if all([
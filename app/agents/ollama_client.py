@@ -5,29 +5,38 @@ Handles multimodal interactions using LangChain-Ollama integration.
 
 import asyncio
 import logging
+from pathlib import Path
 from typing import Dict, Any, Optional, List
 from datetime import datetime
-import base64
 
 from langchain_ollama import ChatOllama
-from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
+from langchain_core.messages import HumanMessage, SystemMessage
 
-from .base_agent import BaseAgent
+from .llm_client import LLMClient
+from .base_agent import returns_error_response
+from .visual_cache import VisualCacheEntry, VisualResultCache, build_prompt_key, content_digest
 from ..schemas.ai_schemas import AIRequest, AIResponse, VisualAnalysisRequest, VisualAnalysisResponse, ConversationMessage
 from ..config.config import settings
+from ..utils.uploads import encode_base64, strip_data_url
 
 
 logger = logging.getLogger(__name__)
 
 
-class OllamaClient(BaseAgent):
+class OllamaClient(LLMClient):
     """
     Ollama client for multimodal interactions.
     Handles both text and image processing using LangChain-Ollama.
     """
     
     def __init__(self):
-        super().__init__("ollama_client")
+        super().__init__(
+            "ollama_client",
+            settings.OLLAMA_MODEL,
+            settings.OLLAMA_TEMPERATURE,
+            max_concurrency=settings.OLLAMA_MAX_CONCURRENCY,
+            max_queue=settings.OLLAMA_MAX_QUEUE
+        )
         
         # Simplified Ollama client initialization - no base_url needed
         # LangChain-Ollama connects to local Ollama automatically
@@ -36,161 +45,250 @@ class OllamaClient(BaseAgent):
             temperature=settings.OLLAMA_TEMPERATURE,
             timeout=settings.OLLAMA_TIMEOUT
         )
+        self.probe_client = self.client.model_copy(update={"num_predict": 1})
+        self.visual_cache: Optional[VisualResultCache] = (
+            VisualResultCache() if settings.VISUAL_CACHE_ENABLED else None
+        )
         
         logger.info(f"Initialized Ollama client with model: {settings.OLLAMA_MODEL}")
     
-    async def process_request(self, request: AIRequest) -> AIResponse:
-        """Process request using Ollama."""
+    @returns_error_response("Ollama processing")
+    async def process_request(self, request: AIRequest, history_content: Optional[str] = None) -> AIResponse:
+        """
+        Process request using Ollama.
+        
+        Args:
+            request: AI request to process
+            history_content: Optional user message to record instead of the prompt
+        """
         async with self.track_request(request):
-            try:
-                if not await self.validate_request(request):
-                    return self.create_error_response(
-                        self.get_conversation_id(request),
-                        "Invalid request format",
-                        request.interaction_type
-                    )
-                
-                conversation_id = self.get_conversation_id(request)
-                
-                # Handle visual analysis requests
-                if isinstance(request, VisualAnalysisRequest):
-                    return await self._process_visual_analysis(request, conversation_id)
-                
-                # Build message history for text requests
-                messages = await self._build_message_history(conversation_id, request)
-                
-                # Track start time
-                start_time = datetime.utcnow()
-                
-                # Generate response - simplified without custom callbacks
-                response = await self.client.ainvoke(messages)
-                
-                # Calculate processing time
-                processing_time = (datetime.utcnow() - start_time).total_seconds()
-                
-                # Extract response content
-                response_content = response.content if hasattr(response, 'content') else str(response)
-                
-                # Update conversation history
-                self.add_to_conversation(
-                    conversation_id,
-                    ConversationMessage(role="user", content=request.message)
-                )
-                self.add_to_conversation(
-                    conversation_id,
-                    ConversationMessage(role="assistant", content=response_content)
-                )
-                
-                return AIResponse(
-                    message=response_content,
-                    interaction_type=request.interaction_type,
-                    conversation_id=conversation_id,
-                    confidence=0.80,
-                    processing_time=processing_time,
-                    model_used=settings.OLLAMA_MODEL,
-                    metadata={
-                        "ollama_model": settings.OLLAMA_MODEL,
-                        "temperature": settings.OLLAMA_TEMPERATURE,
-                        "multimodal_capable": True
-                    }
-                )
-                
-            except Exception as e:
-                logger.error(f"Ollama processing error: {e}")
+            if not await self.validate_request(request):
                 return self.create_error_response(
                     self.get_conversation_id(request),
-                    f"Ollama processing error: {str(e)}",
+                    "Invalid request format",
                     request.interaction_type
                 )
-    
-    async def _process_visual_analysis(self, request: VisualAnalysisRequest, conversation_id: str) -> VisualAnalysisResponse:
-        """Process visual analysis request with image."""
-        try:
-            # Create multimodal message with image
-            messages = [
-                SystemMessage(content="You are AIBIN's visual analysis assistant. Analyze images and provide detailed descriptions, focusing on luxury Projects, style, and key features."),
-                HumanMessage(
-                    content=[
-                        {
-                            "type": "text",
-                            "text": request.message
-                        },
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{request.image_data}"
-                            }
-                        }
-                    ]
-                )
-            ]
             
+            conversation_id = self.get_conversation_id(request)
+            
+            # Handle visual analysis requests
+            if isinstance(request, VisualAnalysisRequest):
+                return await self._process_visual_analysis(request, conversation_id)
+            
+            # Build message history for text requests
+            messages = await self._build_message_history(conversation_id, request)
+            
+            # Track start time
             start_time = datetime.utcnow()
-            response = await self.client.ainvoke(messages)
+            
+            # Generate response, served from the response cache when possible
+            response = await self.invoke_llm(messages, priority=self.get_priority(request))
+            
+            # Calculate processing time
             processing_time = (datetime.utcnow() - start_time).total_seconds()
             
+            # Extract response content
             response_content = response.content if hasattr(response, 'content') else str(response)
             
             # Update conversation history
-            self.add_to_conversation(
+            await self.add_to_conversation(
                 conversation_id,
-                ConversationMessage(role="user", content=f"[IMAGE] {request.message}")
+                ConversationMessage(role="user", content=history_content or request.message)
             )
-            self.add_to_conversation(
+            await self.add_to_conversation(
                 conversation_id,
                 ConversationMessage(role="assistant", content=response_content)
             )
             
-            return VisualAnalysisResponse(
+            # Token usage as reported by the model
+            tokens_used, estimated_tokens = self.get_token_usage(response, request.message, response_content)
+            self.total_tokens_used += tokens_used
+            
+            return AIResponse(
                 message=response_content,
-                interaction_type="visual_analysis",
+                interaction_type=request.interaction_type,
                 conversation_id=conversation_id,
                 confidence=0.80,
+                tokens_used=tokens_used,
                 processing_time=processing_time,
                 model_used=settings.OLLAMA_MODEL,
-                analysis_results={
-                    "image_processed": True,
-                    "model_used": settings.OLLAMA_MODEL,
-                    "processing_time": processing_time
-                },
                 metadata={
-                    "multimodal_processing": True,
-                    "image_analysis": True
+                    "ollama_model": settings.OLLAMA_MODEL,
+                    "temperature": settings.OLLAMA_TEMPERATURE,
+                    "multimodal_capable": True,
+                    "estimated_tokens": estimated_tokens
                 }
             )
-            
-        except Exception as e:
-            logger.error(f"Visual analysis error: {e}")
-            return VisualAnalysisResponse(
-                message=f"I apologize, but I couldn't analyze the image: {str(e)}",
-                interaction_type="visual_analysis",
-                conversation_id=conversation_id,
-                confidence=0.0,
-                analysis_results={"error": str(e)},
-                metadata={"error": True, "error_message": str(e)}
-            )
     
-    async def _build_message_history(self, conversation_id: str, request: AIRequest) -> List:
-        """Build message history for LLM context."""
-        messages = []
+    @returns_error_response("Visual analysis")
+    async def _process_visual_analysis(self, request: VisualAnalysisRequest, conversation_id: str) -> VisualAnalysisResponse:
+        """Process visual analysis request with image."""
+        digest = await self.get_image_digest(request) if self.visual_cache else None
+        if digest:
+            entry, distance = self.visual_cache.get(
+                self._visual_prompt_key(request),
+                digest,
+                request.image_dhash
+            )
+            if entry is not None:
+                return await self._visual_cache_response(request, entry, distance, conversation_id)
         
-        # Add system message
-        system_prompt = self._get_system_prompt(request.interaction_type)
-        messages.append(SystemMessage(content=system_prompt))
+        image_base64 = await self._get_image_base64(request)
         
-        # Add conversation history
-        if settings.ENABLE_CONVERSATION_CONTEXT:
-            history = self.get_conversation_history(conversation_id)
-            for msg in history[-5:]:  # Last 5 messages for context
-                if msg.role == "user":
-                    messages.append(HumanMessage(content=msg.content))
-                elif msg.role == "assistant":
-                    messages.append(AIMessage(content=msg.content))
+        # Create multimodal message with image; plain base64 (not a data URL)
+        # is handed to the Ollama integration without further string copies
+        messages = [
+            SystemMessage(content="You are AIBIN's visual analysis assistant. Analyze images and provide detailed descriptions, focusing on luxury Projects, style, and key features."),
+            HumanMessage(
+                content=[
+                    {
+                        "type": "text",
+                        "text": request.message
+                    },
+                    {
+                        "type": "image_url",
+                        "image_url": image_base64
+                    }
+                ]
+            )
+        ]
+        
+        start_time = datetime.utcnow()
+        response = await self.invoke_llm(messages, priority=self.get_priority(request))
+        processing_time = (datetime.utcnow() - start_time).total_seconds()
+        
+        response_content = response.content if hasattr(response, 'content') else str(response)
+        
+        # Update conversation history
+        await self.add_to_conversation(
+            conversation_id,
+            ConversationMessage(role="user", content=f"[IMAGE] {request.message}")
+        )
+        await self.add_to_conversation(
+            conversation_id,
+            ConversationMessage(role="assistant", content=response_content)
+        )
         
-        # Add current message
-        messages.append(HumanMessage(content=request.message))
+        tokens_used, estimated_tokens = self.get_token_usage(response, request.message, response_content)
+        self.total_tokens_used += tokens_used
         
-        return messages
+        if digest:
+            self.visual_cache.set(
+                self._visual_prompt_key(request),
+                digest,
+                request.image_dhash,
+                response_content,
+                processing_time
+            )
+        
+        return VisualAnalysisResponse(
+            message=response_content,
+            interaction_type="visual_analysis",
+            conversation_id=conversation_id,
+            confidence=0.80,
+            tokens_used=tokens_used,
+            processing_time=processing_time,
+            model_used=settings.OLLAMA_MODEL,
+            analysis_results={
+                "image_processed": True,
+                "model_used": settings.OLLAMA_MODEL,
+                "processing_time": processing_time
+            },
+            metadata={
+                "multimodal_processing": True,
+                "image_analysis": True,
+                "estimated_tokens": estimated_tokens
+            }
+        )
+    
+    def _visual_prompt_key(self, request: VisualAnalysisRequest) -> str:
+        return build_prompt_key(settings.OLLAMA_MODEL, request.analysis_type, request.message)
+    
+    async def get_image_digest(self, request: VisualAnalysisRequest) -> Optional[str]:
+        """Get the exact content hash of the request image as uploaded, hashed off the event loop."""
+        if request.image_digest:
+            return request.image_digest
+        if request.image_path:
+            image = Path(request.image_path)
+        else:
+            image = request.image_bytes if request.image_bytes is not None else strip_data_url(request.image_data or "")
+        if not image:
+            return None
+        return await asyncio.to_thread(content_digest, image)
+    
+    async def get_exact_visual_analysis(
+        self,
+        request: VisualAnalysisRequest,
+        conversation_id: str
+    ) -> Optional[VisualAnalysisResponse]:
+        """
+        Answer from the visual cache when this exact image was analyzed with this prompt.
+        Needs only the request's `image_digest`, so callers can check before decoding the image.
+        """
+        if not self.visual_cache or not request.image_digest:
+            return None
+        entry = self.visual_cache.get_exact(self._visual_prompt_key(request), request.image_digest)
+        if entry is None:
+            return None
+        return await self._visual_cache_response(request, entry, 0, conversation_id)
+    
+    async def _visual_cache_response(
+        self,
+        request: VisualAnalysisRequest,
+        entry: VisualCacheEntry,
+        distance: int,
+        conversation_id: str
+    ) -> VisualAnalysisResponse:
+        """Answer with a cached visual analysis for the same or a near-duplicate image."""
+        await self.add_to_conversation(
+            conversation_id,
+            ConversationMessage(role="user", content=f"[IMAGE] {request.message}")
+        )
+        await self.add_to_conversation(
+            conversation_id,
+            ConversationMessage(role="assistant", content=entry.message)
+        )
+        
+        match = "exact" if distance == 0 else "near"
+        return VisualAnalysisResponse(
+            message=entry.message,
+            interaction_type="visual_analysis",
+            conversation_id=conversation_id,
+            confidence=0.80,
+            tokens_used=0,
+            processing_time=0.0,
+            model_used=settings.OLLAMA_MODEL,
+            analysis_results={
+                "image_processed": True,
+                "model_used": settings.OLLAMA_MODEL,
+                "processing_time": entry.processing_time
+            },
+            metadata={
+                "multimodal_processing": True,
+                "image_analysis": True,
+                "visual_cache": {"hit": match, "distance": distance}
+            }
+        )
+    
+    async def _get_image_base64(self, request: VisualAnalysisRequest) -> str:
+        """Get the request image as base64, encoding raw upload bytes or files off the event loop."""
+        if request.image_path:
+            return await asyncio.to_thread(encode_base64, request.image_path)
+        if request.image_bytes is not None:
+            return await asyncio.to_thread(encode_base64, request.image_bytes)
+        if request.image_data:
+            return strip_data_url(request.image_data)
+        raise ValueError("Visual analysis requires image data")
+    
+    async def _build_message_history(self, conversation_id: str, request: AIRequest) -> List:
+        """Build the token-budgeted prompt for LLM context."""
+        # History is packed under the interaction's token budget; older turns come from the rolling summary
+        return await self.context_window.build_messages(
+            conversation_id,
+            self._get_system_prompt(request.interaction_type),
+            request.message,
+            request.interaction_type
+        )
     
     def _get_system_prompt(self, interaction_type: str) -> str:
         """Get system prompt based on interaction type."""
@@ -227,17 +325,33 @@ class OllamaClient(BaseAgent):
         
         return prompts.get(interaction_type, prompts["general_chat"])
     
+    async def get_agent_stats(self) -> Dict[str, Any]:
+        """Get agent statistics including visual cache metrics."""
+        stats = await super().get_agent_stats()
+        stats["visual_cache"] = (
+            self.visual_cache.get_stats() if self.visual_cache else {"enabled": False}
+        )
+        return stats
+    
+    async def cleanup(self):
+        """Cleanup client resources."""
+        await super().cleanup()
+        if self.visual_cache:
+            self.visual_cache.clear()
+    
     async def health_check(self) -> Dict[str, Any]:
-        """Check Ollama service health."""
+        """
+        Check Ollama service health with a one-token generation.
+        Called by the health prober, which runs in every worker process.
+        """
         try:
-            # Simple health check without custom callbacks
             test_messages = [
                 SystemMessage(content="You are a helpful assistant."),
                 HumanMessage(content="Hello")
             ]
             
             start_time = datetime.utcnow()
-            response = await self.client.ainvoke(test_messages)
+            response = await self.probe_llm(test_messages)
             processing_time = (datetime.utcnow() - start_time).total_seconds()
             
             return {
@@ -9,10 +9,13 @@ from datetime import datetime
 from uuid import UUID
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_
+from sqlalchemy import select, and_, or_, case
 
-from .base_agent import BaseAgent
+from .base_agent import BaseAgent, returns_error_response
 from .groq_client import GroqClient
+from .step_graph import StepGraph
+from .recommendation_scoring import RecommendationScorer, ScoredCandidates
+from .embedding_index import get_embedding_index
 from ..schemas.ai_schemas import (
     AIRequest, 
     ProductRecommendationRequest, 
@@ -21,6 +24,7 @@ from ..schemas.ai_schemas import (
 )
 from ..models.product import Product, Projectstatus
 from ..services.product_service import Projectservice
+from ..services.brand_service import BrandService
 from ..config.config import settings
 
 
@@ -33,123 +37,120 @@ class RecommendationAgent(BaseAgent):
     Focuses purely on recommendation logic and AI-powered matching.
     """
     
-    def __init__(self, db: AsyncSession):
+    def __init__(self, groq_client: Optional[GroqClient] = None):
         super().__init__("recommendation_agent")
-        self.db = db
-        self.groq_client = GroqClient()
-        self.product_service = Projectservice(db)
+        # Shared Groq client from the agent registry when available
+        self.groq_client = groq_client or GroqClient()
+        self.scorer = RecommendationScorer()
         
         logger.info("Initialized Recommendation Agent with AI-powered matching")
     
-    async def process_request(self, request: AIRequest) -> ProductRecommendationResponse:
-        """Process recommendation request."""
+    @returns_error_response("Recommendation")
+    async def process_request(
+        self, 
+        request: AIRequest, 
+        db: Optional[AsyncSession] = None
+    ) -> ProductRecommendationResponse:
+        """Process recommendation request using the per-request database session."""
         async with self.track_request(request):
-            try:
-                if not await self.validate_request(request):
-                    return self._create_error_response(
-                        self.get_conversation_id(request),
-                        "Invalid request format"
-                    )
-                
-                conversation_id = self.get_conversation_id(request)
-                
-                # Handle structured recommendation requests
-                if isinstance(request, ProductRecommendationRequest):
-                    return await self._process_structured_recommendation(request, conversation_id)
-                
-                # Convert general request to recommendation request
-                else:
-                    return await self._process_general_recommendation(request, conversation_id)
-                
-            except Exception as e:
-                logger.error(f"Recommendation error: {e}")
+            if not await self.validate_request(request):
                 return self._create_error_response(
                     self.get_conversation_id(request),
-                    f"Recommendation failed: {str(e)}"
+                    "Invalid request format"
                 )
+            
+            conversation_id = self.get_conversation_id(request)
+            
+            # Handle structured recommendation requests
+            if isinstance(request, ProductRecommendationRequest):
+                return await self._process_structured_recommendation(request, conversation_id, db)
+            
+            # Convert general request to recommendation request
+            else:
+                return await self._process_general_recommendation(request, conversation_id, db)
     
+    @returns_error_response("Structured recommendation")
     async def _process_structured_recommendation(
         self, 
         request: ProductRecommendationRequest, 
-        conversation_id: str
+        conversation_id: str,
+        db: Optional[AsyncSession]
     ) -> ProductRecommendationResponse:
         """Process structured recommendation request."""
-        try:
-            start_time = datetime.utcnow()
-            
-            # Build AI recommendation prompt
-            prompt = self._build_recommendation_prompt(request)
-            
-            # Get AI analysis
-            groq_request = AIRequest(
-                message=prompt,
-                interaction_type="product_recommendation",
-                user_id=request.user_id,
-                conversation_id=conversation_id
-            )
-            
-            ai_response = await self.groq_client.process_request(groq_request)
-            
-            # Get matching Projects
-            Projects = await self._get_matching_Projects(request)
-            
-            # Generate recommendations
-            recommendations = await self._generate_recommendations(Projects, request, ai_response.message)
-            
-            processing_time = (datetime.utcnow() - start_time).total_seconds()
-            
-            return ProductRecommendationResponse(
-                message=ai_response.message,
-                interaction_type=request.interaction_type,
-                conversation_id=conversation_id,
-                confidence=ai_response.confidence,
-                processing_time=processing_time,
-                model_used="groq+database",
-                recommendations=recommendations,
-                total_Projects_considered=len(Projects),
-                recommendation_strategy="ai_assisted_filtering",
-                metadata={
-                    "groq_tokens": ai_response.tokens_used,
-                    "filters_applied": self._get_applied_filters(request)
-                }
-            )
-            
-        except Exception as e:
-            logger.error(f"Structured recommendation error: {e}")
-            return self._create_error_response(
-                conversation_id,
-                f"Structured recommendation failed: {str(e)}"
+        start_time = datetime.utcnow()
+        
+        # Build AI recommendation prompt
+        prompt = self._build_recommendation_prompt(request)
+        
+        # Get AI analysis
+        groq_request = AIRequest(
+            message=prompt,
+            interaction_type="product_recommendation",
+            user_id=request.user_id,
+            conversation_id=conversation_id
+        )
+        
+        # AI analysis and candidate lookup run concurrently; ranking needs both
+        flow = await (
+            StepGraph("structured_recommendation")
+            .add_step("analysis", lambda: self.groq_client.process_request(groq_request), kind="llm")
+            .add_step("candidates", lambda: self._get_matching_Projects(request, db), kind="db")
+            .add_step(
+                "recommendations",
+                lambda analysis, candidates: self._generate_recommendations(candidates, request, analysis.message),
+                depends_on=("analysis", "candidates"),
+                kind="enrichment"
             )
+            .run()
+        )
+        ai_response = flow["analysis"]
+        candidates = flow["candidates"]
+        recommendations = flow["recommendations"]
+        
+        processing_time = (datetime.utcnow() - start_time).total_seconds()
+        
+        return ProductRecommendationResponse(
+            message=ai_response.message,
+            interaction_type=request.interaction_type,
+            conversation_id=conversation_id,
+            confidence=ai_response.confidence,
+            processing_time=processing_time,
+            model_used="groq+database",
+            recommendations=recommendations,
+            total_Projects_considered=candidates.total_considered,
+            recommendation_strategy="ai_assisted_filtering",
+            metadata={
+                "groq_tokens": ai_response.tokens_used,
+                "estimated_tokens": (ai_response.metadata or {}).get("estimated_tokens", False),
+                "filters_applied": self._get_applied_filters(request),
+                "step_timings": flow.get_timings()
+            }
+        )
     
+    @returns_error_response("General recommendation")
     async def _process_general_recommendation(
         self, 
         request: AIRequest, 
-        conversation_id: str
+        conversation_id: str,
+        db: Optional[AsyncSession]
     ) -> ProductRecommendationResponse:
         """Process general recommendation request."""
-        try:
-            start_time = datetime.utcnow()
-            
-            # Convert to recommendation request
-            recommendation_request = ProductRecommendationRequest(
-                message=request.message,
-                user_id=request.user_id,
-                conversation_id=conversation_id,
-                context=request.context
-            )
-            
-            # Process as structured recommendation
-            return await self._process_structured_recommendation(
-                recommendation_request, 
-                conversation_id
-            )
-            
-        except Exception as e:
-            logger.error(f"General recommendation error: {e}")
-            return self._create_error_response(
-                conversation_id,
-                f"General recommendation failed: {str(e)}"
-            )
+        start_time = datetime.utcnow()
+        
+        # Convert to recommendation request
+        recommendation_request = ProductRecommendationRequest(
+            message=request.message,
+            user_id=request.user_id,
+            conversation_id=conversation_id,
+            context=request.context
+        )
+        
+        # Process as structured recommendation
+        return await self._process_structured_recommendation(
+            recommendation_request, 
+            conversation_id,
+            db
+        )
     
     def _build_recommendation_prompt(self, request: ProductRecommendationRequest) -> str:
         """Build AI recommendation prompt."""
@@ -171,11 +172,18 @@ Focus on luxury, authenticity, and personalized matching."""
         
         return prompt
     
-    async def _get_matching_Projects(self, request: ProductRecommendationRequest) -> List[Product]:
-        """Get Projects matching recommendation criteria."""
+    async def _get_matching_Projects(
+        self, 
+        request: ProductRecommendationRequest, 
+        db: Optional[AsyncSession]
+    ) -> ScoredCandidates:
+        """Get the best-scoring Projects matching recommendation criteria."""
+        if db is None:
+            return ScoredCandidates(Projects=[], scores=[], total_considered=0)
+        
         try:
             # Use product service for consistent querying
-            query = self.product_service.get_Projects_query(
+            query = Projectservice(db).get_Projects_query(
                 category_id=None,  # We'll filter by category names if provided
                 search_query=None,
                 min_price=request.price_range.get("min") if request.price_range else None,
@@ -190,38 +198,70 @@ Focus on luxury, authenticity, and personalized matching."""
             if request.exclude_Projects:
                 query = query.where(~Product.id.in_(request.exclude_Projects))
             
-            # Limit results for recommendation processing
-            query = query.limit(settings.PRODUCT_RECOMMENDATION_LIMIT * 3)
+            # Preferred brands and semantic matches rank, they do not filter: they go to the
+            # front of the candidate pool and earn the brand_match and similarity weights,
+            # and the newest rows fill the rest so other brands can still make the list
+            preferred = []
+            if request.brand_preferences:
+                # Match on canonical brand column values (indexed)
+                brands = await BrandService(db).resolve_brand_names(request.brand_preferences)
+                if brands:
+                    request = request.model_copy(update={"brand_preferences": brands})
+                    preferred.append(Product.brand.in_(brands))
+                else:
+                    logger.info(f"No known brands in preferences {request.brand_preferences}; brand does not affect ranking")
             
-            result = await self.db.execute(query)
-            Projects = result.scalars().all()
+            similarity = self._get_semantic_candidates(request.message)
+            if similarity:
+                preferred.append(Product.id.in_(list(similarity)))
             
-            return list(Projects)
+            if preferred:
+                query = query.order_by(None).order_by(
+                    case((or_(*preferred), 0), else_=1),
+                    Product.created_at.desc()
+                )
+            
+            # Score the whole candidate pool and keep the best
+            return await self.scorer.rank(
+                db, query, request, settings.PRODUCT_RECOMMENDATION_LIMIT, similarity
+            )
             
         except Exception as e:
             logger.error(f"Product matching error: {e}")
-            return []
+            return ScoredCandidates(Projects=[], scores=[], total_considered=0)
+    
+    def _get_semantic_candidates(self, message: str) -> Dict[UUID, float]:
+        """Get product ids semantically similar to the request text, with their similarity."""
+        if not settings.EMBEDDING_INDEX_ENABLED:
+            return {}
+        
+        index = get_embedding_index()
+        if not index.ready:
+            return {}
+        
+        try:
+            return dict(index.search(message, k=settings.EMBEDDING_CANDIDATE_K))
+        except Exception as e:
+            logger.warning(f"Semantic candidate search failed: {e}")
+            return {}
     
     async def _generate_recommendations(
         self, 
-        Projects: List[Product], 
+        candidates: ScoredCandidates, 
         request: ProductRecommendationRequest,
         ai_analysis: str
     ) -> List[ProductRecommendation]:
         """Generate AI-powered product recommendations."""
         recommendations = []
         
-        for product in Projects[:settings.PRODUCT_RECOMMENDATION_LIMIT]:
+        for product, score in zip(candidates.Projects, candidates.scores):
             try:
-                # Calculate recommendation confidence
-                confidence = self._calculate_recommendation_confidence(product, request)
+                # Scores are unbounded for ranking; confidence is capped at 1.0
+                confidence = min(score, 1.0)
                 
                 # Generate AI-powered reason
                 reason = await self._generate_recommendation_reason(product, request, ai_analysis)
                 
-                # Extract brand information
-                brand = self._extract_brand_from_product(product)
-                
                 recommendation = ProductRecommendation(
                     product_id=product.id,
                     product_name=product.name,
@@ -229,7 +269,7 @@ Focus on luxury, authenticity, and personalized matching."""
                     confidence=confidence,
                     reason=reason,
                     category=product.category.name if product.category else None,
-                    brand=brand,
+                    brand=product.brand,
                     image_url=None  # TODO: Add when image system is ready
                 )
                 
@@ -244,37 +284,6 @@ Focus on luxury, authenticity, and personalized matching."""
         
         return recommendations
     
-    def _calculate_recommendation_confidence(
-        self, 
-        product: Product, 
-        request: ProductRecommendationRequest
-    ) -> float:
-        """Calculate recommendation confidence score."""
-        confidence = 0.6  # Base confidence for recommendations
-        
-        # Price range matching
-        if request.price_range:
-            min_price = request.price_range.get("min", 0)
-            max_price = request.price_range.get("max", float('inf'))
-            
-            if min_price <= product.price <= max_price:
-                confidence += 0.2
-        
-        # Stock availability bonus
-        if product.quantity > 0:
-            confidence += 0.1
-        
-        # Featured product bonus
-        if product.is_featured:
-            confidence += 0.1
-        
-        # Category preference matching
-        if request.category_preferences and product.category:
-            if product.category.name in request.category_preferences:
-                confidence += 0.15
-        
-        return min(confidence, 1.0)
-    
     async def _generate_recommendation_reason(
         self, 
         product: Product, 
@@ -328,22 +337,6 @@ Focus on luxury, authenticity, and personalized matching."""
         else:
             return style_reasons[1]
     
-    def _extract_brand_from_product(self, product: Product) -> Optional[str]:
-        """Extract brand from product information."""
-        luxury_brands = [
-            "Louis Vuitton", "Chanel", "Hermès", "Gucci", "Prada", 
-            "Dior", "Cartier", "Rolex", "Versace", "Armani",
-            "Balenciaga", "Saint Laurent", "Bottega Veneta"
-        ]
-        
-        product_text = f"{product.name} {product.description or ''}".lower()
-        
-        for brand in luxury_brands:
-            if brand.lower() in product_text:
-                return brand
-        
-        return None
-    
     def _get_applied_filters(self, request: ProductRecommendationRequest) -> Dict[str, Any]:
         """Get applied filters for metadata."""
         filters = {}
@@ -376,14 +369,37 @@ Focus on luxury, authenticity, and personalized matching."""
             metadata={"error": True, "error_message": error_message}
         )
     
-    async def health_check(self) -> Dict[str, Any]:
+    def build_error_response(
+        self,
+        request: AIRequest,
+        conversation_id: Optional[str],
+        description: str,
+        error: Exception
+    ) -> ProductRecommendationResponse:
+        """Create the recommendation-shaped error response for a failed handler."""
+        return self._create_error_response(
+            conversation_id or self.get_conversation_id(request),
+            f"{description} failed: {str(error)}"
+        )
+    
+    async def get_agent_stats(self) -> Dict[str, Any]:
+        """Get agent statistics including scoring metrics."""
+        stats = await super().get_agent_stats()
+        stats["scoring"] = self.scorer.get_stats()
+        if settings.EMBEDDING_INDEX_ENABLED:
+            stats["embedding_index"] = get_embedding_index().get_stats()
+        return stats
+    
+    async def health_check(self, db: Optional[AsyncSession] = None) -> Dict[str, Any]:
         """Check the health of the recommendation agent."""
         try:
             groq_health = await self.groq_client.health_check()
             
-            # Test database connection
-            db_test = await self.db.execute(select(Product).limit(1))
-            db_healthy = db_test is not None
+            # Test database connection when a session is provided
+            db_healthy = True
+            if db is not None:
+                db_test = await db.execute(select(Product).limit(1))
+                db_healthy = db_test is not None
             
             return {
                 "status": "healthy" if all([
@@ -0,0 +1,234 @@
+"""
+Vectorized recommendation scoring for AIBIN AI agents.
+Scores large candidate sets in one NumPy pass and selects the top-k.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, List
+
+import numpy as np
+from sqlalchemy import Select, func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from ..models.product import Product
+from ..models.category import Category
+from ..schemas.ai_schemas import ProductRecommendationRequest
+from ..config.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+@dataclass
+class ScoringWeights:
+    """Additive score weights; the base score applies to every candidate."""
+    base: float = 0.6
+    price_match: float = 0.2
+    in_stock: float = 0.1
+    featured: float = 0.1
+    category_match: float = 0.15
+    brand_match: float = 0.1
+    recency: float = 0.1
+    similarity: float = 0.3
+
+    @classmethod
+    def from_settings(cls) -> "ScoringWeights":
+        return cls(
+            price_match=settings.RECOMMENDATION_WEIGHT_PRICE,
+            in_stock=settings.RECOMMENDATION_WEIGHT_STOCK,
+            featured=settings.RECOMMENDATION_WEIGHT_FEATURED,
+            category_match=settings.RECOMMENDATION_WEIGHT_CATEGORY,
+            brand_match=settings.RECOMMENDATION_WEIGHT_BRAND,
+            recency=settings.RECOMMENDATION_WEIGHT_RECENCY,
+            similarity=settings.RECOMMENDATION_WEIGHT_SIMILARITY
+        )
+
+
+@dataclass
+class CandidateFeatures:
+    """Column-oriented features for a candidate set, one array entry per product."""
+    ids: List[Any]
+    price: np.ndarray
+    quantity: np.ndarray
+    featured: np.ndarray
+    category_match: np.ndarray
+    brand_match: np.ndarray
+    created_at: np.ndarray
+    similarity: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+@dataclass
+class ScoredCandidates:
+    """Top-ranked products with their scores, best first."""
+    Projects: List[Product]
+    scores: List[float]
+    total_considered: int
+
+
+class RecommendationScorer:
+    """
+    Ranks recommendation candidates with a vectorized scoring function.
+
+    Only the feature columns are fetched for the candidate pool (up to
+    RECOMMENDATION_CANDIDATE_LIMIT rows); category and brand matches are
+    computed in the same SQL query, brand against the precomputed brand
+    column. Scores are computed for the whole pool with array operations,
+    the top-k are picked with `argpartition`, and full Product rows are
+    loaded for those k only.
+    """
+
+    def __init__(self, weights: Optional[ScoringWeights] = None):
+        self.weights = weights or ScoringWeights.from_settings()
+
+        # Metrics
+        self.rankings = 0
+        self.candidates_scored = 0
+        self.last_scoring_time: Optional[float] = None
+
+    def build_feature_query(self, base_query: Select, request: ProductRecommendationRequest) -> Select:
+        """Turn a filtered Product query into a query for the scoring features."""
+        category_match = (
+            Category.name.in_(request.category_preferences)
+            if request.category_preferences else literal(False)
+        )
+        brand_match = (
+            Product.brand.in_(request.brand_preferences)
+            if request.brand_preferences else literal(False)
+        )
+
+        return (
+            base_query
+            .with_only_columns(
+                Product.id,
+                Product.price,
+                Product.quantity,
+                Product.is_featured,
+                func.coalesce(category_match, False).label("category_match"),
+                func.coalesce(brand_match, False).label("brand_match"),
+                func.extract("epoch", Product.created_at).label("created_at")
+            )
+            .outerjoin(Category, Category.id == Product.category_id)
+            .limit(settings.RECOMMENDATION_CANDIDATE_LIMIT)
+        )
+
+    async def load_features(
+        self,
+        db: AsyncSession,
+        base_query: Select,
+        request: ProductRecommendationRequest,
+        similarity: Optional[Dict[Any, float]] = None
+    ) -> CandidateFeatures:
+        """Fetch candidate features into arrays; `similarity` maps product ids to semantic match scores."""
+        result = await db.execute(self.build_feature_query(base_query, request))
+        rows = result.all()
+
+        if not rows:
+            empty = np.empty(0)
+            return CandidateFeatures([], empty, empty, empty, empty, empty, empty, empty)
+
+        ids, price, quantity, featured, category_match, brand_match, created_at = zip(*rows)
+        return CandidateFeatures(
+            ids=list(ids),
+            price=np.asarray(price, dtype=np.float64),
+            quantity=np.asarray(quantity, dtype=np.int64),
+            featured=np.asarray(featured, dtype=bool),
+            category_match=np.asarray(category_match, dtype=bool),
+            brand_match=np.asarray(brand_match, dtype=bool),
+            created_at=np.asarray(created_at, dtype=np.float64),
+            similarity=np.fromiter(
+                ((similarity or {}).get(product_id, 0.0) for product_id in ids),
+                dtype=np.float64,
+                count=len(ids)
+            )
+        )
+
+    def score(self, features: CandidateFeatures, request: ProductRecommendationRequest) -> np.ndarray:
+        """Score every candidate in one pass. Scores are not clipped, so they stay comparable for ranking."""
+        weights = self.weights
+        scores = np.full(len(features), weights.base, dtype=np.float64)
+
+        if request.price_range:
+            min_price = request.price_range.get("min", 0.0)
+            max_price = request.price_range.get("max", np.inf)
+            scores += weights.price_match * ((features.price >= min_price) & (features.price <= max_price))
+
+        scores += weights.in_stock * (features.quantity > 0)
+        scores += weights.featured * features.featured
+        scores += weights.category_match * features.category_match
+        scores += weights.brand_match * features.brand_match
+        scores += weights.similarity * features.similarity
+
+        if weights.recency and len(features):
+            # Exponential decay: a product RECOMMENDATION_RECENCY_HALF_LIFE_DAYS old gets half the weight
+            age_days = np.maximum(time.time() - features.created_at, 0.0) / SECONDS_PER_DAY
+            scores += weights.recency * np.exp2(-age_days / settings.RECOMMENDATION_RECENCY_HALF_LIFE_DAYS)
+
+        return scores
+
+    @staticmethod
+    def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """Indices of the k highest scores, best first."""
+        k = min(k, len(scores))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        if k < len(scores):
+            # O(n) selection of the k best, then sort only those
+            candidates = np.argpartition(-scores, k - 1)[:k]
+        else:
+            candidates = np.arange(len(scores))
+        return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+    async def rank(
+        self,
+        db: AsyncSession,
+        base_query: Select,
+        request: ProductRecommendationRequest,
+        k: int,
+        similarity: Optional[Dict[Any, float]] = None
+    ) -> ScoredCandidates:
+        """Score the candidate pool and load the top-k Projects."""
+        features = await self.load_features(db, base_query, request, similarity)
+
+        started = time.perf_counter()
+        scores = self.score(features, request)
+        best = self.top_k(scores, k)
+        self.last_scoring_time = time.perf_counter() - started
+        self.rankings += 1
+        self.candidates_scored += len(features)
+
+        if len(best) == 0:
+            return ScoredCandidates(Projects=[], scores=[], total_considered=len(features))
+
+        best_ids = [features.ids[i] for i in best]
+        result = await db.execute(
+            select(Product)
+            .options(selectinload(Product.category))
+            .where(Product.id.in_(best_ids))
+        )
+        by_id = {product.id: product for product in result.scalars().all()}
+
+        Projects, product_scores = [], []
+        for index, product_id in zip(best, best_ids):
+            product = by_id.get(product_id)
+            if product is not None:
+                Projects.append(product)
+                product_scores.append(float(scores[index]))
+
+        return ScoredCandidates(Projects=Projects, scores=product_scores, total_considered=len(features))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get scoring statistics."""
+        return {
+            "rankings": self.rankings,
+            "candidates_scored": self.candidates_scored,
+            "last_scoring_time": self.last_scoring_time,
+            "candidate_limit": settings.RECOMMENDATION_CANDIDATE_LIMIT
+        }
@@ -0,0 +1,108 @@
+"""
+Agent registry for AIBIN AI agents.
+Holds the process-wide LLM clients and agents so they are built once per worker.
+"""
+
+import logging
+from typing import Optional, List, Tuple
+
+from .base_agent import BaseAgent
+from .backend_router import BackendRouter
+from .fast_path import FastPathRouter
+from .conversation_store import get_conversation_store, close_conversation_store
+from .groq_client import GroqClient
+from .ollama_client import OllamaClient
+from .navigation_agent import NavigationAgent
+from .recommendation_agent import RecommendationAgent
+from .voice_agent import VoiceAgent
+
+
+logger = logging.getLogger(__name__)
+
+
+class AgentRegistry:
+    """
+    Process-wide container for long-lived AI clients and agents.
+    Agents share the LLM clients, so each worker keeps one set of
+    LangChain chat models and their HTTP connection pools.
+    """
+
+    def __init__(self):
+        # Shared conversation history for all agents
+        self.conversation_store = get_conversation_store()
+        
+        # Core AI clients
+        self.groq_client = GroqClient()
+        try:
+            self.ollama_client: Optional[OllamaClient] = OllamaClient()
+        except Exception as e:
+            logger.warning(f"Ollama client initialization failed: {e}")
+            self.ollama_client = None
+
+        # Routes text chat between the clients by health and latency
+        self.backend_router = BackendRouter({
+            "groq_client": self.groq_client,
+            "ollama_client": self.ollama_client
+        })
+
+        # Answers trivial and structured queries without an LLM call
+        self.fast_path_router = FastPathRouter()
+
+        # Specialized agents reuse the shared clients
+        self.product_agent = NavigationAgent(groq_client=self.groq_client)
+        self.recommendation_agent = RecommendationAgent(groq_client=self.groq_client)
+        self.voice_agent = VoiceAgent(ollama_client=self.ollama_client)
+
+        logger.info("Agent registry initialized with shared Groq/Ollama clients")
+
+    def get_agents(self) -> List[Tuple[str, BaseAgent]]:
+        """Get all registered agents with their names."""
+        agents: List[Tuple[str, BaseAgent]] = [
+            ("groq_client", self.groq_client),
+            ("product_agent", self.product_agent),
+            ("recommendation_agent", self.recommendation_agent),
+            ("voice_agent", self.voice_agent)
+        ]
+
+        if self.ollama_client:
+            agents.append(("ollama_client", self.ollama_client))
+
+        return agents
+
+    async def cleanup(self):
+        """Cleanup all registered agents."""
+        for agent_name, agent in self.get_agents():
+            try:
+                await agent.cleanup()
+            except Exception as e:
+                logger.error(f"Cleanup failed for {agent_name}: {e}")
+
+        await close_conversation_store()
+
+        logger.info("Agent registry cleanup completed")
+
+
+_registry: Optional[AgentRegistry] = None
+
+
+def init_agent_registry() -> AgentRegistry:
+    """Create the process-wide agent registry (called from the app lifespan)."""
+    global _registry
+    if _registry is None:
+        _registry = AgentRegistry()
+    return _registry
+
+
+def get_agent_registry() -> AgentRegistry:
+    """Get the agent registry, creating it lazily outside the app lifespan."""
+    if _registry is None:
+        return init_agent_registry()
+    return _registry
+
+
+async def shutdown_agent_registry():
+    """Cleanup and drop the process-wide agent registry."""
+    global _registry
+    if _registry is not None:
+        await _registry.cleanup()
+        _registry = None
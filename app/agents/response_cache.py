@@ -0,0 +1,179 @@
+"""
+LLM response cache for AIBIN AI agents.
+Caches chat model completions for repeated, deterministic prompts.
+"""
+
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Tuple
+
+from langchain_core.messages import BaseMessage, SystemMessage
+
+from ..config.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_message_text(text: str) -> str:
+    """Normalize user text so trivially different inputs share a cache entry."""
+    return " ".join(text.split()).casefold()
+
+
+def build_cache_key(model: str, temperature: float, messages: List[BaseMessage]) -> Optional[str]:
+    """
+    Build a cache key from model, temperature, system prompt, normalized
+    message and a hash of the history window.
+    Returns None when the messages cannot be cached (e.g. image content).
+    """
+    if not messages or any(not isinstance(message.content, str) for message in messages):
+        return None
+
+    system_prompt = ""
+    history = messages[:-1]
+    if isinstance(messages[0], SystemMessage):
+        system_prompt = messages[0].content
+        history = messages[1:-1]
+
+    history_hash = hashlib.sha256()
+    for message in history:
+        history_hash.update(message.type.encode("utf-8"))
+        history_hash.update(b"\x00")
+        history_hash.update(message.content.encode("utf-8"))
+        history_hash.update(b"\x01")
+
+    key = hashlib.sha256()
+    for part in (
+        model,
+        f"{temperature:.3f}",
+        system_prompt,
+        normalize_message_text(messages[-1].content),
+        history_hash.hexdigest()
+    ):
+        key.update(part.encode("utf-8"))
+        key.update(b"\x00")
+
+    return key.hexdigest()
+
+
+def mark_cache_hit(response: BaseMessage) -> BaseMessage:
+    """
+    Copy of a cached response that reports no token usage.
+    Serving it cost nothing, so it must not be charged to the user or the model budget.
+    """
+    return response.model_copy(update={
+        "usage_metadata": {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0},
+        "response_metadata": {**response.response_metadata, "cache_hit": True}
+    })
+
+
+def is_cache_hit(response: Optional[BaseMessage]) -> bool:
+    return bool(response is not None and response.response_metadata.get("cache_hit"))
+
+
+class LLMResponseCache:
+    """
+    Bounded LRU cache of LLM responses.
+    Entries expire after a TTL and the cache is capped by entry count and total bytes.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[int] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        max_temperature: Optional[float] = None
+    ):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.LLM_CACHE_TTL_SECONDS
+        self.max_entries = max_entries or settings.LLM_CACHE_MAX_ENTRIES
+        self.max_bytes = max_bytes or settings.LLM_CACHE_MAX_BYTES
+        self.max_temperature = (
+            max_temperature if max_temperature is not None else settings.LLM_CACHE_MAX_TEMPERATURE
+        )
+
+        self._entries: "OrderedDict[str, Tuple[BaseMessage, int, float]]" = OrderedDict()
+        self._total_bytes = 0
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def should_cache(self, temperature: float) -> bool:
+        """Check whether calls at this temperature are cacheable."""
+        if temperature > self.max_temperature:
+            self.skipped += 1
+            return False
+        return True
+
+    @staticmethod
+    def _entry_size(response: BaseMessage) -> int:
+        content = response.content if isinstance(response.content, str) else str(response.content)
+        return len(content.encode("utf-8"))
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry[1]
+
+    def get(self, key: str) -> Optional[BaseMessage]:
+        """Get a cached response, or None on a miss."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        response, _, expires_at = entry
+        if time.monotonic() >= expires_at:
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return mark_cache_hit(response)
+
+    def set(self, key: str, response: BaseMessage):
+        """Store a response, evicting least recently used entries beyond the caps."""
+        size = self._entry_size(response)
+        if size > self.max_bytes:
+            return
+
+        self._remove(key)
+        self._entries[key] = (response, size, time.monotonic() + self.ttl_seconds)
+        self._total_bytes += size
+
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes
+        ):
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop all cached responses."""
+        self._entries.clear()
+        self._total_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": True,
+            "entries": len(self._entries),
+            "total_bytes": self._total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups > 0 else 0.0,
+            "skipped": self.skipped,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
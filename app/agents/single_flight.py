@@ -0,0 +1,98 @@
+"""
+Single-flight request coalescing for AIBIN AI agents.
+Concurrent callers with the same key share one in-flight call.
+"""
+
+import asyncio
+import logging
+from typing import Dict, Any, Callable, Awaitable, Optional, TypeVar
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls.
+
+    The first caller for a key (the leader) starts the call as a task; callers
+    arriving while it is in flight (followers) await the same task. A cancelled
+    caller never cancels the shared call while others are still waiting on it;
+    the call is only cancelled once every waiter has gone away.
+    Followers can be given a copy of the result (e.g. one that reports no
+    token usage) so work done once is only accounted for once.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+
+        # Metrics
+        self.leaders = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.cancelled_waiters = 0
+        self.abandoned_calls = 0
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[T]],
+        follower_result: Optional[Callable[[T], T]] = None
+    ) -> T:
+        """
+        Run `fn` for `key`, or join the call already in flight for it.
+        Followers receive `follower_result(result)` when it is given.
+        """
+        task = self._in_flight.get(key)
+        is_leader = task is None
+        if is_leader:
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda done_task: self._on_done(key, done_task))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+
+        self._waiters[key] += 1
+        try:
+            result = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            self.cancelled_waiters += 1
+            if not task.done() and self._waiters.get(key, 0) <= 1 and self._in_flight.get(key) is task:
+                # Last waiter left; nobody needs the result any more
+                task.cancel()
+                self.abandoned_calls += 1
+            raise
+        finally:
+            if self._in_flight.get(key) is task and key in self._waiters:
+                self._waiters[key] -= 1
+
+        if follower_result is not None and not is_leader:
+            return follower_result(result)
+        return result
+
+    def _on_done(self, key: str, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+            self._waiters.pop(key, None)
+
+        # Retrieve the exception so unawaited failures are not reported as never retrieved
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing statistics."""
+        return {
+            "enabled": True,
+            "in_flight": len(self._in_flight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "cancelled_waiters": self.cancelled_waiters,
+            "abandoned_calls": self.abandoned_calls
+        }
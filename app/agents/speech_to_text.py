@@ -0,0 +1,335 @@
+"""
+Speech-to-text for AIBIN voice interactions.
+Pluggable local STT engines fed incrementally from streamed audio frames.
+"""
+
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Optional, List, Tuple
+
+import numpy as np
+
+from .audio_preprocessing import detect_speech
+from ..config.config import settings
+
+try:
+    import vosk
+except ImportError:  # Optional dependency; the "vosk" engine is unavailable without it
+    vosk = None
+
+try:
+    import opuslib
+except ImportError:  # Optional dependency; only PCM frames are accepted without it
+    opuslib = None
+
+
+logger = logging.getLogger(__name__)
+
+# 16-bit little-endian mono PCM
+PCM_SAMPLE_WIDTH = 2
+# Longest Opus packet duration; bounds the decode buffer
+OPUS_MAX_FRAME_MS = 120
+# Audio held back while waiting for speech: enough for the VAD noise floor and onset padding
+LEADING_SILENCE_WINDOW_SECONDS = 1.0
+
+
+class STTStream(ABC):
+    """
+    One utterance being recognized.
+
+    Audio is fed as 16-bit mono PCM at the engine's sample rate. Methods are
+    blocking (engines are CPU-bound) and are called from a worker thread.
+    """
+
+    @abstractmethod
+    def accept(self, pcm: bytes) -> str:
+        """Feed audio; returns the current hypothesis for the whole utterance so far."""
+
+    @abstractmethod
+    def finish(self) -> str:
+        """Flush the engine and return the final transcript."""
+
+
+class STTEngine(ABC):
+    """Local speech recognizer that creates one stream per utterance."""
+
+    name: str = "stt"
+
+    def __init__(self, sample_rate: int):
+        self.sample_rate = sample_rate
+
+    @abstractmethod
+    def create_stream(self) -> STTStream:
+        """Start recognizing a new utterance."""
+
+
+class _ScriptedStream(STTStream):
+    def __init__(self, words: List[str], bytes_per_word: int):
+        self._words = words
+        self._bytes_per_word = bytes_per_word
+        self._received = 0
+
+    def accept(self, pcm: bytes) -> str:
+        self._received += len(pcm)
+        return " ".join(self._words[:self._received // self._bytes_per_word])
+
+    def finish(self) -> str:
+        return " ".join(self._words) if self._received else ""
+
+
+class ScriptedSTTEngine(STTEngine):
+    """
+    Deterministic stand-in engine for tests and local development.
+
+    Ignores the audio content and "recognizes" a fixed script, revealing one
+    more word per `seconds_per_word` of audio received, so partial and final
+    transcripts are reproducible for a given stream of frames.
+    """
+
+    name = "scripted"
+
+    def __init__(
+        self,
+        sample_rate: int,
+        script: str = "show me luxury handbags",
+        seconds_per_word: float = 0.4
+    ):
+        super().__init__(sample_rate)
+        self.words = script.split()
+        self.bytes_per_word = max(1, int(sample_rate * seconds_per_word) * PCM_SAMPLE_WIDTH)
+
+    def create_stream(self) -> STTStream:
+        return _ScriptedStream(self.words, self.bytes_per_word)
+
+
+class _VoskStream(STTStream):
+    def __init__(self, model, sample_rate: int):
+        self._recognizer = vosk.KaldiRecognizer(model, sample_rate)
+        self._segments: List[str] = []
+
+    def _hypothesis(self, tail: str) -> str:
+        return " ".join(segment for segment in (*self._segments, tail) if segment)
+
+    def accept(self, pcm: bytes) -> str:
+        if self._recognizer.AcceptWaveform(pcm):
+            # Vosk detected a pause and finalized a segment
+            self._segments.append(json.loads(self._recognizer.Result()).get("text", ""))
+            return self._hypothesis("")
+        return self._hypothesis(json.loads(self._recognizer.PartialResult()).get("partial", ""))
+
+    def finish(self) -> str:
+        return self._hypothesis(json.loads(self._recognizer.FinalResult()).get("text", ""))
+
+
+class VoskSTTEngine(STTEngine):
+    """Offline Kaldi-based recognizer; the model is loaded once from STT_MODEL_PATH."""
+
+    name = "vosk"
+
+    def __init__(self, sample_rate: int):
+        super().__init__(sample_rate)
+        if vosk is None:
+            raise RuntimeError("The vosk package is not installed")
+        if not settings.STT_MODEL_PATH:
+            raise RuntimeError("STT_MODEL_PATH is not configured")
+        vosk.SetLogLevel(-1)
+        self.model = vosk.Model(settings.STT_MODEL_PATH)
+
+    def create_stream(self) -> STTStream:
+        return _VoskStream(self.model, self.sample_rate)
+
+
+STT_ENGINES = {
+    "scripted": ScriptedSTTEngine,
+    "vosk": VoskSTTEngine,
+}
+
+
+class STTUnavailableError(RuntimeError):
+    """Speech-to-text is disabled or its engine cannot be loaded."""
+
+
+def create_stt_engine(backend: Optional[str] = None, sample_rate: Optional[int] = None) -> STTEngine:
+    """Create the configured STT engine."""
+    backend = backend or settings.STT_ENGINE
+    if not backend:
+        raise STTUnavailableError(f"Speech-to-text is disabled; set STT_ENGINE to one of: {', '.join(STT_ENGINES)}")
+    if backend not in STT_ENGINES:
+        raise ValueError(f"Unknown STT engine '{backend}'. Available: {', '.join(STT_ENGINES)}")
+    return STT_ENGINES[backend](sample_rate=sample_rate or settings.STT_SAMPLE_RATE)
+
+
+class AudioDecoder:
+    """Turns client audio frames into PCM: PCM frames pass through, Opus frames are one packet each."""
+
+    ENCODINGS = ("pcm_s16le", "opus")
+
+    def __init__(self, encoding: str, sample_rate: int):
+        if encoding not in self.ENCODINGS:
+            raise ValueError(f"Unsupported audio encoding '{encoding}'. Supported: {', '.join(self.ENCODINGS)}")
+        self.encoding = encoding
+        self._opus = None
+        self._opus_frame_size = sample_rate * OPUS_MAX_FRAME_MS // 1000
+        if encoding == "opus":
+            if opuslib is None:
+                raise ValueError("Opus audio requires the opuslib package")
+            self._opus = opuslib.Decoder(sample_rate, 1)
+
+    def decode(self, frame: bytes) -> bytes:
+        if self._opus is not None:
+            return self._opus.decode(frame, self._opus_frame_size)
+        if len(frame) % PCM_SAMPLE_WIDTH:
+            raise ValueError("PCM frames must contain whole 16-bit samples")
+        return frame
+
+
+class PartialStabilizer:
+    """
+    Splits partial hypotheses into a stable prefix and an unstable tail.
+
+    Engines revise the last few words of a partial as more audio arrives. A
+    word becomes stable once it has been unchanged for `stability`
+    consecutive hypotheses; the stable prefix only ever grows, so clients can
+    act on it (e.g. start a search) without it being retracted.
+    """
+
+    def __init__(self, stability: int):
+        self.stability = max(1, stability)
+        self._recent: List[List[str]] = []
+        self._stable: List[str] = []
+        self._last: Tuple[str, str] = ("", "")
+
+    def update(self, hypothesis: str) -> Optional[Dict[str, str]]:
+        """Record a hypothesis; returns a partial update when the text or the stable prefix changed."""
+        words = hypothesis.split()
+        self._recent = (self._recent + [words])[-self.stability:]
+
+        if len(self._recent) == self.stability:
+            agreed = []
+            for column in zip(*self._recent):
+                if any(word != column[0] for word in column):
+                    break
+                agreed.append(column[0])
+            if len(agreed) > len(self._stable) and agreed[:len(self._stable)] == self._stable:
+                self._stable = agreed
+
+        update = (" ".join(words), " ".join(self._stable))
+        if update == self._last:
+            return None
+        self._last = update
+        return {"text": update[0], "stable": update[1]}
+
+
+class StreamingTranscriber:
+    """
+    Incremental transcription of one utterance.
+
+    Frames are decoded and fed to the engine in a worker thread, one at a
+    time and in order; partial transcripts are emitted as they change. The
+    utterance is capped at STT_MAX_UTTERANCE_SECONDS of audio.
+
+    With AUDIO_VAD_ENABLED, audio before the speech onset is held back and
+    checked with the preprocessing stage's VAD instead of being recognized;
+    only the speech (padded by AUDIO_VAD_PADDING_MS) reaches the engine.
+    """
+
+    def __init__(self, engine: STTEngine, encoding: str = "pcm_s16le", trim_leading_silence: Optional[bool] = None):
+        self.decoder = AudioDecoder(encoding, engine.sample_rate)
+        self.stream = engine.create_stream()
+        self.stabilizer = PartialStabilizer(settings.STT_PARTIAL_STABILITY)
+        self.sample_rate = engine.sample_rate
+        self.max_bytes = engine.sample_rate * PCM_SAMPLE_WIDTH * settings.STT_MAX_UTTERANCE_SECONDS
+        self.received_bytes = 0
+        self.trimmed_bytes = 0
+        self._speech_started = not (settings.AUDIO_VAD_ENABLED if trim_leading_silence is None else trim_leading_silence)
+        self._leading = bytearray()
+
+    def _speech_onset(self, pcm: bytes) -> bytes:
+        """Hold audio back until speech starts; returns the audio from the (padded) onset, or b"" before it."""
+        self._leading += pcm
+        segments = detect_speech(np.frombuffer(bytes(self._leading), dtype="<i2"), self.sample_rate)
+        if segments:
+            start = segments[0][0] * PCM_SAMPLE_WIDTH
+            self.trimmed_bytes += start
+            speech = bytes(self._leading[start:])
+            self._leading = bytearray()
+            self._speech_started = True
+            return speech
+
+        window = int(self.sample_rate * LEADING_SILENCE_WINDOW_SECONDS) * PCM_SAMPLE_WIDTH
+        if len(self._leading) > window:
+            excess = len(self._leading) - window
+            self.trimmed_bytes += excess
+            del self._leading[:excess]
+        return b""
+
+    def _accept(self, frame: bytes) -> Optional[str]:
+        pcm = self.decoder.decode(frame)
+        self.received_bytes += len(pcm)
+        if self.received_bytes > self.max_bytes:
+            raise ValueError(f"Utterance exceeds {settings.STT_MAX_UTTERANCE_SECONDS} seconds of audio")
+        if not self._speech_started:
+            pcm = self._speech_onset(pcm)
+            if not pcm:
+                return None
+        return self.stream.accept(pcm)
+
+    async def feed(self, frame: bytes) -> Optional[Dict[str, str]]:
+        """Feed one audio frame; returns a partial transcript update when it changed."""
+        hypothesis = await asyncio.to_thread(self._accept, frame)
+        if hypothesis is None:
+            return None
+        return self.stabilizer.update(hypothesis)
+
+    async def finish(self) -> str:
+        """Finalize the utterance and return its transcript."""
+        return (await asyncio.to_thread(self.stream.finish)).strip()
+
+    @property
+    def audio_seconds(self) -> float:
+        return self.received_bytes / (PCM_SAMPLE_WIDTH * self.sample_rate)
+
+
+_stt_engine: Optional[STTEngine] = None
+
+
+def get_stt_engine() -> STTEngine:
+    """
+    Get the process-wide STT engine.
+
+    Loading a model can take seconds, so callers on the event loop should
+    use `asyncio.to_thread(get_stt_engine)` for the first call.
+    """
+    global _stt_engine
+    if _stt_engine is None:
+        _stt_engine = create_stt_engine()
+        logger.info(f"STT engine loaded: {_stt_engine.name} at {_stt_engine.sample_rate} Hz")
+    return _stt_engine
+
+
+async def load_stt_engine():
+    """
+    Load the configured STT engine at startup, so a bad STT_ENGINE or
+    STT_MODEL_PATH stops the worker instead of failing the first voice request.
+
+    Raises:
+        STTUnavailableError: If the configured engine cannot be loaded
+    """
+    if not settings.STT_ENGINE:
+        logger.info("Speech-to-text disabled (STT_ENGINE is not set)")
+        return
+    try:
+        await asyncio.to_thread(get_stt_engine)
+    except Exception as e:
+        raise STTUnavailableError(f"STT_ENGINE '{settings.STT_ENGINE}' could not be loaded: {e}") from e
+
+
+def get_stt_status() -> Dict[str, Any]:
+    """Get the STT engine status without loading it."""
+    return {
+        "enabled": bool(settings.STT_ENGINE),
+        "engine": settings.STT_ENGINE or None,
+        "loaded": _stt_engine is not None
+    }
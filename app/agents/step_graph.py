@@ -0,0 +1,150 @@
+"""
+Step graph executor for AIBIN AI agents.
+Runs the independent steps of an agent flow concurrently and times each step.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Any, Callable, Awaitable, Tuple, List
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Step:
+    """A named unit of work in an agent flow (LLM call, DB query, enrichment)."""
+    name: str
+    fn: Callable[..., Awaitable[Any]]
+    depends_on: Tuple[str, ...] = ()
+    kind: str = "compute"
+
+
+@dataclass
+class StepGraphResult:
+    """Step results keyed by step name, with per-step timings."""
+    results: Dict[str, Any]
+    timings: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    total_time: float = 0.0
+
+    def __getitem__(self, step_name: str) -> Any:
+        return self.results[step_name]
+
+    def get_timings(self) -> Dict[str, Any]:
+        """Get step timings for response metadata."""
+        return {"total_time": self.total_time, "steps": self.timings}
+
+
+class StepGraph:
+    """
+    Small dependency-graph executor for agent flows.
+
+    Each step is an async callable that receives the results of the steps it
+    depends on as keyword arguments. Every step starts as soon as its
+    dependencies finish, so independent steps (e.g. an LLM call and a
+    database query) overlap and the flow takes roughly as long as its
+    slowest path rather than the sum of its steps.
+
+    Steps that share an AsyncSession must not run concurrently; chain them
+    with `depends_on` instead. If a step fails, the steps still running are
+    cancelled and the error is raised to the caller.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.steps: Dict[str, Step] = {}
+
+    def add_step(
+        self,
+        name: str,
+        fn: Callable[..., Awaitable[Any]],
+        depends_on: Tuple[str, ...] = (),
+        kind: str = "compute"
+    ) -> "StepGraph":
+        """Add a step. Returns the graph so steps can be chained."""
+        if name in self.steps:
+            raise ValueError(f"Duplicate step '{name}' in graph '{self.name}'")
+        self.steps[name] = Step(name=name, fn=fn, depends_on=tuple(depends_on), kind=kind)
+        return self
+
+    def _validate(self):
+        """Reject unknown dependencies and cycles, which would otherwise deadlock."""
+        for step in self.steps.values():
+            for dependency in step.depends_on:
+                if dependency not in self.steps:
+                    raise ValueError(f"Step '{step.name}' depends on unknown step '{dependency}'")
+
+        visiting, visited = set(), set()
+
+        def visit(step_name: str):
+            if step_name in visited:
+                return
+            if step_name in visiting:
+                raise ValueError(f"Dependency cycle at step '{step_name}' in graph '{self.name}'")
+            visiting.add(step_name)
+            for dependency in self.steps[step_name].depends_on:
+                visit(dependency)
+            visiting.discard(step_name)
+            visited.add(step_name)
+
+        for step_name in self.steps:
+            visit(step_name)
+
+    async def run(self) -> StepGraphResult:
+        """Execute the graph and return every step's result."""
+        self._validate()
+
+        graph_start = time.monotonic()
+        timings: Dict[str, Dict[str, Any]] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_step(step: Step) -> Any:
+            inputs = {}
+            for dependency in step.depends_on:
+                inputs[dependency] = await tasks[dependency]
+
+            started = time.monotonic()
+            timing = {"kind": step.kind, "start_offset": started - graph_start}
+            timings[step.name] = timing
+            try:
+                result = await step.fn(**inputs)
+                timing["status"] = "ok"
+                return result
+            except asyncio.CancelledError:
+                timing["status"] = "cancelled"
+                raise
+            except Exception:
+                timing["status"] = "error"
+                raise
+            finally:
+                timing["duration"] = time.monotonic() - started
+
+        for step in self.steps.values():
+            tasks[step.name] = asyncio.ensure_future(run_step(step))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            pending: List[asyncio.Task] = [task for task in tasks.values() if not task.done()]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            # Retrieve remaining exceptions so they are not reported as never retrieved
+            for task in tasks.values():
+                if task.done() and not task.cancelled():
+                    task.exception()
+            raise
+
+        total_time = time.monotonic() - graph_start
+        logger.debug(
+            f"Step graph {self.name} finished in {total_time:.3f}s: "
+            + ", ".join(f"{name}={timing['duration']:.3f}s" for name, timing in timings.items())
+        )
+
+        return StepGraphResult(
+            results={name: task.result() for name, task in tasks.items()},
+            timings=timings,
+            total_time=total_time
+        )
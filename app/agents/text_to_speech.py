@@ -0,0 +1,418 @@
+"""
+Text-to-speech for AIBIN voice interactions.
+Pluggable local TTS engines behind a content-addressed on-disk audio cache.
+"""
+
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import re
+import tempfile
+import unicodedata
+import wave
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from .single_flight import SingleFlight
+from ..config.config import settings
+
+try:
+    from piper import PiperVoice
+except ImportError:  # Optional dependency; the "piper" engine is unavailable without it
+    PiperVoice = None
+
+
+logger = logging.getLogger(__name__)
+
+AUDIO_CONTENT_TYPES = {
+    "wav": "audio/wav",
+}
+CACHE_KEY_LENGTH = 64  # Hex SHA-256
+# Voice names become model file names, so they may not contain path separators or dots
+VOICE_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def normalize_speech_text(text: str) -> str:
+    """
+    Normalize text so equivalent phrases share a cache entry.
+
+    Only Unicode form and whitespace are normalized; case is kept because it
+    changes pronunciation ("US" vs "us").
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def build_audio_key(engine: str, voice: str, format: str, text: str) -> str:
+    """Content address of a synthesized phrase."""
+    key = hashlib.sha256()
+    for part in (engine, voice, format, normalize_speech_text(text)):
+        key.update(part.encode("utf-8"))
+        key.update(b"\x00")
+    return key.hexdigest()
+
+
+def wav_duration(data: bytes) -> float:
+    """Duration of a WAV clip in seconds."""
+    with wave.open(io.BytesIO(data), "rb") as clip:
+        return clip.getnframes() / clip.getframerate()
+
+
+def encode_wav(samples: np.ndarray, sample_rate: int) -> bytes:
+    """Encode 16-bit mono samples as a WAV file."""
+    output = io.BytesIO()
+    with wave.open(output, "wb") as clip:
+        clip.setnchannels(1)
+        clip.setsampwidth(2)
+        clip.setframerate(sample_rate)
+        clip.writeframes(samples.astype("<i2").tobytes())
+    return output.getvalue()
+
+
+class TTSEngine(ABC):
+    """
+    Local speech synthesizer.
+
+    `synthesize` is blocking (engines are CPU-bound) and is called from a
+    worker thread.
+    """
+
+    name: str = "tts"
+    formats: Tuple[str, ...] = ("wav",)
+
+    @abstractmethod
+    def synthesize(self, text: str, voice: str, format: str) -> bytes:
+        """Synthesize text into an audio file in the given format."""
+
+
+class ToneTTSEngine(TTSEngine):
+    """
+    Deterministic stand-in engine for tests and local development.
+
+    Renders one short tone per word (longer words last longer, the pitch is
+    derived from the voice name), so output length and bytes are
+    reproducible for a given text and voice.
+    """
+
+    name = "tone"
+    sample_rate = 16000
+    seconds_per_char = 0.06
+    gap_seconds = 0.05
+
+    def synthesize(self, text: str, voice: str, format: str) -> bytes:
+        pitch = 180 + zlib.crc32(voice.encode("utf-8")) % 120
+        gap = np.zeros(int(self.sample_rate * self.gap_seconds), dtype=np.float32)
+        parts = []
+        for word in text.split():
+            t = np.arange(int(self.sample_rate * self.seconds_per_char * len(word))) / self.sample_rate
+            envelope = np.minimum(1.0, np.minimum(t, t[-1] - t) * 50) if len(t) else t
+            parts.extend((0.3 * np.sin(2 * np.pi * pitch * t) * envelope, gap))
+        samples = np.concatenate(parts) if parts else gap
+        return encode_wav(np.round(samples * 32767), self.sample_rate)
+
+
+class PiperTTSEngine(TTSEngine):
+    """Offline neural TTS; each voice is an ONNX model `<voice>.onnx` in TTS_MODEL_PATH, loaded on first use."""
+
+    name = "piper"
+
+    def __init__(self):
+        if PiperVoice is None:
+            raise RuntimeError("The piper-tts package is not installed")
+        if not settings.TTS_MODEL_PATH:
+            raise RuntimeError("TTS_MODEL_PATH is not configured")
+        self._voices: Dict[str, Any] = {}
+
+    def _get_voice(self, voice: str):
+        if voice not in self._voices:
+            if not VOICE_NAME_PATTERN.match(voice):
+                raise ValueError(f"Invalid voice name '{voice}'")
+            model_dir = os.path.realpath(settings.TTS_MODEL_PATH)
+            model_path = os.path.realpath(os.path.join(model_dir, f"{voice}.onnx"))
+            if os.path.dirname(model_path) != model_dir or not os.path.isfile(model_path):
+                raise ValueError(f"Unknown voice '{voice}'")
+            self._voices[voice] = PiperVoice.load(model_path)
+        return self._voices[voice]
+
+    def synthesize(self, text: str, voice: str, format: str) -> bytes:
+        output = io.BytesIO()
+        with wave.open(output, "wb") as clip:
+            self._get_voice(voice).synthesize_wav(text, clip)
+        return output.getvalue()
+
+
+TTS_ENGINES = {
+    "tone": ToneTTSEngine,
+    "piper": PiperTTSEngine,
+}
+
+
+def create_tts_engine(backend: Optional[str] = None) -> TTSEngine:
+    """Create the configured TTS engine."""
+    backend = backend or settings.TTS_ENGINE
+    if backend not in TTS_ENGINES:
+        raise ValueError(f"Unknown TTS engine '{backend}'. Available: {', '.join(TTS_ENGINES)}")
+    return TTS_ENGINES[backend]()
+
+
+@dataclass
+class CachedAudio:
+    """A synthesized phrase stored in the audio cache."""
+    key: str
+    path: str
+    format: str
+    size: int
+    duration: float
+    cached: bool = True
+
+    @property
+    def content_type(self) -> str:
+        return AUDIO_CONTENT_TYPES[self.format]
+
+
+class TTSAudioCache:
+    """
+    Content-addressed audio files on disk with an in-memory LRU index.
+
+    Files are named `<sha256>.<format>` in TTS_CACHE_DIR, so a phrase is
+    synthesized once and served as a static file afterwards, across restarts
+    and across workers sharing the directory. The index tracks sizes and
+    recency; the least recently used files are deleted once the cache
+    exceeds TTS_CACHE_MAX_BYTES. Writes are atomic (temp file + rename).
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.directory = directory or settings.TTS_CACHE_DIR or os.path.join(tempfile.gettempdir(), "aibin-tts")
+        self.max_bytes = max_bytes or settings.TTS_CACHE_MAX_BYTES
+        self._index: "OrderedDict[str, CachedAudio]" = OrderedDict()
+        self._total_bytes = 0
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        """Index files left by earlier runs, oldest access first."""
+        entries = []
+        for filename in os.listdir(self.directory):
+            key, _, format = filename.partition(".")
+            if len(key) != CACHE_KEY_LENGTH or format not in AUDIO_CONTENT_TYPES:
+                continue
+            path = os.path.join(self.directory, filename)
+            try:
+                with wave.open(path, "rb") as clip:
+                    duration = clip.getnframes() / clip.getframerate()
+                stat = os.stat(path)
+            except (OSError, wave.Error, EOFError):
+                continue
+            entries.append((stat.st_mtime, CachedAudio(key, path, format, stat.st_size, duration)))
+        for _, entry in sorted(entries, key=lambda item: item[0]):
+            self._index[entry.key] = entry
+            self._total_bytes += entry.size
+        if entries:
+            logger.info(f"TTS audio cache loaded: {len(entries)} clips, {self._total_bytes} bytes")
+        self._evict()
+
+    def _remove(self, key: str):
+        entry = self._index.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry.size
+            try:
+                os.unlink(entry.path)
+            except FileNotFoundError:
+                pass
+
+    def _evict(self):
+        while self._index and self._total_bytes > self.max_bytes:
+            self._remove(next(iter(self._index)))
+            self.evictions += 1
+
+    def path_for(self, key: str, format: str) -> str:
+        return os.path.join(self.directory, f"{key}.{format}")
+
+    def get(self, key: str) -> Optional[CachedAudio]:
+        """Get a cached clip, or None on a miss."""
+        entry = self._index.get(key)
+        if entry is not None:
+            try:
+                # Refresh the mtime so recency survives restarts (and confirms the file still exists)
+                os.utime(entry.path)
+            except FileNotFoundError:
+                # Another worker sharing the directory evicted it
+                self._index.pop(key)
+                self._total_bytes -= entry.size
+                entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._index.move_to_end(key)
+        self.hits += 1
+        return replace(entry, cached=True)
+
+    def write(self, key: str, format: str, data: bytes) -> CachedAudio:
+        """Write a clip file atomically. Blocking; call from a worker thread, then `add` the entry."""
+        path = self.path_for(key, format)
+        descriptor, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return CachedAudio(key, path, format, len(data), wav_duration(data), cached=False)
+
+    def add(self, entry: CachedAudio):
+        """Index a written clip and evict beyond the size cap."""
+        previous = self._index.pop(entry.key, None)
+        if previous is not None:
+            self._total_bytes -= previous.size
+        self._index[entry.key] = entry
+        self._total_bytes += entry.size
+        self._evict()
+
+    def lookup(self, key: str) -> Optional[Tuple[str, str]]:
+        """
+        Find a clip file by key for serving, without counting a hit.
+        Falls back to the directory for clips written by other workers.
+
+        Returns:
+            (path, format), or None when the clip is not cached
+        """
+        if len(key) != CACHE_KEY_LENGTH or any(char not in "0123456789abcdef" for char in key):
+            return None
+        entry = self._index.get(key)
+        candidates = [entry.format] if entry is not None else list(AUDIO_CONTENT_TYPES)
+        for format in candidates:
+            path = self.path_for(key, format)
+            if os.path.exists(path):
+                return path, format
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "directory": self.directory,
+            "entries": len(self._index),
+            "total_bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups > 0 else 0.0,
+            "evictions": self.evictions
+        }
+
+
+class TextToSpeech:
+    """
+    Speech synthesis with caching.
+
+    Guidance phrases ("Turn left at the escalator", greetings, store hours)
+    repeat constantly, so each (text, voice, format) is synthesized once and
+    then served from the audio cache. Concurrent requests for the same
+    uncached phrase share one synthesis.
+    """
+
+    def __init__(self, engine: Optional[TTSEngine] = None, cache: Optional[TTSAudioCache] = None):
+        self.engine = engine or create_tts_engine()
+        self.cache = cache or TTSAudioCache()
+        self.single_flight = SingleFlight("tts")
+
+        # Metrics
+        self.syntheses = 0
+        self.synthesis_seconds = 0.0
+
+    async def synthesize(self, text: str, voice: Optional[str] = None, format: str = "wav") -> CachedAudio:
+        """
+        Get the audio for a phrase, synthesizing it on a cache miss.
+
+        Raises:
+            ValueError: For empty or overlong text and unsupported formats or voices
+        """
+        text = normalize_speech_text(text)
+        voice = voice or settings.TTS_DEFAULT_VOICE
+        if not VOICE_NAME_PATTERN.match(voice):
+            raise ValueError("Voice names may only contain letters, digits, '_' and '-'")
+        if not text:
+            raise ValueError("Text cannot be empty")
+        if len(text) > settings.TTS_MAX_TEXT_LENGTH:
+            raise ValueError(f"Text exceeds {settings.TTS_MAX_TEXT_LENGTH} characters")
+        if format not in self.engine.formats:
+            raise ValueError(f"Unsupported audio format '{format}'. Supported: {', '.join(self.engine.formats)}")
+
+        key = build_audio_key(self.engine.name, voice, format, text)
+        entry = self.cache.get(key)
+        if entry is not None:
+            return entry
+
+        return await self.single_flight.do(key, lambda: self._synthesize(key, text, voice, format))
+
+    async def _synthesize(self, key: str, text: str, voice: str, format: str) -> CachedAudio:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        data = await asyncio.to_thread(self.engine.synthesize, text, voice, format)
+        self.syntheses += 1
+        self.synthesis_seconds += loop.time() - started
+        entry = await asyncio.to_thread(self.cache.write, key, format, data)
+        self.cache.add(entry)
+        return entry
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get synthesis and cache statistics."""
+        return {
+            "engine": self.engine.name,
+            "syntheses": self.syntheses,
+            "average_synthesis_time": self.synthesis_seconds / self.syntheses if self.syntheses else 0.0,
+            "cache": self.cache.get_stats(),
+            "single_flight": self.single_flight.get_stats()
+        }
+
+
+_text_to_speech: Optional[TextToSpeech] = None
+
+
+def get_text_to_speech() -> TextToSpeech:
+    """
+    Get the process-wide text-to-speech service.
+
+    Creating it scans the cache directory, so callers on the event loop
+    should use `asyncio.to_thread(get_text_to_speech)` for the first call.
+    """
+    global _text_to_speech
+    if _text_to_speech is None:
+        _text_to_speech = TextToSpeech()
+        logger.info(f"TTS engine loaded: {_text_to_speech.engine.name}")
+    return _text_to_speech
+
+
+async def load_text_to_speech():
+    """
+    Load the configured TTS engine at startup, so a bad TTS_ENGINE or
+    TTS_MODEL_PATH stops the worker instead of failing the first voice request.
+
+    Raises:
+        RuntimeError: If the configured engine cannot be loaded
+    """
+    try:
+        await asyncio.to_thread(get_text_to_speech)
+    except Exception as e:
+        raise RuntimeError(f"TTS_ENGINE '{settings.TTS_ENGINE}' could not be loaded: {e}") from e
+
+
+def get_text_to_speech_stats() -> Dict[str, Any]:
+    """Get TTS statistics without loading the engine."""
+    if _text_to_speech is None:
+        return {"loaded": False}
+    return {"loaded": True, **_text_to_speech.get_stats()}
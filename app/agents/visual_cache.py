@@ -0,0 +1,252 @@
+"""
+Visual analysis result cache for AIBIN AI agents.
+Serves repeated and near-duplicate images by exact content hash and perceptual hash.
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Tuple, Union
+
+from .response_cache import normalize_message_text
+from ..config.config import settings
+
+
+def content_digest(image: Union[bytes, str, Path]) -> str:
+    """SHA-256 of the image as sent to the model (raw bytes, base64 text, or a spooled upload file)."""
+    if isinstance(image, Path):
+        with open(image, "rb") as file:
+            return hashlib.file_digest(file, "sha256").hexdigest()
+    data = image.encode("ascii") if isinstance(image, str) else image
+    return hashlib.sha256(data).hexdigest()
+
+
+def build_prompt_key(model: str, analysis_type: str, message: str) -> str:
+    """Key of everything besides the image that determines the answer."""
+    key = hashlib.sha256()
+    for part in (model, analysis_type, normalize_message_text(message)):
+        key.update(part.encode("utf-8"))
+        key.update(b"\x00")
+    return key.hexdigest()
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+@dataclass
+class VisualCacheEntry:
+    """A cached visual analysis answer."""
+    prompt_key: str
+    digest: str
+    dhash: Optional[int]
+    message: str
+    processing_time: float
+    expires_at: float
+
+
+class MultiIndexHash:
+    """
+    Multi-index hashing over 64-bit perceptual hashes.
+
+    The hash is split into radius + 1 disjoint bit blocks, each with its own
+    exact-match table. Two hashes within `radius` bits must agree exactly on
+    at least one block (pigeonhole), so a radius query is radius + 1 dict
+    lookups plus a popcount per candidate instead of a scan over all hashes.
+    """
+
+    def __init__(self, radius: int, bits: int = 64):
+        self.radius = radius
+        block_count = radius + 1
+        widths = [bits // block_count + (1 if index < bits % block_count else 0) for index in range(block_count)]
+        self._blocks: List[Tuple[int, int]] = []  # (shift, mask)
+        shift = bits
+        for width in widths:
+            shift -= width
+            self._blocks.append((shift, (1 << width) - 1))
+        self._tables: List[Dict[int, Dict[str, int]]] = [{} for _ in self._blocks]
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, value: int, key: str):
+        for (shift, mask), table in zip(self._blocks, self._tables):
+            table.setdefault((value >> shift) & mask, {})[key] = value
+        self._size += 1
+
+    def discard(self, value: int, key: str):
+        removed = False
+        for (shift, mask), table in zip(self._blocks, self._tables):
+            block = (value >> shift) & mask
+            bucket = table.get(block)
+            if bucket is not None and bucket.pop(key, None) is not None:
+                removed = True
+                if not bucket:
+                    del table[block]
+        if removed:
+            self._size -= 1
+
+    def search(self, value: int) -> List[Tuple[int, str]]:
+        """Get (distance, key) pairs of all hashes within the radius, nearest first."""
+        matches = {}
+        for (shift, mask), table in zip(self._blocks, self._tables):
+            for key, candidate in table.get((value >> shift) & mask, {}).items():
+                if key not in matches:
+                    distance = hamming_distance(value, candidate)
+                    if distance <= self.radius:
+                        matches[key] = distance
+        return sorted((distance, key) for key, distance in matches.items())
+
+
+class VisualResultCache:
+    """
+    Bounded LRU cache of visual analysis answers.
+
+    Lookups first try the exact key (prompt + SHA-256 of the image), then a
+    multi-index table of dHashes per prompt for images within
+    VISUAL_CACHE_MAX_DISTANCE bits, so re-uploads, re-encodes and resized
+    copies of a product photo skip the vision model. Entries expire after a TTL.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[int] = None,
+        max_entries: Optional[int] = None,
+        max_distance: Optional[int] = None
+    ):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.VISUAL_CACHE_TTL_SECONDS
+        self.max_entries = max_entries or settings.VISUAL_CACHE_MAX_ENTRIES
+        self.max_distance = max_distance if max_distance is not None else settings.VISUAL_CACHE_MAX_DISTANCE
+
+        self._entries: "OrderedDict[str, VisualCacheEntry]" = OrderedDict()
+        self._indexes: Dict[str, MultiIndexHash] = {}
+
+        # Metrics
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.lookup_time = 0.0
+
+    @staticmethod
+    def _entry_key(prompt_key: str, digest: str) -> str:
+        return f"{prompt_key}:{digest}"
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None or entry.dhash is None:
+            return
+        index = self._indexes.get(entry.prompt_key)
+        if index is not None:
+            index.discard(entry.dhash, key)
+            if not index:
+                del self._indexes[entry.prompt_key]
+
+    def _get_live(self, key: str, now: float) -> Optional[VisualCacheEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if now >= entry.expires_at:
+            self._remove(key)
+            self.expirations += 1
+            return None
+        return entry
+
+    def get_exact(self, prompt_key: str, digest: str) -> Optional[VisualCacheEntry]:
+        """
+        Look up a cached answer for this exact image only.
+        A miss is not counted, since the full lookup in `get` follows it.
+        """
+        key = self._entry_key(prompt_key, digest)
+        entry = self._get_live(key, time.monotonic())
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.exact_hits += 1
+        return entry
+
+    def get(
+        self,
+        prompt_key: str,
+        digest: str,
+        dhash: Optional[int] = None
+    ) -> Tuple[Optional[VisualCacheEntry], Optional[int]]:
+        """
+        Look up a cached answer.
+
+        Returns:
+            (entry, Hamming distance) - distance 0 for exact hits, (None, None) on a miss
+        """
+        started = time.perf_counter()
+        now = time.monotonic()
+        try:
+            key = self._entry_key(prompt_key, digest)
+            entry = self._get_live(key, now)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return entry, 0
+
+            index = self._indexes.get(prompt_key)
+            if dhash is not None and index is not None:
+                for distance, near_key in index.search(dhash):
+                    entry = self._get_live(near_key, now)
+                    if entry is not None:
+                        self._entries.move_to_end(near_key)
+                        self.near_hits += 1
+                        return entry, distance
+
+            self.misses += 1
+            return None, None
+        finally:
+            self.lookup_time += time.perf_counter() - started
+
+    def set(self, prompt_key: str, digest: str, dhash: Optional[int], message: str, processing_time: float):
+        """Store an answer, evicting least recently used entries beyond the cap."""
+        key = self._entry_key(prompt_key, digest)
+        self._remove(key)
+        self._entries[key] = VisualCacheEntry(
+            prompt_key=prompt_key,
+            digest=digest,
+            dhash=dhash,
+            message=message,
+            processing_time=processing_time,
+            expires_at=time.monotonic() + self.ttl_seconds
+        )
+        if dhash is not None and self.max_distance > 0:
+            index = self._indexes.get(prompt_key)
+            if index is None:
+                index = self._indexes[prompt_key] = MultiIndexHash(self.max_distance)
+            index.add(dhash, key)
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def clear(self):
+        """Drop all cached answers."""
+        self._entries.clear()
+        self._indexes.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        lookups = self.exact_hits + self.near_hits + self.misses
+        hits = self.exact_hits + self.near_hits
+        return {
+            "enabled": True,
+            "entries": len(self._entries),
+            "prompts": len(self._indexes),
+            "max_entries": self.max_entries,
+            "max_distance": self.max_distance,
+            "ttl_seconds": self.ttl_seconds,
+            "exact_hits": self.exact_hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups > 0 else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "average_lookup_time": self.lookup_time / lookups if lookups > 0 else 0.0
+        }
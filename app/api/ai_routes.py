@@ -3,39 +3,60 @@ AI API endpoints for AIBIN agents.
 Handles chat, recommendations, voice, and visual analysis requests.
 """
 
-from typing import Optional, Dict, Any, List
-import base64
+from typing import Optional, Dict, Any, List, AsyncIterator
+import asyncio
+import json
 
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Form
-from fastapi.responses import JSONResponse
+from fastapi import (
+    APIRouter, Depends, HTTPException, Request, status, File, UploadFile, Form, Query, WebSocket, WebSocketDisconnect
+)
+from fastapi.responses import JSONResponse, StreamingResponse, FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..db.database import get_db
+from ..db.database import get_db, SessionLocal
 from ..services.ai_service import AIService
+from ..services.auth_service import AuthService
 from ..schemas.ai_schemas import (
     AIRequest,
     AIResponse,
+    AIBatchRequest,
     ProductRecommendationRequest,
     ProductRecommendationResponse,
     VisualAnalysisRequest,
     VisualAnalysisResponse,
+    VoiceSynthesisRequest,
     AIHealthCheck,
     ConversationHistory
 )
-from ..utils.dependencies import optional_auth, get_current_user
+from ..utils.dependencies import optional_auth, get_current_user, check_llm_admission, record_llm_usage
 from datetime import datetime
-from ..agents.groq_client import GroqClient
-from ..agents.ollama_client import OllamaClient
+from ..agents.registry import get_agent_registry
+from ..agents.health_prober import get_health_prober
+from ..agents.speech_to_text import StreamingTranscriber, get_stt_engine
+from ..agents.text_to_speech import AUDIO_CONTENT_TYPES, get_text_to_speech
 from ..logging.log import logger, log_ai_interaction, log_user_action
 from ..config.config import settings
+from ..utils.exceptions import BackendOverloadedError
+from ..utils.uploads import SpooledImage, spool_image_stream, spool_image_upload
 
 
 router = APIRouter(prefix="/ai", tags=["AI Agents"])
 
 
+def _backend_overloaded_error(error: BackendOverloadedError) -> HTTPException:
+    """Map a bulkhead rejection to 503 so clients back off instead of retrying into the queue."""
+    logger.warning(f"LLM backend overloaded: {error.message}")
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=error.message,
+        headers={"Retry-After": str(error.details.get("retry_after", 1))}
+    )
+
+
 @router.post("/chat", response_model=AIResponse)
 async def chat_with_agent(
     request: AIRequest,
+    http_request: Request,
     db: AsyncSession = Depends(get_db),
     current_user = Depends(optional_auth)
 ):
@@ -49,6 +70,8 @@ async def chat_with_agent(
     - voice_chat: Voice-optimized responses
     - multimodal: Text + visual content
     """
+    await check_llm_admission(http_request, current_user, [request.interaction_type])
+    
     try:
         logger.info(f"AI chat request: {request.interaction_type}")
         
@@ -66,6 +89,7 @@ async def chat_with_agent(
         
         # Process chat request
         response = await ai_service.process_chat_request(request)
+        await record_llm_usage(current_user, response.tokens_used)
         
         # Log AI interaction
         log_ai_interaction(
@@ -80,6 +104,8 @@ async def chat_with_agent(
         logger.info(f"AI chat completed: {response.interaction_type}")
         return response
         
+    except BackendOverloadedError as e:
+        raise _backend_overloaded_error(e)
     except Exception as e:
         logger.error(f"Chat request failed: {e}")
         raise HTTPException(
@@ -91,6 +117,7 @@ async def chat_with_agent(
 @router.post("/recommendations", response_model=ProductRecommendationResponse)
 async def get_product_recommendations(
     request: ProductRecommendationRequest,
+    http_request: Request,
     db: AsyncSession = Depends(get_db),
     current_user = Depends(optional_auth)
 ):
@@ -100,6 +127,8 @@ async def get_product_recommendations(
     Analyzes user preferences and suggests relevant luxury Projects.
     Supports filtering by category, price range, and brand preferences.
     """
+    await check_llm_admission(http_request, current_user, ["product_recommendation"])
+    
     try:
         logger.info(f"Product recommendation request")
         
@@ -121,6 +150,7 @@ async def get_product_recommendations(
         
         # Get recommendations
         response = await ai_service.get_product_recommendations(request)
+        await record_llm_usage(current_user, response.tokens_used)
         
         # Log recommendation interaction
         log_ai_interaction(
@@ -135,6 +165,8 @@ async def get_product_recommendations(
         logger.info(f"Generated {len(response.recommendations)} recommendations")
         return response
         
+    except BackendOverloadedError as e:
+        raise _backend_overloaded_error(e)
     except Exception as e:
         logger.error(f"Product recommendation failed: {e}")
         raise HTTPException(
@@ -146,6 +178,7 @@ async def get_product_recommendations(
 @router.post("/analyze-image", response_model=VisualAnalysisResponse)
 async def analyze_image(
     request: VisualAnalysisRequest,
+    http_request: Request,
     db: AsyncSession = Depends(get_db),
     current_user = Depends(optional_auth)
 ):
@@ -158,6 +191,8 @@ async def analyze_image(
     - Product matching and visual search
     - Style and feature analysis
     """
+    await check_llm_admission(http_request, current_user, ["visual_analysis"])
+    
     try:
         logger.info(f"Image analysis request")
         
@@ -167,6 +202,11 @@ async def analyze_image(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Either image_url or image_data must be provided"
             )
+        if request.image_data and len(request.image_data) * 3 // 4 > settings.MAX_FILE_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Image must be less than {settings.MAX_FILE_SIZE / 1024 / 1024:.1f}MB; use /ai/analyze-image/raw for binary uploads"
+            )
         
         # Initialize AI service
         ai_service = AIService(db)
@@ -182,6 +222,7 @@ async def analyze_image(
         
         # Analyze image
         response = await ai_service.analyze_image(request)
+        await record_llm_usage(current_user, response.tokens_used)
         
         # Log visual analysis interaction
         log_ai_interaction(
@@ -196,6 +237,10 @@ async def analyze_image(
         logger.info(f"Image analysis completed")
         return response
         
+    except HTTPException:
+        raise
+    except BackendOverloadedError as e:
+        raise _backend_overloaded_error(e)
     except Exception as e:
         logger.error(f"Image analysis failed: {e}")
         raise HTTPException(
@@ -206,6 +251,7 @@ async def analyze_image(
 
 @router.post("/upload-image", response_model=VisualAnalysisResponse)
 async def upload_and_analyze_image(
+    http_request: Request,
     file: UploadFile = File(...),
     message: str = Form("Analyze this image for product matching"),
     analysis_type: str = Form("product_matching"),
@@ -215,42 +261,19 @@ async def upload_and_analyze_image(
     """
     Upload and analyze image file.
     
-    Accepts image files and converts to base64 for analysis.
-    Supports JPEG, PNG, and WebP formats.
+    Accepts image files (spooled to disk past the upload threshold, and then
+    passed on by path) for the visual model. Supports JPEG, PNG, and WebP formats.
     """
+    await check_llm_admission(http_request, current_user, ["visual_analysis"])
+    
+    # Validate size, declared type and file signature while copying into our spool
+    image = await spool_image_upload(file)
+    
     try:
-        # Validate file type
-        if not file.content_type or not file.content_type.startswith("image/"):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="File must be an image"
-            )
-        
-        # Check file size
-        file.file.seek(0, 2)  # Move pointer to the end of the file
-        file_size = file.file.tell()  # Get the size of the file in bytes
-        file.file.seek(0)  # Reset pointer to the beginning of the file
-        if file_size > settings.MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"File size must be less than {settings.MAX_FILE_SIZE / 1024 / 1024:.1f}MB"
-            )
-        
-        # Validate file type against allowed types
-        if file.content_type not in settings.ALLOWED_FILE_TYPES:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"File type {file.content_type} not allowed. Allowed types: {', '.join(settings.ALLOWED_FILE_TYPES)}"
-            )
-        
-        # Read and encode image
-        image_data = await file.read()
-        encoded_image = base64.b64encode(image_data).decode('utf-8')
-        
-        # Create analysis request
-        request = VisualAnalysisRequest(
+        # Create analysis request; the image is base64-encoded once, in the visual client
+        request = await _visual_request_from_upload(
+            image,
             message=message,
-            image_data=encoded_image,
             analysis_type=analysis_type,
             user_id=current_user.user_id if current_user else None  # Fix: Use user_id instead of id
         )
@@ -262,8 +285,8 @@ async def upload_and_analyze_image(
                 user_id=str(current_user.user_id),  # Fix: Use user_id instead of id
                 details={
                     "filename": file.filename,
-                    "content_type": file.content_type,
-                    "size": file.size,
+                    "content_type": image.content_type,
+                    "size": image.size,
                     "analysis_type": analysis_type
                 }
             )
@@ -273,23 +296,99 @@ async def upload_and_analyze_image(
         
         # Analyze image
         response = await ai_service.analyze_image(request)
+        await record_llm_usage(current_user, response.tokens_used)
         
         logger.info(f"Uploaded image analyzed: {file.filename}")
         return response
         
     except HTTPException:
         raise
+    except BackendOverloadedError as e:
+        raise _backend_overloaded_error(e)
     except Exception as e:
         logger.error(f"Image upload and analysis failed: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Image upload and analysis failed: {str(e)}"
         )
+    finally:
+        image.close()
+
+
+async def _visual_request_from_upload(image: SpooledImage, **fields) -> VisualAnalysisRequest:
+    """Build a visual request for a spooled upload: by path when it is on disk, else its bytes."""
+    if image.path:
+        return VisualAnalysisRequest(image_path=image.path, **fields)
+    return VisualAnalysisRequest(image_bytes=await asyncio.to_thread(image.read_bytes), **fields)
+
+
+@router.post("/analyze-image/raw", response_model=VisualAnalysisResponse)
+async def analyze_raw_image(
+    http_request: Request,
+    message: str = Query("Analyze this image for product matching"),
+    analysis_type: str = Query("product_matching"),
+    conversation_id: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(optional_auth)
+):
+    """
+    Analyze an image sent as the raw request body.
+    
+    Send the image bytes with `Content-Type: image/jpeg|png|webp`. The body is
+    streamed to a spooled file: oversized or mismatched uploads are rejected
+    before (Content-Length, Content-Type) or while (size, file signature) it
+    is read, without buffering the whole body or base64 in JSON.
+    """
+    await check_llm_admission(http_request, current_user, ["visual_analysis"])
+    
+    image = await spool_image_stream(
+        http_request.stream(),
+        http_request.headers.get("content-type"),
+        http_request.headers.get("content-length")
+    )
+    
+    try:
+        request = await _visual_request_from_upload(
+            image,
+            message=message,
+            analysis_type=analysis_type,
+            conversation_id=conversation_id,
+            user_id=current_user.user_id if current_user else None
+        )
+        
+        if current_user:
+            log_user_action(
+                action="image_raw_analysis",
+                user_id=str(current_user.user_id),
+                details={
+                    "content_type": image.content_type,
+                    "size": image.size,
+                    "analysis_type": analysis_type
+                }
+            )
+        
+        response = await AIService(db).analyze_image(request)
+        await record_llm_usage(current_user, response.tokens_used)
+        
+        logger.info(f"Raw image analyzed: {image.size} bytes")
+        return response
+        
+    except BackendOverloadedError as e:
+        raise _backend_overloaded_error(e)
+    except Exception as e:
+        logger.error(f"Raw image analysis failed: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Raw image analysis failed: {str(e)}"
+        )
+    finally:
+        image.close()
 
 
 @router.post("/voice-chat", response_model=AIResponse)
 async def voice_chat(
     request: AIRequest,
+    http_request: Request,
     db: AsyncSession = Depends(get_db),
     current_user = Depends(optional_auth)
 ):
@@ -301,6 +400,8 @@ async def voice_chat(
     - Clear, concise responses
     - Natural language flow
     """
+    await check_llm_admission(http_request, current_user, ["voice_chat"])
+    
     try:
         logger.info(f"Voice chat request")
         
@@ -321,6 +422,7 @@ async def voice_chat(
         
         # Process voice chat
         response = await ai_service.process_chat_request(request)
+        await record_llm_usage(current_user, response.tokens_used)
         
         # Log voice interaction
         log_ai_interaction(
@@ -335,6 +437,8 @@ async def voice_chat(
         logger.info(f"Voice chat completed")
         return response
         
+    except BackendOverloadedError as e:
+        raise _backend_overloaded_error(e)
     except Exception as e:
         logger.error(f"Voice chat failed: {e}")
         raise HTTPException(
@@ -343,6 +447,424 @@ async def voice_chat(
         )
 
 
+def _format_stream_event(event: Dict[str, Any], stream_format: str) -> str:
+    """Format a streaming event as an SSE frame or an NDJSON line."""
+    if stream_format == "ndjson":
+        return json.dumps({"event": event["event"], **event["data"]}, ensure_ascii=False, default=str) + "\n"
+    payload = json.dumps(event["data"], ensure_ascii=False, default=str)
+    return f"event: {event['event']}\ndata: {payload}\n\n"
+
+
+def _stream_chat_response(
+    request: AIRequest,
+    stream_format: str,
+    agent_name: str,
+    current_user=None
+) -> StreamingResponse:
+    """Build a streaming response for a chat request."""
+    
+    async def event_stream() -> AsyncIterator[str]:
+        # The request-scoped session from get_db is closed before streaming starts,
+        # so the stream opens its own (lazily connected) session
+        async with SessionLocal() as db:
+            ai_service = AIService(db)
+            async for event in ai_service.stream_chat_request(request):
+                if event["event"] == "done":
+                    data = event["data"]
+                    log_ai_interaction(
+                        agent_name=agent_name,
+                        model=data.get("model_used") or "mixed",
+                        input_tokens=len(request.message.split()),
+                        output_tokens=data.get("tokens_used") or len(data.get("message", "").split()),
+                        duration=data.get("processing_time") or 0,
+                        user_id=str(request.user_id) if request.user_id else None
+                    )
+                    await record_llm_usage(current_user, data.get("tokens_used"))
+                yield _format_stream_event(event, stream_format)
+    
+    media_type = "application/x-ndjson" if stream_format == "ndjson" else "text/event-stream"
+    return StreamingResponse(
+        event_stream(),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/chat/stream")
+async def stream_chat_with_agent(
+    request: AIRequest,
+    http_request: Request,
+    stream_format: str = Query("sse", alias="format", pattern="^(sse|ndjson)$"),
+    current_user = Depends(optional_auth)
+):
+    """
+    Stream a chat response token by token.
+    
+    Emits `token` frames as the model generates and a final `done` frame with
+    conversation_id, timing and token metadata. Use `format=ndjson` for
+    newline-delimited JSON instead of Server-Sent Events.
+    """
+    logger.info(f"AI streaming chat request: {request.interaction_type}")
+    
+    await check_llm_admission(http_request, current_user, [request.interaction_type])
+    
+    if current_user:
+        request.user_id = current_user.user_id
+        log_user_action(
+            action="ai_chat_stream_request",
+            user_id=str(current_user.user_id),
+            details={"interaction_type": request.interaction_type}
+        )
+    
+    return _stream_chat_response(request, stream_format, "ai_service", current_user)
+
+
+@router.post("/voice-chat/stream")
+async def stream_voice_chat(
+    request: AIRequest,
+    http_request: Request,
+    stream_format: str = Query("sse", alias="format", pattern="^(sse|ndjson)$"),
+    current_user = Depends(optional_auth)
+):
+    """
+    Stream a voice-optimized chat response token by token.
+    
+    Lets voice/AR clients start speaking before generation completes.
+    """
+    logger.info("Voice streaming chat request")
+    
+    request.interaction_type = "voice_chat"
+    
+    await check_llm_admission(http_request, current_user, ["voice_chat"])
+    
+    if current_user:
+        request.user_id = current_user.user_id
+        log_user_action(
+            action="voice_chat_stream_request",
+            user_id=str(current_user.user_id),
+            details={"message_length": len(request.message)}
+        )
+    
+    return _stream_chat_response(request, stream_format, "voice_agent", current_user)
+
+
+@router.websocket("/voice/stream")
+async def voice_stream(websocket: WebSocket, token: Optional[str] = Query(None)):
+    """
+    Streaming voice chat: speech in, partial transcripts and answers out.
+    
+    Protocol (authenticate with an access token in the `token` query parameter):
+    - Client sends `{"type": "start", "encoding": "pcm_s16le" | "opus", "conversation_id": ...}`
+      (optional; PCM is the default), then binary audio frames of 16-bit mono PCM at
+      STT_SAMPLE_RATE or one Opus packet per frame.
+    - Server sends `{"type": "partial", "text", "stable"}` as the transcript changes;
+      `stable` is a prefix that will not be revised.
+    - Audio before the user starts speaking is trimmed by voice activity detection
+      and never reaches the recognizer.
+    - Client sends `{"type": "end"}` when the user stops speaking; the server replies with
+      `{"type": "final", "text"}` and then `{"type": "response", ...}` (an AIResponse).
+      `{"type": "cancel"}` discards the current utterance.
+    - Errors are reported as `{"type": "error", "status", "detail"}`; the socket stays open
+      for the next utterance.
+    """
+    await websocket.accept()
+    
+    current_user = None
+    if token:
+        try:
+            async with SessionLocal() as db:
+                current_user = await AuthService(db).verify_token(token)
+        except Exception as e:
+            logger.warning(f"Voice stream authentication failed: {e}")
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Invalid authentication credentials")
+            return
+    
+    try:
+        engine = await asyncio.to_thread(get_stt_engine)
+    except Exception as e:
+        logger.error(f"Speech recognition unavailable: {e}")
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR, reason="Speech recognition unavailable")
+        return
+    
+    encoding = "pcm_s16le"
+    conversation_id: Optional[str] = None
+    transcriber: Optional[StreamingTranscriber] = None
+    
+    try:
+        while True:
+            message = await asyncio.wait_for(websocket.receive(), timeout=settings.STT_IDLE_TIMEOUT_SECONDS)
+            if message["type"] == "websocket.disconnect":
+                break
+            
+            if message.get("bytes") is not None:
+                try:
+                    if transcriber is None:
+                        transcriber = StreamingTranscriber(engine, encoding)
+                    update = await transcriber.feed(message["bytes"])
+                except ValueError as e:
+                    transcriber = None
+                    await _send_ws_error(websocket, status.HTTP_400_BAD_REQUEST, str(e))
+                    continue
+                if update:
+                    await websocket.send_json({"type": "partial", **update})
+                continue
+            
+            try:
+                control = json.loads(message.get("text") or "")
+            except ValueError:
+                await _send_ws_error(websocket, status.HTTP_400_BAD_REQUEST, "Control messages must be JSON")
+                continue
+            kind = control.get("type") if isinstance(control, dict) else None
+            
+            if kind == "start":
+                encoding = control.get("encoding", encoding)
+                conversation_id = control.get("conversation_id", conversation_id)
+                transcriber = None
+            elif kind == "cancel":
+                transcriber = None
+            elif kind == "end":
+                text = await transcriber.finish() if transcriber else ""
+                transcriber = None
+                await websocket.send_json({"type": "final", "text": text})
+                if text:
+                    response = await _respond_to_utterance(websocket, text, conversation_id, current_user)
+                    if response is not None:
+                        conversation_id = response.conversation_id
+            else:
+                await _send_ws_error(websocket, status.HTTP_400_BAD_REQUEST, f"Unknown message type: {kind}")
+    
+    except asyncio.TimeoutError:
+        await websocket.close(code=status.WS_1000_NORMAL_CLOSURE, reason="Idle timeout")
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"Voice stream failed: {e}")
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR, reason="Voice stream failed")
+
+
+async def _send_ws_error(websocket: WebSocket, status_code: int, detail: str):
+    """Report a recoverable error on a WebSocket without closing it."""
+    await websocket.send_json({"type": "error", "status": status_code, "detail": detail})
+
+
+async def _respond_to_utterance(
+    websocket: WebSocket,
+    text: str,
+    conversation_id: Optional[str],
+    current_user=None
+) -> Optional[AIResponse]:
+    """Run a transcribed utterance through the voice agent and send the answer."""
+    try:
+        await check_llm_admission(websocket, current_user, ["voice_chat"])
+    except HTTPException as e:
+        await _send_ws_error(websocket, e.status_code, e.detail)
+        return None
+    
+    request = AIRequest(
+        message=text,
+        interaction_type="voice_chat",
+        user_id=current_user.user_id if current_user else None,
+        conversation_id=conversation_id
+    )
+    try:
+        response = await get_agent_registry().voice_agent.process_request(request)
+    except BackendOverloadedError as e:
+        await _send_ws_error(websocket, status.HTTP_503_SERVICE_UNAVAILABLE, e.message)
+        return None
+    
+    await record_llm_usage(current_user, response.tokens_used)
+    log_ai_interaction(
+        agent_name="voice_agent",
+        model=response.model_used or "ollama_llava",
+        input_tokens=len(text.split()),
+        output_tokens=len(response.message.split()),
+        duration=response.processing_time or 0,
+        user_id=str(request.user_id) if request.user_id else None
+    )
+    await websocket.send_json({"type": "response", **response.model_dump(mode="json")})
+    return response
+
+
+@router.post("/voice/speak")
+async def synthesize_speech(
+    request: VoiceSynthesisRequest,
+    http_request: Request,
+    inline: bool = Query(False, description="Return the audio itself instead of its URL"),
+    current_user = Depends(optional_auth)
+):
+    """
+    Synthesize speech for a phrase.
+    
+    Audio is cached by (text, voice, format), so repeated guidance phrases are
+    served without synthesis. Returns the cached audio URL, duration and
+    whether it was a cache hit; with `inline=true` the audio file is returned.
+    Requests count against the per-user and per-IP request rate limits.
+    """
+    # Synthesis runs no LLM, so no model bucket applies; the user and IP buckets still do
+    await check_llm_admission(http_request, current_user, [])
+    
+    if current_user:
+        log_user_action(
+            action="voice_speak_request",
+            user_id=str(current_user.user_id),
+            details={"text_length": len(request.text)}
+        )
+    
+    result = await get_agent_registry().voice_agent.generate_voice_response(request.text, request.voice, request.format)
+    if result["status"] == "invalid":
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=result["error"])
+    if result["status"] != "ready":
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Speech synthesis failed: {result.get('error')}"
+        )
+    
+    if inline:
+        return await _cached_audio_response(result["audio_key"])
+    return result
+
+
+@router.get("/voice/audio/{key}")
+async def get_cached_speech(key: str):
+    """
+    Serve synthesized audio by its content address.
+    
+    The URL changes whenever the text, voice or format does, so clients and
+    CDNs may cache the response forever.
+    """
+    return await _cached_audio_response(key)
+
+
+async def _cached_audio_response(key: str) -> FileResponse:
+    """Build a long-lived file response for a cached audio clip."""
+    try:
+        tts = await asyncio.to_thread(get_text_to_speech)
+    except Exception as e:
+        logger.error(f"Text-to-speech unavailable: {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Text-to-speech unavailable")
+    
+    found = tts.cache.lookup(key)
+    if found is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Audio not found")
+    path, format = found
+    return FileResponse(
+        path,
+        media_type=AUDIO_CONTENT_TYPES[format],
+        headers={"Cache-Control": "public, max-age=31536000, immutable", "ETag": f'"{key}"'}
+    )
+
+
+@router.post("/chat/batch")
+async def batch_chat_with_agent(
+    batch: AIBatchRequest,
+    http_request: Request,
+    current_user = Depends(optional_auth)
+):
+    """
+    Process several chat requests in one call.
+    
+    Requests run concurrently (at most `max_concurrency` at a time, capped by
+    AI_BATCH_MAX_CONCURRENCY) and results are streamed as newline-delimited
+    JSON in completion order: one `result` or `error` line per request,
+    tagged with its `index` in the batch, then a final `done` line. A failed
+    request does not fail the rest of the batch.
+    """
+    if len(batch.requests) > settings.AI_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Batch exceeds maximum of {settings.AI_BATCH_MAX_ITEMS} requests"
+        )
+    
+    logger.info(f"AI batch chat request: {len(batch.requests)} requests")
+    
+    await check_llm_admission(
+        http_request,
+        current_user,
+        list({item.interaction_type for item in batch.requests}),
+        request_count=len(batch.requests)
+    )
+    
+    if current_user:
+        for item in batch.requests:
+            item.user_id = current_user.user_id
+        log_user_action(
+            action="ai_chat_batch_request",
+            user_id=str(current_user.user_id),
+            details={"batch_size": len(batch.requests)}
+        )
+    
+    concurrency = min(batch.max_concurrency or settings.AI_BATCH_MAX_CONCURRENCY, settings.AI_BATCH_MAX_CONCURRENCY)
+    return _stream_batch_response(batch.requests, max(1, concurrency), current_user)
+
+
+def _stream_batch_response(
+    requests: List[AIRequest],
+    concurrency: int,
+    current_user=None
+) -> StreamingResponse:
+    """Build an NDJSON response that emits each batch result as it completes."""
+    
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def process_item(index: int, item: AIRequest) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                # Each item gets its own session; an AsyncSession is not safe for concurrent use
+                async with SessionLocal() as db:
+                    response = await AIService(db).process_chat_request(item)
+                metadata = response.metadata or {}
+                if metadata.get("error"):
+                    # Agents turn failures into error responses; report them as failed items
+                    logger.error(f"Batch chat item {index} failed: {metadata.get('error_message')}")
+                    return {"event": "error", "data": {
+                        "index": index,
+                        "error_message": metadata.get("error_message") or response.message,
+                        "conversation_id": response.conversation_id
+                    }}
+                await record_llm_usage(current_user, response.tokens_used)
+                log_ai_interaction(
+                    agent_name="ai_service",
+                    model=response.model_used or "mixed",
+                    input_tokens=len(item.message.split()),
+                    output_tokens=response.tokens_used or len(response.message.split()),
+                    duration=response.processing_time or 0,
+                    user_id=str(item.user_id) if item.user_id else None
+                )
+                return {"event": "result", "data": {"index": index, **response.model_dump(mode="json")}}
+            except Exception as e:
+                logger.error(f"Batch chat item {index} failed: {e}")
+                return {"event": "error", "data": {"index": index, "error_message": str(e)}}
+    
+    async def event_stream() -> AsyncIterator[str]:
+        tasks = [asyncio.ensure_future(process_item(index, item)) for index, item in enumerate(requests)]
+        succeeded = failed = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                event = await next_done
+                if event["event"] == "result":
+                    succeeded += 1
+                else:
+                    failed += 1
+                yield _format_stream_event(event, "ndjson")
+            
+            yield _format_stream_event(
+                {"event": "done", "data": {"total": len(requests), "succeeded": succeeded, "failed": failed}},
+                "ndjson"
+            )
+        finally:
+            # Client disconnected: stop work nobody will read
+            pending = [task for task in tasks if not task.done()]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.delete("/conversations/{conversation_id}")
 async def clear_conversation(
     conversation_id: str,
@@ -360,13 +882,8 @@ async def clear_conversation(
         # Initialize AI service
         ai_service = AIService(db)
         
-        # Clear conversation across all agents
-        ai_service.groq_client.clear_conversation(conversation_id)
-        if ai_service.ollama_client:
-            ai_service.ollama_client.clear_conversation(conversation_id)
-        ai_service.product_agent.clear_conversation(conversation_id)
-        ai_service.recommendation_agent.clear_conversation(conversation_id)
-        ai_service.voice_agent.clear_conversation(conversation_id)
+        # Clear conversation across all agents in the shared store
+        await ai_service.registry.conversation_store.clear(None, conversation_id)
         
         # Log user action
         if current_user:
@@ -411,23 +928,23 @@ async def get_conversation_history(
         
         # Get conversation history based on agent type
         if agent_type == "groq":
-            history = ai_service.groq_client.get_conversation_history(conversation_id)
+            history = await ai_service.groq_client.get_conversation_history(conversation_id, limit)
         elif agent_type == "ollama":
-            history = ai_service.ollama_client.get_conversation_history(conversation_id) if ai_service.ollama_client else []
+            history = await ai_service.ollama_client.get_conversation_history(conversation_id, limit) if ai_service.ollama_client else []
         elif agent_type == "product":
-            history = ai_service.product_agent.get_conversation_history(conversation_id)
+            history = await ai_service.product_agent.get_conversation_history(conversation_id, limit)
         elif agent_type == "recommendation":
-            history = ai_service.recommendation_agent.get_conversation_history(conversation_id)
+            history = await ai_service.recommendation_agent.get_conversation_history(conversation_id, limit)
         elif agent_type == "voice":
-            history = ai_service.voice_agent.get_conversation_history(conversation_id)
+            history = await ai_service.voice_agent.get_conversation_history(conversation_id, limit)
         else:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Invalid agent_type: {agent_type}. Must be one of: groq, ollama, product, recommendation, voice"
             )
         
-        # Limit results
-        limited_history = history[-limit:] if len(history) > limit else history
+        # Store already returns at most the last `limit` messages
+        limited_history = history
         
         # Log user action
         if current_user:
@@ -462,54 +979,26 @@ async def get_conversation_history(
 async def ai_health_check():
     """
     Check the health of all AI services.
+    
+    Served from the background health prober's cached snapshot; `stale` is
+    set when the last probe is older than the staleness threshold.
     """
-    logger.info("Performing AI health check")
+    snapshot = await get_health_prober().get_snapshot()
+    backends = snapshot["backends"]
     
-    # Initialize results
+    unknown = {"status": "unknown", "error": "Health not probed yet"}
     results = {
-        "groq": {"status": "unknown", "error": None},
-        "ollama": {"status": "unknown", "error": None},
+        "groq": backends.get("groq", unknown),
+        "ollama": backends.get("ollama", unknown),
+        "database": backends.get("database", unknown),
         "overall_status": "unknown",
         "timestamp": datetime.utcnow().isoformat(),
+        "checked_at": snapshot["checked_at"],
+        "age_seconds": snapshot["age_seconds"],
+        "stale": snapshot["stale"],
         "version": settings.APP_VERSION
     }
     
-    # Check Groq health
-    try:
-        groq_client = GroqClient()
-        groq_health = await groq_client.health_check()
-        results["groq"] = groq_health
-        logger.info("Groq health check completed successfully")
-    except Exception as e:
-        logger.error(f"Groq health check failed: {str(e)}")
-        results["groq"] = {
-            "status": "unhealthy",
-            "error": str(e),
-            "last_check": datetime.utcnow().isoformat(),
-            "model": settings.GROQ_MODEL
-        }
-    
-    # Check Ollama health (optional service)
-    try:
-        ollama_client = OllamaClient()
-        ollama_health = await ollama_client.health_check()
-        results["ollama"] = ollama_health
-        logger.info("Ollama health check completed successfully")
-    except ImportError:
-        logger.info("Ollama client not available - treating as optional service")
-        results["ollama"] = {
-            "status": "not_available",
-            "error": "Ollama service not configured",
-            "last_check": datetime.utcnow().isoformat()
-        }
-    except Exception as e:
-        logger.warning(f"Ollama health check failed: {str(e)}")
-        results["ollama"] = {
-            "status": "unhealthy", 
-            "error": str(e),
-            "last_check": datetime.utcnow().isoformat()
-        }
-    
     # Determine overall status
     groq_healthy = results["groq"]["status"] == "healthy"
     ollama_available = results["ollama"]["status"] in ["healthy", "not_available"]
@@ -531,7 +1020,7 @@ async def ai_health_check():
         "ollama_model": settings.OLLAMA_MODEL
     }
     
-    logger.info(f"AI health check completed: Overall={results['overall_status']}, Groq={results['groq']['status']}, Ollama={results['ollama']['status']}")
+    logger.debug(f"AI health check served: Overall={results['overall_status']}, Groq={results['groq']['status']}, Ollama={results['ollama']['status']}")
     
     return results
 
@@ -670,7 +1159,7 @@ async def test_groq_connection():
     try:
         logger.info("Testing Groq connection...")
         
-        groq_client = GroqClient()
+        groq_client = get_agent_registry().groq_client
         
         # Create a simple test request
         test_request = AIRequest(
@@ -712,7 +1201,9 @@ async def test_ollama_connection():
     try:
         logger.info("Testing Ollama connection...")
         
-        ollama_client = OllamaClient()
+        ollama_client = get_agent_registry().ollama_client
+        if ollama_client is None:
+            raise RuntimeError("Ollama client not initialized")
         
         # Create a simple test request
         test_request = AIRequest(
@@ -0,0 +1,297 @@
+"""
+AI conversation WebSocket for AIBIN AR and voice clients.
+One authenticated, long-lived socket multiplexing chat, visual and navigation requests.
+"""
+
+from typing import Optional, Dict, Any
+import asyncio
+import json
+import time
+
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from pydantic import BaseModel, ValidationError
+
+from ..db.database import SessionLocal
+from ..services.ai_service import AIService
+from ..services.auth_service import AuthService, TokenData
+from ..schemas.ai_schemas import AIRequest, ProductRecommendationRequest, VisualAnalysisRequest
+from ..utils.dependencies import check_llm_admission, record_llm_usage
+from ..utils.exceptions import BackendOverloadedError
+from ..utils.security import decode_jwt_token
+from ..agents.registry import AgentRegistry, get_agent_registry
+from ..logging.log import logger, log_ai_interaction, log_user_action
+from ..config.config import settings
+
+
+router = APIRouter(prefix="/ai", tags=["AI Agents"])
+
+NAVIGATION_INTERACTIONS = {"product_search", "product_details"}
+
+
+class ConversationSession:
+    """
+    State of one conversation socket.
+
+    The user is authenticated once per socket (or again on an `auth`
+    message, to refresh an expiring token) instead of once per request, and
+    the agent registry handle and conversation id live as long as the socket.
+    Each request runs as its own task keyed by the client's request id, so
+    a slow image analysis does not hold up a chat reply; responses are
+    tagged with that id and sends are serialized.
+    """
+
+    # Message type -> (payload schema, handler name)
+    HANDLERS = {
+        "chat": (AIRequest, "_handle_chat"),
+        "stream": (AIRequest, "_handle_stream"),
+        "navigation": (AIRequest, "_handle_navigation"),
+        "visual": (VisualAnalysisRequest, "_handle_visual"),
+        "recommendations": (ProductRecommendationRequest, "_handle_recommendations"),
+    }
+
+    def __init__(self, websocket: WebSocket, registry: AgentRegistry):
+        self.websocket = websocket
+        self.registry = registry
+        self.current_user: Optional[TokenData] = None
+        self.expires_at: Optional[float] = None
+        self.conversation_id: Optional[str] = None
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self._send_lock = asyncio.Lock()
+
+        # Metrics
+        self.requests = 0
+        self.opened_at = time.monotonic()
+
+    async def send(self, message: Dict[str, Any]):
+        async with self._send_lock:
+            await self.websocket.send_text(json.dumps(message, ensure_ascii=False, default=str))
+
+    async def send_error(self, request_id: Optional[str], status_code: int, detail: Any):
+        await self.send({"id": request_id, "type": "error", "status": status_code, "detail": detail})
+
+    async def authenticate(self, token: str):
+        """
+        Verify an access token and bind the user to the session.
+
+        Raises:
+            AuthenticationError: If the token is invalid or the user inactive
+        """
+        async with SessionLocal() as db:
+            current_user = await AuthService(db).verify_token(token)
+        expires_at = decode_jwt_token(token, settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM).get("exp")
+
+        if self.current_user and current_user.user_id != self.current_user.user_id:
+            # A different user on the same socket would inherit this conversation
+            self.conversation_id = None
+        self.current_user = current_user
+        self.expires_at = float(expires_at) if expires_at else None
+
+    @property
+    def token_expired(self) -> bool:
+        return self.expires_at is not None and time.time() >= self.expires_at
+
+    async def handle(self, message: Any):
+        """Dispatch one client message."""
+        if not isinstance(message, dict):
+            await self.send_error(None, status.HTTP_400_BAD_REQUEST, "Messages must be JSON objects")
+            return
+
+        kind = message.get("type")
+        request_id = message.get("id")
+        if request_id is not None:
+            request_id = str(request_id)
+
+        if kind == "ping":
+            await self.send({"id": request_id, "type": "pong"})
+        elif kind == "auth":
+            try:
+                await self.authenticate(str(message.get("token", "")))
+            except Exception as e:
+                logger.warning(f"Conversation socket re-authentication failed: {e}")
+                await self.send_error(request_id, status.HTTP_401_UNAUTHORIZED, "Invalid authentication credentials")
+                return
+            await self.send({"id": request_id, "type": "authenticated", "user_id": str(self.current_user.user_id)})
+        elif kind == "cancel":
+            task = self.tasks.get(request_id)
+            if task is not None:
+                task.cancel()
+            await self.send({"id": request_id, "type": "cancelled", "found": task is not None})
+        elif kind in self.HANDLERS:
+            await self._start(kind, request_id, message.get("payload") or {})
+        else:
+            await self.send_error(request_id, status.HTTP_400_BAD_REQUEST, f"Unknown message type: {kind}")
+
+    async def _start(self, kind: str, request_id: Optional[str], payload: Dict[str, Any]):
+        if request_id is None:
+            await self.send_error(None, status.HTTP_400_BAD_REQUEST, "Requests need an id")
+            return
+        if request_id in self.tasks:
+            await self.send_error(request_id, status.HTTP_409_CONFLICT, "A request with this id is in flight")
+            return
+        if len(self.tasks) >= settings.AI_WS_MAX_IN_FLIGHT:
+            await self.send_error(
+                request_id,
+                status.HTTP_429_TOO_MANY_REQUESTS,
+                f"At most {settings.AI_WS_MAX_IN_FLIGHT} requests may be in flight per connection"
+            )
+            return
+        if self.current_user and self.token_expired:
+            await self.send_error(request_id, status.HTTP_401_UNAUTHORIZED, "Token expired; send an auth message")
+            return
+
+        schema, handler = self.HANDLERS[kind]
+        try:
+            request = schema.model_validate(payload)
+        except ValidationError as e:
+            await self.send_error(request_id, status.HTTP_422_UNPROCESSABLE_ENTITY, e.errors(include_url=False))
+            return
+
+        request.user_id = self.current_user.user_id if self.current_user else None
+        if not request.conversation_id:
+            request.conversation_id = self.conversation_id
+
+        self.requests += 1
+        task = asyncio.create_task(self._run(request_id, getattr(self, handler), request))
+        self.tasks[request_id] = task
+        task.add_done_callback(lambda _: self.tasks.pop(request_id, None))
+
+    async def _run(self, request_id: str, handler, request: AIRequest):
+        try:
+            # Sessions connect lazily, so requests that never query cost no connection
+            async with SessionLocal() as db:
+                await handler(request_id, request, AIService(db, self.registry))
+        except asyncio.CancelledError:
+            raise
+        except HTTPException as e:
+            await self.send_error(request_id, e.status_code, e.detail)
+        except BackendOverloadedError as e:
+            await self.send_error(request_id, status.HTTP_503_SERVICE_UNAVAILABLE, e.message)
+        except Exception as e:
+            logger.error(f"Conversation socket request {request_id} failed: {e}")
+            await self.send_error(request_id, status.HTTP_500_INTERNAL_SERVER_ERROR, str(e))
+
+    async def _admit(self, interaction_type: str):
+        await check_llm_admission(self.websocket, self.current_user, [interaction_type])
+
+    async def _send_result(self, request_id: str, agent_name: str, request: AIRequest, response: BaseModel):
+        if getattr(response, "conversation_id", None) and not response.conversation_id.startswith("error_"):
+            self.conversation_id = response.conversation_id
+        await record_llm_usage(self.current_user, getattr(response, "tokens_used", None))
+        log_ai_interaction(
+            agent_name=agent_name,
+            model=getattr(response, "model_used", None) or "mixed",
+            input_tokens=len(request.message.split()),
+            output_tokens=getattr(response, "tokens_used", None) or len(response.message.split()),
+            duration=getattr(response, "processing_time", None) or 0,
+            user_id=str(request.user_id) if request.user_id else None
+        )
+        await self.send({"id": request_id, "type": "result", "data": response.model_dump(mode="json")})
+
+    async def _handle_chat(self, request_id: str, request: AIRequest, ai_service: AIService):
+        await self._admit(request.interaction_type)
+        response = await ai_service.process_chat_request(request)
+        await self._send_result(request_id, "ai_service", request, response)
+
+    async def _handle_navigation(self, request_id: str, request: AIRequest, ai_service: AIService):
+        if request.interaction_type not in NAVIGATION_INTERACTIONS:
+            request.interaction_type = "product_search"
+        await self._handle_chat(request_id, request, ai_service)
+
+    async def _handle_visual(self, request_id: str, request: VisualAnalysisRequest, ai_service: AIService):
+        await self._admit("visual_analysis")
+        response = await ai_service.analyze_image(request)
+        await self._send_result(request_id, "voice_agent", request, response)
+
+    async def _handle_recommendations(
+        self,
+        request_id: str,
+        request: ProductRecommendationRequest,
+        ai_service: AIService
+    ):
+        await self._admit("product_recommendation")
+        response = await ai_service.get_product_recommendations(request)
+        await self._send_result(request_id, "recommendation_agent", request, response)
+
+    async def _handle_stream(self, request_id: str, request: AIRequest, ai_service: AIService):
+        await self._admit(request.interaction_type)
+        async for event in ai_service.stream_chat_request(request):
+            if event["event"] == "done":
+                data = event["data"]
+                if data.get("conversation_id"):
+                    self.conversation_id = data["conversation_id"]
+                await record_llm_usage(self.current_user, data.get("tokens_used"))
+                log_ai_interaction(
+                    agent_name="ai_service",
+                    model=data.get("model_used") or "mixed",
+                    input_tokens=len(request.message.split()),
+                    output_tokens=data.get("tokens_used") or len(data.get("message", "").split()),
+                    duration=data.get("processing_time") or 0,
+                    user_id=str(request.user_id) if request.user_id else None
+                )
+            await self.send({"id": request_id, "type": event["event"], "data": event["data"]})
+
+    async def close(self):
+        """Cancel requests still in flight."""
+        pending = list(self.tasks.values())
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+@router.websocket("/ws")
+async def conversation_socket(websocket: WebSocket, token: Optional[str] = Query(None)):
+    """
+    Persistent conversation channel for AR and voice clients.
+
+    Authenticate with an access token in the `token` query parameter or an
+    `{"type": "auth", "token": ...}` message (also used to refresh the token).
+    Requests are `{"id": ..., "type": ..., "payload": {...}}` where type is:
+    - `chat`: an AIRequest, answered with one `result`
+    - `stream`: an AIRequest, answered with `token` frames and a `done` frame
+    - `navigation`: an AIRequest routed to the navigation agent (product_search by default)
+    - `visual`: a VisualAnalysisRequest with base64 `image_data`
+    - `recommendations`: a ProductRecommendationRequest
+
+    Every reply carries the request's `id`; requests run concurrently (up to
+    AI_WS_MAX_IN_FLIGHT) and may complete out of order. `{"id", "type": "cancel"}`
+    cancels a request and `{"type": "ping"}` keeps the socket alive. Failures are
+    `{"id", "type": "error", "status", "detail"}` and leave the socket open.
+    The conversation id from the first reply is reused until a request sets its own.
+    """
+    await websocket.accept()
+    session = ConversationSession(websocket, get_agent_registry())
+
+    if token:
+        try:
+            await session.authenticate(token)
+        except Exception as e:
+            logger.warning(f"Conversation socket authentication failed: {e}")
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Invalid authentication credentials")
+            return
+        log_user_action(action="ai_socket_opened", user_id=str(session.current_user.user_id))
+
+    try:
+        while True:
+            message = await asyncio.wait_for(websocket.receive(), timeout=settings.AI_WS_IDLE_TIMEOUT_SECONDS)
+            if message["type"] == "websocket.disconnect":
+                break
+            try:
+                payload = json.loads(message.get("text") or "")
+            except ValueError:
+                await session.send_error(None, status.HTTP_400_BAD_REQUEST, "Messages must be JSON text frames")
+                continue
+            await session.handle(payload)
+
+    except asyncio.TimeoutError:
+        await websocket.close(code=status.WS_1000_NORMAL_CLOSURE, reason="Idle timeout")
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"Conversation socket failed: {e}")
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR, reason="Conversation socket failed")
+    finally:
+        await session.close()
+        logger.info(
+            f"Conversation socket closed after {time.monotonic() - session.opened_at:.1f}s, "
+            f"{session.requests} requests"
+        )
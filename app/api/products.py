@@ -10,6 +10,8 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query, Path
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.database import get_db
+from app.agents.embedding_index import get_embedding_index
+from app.config.config import settings
 from app.models.product import Product
 from app.schemas.product_schemas import (
     ProductCreateRequest,
@@ -25,6 +27,12 @@ from app.logging.log import logger
 router = APIRouter(prefix="/Projects", tags=["Projects"])
 
 
+def _writing_product_service(db: AsyncSession) -> Projectservice:
+    """Product service for write endpoints; writes update this worker's semantic index immediately."""
+    embedding_index = get_embedding_index() if settings.EMBEDDING_INDEX_ENABLED else None
+    return Projectservice(db, embedding_index=embedding_index)
+
+
 @router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
 async def create_product(
     product_data: ProductCreateRequest,
@@ -37,7 +45,7 @@ async def create_product(
     This endpoint is restricted to administrators.
     """
     try:
-        product_service = Projectservice(db)
+        product_service = _writing_product_service(db)
         product = await product_service.create_product(product_data)
         return product
         
@@ -97,7 +105,7 @@ async def update_product(
     Returns 404 if the product is not found.
     """
     try:
-        product_service = Projectservice(db)
+        product_service = _writing_product_service(db)
         product = await product_service.update_product(product_id, data)
         
         if not product:
@@ -132,7 +140,7 @@ async def delete_product(
     Returns 404 if the product is not found.
     """
     try:
-        product_service = Projectservice(db)
+        product_service = _writing_product_service(db)
         success = await product_service.delete_product(product_id, permanent=permanent)
         
         if not success:
@@ -49,16 +49,142 @@ class Settings:
     MAX_CONVERSATION_HISTORY: int = config("MAX_CONVERSATION_HISTORY", default=10, cast=int)
     ENABLE_CONVERSATION_CONTEXT: bool = config("ENABLE_CONVERSATION_CONTEXT", default=True, cast=bool)
     PRODUCT_RECOMMENDATION_LIMIT: int = config("PRODUCT_RECOMMENDATION_LIMIT", default=5, cast=int)
+    RECOMMENDATION_CANDIDATE_LIMIT: int = config("RECOMMENDATION_CANDIDATE_LIMIT", default=5000, cast=int)
+    RECOMMENDATION_RECENCY_HALF_LIFE_DAYS: float = config("RECOMMENDATION_RECENCY_HALF_LIFE_DAYS", default=30.0, cast=float)
+    RECOMMENDATION_WEIGHT_PRICE: float = config("RECOMMENDATION_WEIGHT_PRICE", default=0.2, cast=float)
+    RECOMMENDATION_WEIGHT_STOCK: float = config("RECOMMENDATION_WEIGHT_STOCK", default=0.1, cast=float)
+    RECOMMENDATION_WEIGHT_FEATURED: float = config("RECOMMENDATION_WEIGHT_FEATURED", default=0.1, cast=float)
+    RECOMMENDATION_WEIGHT_CATEGORY: float = config("RECOMMENDATION_WEIGHT_CATEGORY", default=0.15, cast=float)
+    RECOMMENDATION_WEIGHT_BRAND: float = config("RECOMMENDATION_WEIGHT_BRAND", default=0.1, cast=float)
+    RECOMMENDATION_WEIGHT_RECENCY: float = config("RECOMMENDATION_WEIGHT_RECENCY", default=0.1, cast=float)
+    RECOMMENDATION_WEIGHT_SIMILARITY: float = config("RECOMMENDATION_WEIGHT_SIMILARITY", default=0.3, cast=float)
+    
+    # Brand Detection Configuration
+    BRAND_DICTIONARY_TTL_SECONDS: int = config("BRAND_DICTIONARY_TTL_SECONDS", default=300, cast=int)
+    BRAND_BACKFILL_ON_STARTUP: bool = config("BRAND_BACKFILL_ON_STARTUP", default=True, cast=bool)
+    BRAND_BACKFILL_BATCH_SIZE: int = config("BRAND_BACKFILL_BATCH_SIZE", default=1000, cast=int)
+    
+    # Product Embedding Index Configuration
+    EMBEDDING_INDEX_ENABLED: bool = config("EMBEDDING_INDEX_ENABLED", default=True, cast=bool)
+    EMBEDDING_BACKEND: str = config("EMBEDDING_BACKEND", default="hashed_tfidf")
+    EMBEDDING_DIM: int = config("EMBEDDING_DIM", default=512, cast=int)
+    EMBEDDING_INDEX_DIR: str = config("EMBEDDING_INDEX_DIR", default="")  # empty = system temp dir
+    EMBEDDING_SYNC_INTERVAL_SECONDS: int = config("EMBEDDING_SYNC_INTERVAL_SECONDS", default=300, cast=int)
+    EMBEDDING_SYNC_BATCH_SIZE: int = config("EMBEDDING_SYNC_BATCH_SIZE", default=500, cast=int)
+    # Each sync re-scans this far behind its watermark, so rows committed late with an older updated_at are not skipped
+    EMBEDDING_SYNC_OVERLAP_SECONDS: int = config("EMBEDDING_SYNC_OVERLAP_SECONDS", default=600, cast=int)
+    EMBEDDING_MIN_SIMILARITY: float = config("EMBEDDING_MIN_SIMILARITY", default=0.15, cast=float)
+    EMBEDDING_CANDIDATE_K: int = config("EMBEDDING_CANDIDATE_K", default=500, cast=int)
+    EMBEDDING_IVF_ENABLED: bool = config("EMBEDDING_IVF_ENABLED", default=False, cast=bool)
+    EMBEDDING_IVF_MIN_ROWS: int = config("EMBEDDING_IVF_MIN_ROWS", default=50000, cast=int)
+    EMBEDDING_IVF_LISTS: int = config("EMBEDDING_IVF_LISTS", default=0, cast=int)  # 0 = sqrt(rows)
+    EMBEDDING_IVF_PROBES: int = config("EMBEDDING_IVF_PROBES", default=8, cast=int)
+    
+    # Conversation Store Configuration
+    CONVERSATION_STORE_BACKEND: str = config("CONVERSATION_STORE_BACKEND", default="memory")  # memory or postgres
+    CONVERSATION_TTL_SECONDS: int = config("CONVERSATION_TTL_SECONDS", default=24 * 60 * 60, cast=int)
+    CONVERSATION_STORE_MAX_CONVERSATIONS: int = config("CONVERSATION_STORE_MAX_CONVERSATIONS", default=10000, cast=int)
+    CONVERSATION_STORE_MAX_BYTES: int = config("CONVERSATION_STORE_MAX_BYTES", default=64 * 1024 * 1024, cast=int)  # 64MB
+    CONVERSATION_STORE_MAX_MESSAGES: int = config("CONVERSATION_STORE_MAX_MESSAGES", default=50, cast=int)  # Kept per conversation; turns older than MAX_CONVERSATION_HISTORY are summarized
+    CONTEXT_TOKEN_BUDGET: int = config("CONTEXT_TOKEN_BUDGET", default=2000, cast=int)  # Prompt tokens incl. system prompt
+    CONTEXT_VOICE_TOKEN_BUDGET: int = config("CONTEXT_VOICE_TOKEN_BUDGET", default=800, cast=int)  # Voice/multimodal prompts
+    CONTEXT_SUMMARY_ENABLED: bool = config("CONTEXT_SUMMARY_ENABLED", default=True, cast=bool)
+    CONTEXT_SUMMARY_MAX_TOKENS: int = config("CONTEXT_SUMMARY_MAX_TOKENS", default=200, cast=int)
+    CONTEXT_SUMMARY_INPUT_TOKENS: int = config("CONTEXT_SUMMARY_INPUT_TOKENS", default=3000, cast=int)
+    
+    # LLM Response Cache Configuration
+    LLM_CACHE_ENABLED: bool = config("LLM_CACHE_ENABLED", default=True, cast=bool)
+    LLM_CACHE_TTL_SECONDS: int = config("LLM_CACHE_TTL_SECONDS", default=60 * 60, cast=int)
+    LLM_CACHE_MAX_ENTRIES: int = config("LLM_CACHE_MAX_ENTRIES", default=1000, cast=int)
+    LLM_CACHE_MAX_BYTES: int = config("LLM_CACHE_MAX_BYTES", default=16 * 1024 * 1024, cast=int)  # 16MB
+    LLM_CACHE_MAX_TEMPERATURE: float = config("LLM_CACHE_MAX_TEMPERATURE", default=1.0, cast=float)  # Skip caching above this
+    LLM_SINGLE_FLIGHT_ENABLED: bool = config("LLM_SINGLE_FLIGHT_ENABLED", default=True, cast=bool)
+    LLM_BULKHEAD_ENABLED: bool = config("LLM_BULKHEAD_ENABLED", default=True, cast=bool)
+    LLM_QUEUE_TIMEOUT_SECONDS: float = config("LLM_QUEUE_TIMEOUT_SECONDS", default=10.0, cast=float)  # Max wait for a slot
+    GROQ_MAX_CONCURRENCY: int = config("GROQ_MAX_CONCURRENCY", default=16, cast=int)
+    GROQ_MAX_QUEUE: int = config("GROQ_MAX_QUEUE", default=64, cast=int)
+    OLLAMA_MAX_CONCURRENCY: int = config("OLLAMA_MAX_CONCURRENCY", default=2, cast=int)
+    OLLAMA_MAX_QUEUE: int = config("OLLAMA_MAX_QUEUE", default=16, cast=int)
+    LLM_ROUTING_ENABLED: bool = config("LLM_ROUTING_ENABLED", default=True, cast=bool)
+    LLM_ROUTER_LATENCY_THRESHOLD_SECONDS: float = config("LLM_ROUTER_LATENCY_THRESHOLD_SECONDS", default=8.0, cast=float)
+    LLM_EWMA_ALPHA: float = config("LLM_EWMA_ALPHA", default=0.2, cast=float)
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = config("LLM_CIRCUIT_FAILURE_THRESHOLD", default=5, cast=int)
+    LLM_CIRCUIT_ERROR_RATE_THRESHOLD: float = config("LLM_CIRCUIT_ERROR_RATE_THRESHOLD", default=0.5, cast=float)
+    LLM_CIRCUIT_RESET_SECONDS: int = config("LLM_CIRCUIT_RESET_SECONDS", default=30, cast=int)
+    AI_BATCH_MAX_ITEMS: int = config("AI_BATCH_MAX_ITEMS", default=100, cast=int)
+    AI_BATCH_MAX_CONCURRENCY: int = config("AI_BATCH_MAX_CONCURRENCY", default=8, cast=int)
+    AI_WS_MAX_IN_FLIGHT: int = config("AI_WS_MAX_IN_FLIGHT", default=8, cast=int)
+    AI_WS_IDLE_TIMEOUT_SECONDS: int = config("AI_WS_IDLE_TIMEOUT_SECONDS", default=300, cast=int)
+    FAST_PATH_ENABLED: bool = config("FAST_PATH_ENABLED", default=True, cast=bool)
+    HEALTH_PROBE_ENABLED: bool = config("HEALTH_PROBE_ENABLED", default=True, cast=bool)
+    HEALTH_PROBE_INTERVAL_SECONDS: int = config("HEALTH_PROBE_INTERVAL_SECONDS", default=60, cast=int)
+    HEALTH_PROBE_STALE_AFTER_SECONDS: int = config("HEALTH_PROBE_STALE_AFTER_SECONDS", default=180, cast=int)
+    
+    # Product AI Summary Refresh Configuration
+    AI_SUMMARY_REFRESH_ENABLED: bool = config("AI_SUMMARY_REFRESH_ENABLED", default=True, cast=bool)
+    AI_SUMMARY_REFRESH_INTERVAL_SECONDS: int = config("AI_SUMMARY_REFRESH_INTERVAL_SECONDS", default=300, cast=int)
+    AI_SUMMARY_BATCH_SIZE: int = config("AI_SUMMARY_BATCH_SIZE", default=20, cast=int)
+    AI_SUMMARY_MAX_CONCURRENCY: int = config("AI_SUMMARY_MAX_CONCURRENCY", default=4, cast=int)
     
     # API Settings
     API_V1_PREFIX: str = config("API_V1_PREFIX", default="/api/v1")
     CORS_ORIGINS: list = config("CORS_ORIGINS", default="*").split(",")
-    RATE_LIMIT_PER_MINUTE: int = config("RATE_LIMIT_PER_MINUTE", default=60, cast=int)
+    RATE_LIMIT_ENABLED: bool = config("RATE_LIMIT_ENABLED", default=True, cast=bool)
+    RATE_LIMIT_BACKEND: str = config("RATE_LIMIT_BACKEND", default="memory")  # memory or postgres (shared across workers)
+    RATE_LIMIT_PER_MINUTE: int = config("RATE_LIMIT_PER_MINUTE", default=60, cast=int)  # Requests per user
+    RATE_LIMIT_PER_IP_PER_MINUTE: int = config("RATE_LIMIT_PER_IP_PER_MINUTE", default=120, cast=int)
+    RATE_LIMIT_USER_TOKENS_PER_MINUTE: int = config("RATE_LIMIT_USER_TOKENS_PER_MINUTE", default=20000, cast=int)
+    GROQ_TOKENS_PER_MINUTE: int = config("GROQ_TOKENS_PER_MINUTE", default=30000, cast=int)  # 0 disables
+    OLLAMA_TOKENS_PER_MINUTE: int = config("OLLAMA_TOKENS_PER_MINUTE", default=0, cast=int)  # 0 disables
     
     # File Upload Settings
     MAX_FILE_SIZE: int = config("MAX_FILE_SIZE", default=10 * 1024 * 1024, cast=int)  # 10MB
+    UPLOAD_SPOOL_THRESHOLD: int = config("UPLOAD_SPOOL_THRESHOLD", default=1024 * 1024, cast=int)  # 1MB in memory, then disk
     ALLOWED_FILE_TYPES: list[str] = config("ALLOWED_FILE_TYPES", default="image/jpeg,image/png,image/webp").split(",")
     
+    # Image Preprocessing Configuration
+    IMAGE_PREPROCESS_ENABLED: bool = config("IMAGE_PREPROCESS_ENABLED", default=True, cast=bool)
+    IMAGE_PREPROCESS_WORKERS: int = config("IMAGE_PREPROCESS_WORKERS", default=2, cast=int)
+    IMAGE_MAX_SIDE: int = config("IMAGE_MAX_SIDE", default=1024, cast=int)
+    IMAGE_JPEG_QUALITY: int = config("IMAGE_JPEG_QUALITY", default=85, cast=int)
+    
+    # Visual Analysis Cache Configuration
+    VISUAL_CACHE_ENABLED: bool = config("VISUAL_CACHE_ENABLED", default=True, cast=bool)
+    VISUAL_CACHE_TTL_SECONDS: int = config("VISUAL_CACHE_TTL_SECONDS", default=60 * 60, cast=int)
+    VISUAL_CACHE_MAX_ENTRIES: int = config("VISUAL_CACHE_MAX_ENTRIES", default=2000, cast=int)
+    VISUAL_CACHE_MAX_DISTANCE: int = config("VISUAL_CACHE_MAX_DISTANCE", default=6, cast=int)  # Hamming bits of 64; 0 = exact only
+    
+    # Speech-to-Text Configuration
+    STT_ENGINE: str = config("STT_ENGINE", default="")  # vosk | scripted (deterministic stand-in); empty = disabled
+    STT_MODEL_PATH: str = config("STT_MODEL_PATH", default="")
+    STT_SAMPLE_RATE: int = config("STT_SAMPLE_RATE", default=16000, cast=int)
+    STT_MAX_UTTERANCE_SECONDS: int = config("STT_MAX_UTTERANCE_SECONDS", default=30, cast=int)
+    STT_PARTIAL_STABILITY: int = config("STT_PARTIAL_STABILITY", default=2, cast=int)  # Hypotheses a word must survive
+    STT_IDLE_TIMEOUT_SECONDS: int = config("STT_IDLE_TIMEOUT_SECONDS", default=60, cast=int)
+    
+    # Text-to-Speech Configuration
+    TTS_ENGINE: str = config("TTS_ENGINE", default="tone")  # piper (needs piper-tts and TTS_MODEL_PATH) | tone (deterministic stand-in)
+    TTS_MODEL_PATH: str = config("TTS_MODEL_PATH", default="")  # Directory of <voice>.onnx models
+    TTS_DEFAULT_VOICE: str = config("TTS_DEFAULT_VOICE", default="en_US-lessac-medium")
+    TTS_MAX_TEXT_LENGTH: int = config("TTS_MAX_TEXT_LENGTH", default=1000, cast=int)
+    TTS_CACHE_DIR: str = config("TTS_CACHE_DIR", default="")  # empty = system temp dir
+    TTS_CACHE_MAX_BYTES: int = config("TTS_CACHE_MAX_BYTES", default=512 * 1024 * 1024, cast=int)  # 512MB
+    
+    # Audio Preprocessing Configuration
+    AUDIO_VAD_ENABLED: bool = config("AUDIO_VAD_ENABLED", default=True, cast=bool)
+    AUDIO_VAD_FRAME_MS: int = config("AUDIO_VAD_FRAME_MS", default=20, cast=int)
+    AUDIO_VAD_THRESHOLD_DB: float = config("AUDIO_VAD_THRESHOLD_DB", default=12.0, cast=float)  # Above the noise floor
+    AUDIO_VAD_MAX_NOISE_FLOOR_DB: float = config("AUDIO_VAD_MAX_NOISE_FLOOR_DB", default=-45.0, cast=float)  # dBFS
+    AUDIO_VAD_ZCR_THRESHOLD: float = config("AUDIO_VAD_ZCR_THRESHOLD", default=0.25, cast=float)
+    AUDIO_VAD_MIN_SPEECH_MS: int = config("AUDIO_VAD_MIN_SPEECH_MS", default=100, cast=int)
+    AUDIO_VAD_MIN_SILENCE_MS: int = config("AUDIO_VAD_MIN_SILENCE_MS", default=400, cast=int)
+    AUDIO_VAD_PADDING_MS: int = config("AUDIO_VAD_PADDING_MS", default=200, cast=int)
+    
+    # Metrics Configuration
+    METRICS_ENABLED: bool = config("METRICS_ENABLED", default=True, cast=bool)
+    METRICS_MULTIPROC_DIR: str = config("METRICS_MULTIPROC_DIR", default="")  # Shared by all workers; empty on deploy
+    METRICS_FLUSH_INTERVAL_SECONDS: float = config("METRICS_FLUSH_INTERVAL_SECONDS", default=5.0, cast=float)
+    
     # Logging Configuration
     LOG_LEVEL: str = config("LOG_LEVEL", default="INFO")
     LOG_FORMAT: str = config("LOG_FORMAT", default="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
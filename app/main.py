@@ -4,13 +4,23 @@ Agentic AI-Based Indoor Navigation uses advanced AI and augmented reality (AR) t
 """
 
 import time
-from fastapi import FastAPI, Request, Response
+import asyncio
+from fastapi import FastAPI, Request, Response, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import uuid
 
 from app.config.config import settings
-from app.api import auth, users, Projects, category, ai_routes
+from app.api import auth, users, products, category, ai_routes, ai_session
+from app.agents.registry import init_agent_registry, shutdown_agent_registry
+from app.agents.health_prober import get_health_prober
+from app.agents.embedding_index import get_embedding_index
+from app.agents.image_preprocessing import get_image_preprocessor
+from app.agents.speech_to_text import load_stt_engine
+from app.agents.text_to_speech import load_text_to_speech
+from app.utils.metrics import get_metrics_registry, PROMETHEUS_CONTENT_TYPE
+from app.services.product_summary_service import run_summary_refresh_loop
+from app.services.brand_service import run_brand_backfill
 from app.logging.log import logger, log_api_request, log_user_action
 
 
@@ -45,10 +55,48 @@ async def lifespan(app: FastAPI):
         }
     )
     
+    # Build long-lived AI clients and agents once per worker
+    try:
+        init_agent_registry()
+        logger.info("🤖 AI agent registry initialized")
+    except Exception as e:
+        logger.error(f"AI agent registry initialization failed: {e}")
+    
+    # A misconfigured speech engine fails startup rather than the first voice request
+    await load_stt_engine()
+    await load_text_to_speech()
+    
+    # Start background jobs
+    background_tasks = []
+    if settings.AI_SUMMARY_REFRESH_ENABLED:
+        background_tasks.append(asyncio.create_task(run_summary_refresh_loop()))
+        logger.info("📝 Product AI summary refresh started")
+    if settings.HEALTH_PROBE_ENABLED:
+        background_tasks.append(asyncio.create_task(get_health_prober().run()))
+        logger.info("🩺 AI health prober started")
+    if settings.BRAND_BACKFILL_ON_STARTUP:
+        background_tasks.append(asyncio.create_task(run_brand_backfill()))
+        logger.info("🏷️ Product brand backfill started")
+    if settings.EMBEDDING_INDEX_ENABLED:
+        background_tasks.append(asyncio.create_task(get_embedding_index().run()))
+        logger.info("🧭 Product embedding index sync started")
+    if settings.METRICS_ENABLED and settings.METRICS_MULTIPROC_DIR:
+        background_tasks.append(asyncio.create_task(get_metrics_registry().run()))
+        logger.info("📈 Multiprocess metrics flush started")
+    
     yield
     
     # Shutdown
     logger.info(f"🛑 {settings.APP_NAME} shutting down...")
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    if settings.METRICS_ENABLED:
+        await get_metrics_registry().flush()
+    if settings.EMBEDDING_INDEX_ENABLED:
+        get_embedding_index().close()
+    get_image_preprocessor().shutdown()
+    await shutdown_agent_registry()
     log_user_action(
         action="application_shutdown",
         user_id="system",
@@ -177,15 +225,25 @@ async def ping():
     }
 
 
+# Prometheus metrics endpoint
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def metrics():
+    """Agent, LLM and bulkhead metrics of all workers in Prometheus text format."""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(content=await get_metrics_registry().render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
 # Include API routers
 app.include_router(
     auth.router,
     prefix=f"{settings.API_V1_PREFIX}"
 )
 app.include_router(users.router, prefix=f"{settings.API_V1_PREFIX}")
-app.include_router(Projects.router, prefix=f"{settings.API_V1_PREFIX}")
+app.include_router(products.router, prefix=f"{settings.API_V1_PREFIX}")
 app.include_router(category.router, prefix=f"{settings.API_V1_PREFIX}")
 app.include_router(ai_routes.router, prefix=f"{settings.API_V1_PREFIX}")
+app.include_router(ai_session.router, prefix=f"{settings.API_V1_PREFIX}")
 
 
 # Root endpoint
@@ -3,6 +3,9 @@ from .user import User, UserRole, UserStatus
 from .user_session import UserSession
 from .category import Category
 from .product import Product, Projectstatus, ProductCondition
+from .conversation_message import ConversationMessageRecord
+from .rate_limit_bucket import RateLimitBucket
+from .brand import Brand
 
 __all__ = [
     "BaseModel",
@@ -14,4 +17,7 @@ __all__ = [
     "Product",
     "Projectstatus",
     "ProductCondition",
+    "ConversationMessageRecord",
+    "RateLimitBucket",
+    "Brand",
 ]
\ No newline at end of file
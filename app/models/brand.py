@@ -0,0 +1,31 @@
+"""
+Brand model for AIBIN Indoor Navigation platform.
+Dictionary of brands detected in product text.
+"""
+
+from sqlalchemy import Column, String, Boolean
+from sqlalchemy.dialects.postgresql import JSONB
+
+from .base_model import BaseModel
+
+
+class Brand(BaseModel):
+    """
+    Brand dictionary entry.
+
+    `name` is the canonical brand stored on Product.brand; `aliases` holds
+    alternate spellings and abbreviations (e.g. "Hermes", "LV") that are
+    also matched in product text.
+    """
+
+    __tablename__ = "brands"
+
+    # Brand Identity
+    name = Column(String(100), nullable=False, unique=True, index=True)
+    aliases = Column(JSONB, nullable=False, default=list)
+
+    # Status
+    is_active = Column(Boolean, default=True, nullable=False)
+
+    def __repr__(self):
+        return f"<Brand(id={self.id}, name='{self.name}')>"
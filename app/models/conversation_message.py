@@ -0,0 +1,37 @@
+"""
+Conversation message model for AIBIN AI agents.
+Persists agent conversation history so it is shared across workers and restarts.
+"""
+
+from sqlalchemy import Column, String, Text, Index
+from sqlalchemy.dialects.postgresql import JSONB
+
+from .base_model import BaseModel
+
+
+class ConversationMessageRecord(BaseModel):
+    """
+    Stored conversation message for an AI agent.
+
+    Messages are namespaced by history namespace, mirroring the in-memory
+    conversation store: the LLM clients share "llm_chat", other agents use
+    their own name, and rolling summaries use "<namespace>:summary".
+    """
+
+    __tablename__ = "conversation_messages"
+
+    # Conversation Identity
+    namespace = Column(String(100), nullable=False)
+    conversation_id = Column(String(255), nullable=False, index=True)
+
+    # Message Content
+    role = Column(String(20), nullable=False)
+    content = Column(Text, nullable=False)
+    message_metadata = Column("metadata", JSONB, nullable=True)
+
+    __table_args__ = (
+        Index("ix_conversation_messages_lookup", "namespace", "conversation_id", "created_at"),
+    )
+
+    def __repr__(self):
+        return f"<ConversationMessageRecord(id={self.id}, conversation_id='{self.conversation_id}', role='{self.role}')>"
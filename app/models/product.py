@@ -4,7 +4,7 @@ Core model for all product data.
 """
 
 from typing import Optional
-from sqlalchemy import Column, String, Text, Float, Boolean, Integer, ForeignKey, Enum
+from sqlalchemy import Column, String, Text, Float, Boolean, Integer, ForeignKey, Enum, DateTime
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 import enum
@@ -45,6 +45,9 @@ class Product(BaseModel):
     description = Column(Text, nullable=True)
     short_description = Column(String(500), nullable=True)
     
+    # Brand (detected from name/description at write time)
+    brand = Column(String(100), nullable=True, index=True)
+    
     # Category
     category_id = Column(UUID(as_uuid=True), ForeignKey("categories.id"), nullable=False, index=True)
     
@@ -83,6 +86,7 @@ class Product(BaseModel):
     # Advanced Features
     search_vector = Column(String(500), nullable=True)
     ai_summary = Column(Text, nullable=True)
+    ai_summary_updated_at = Column(DateTime, nullable=True)
     
     # Relationships - ONLY include what exists in the current system
     category = relationship("Category", back_populates="Projects")
@@ -100,6 +104,13 @@ class Product(BaseModel):
         """Check if product is low in stock."""
         return 0 < self.quantity <= self.low_stock_threshold
     
+    @property
+    def has_fresh_ai_summary(self) -> bool:
+        """Check if the stored AI summary was generated after the last product update."""
+        if not self.ai_summary or not self.ai_summary_updated_at:
+            return False
+        return self.updated_at is None or self.ai_summary_updated_at >= self.updated_at
+    
     @property
     def discount_percentage(self) -> Optional[int]:
         """Calculate discount percentage if compare_at_price is set."""
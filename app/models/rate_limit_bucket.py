@@ -0,0 +1,30 @@
+"""
+Rate limit bucket model for AIBIN application.
+Stores token-bucket state shared by all uvicorn workers.
+"""
+
+from sqlalchemy import Column, String, Float, DateTime
+from sqlalchemy.sql import func
+
+from .base_model import BaseModel
+
+
+class RateLimitBucket(BaseModel):
+    """
+    Token bucket used for LLM admission control.
+
+    Buckets are keyed by scope, e.g. `user:<id>`, `ip:<address>` or
+    `model:<name>`, and refilled lazily from `refilled_at` on each update.
+    """
+
+    __tablename__ = "rate_limit_buckets"
+
+    # Bucket Identity
+    key = Column(String(255), nullable=False, unique=True, index=True)
+
+    # Bucket State
+    tokens = Column(Float, nullable=False)
+    refilled_at = Column(DateTime, default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<RateLimitBucket(key='{self.key}', tokens={self.tokens})>"
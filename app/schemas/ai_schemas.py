@@ -46,6 +46,12 @@ class AIResponse(BaseModel):
     metadata: Optional[Dict[str, Any]] = Field(default=None, description="Additional metadata")
 
 
+class AIBatchRequest(BaseModel):
+    """Batch chat request schema."""
+    requests: List[AIRequest] = Field(..., min_length=1, description="Chat requests to process")
+    max_concurrency: Optional[int] = Field(default=None, ge=1, description="Maximum requests processed at once")
+
+
 class ProductRecommendation(BaseModel):
     """Product recommendation schema."""
     product_id: UUID = Field(..., description="Product ID")
@@ -79,6 +85,27 @@ class VisualAnalysisRequest(AIRequest):
     interaction_type: str = Field(default="visual_analysis", description="Interaction type")
     image_url: Optional[str] = Field(default=None, description="Image URL to analyze")
     image_data: Optional[str] = Field(default=None, description="Base64 encoded image data")
+    image_bytes: Optional[bytes] = Field(
+        default=None,
+        exclude=True,
+        repr=False,
+        description="Raw image bytes from binary uploads (not part of the JSON API)"
+    )
+    image_path: Optional[str] = Field(
+        default=None,
+        exclude=True,
+        description="Path of a binary upload spooled to disk, used instead of image_bytes (not part of the JSON API)"
+    )
+    image_digest: Optional[str] = Field(
+        default=None,
+        exclude=True,
+        description="SHA-256 of the image as uploaded, before preprocessing (not part of the JSON API)"
+    )
+    image_dhash: Optional[int] = Field(
+        default=None,
+        exclude=True,
+        description="Perceptual hash of the image (not part of the JSON API)"
+    )
     analysis_type: str = Field(default="product_matching", description="Type of analysis")
 
 
@@ -87,6 +114,17 @@ class VisualAnalysisResponse(AIResponse):
     analysis_results: Dict[str, Any] = Field(..., description="Analysis results")
 
 
+class VoiceSynthesisRequest(BaseModel):
+    """Text-to-speech request schema."""
+    text: str = Field(..., min_length=1, description="Text to speak")
+    voice: Optional[str] = Field(
+        default=None,
+        pattern=r"^[A-Za-z0-9_-]{1,64}$",
+        description="Voice name (defaults to TTS_DEFAULT_VOICE)"
+    )
+    format: str = Field(default="wav", description="Audio format")
+
+
 class ConversationHistory(BaseModel):
     """Conversation history schema."""
     conversation_id: str = Field(..., description="Conversation ID")
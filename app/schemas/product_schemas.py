@@ -121,6 +121,7 @@ class ProductResponse(ProductBase):
     is_in_stock: bool = Field(..., description="Whether product is in stock")
     is_low_stock: bool = Field(..., description="Whether product is low in stock")
     discount_percentage: Optional[int] = Field(None, description="Discount percentage if applicable")
+    brand: Optional[str] = Field(None, description="Brand detected from the product text")
     
     class Config:
         from_attributes = True
@@ -4,24 +4,24 @@ Coordinates between different AI agents and handles business logic.
 """
 
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, AsyncIterator
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..agents.groq_client import GroqClient
-from ..agents.ollama_client import OllamaClient
-from ..agents.navigation_agent import ProductAgent
-from ..agents.recommendation_agent import RecommendationAgent
-from ..agents.voice_agent import VoiceAgent
+from ..agents.registry import AgentRegistry, get_agent_registry
+from ..agents.base_agent import returns_error_response
+from ..agents.health_prober import get_health_prober
 from ..schemas.ai_schemas import (
     AIRequest, 
     AIResponse, 
     ProductRecommendationRequest, 
     ProductRecommendationResponse,
     VisualAnalysisRequest,
-    VisualAnalysisResponse
+    VisualAnalysisResponse,
+    ConversationMessage
 )
 from ..config.config import settings
+from ..utils.exceptions import BackendOverloadedError
 
 
 logger = logging.getLogger(__name__)
@@ -33,101 +33,239 @@ class AIService:
     Handles routing, load balancing, and aggregation of AI responses.
     """
     
-    def __init__(self, db: AsyncSession):
-        """Initialize AI service with database session."""
-        self.db = db
-        
-        # Initialize core AI clients
-        self.groq_client = GroqClient()
-        try:
-            self.ollama_client = OllamaClient()
-        except Exception as e:
-            logger.warning(f"Ollama client initialization failed: {e}")
-            self.ollama_client = None
+    # Interaction types handled by specialized agents rather than plain chat
+    AGENT_INTERACTION_TYPES = {
+        "product_search",
+        "product_details",
+        "product_recommendation",
+        "voice_chat",
+        "multimodal"
+    }
+    
+    def __init__(self, db: AsyncSession, registry: Optional[AgentRegistry] = None):
+        """
+        Initialize AI service with database session.
         
-        # Initialize specialized agents
-        self.product_agent = ProductAgent(db)
-        self.recommendation_agent = RecommendationAgent(db)
-        self.voice_agent = VoiceAgent(db)
+        Agents and LLM clients are long-lived and come from the process-wide
+        registry; only the per-request database session is bound here.
+        """
+        self.db = db
+        self.registry = registry or get_agent_registry()
         
-        logger.info("AI Service initialized with all agents")
+        # Shared AI clients and specialized agents
+        self.groq_client = self.registry.groq_client
+        self.ollama_client = self.registry.ollama_client
+        self.product_agent = self.registry.product_agent
+        self.recommendation_agent = self.registry.recommendation_agent
+        self.voice_agent = self.registry.voice_agent
     
+    @returns_error_response("Chat request processing")
     async def process_chat_request(self, request: AIRequest) -> AIResponse:
         """
         Process chat request by routing to appropriate agent.
         """
+        logger.info(f"Processing chat request: {request.interaction_type}")
+        
+        # Trivial and structured queries are answered without the LLM
+        fast_response = await self._try_fast_path(request)
+        if fast_response:
+            return fast_response
+        
+        # Route based on interaction type
+        if request.interaction_type == "product_search":
+            return await self.product_agent.process_request(request, self.db)
+        elif request.interaction_type == "product_details":
+            return await self.product_agent.process_request(request, self.db)
+        elif request.interaction_type == "product_recommendation":
+            # Convert to recommendation request
+            rec_request = ProductRecommendationRequest(
+                message=request.message,
+                user_id=request.user_id,
+                conversation_id=request.conversation_id,
+                context=request.context
+            )
+            return await self.recommendation_agent.process_request(rec_request, self.db)
+        elif request.interaction_type == "voice_chat":
+            return await self.voice_agent.process_request(request)
+        elif request.interaction_type == "multimodal":
+            return await self.voice_agent.process_request(request)
+        else:
+            # General chat goes to the healthiest backend, Groq preferred
+            return await self._route_chat_request(request)
+    
+    async def stream_chat_request(self, request: AIRequest) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream chat request events (`token`, `done`, `error`).
+        
+        General chat streams from Groq and voice chat streams from Ollama.
+        Agent flows that combine LLM output with database results are not
+        token-streamable, so they are sent as a single token frame.
+        """
         try:
-            logger.info(f"Processing chat request: {request.interaction_type}")
+            logger.info(f"Processing streaming chat request: {request.interaction_type}")
+            
+            if request.interaction_type == "voice_chat":
+                async for event in self.voice_agent.stream_voice_chat(request):
+                    yield event
+                return
+            
+            fast_response = await self._try_fast_path(request)
+            if fast_response:
+                yield {"event": "token", "data": {"content": fast_response.message}}
+                yield {
+                    "event": "done",
+                    "data": {
+                        "message": fast_response.message,
+                        "conversation_id": fast_response.conversation_id,
+                        "interaction_type": fast_response.interaction_type,
+                        "model_used": fast_response.model_used,
+                        "processing_time": fast_response.processing_time,
+                        "time_to_first_token": fast_response.processing_time,
+                        "tokens_used": 0,
+                        "estimated_tokens": False
+                    }
+                }
+                return
+            
+            if request.interaction_type not in self.AGENT_INTERACTION_TYPES:
+                # Streams cannot fail over mid-response, so only the initial choice is routed
+                client = self.registry.backend_router.candidates("groq_client")[0]
+                self.registry.backend_router.record_route("groq_client", client, 0)
+                async for event in client.stream_request(request):
+                    yield event
+                return
+            
+            response = await self.process_chat_request(request)
+            yield {"event": "token", "data": {"content": response.message}}
+            yield {
+                "event": "done",
+                "data": {
+                    "message": response.message,
+                    "conversation_id": response.conversation_id,
+                    "interaction_type": response.interaction_type,
+                    "model_used": response.model_used,
+                    "processing_time": response.processing_time,
+                    "time_to_first_token": response.processing_time,
+                    "tokens_used": response.tokens_used,
+                    "estimated_tokens": (response.metadata or {}).get("estimated_tokens", False)
+                }
+            }
             
-            # Route based on interaction type
-            if request.interaction_type == "product_search":
-                return await self.product_agent.process_request(request)
-            elif request.interaction_type == "product_details":
-                return await self.product_agent.process_request(request)
-            elif request.interaction_type == "product_recommendation":
-                # Convert to recommendation request
-                rec_request = ProductRecommendationRequest(
-                    message=request.message,
-                    user_id=request.user_id,
-                    conversation_id=request.conversation_id,
-                    context=request.context
-                )
-                return await self.recommendation_agent.process_request(rec_request)
-            elif request.interaction_type == "voice_chat":
-                return await self.voice_agent.process_request(request)
-            elif request.interaction_type == "multimodal":
-                return await self.voice_agent.process_request(request)
-            else:
-                # Default to Groq for general chat
-                return await self.groq_client.process_request(request)
-                
         except Exception as e:
-            logger.error(f"Chat request processing failed: {e}")
-            return AIResponse(
-                message=f"I apologize, but I encountered an error processing your request: {str(e)}",
-                interaction_type=request.interaction_type,
-                conversation_id=request.conversation_id or f"error_{datetime.utcnow().timestamp()}",
-                confidence=0.0,
-                metadata={"error": True, "error_message": str(e)}
-            )
+            logger.error(f"Streaming chat request failed: {e}")
+            yield {
+                "event": "error",
+                "data": {
+                    "conversation_id": request.conversation_id,
+                    "error_message": str(e)
+                }
+            }
+    
+    async def _try_fast_path(self, request: AIRequest) -> Optional[AIResponse]:
+        """
+        Answer the request on the deterministic fast path if possible.
+        The turn is recorded in the Groq conversation so LLM follow-ups keep context.
+        """
+        if not settings.FAST_PATH_ENABLED:
+            return None
+        
+        response = await self.registry.fast_path_router.handle(request, self.db)
+        if response is None:
+            return None
+        
+        await self.groq_client.add_to_conversation(
+            response.conversation_id,
+            ConversationMessage(role="user", content=request.message)
+        )
+        await self.groq_client.add_to_conversation(
+            response.conversation_id,
+            ConversationMessage(role="assistant", content=response.message)
+        )
+        return response
+    
+    async def _route_chat_request(self, request: AIRequest, preferred: str = "groq_client") -> AIResponse:
+        """
+        Send a text chat request to the best backend, falling back once.
+        
+        Backends with an open circuit or slow EWMA latency are skipped in
+        favour of a healthy one; if the chosen backend still fails, the next
+        candidate gets one attempt before the error is returned.
+        """
+        router = self.registry.backend_router
+        candidates = router.candidates(preferred)[:2]
+        response = None
+        
+        for attempt, client in enumerate(candidates):
+            is_last = attempt == len(candidates) - 1
+            try:
+                response = await client.process_request(request)
+            except BackendOverloadedError:
+                if is_last:
+                    raise
+                logger.warning(f"{client.agent_name} overloaded, falling back")
+                continue
+            
+            if is_last or not (response.metadata or {}).get("error"):
+                router.record_route(preferred, client, attempt)
+                response.metadata = {**(response.metadata or {}), "routed_backend": client.agent_name}
+                return response
+            
+            logger.warning(f"{client.agent_name} failed, falling back: {response.metadata.get('error_message')}")
+        
+        return response
     
+    @returns_error_response("Product recommendation")
     async def get_product_recommendations(self, request: ProductRecommendationRequest) -> ProductRecommendationResponse:
         """
         Get product recommendations using the recommendation agent.
         """
-        try:
-            logger.info("Processing product recommendation request")
-            return await self.recommendation_agent.process_request(request)
-        except Exception as e:
-            logger.error(f"Product recommendation failed: {e}")
-            return ProductRecommendationResponse(
-                message=f"I apologize, but I couldn't generate recommendations: {str(e)}",
-                interaction_type="product_recommendation",
-                conversation_id=request.conversation_id or f"error_{datetime.utcnow().timestamp()}",
-                confidence=0.0,
-                recommendations=[],
-                total_Projects_considered=0,
-                recommendation_strategy="error_fallback",
-                metadata={"error": True, "error_message": str(e)}
-            )
+        logger.info("Processing product recommendation request")
+        return await self.recommendation_agent.process_request(request, self.db)
     
+    @returns_error_response("Visual analysis")
     async def analyze_image(self, request: VisualAnalysisRequest) -> VisualAnalysisResponse:
         """
         Analyze image using the voice agent (which handles multimodal).
         """
-        try:
-            logger.info("Processing image analysis request")
-            return await self.voice_agent.process_request(request)
-        except Exception as e:
-            logger.error(f"Image analysis failed: {e}")
+        logger.info("Processing image analysis request")
+        return await self.voice_agent.process_request(request)
+    
+    def build_error_response(
+        self,
+        request: AIRequest,
+        conversation_id: Optional[str],
+        description: str,
+        error: Exception
+    ) -> AIResponse:
+        """Create the error response for a failed request (see `returns_error_response`)."""
+        conversation_id = conversation_id or request.conversation_id or f"error_{datetime.utcnow().timestamp()}"
+        if isinstance(request, VisualAnalysisRequest):
             return VisualAnalysisResponse(
-                message=f"I apologize, but I couldn't analyze the image: {str(e)}",
+                message=f"I apologize, but I couldn't analyze the image: {str(error)}",
                 interaction_type="visual_analysis",
-                conversation_id=request.conversation_id or f"error_{datetime.utcnow().timestamp()}",
+                conversation_id=conversation_id,
                 confidence=0.0,
-                analysis_results={"error": str(e)},
-                metadata={"error": True, "error_message": str(e)}
+                analysis_results={"error": str(error)},
+                metadata={"error": True, "error_message": str(error)}
+            )
+        if isinstance(request, ProductRecommendationRequest):
+            return ProductRecommendationResponse(
+                message=f"I apologize, but I couldn't generate recommendations: {str(error)}",
+                interaction_type="product_recommendation",
+                conversation_id=conversation_id,
+                confidence=0.0,
+                recommendations=[],
+                total_Projects_considered=0,
+                recommendation_strategy="error_fallback",
+                metadata={"error": True, "error_message": str(error)}
             )
+        return AIResponse(
+            message=f"I apologize, but I encountered an error processing your request: {str(error)}",
+            interaction_type=request.interaction_type,
+            conversation_id=conversation_id,
+            confidence=0.0,
+            metadata={"error": True, "error_message": str(error)}
+        )
     
     async def get_agent_statistics(self) -> Dict[str, Any]:
         """
@@ -150,18 +288,7 @@ class AIService:
             }
             
             # Gather stats from each agent
-            agents = [
-                ("groq_client", self.groq_client),
-                ("product_agent", self.product_agent),
-                ("recommendation_agent", self.recommendation_agent),
-                ("voice_agent", self.voice_agent)
-            ]
-            
-            # Add ollama if available
-            if self.ollama_client:
-                agents.append(("ollama_client", self.ollama_client))
-            
-            for agent_name, agent in agents:
+            for agent_name, agent in self.registry.get_agents():
                 try:
                     agent_stats = await agent.get_agent_stats()
                     statistics["agents"][agent_name] = agent_stats
@@ -187,6 +314,9 @@ class AIService:
                     statistics["summary"]["total_processing_time"] / total_requests
                 )
             
+            statistics["routing"] = self.registry.backend_router.get_stats()
+            statistics["fast_path"] = self.registry.fast_path_router.get_stats()
+            
             # Add health check info
             statistics["health"] = await self._get_health_summary()
             
@@ -210,67 +340,16 @@ class AIService:
             }
     
     async def _get_health_summary(self) -> Dict[str, Any]:
-        """Get health summary of all agents."""
-        health_summary = {
-            "overall_status": "unknown",
-            "healthy_agents": 0,
-            "total_agents": 0,
-            "agent_health": {}
-        }
-        
-        agents = [
-            ("groq_client", self.groq_client),
-            ("product_agent", self.product_agent),
-            ("recommendation_agent", self.recommendation_agent),
-            ("voice_agent", self.voice_agent)
-        ]
-        
-        if self.ollama_client:
-            agents.append(("ollama_client", self.ollama_client))
-        
-        for agent_name, agent in agents:
-            try:
-                health = await agent.health_check()
-                health_summary["agent_health"][agent_name] = health
-                health_summary["total_agents"] += 1
-                
-                if health.get("status") == "healthy":
-                    health_summary["healthy_agents"] += 1
-                    
-            except Exception as e:
-                health_summary["agent_health"][agent_name] = {
-                    "status": "error",
-                    "error": str(e)
-                }
-                health_summary["total_agents"] += 1
-        
-        # Determine overall status
-        if health_summary["healthy_agents"] == health_summary["total_agents"]:
-            health_summary["overall_status"] = "healthy"
-        elif health_summary["healthy_agents"] > 0:
-            health_summary["overall_status"] = "partial"
-        else:
-            health_summary["overall_status"] = "unhealthy"
-        
-        return health_summary
+        """
+        Get health summary of all agents.
+        Read from the background prober's cached snapshot, so no LLM calls run inline.
+        """
+        return await get_health_prober().get_health_summary()
     
     async def cleanup(self):
-        """Cleanup all agents."""
-        try:
-            agents = [
-                self.groq_client,
-                self.product_agent,
-                self.recommendation_agent,
-                self.voice_agent
-            ]
-            
-            if self.ollama_client:
-                agents.append(self.ollama_client)
-            
-            for agent in agents:
-                if hasattr(agent, 'cleanup'):
-                    await agent.cleanup()
-            
-            logger.info("AI Service cleanup completed")
-        except Exception as e:
-            logger.error(f"AI Service cleanup failed: {e}")
\ No newline at end of file
+        """
+        Cleanup per-request resources.
+        Shared agents are owned by the agent registry and cleaned up on shutdown.
+        """
+        self.db = None
+        logger.debug("AI Service request scope released")
\ No newline at end of file
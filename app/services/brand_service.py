@@ -0,0 +1,220 @@
+"""
+Brand service for AIBIN Indoor Navigation platform.
+Maintains the brand dictionary and detects Product.brand at write time.
+"""
+
+import asyncio
+import time
+from typing import Optional, List, Dict
+from sqlalchemy import select, update, bindparam, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.brand import Brand
+from app.models.product import Product
+from app.utils.brand_matcher import BrandMatcher
+from app.config.config import settings
+from app.logging.log import logger
+
+
+# Advisory lock key so only one uvicorn worker runs the brand backfill
+BRAND_BACKFILL_LOCK_KEY = 7_305_114_022
+
+# Process-wide compiled matcher, rebuilt when the TTL expires or the dictionary changes
+_matcher: Optional[BrandMatcher] = None
+_matcher_loaded_at: float = 0.0
+
+
+def invalidate_brand_matcher():
+    """Force the next detection to recompile the matcher from the database."""
+    global _matcher
+    _matcher = None
+
+
+class BrandService:
+    """Service for brand dictionary and brand detection operations."""
+
+    def __init__(self, db: AsyncSession):
+        """
+        Initialize brand service.
+
+        Args:
+            db: Database session
+        """
+        self.db = db
+
+    async def list_brands(self, active_only: bool = True) -> List[Brand]:
+        """
+        List dictionary brands.
+
+        Args:
+            active_only: Only return active brands
+
+        Returns:
+            Brands ordered by name
+        """
+        query = select(Brand).where(Brand.is_deleted == False)
+        if active_only:
+            query = query.where(Brand.is_active == True)
+        result = await self.db.execute(query.order_by(Brand.name.asc()))
+        return list(result.scalars().all())
+
+    async def add_brand(self, name: str, aliases: Optional[List[str]] = None) -> Brand:
+        """
+        Add a brand to the dictionary.
+
+        Existing Projects are not re-tagged until the next backfill.
+
+        Args:
+            name: Canonical brand name
+            aliases: Alternate spellings matched in product text
+
+        Returns:
+            Newly created brand
+        """
+        brand = Brand(name=name, aliases=aliases or [])
+        self.db.add(brand)
+        await self.db.commit()
+        await self.db.refresh(brand)
+        invalidate_brand_matcher()
+
+        logger.info(f"Brand added: {brand.name}")
+        return brand
+
+    async def get_matcher(self) -> BrandMatcher:
+        """Get the compiled matcher, reloading the dictionary when the cached one has expired."""
+        global _matcher, _matcher_loaded_at
+
+        if _matcher is not None and time.monotonic() - _matcher_loaded_at < settings.BRAND_DICTIONARY_TTL_SECONDS:
+            return _matcher
+
+        patterns: Dict[str, str] = {}
+        for brand in await self.list_brands():
+            patterns[brand.name] = brand.name
+            for alias in brand.aliases or []:
+                patterns[alias] = brand.name
+
+        _matcher = BrandMatcher(patterns)
+        _matcher_loaded_at = time.monotonic()
+        logger.info(f"Brand matcher compiled: {_matcher.pattern_count} patterns")
+        return _matcher
+
+    async def detect_brand(self, product: Product) -> Optional[str]:
+        """
+        Detect the brand of a product.
+
+        Args:
+            product: Product to inspect
+
+        Returns:
+            Canonical brand name, or None when no dictionary brand is mentioned
+        """
+        matcher = await self.get_matcher()
+        return matcher.first_match(product.name, product.short_description, product.description)
+
+    async def resolve_brand_names(self, names: List[str]) -> List[str]:
+        """
+        Map user-supplied brand names (any casing, accents or alias) to canonical names.
+
+        Args:
+            names: Brand names as typed by the user
+
+        Returns:
+            Canonical names of the brands recognized, without duplicates
+        """
+        matcher = await self.get_matcher()
+        resolved = []
+        for name in names:
+            canonical = matcher.first_match(name)
+            if canonical and canonical not in resolved:
+                resolved.append(canonical)
+        return resolved
+
+    async def backfill_brands(self, batch_size: Optional[int] = None) -> int:
+        """
+        Re-detect brands for all Projects, batch by batch.
+
+        Rows are updated with one bulk UPDATE per batch, and only when the
+        detected brand differs from the stored one; updated_at is left as is.
+
+        Args:
+            batch_size: Number of Projects to scan per batch
+
+        Returns:
+            Number of Projects whose brand changed
+        """
+        batch_size = batch_size or settings.BRAND_BACKFILL_BATCH_SIZE
+        matcher = await self.get_matcher()
+        table = Product.__table__
+        statement = (
+            update(table)
+            .where(table.c.id == bindparam("b_id"))
+            .values(brand=bindparam("b_brand"), updated_at=table.c.updated_at)
+        )
+
+        changed = 0
+        last_id = None
+        while True:
+            query = (
+                select(Product.id, Product.name, Product.short_description, Product.description, Product.brand)
+                .where(Product.is_deleted == False)
+                .order_by(Product.id.asc())
+                .limit(batch_size)
+            )
+            if last_id is not None:
+                query = query.where(Product.id > last_id)
+            rows = (await self.db.execute(query)).all()
+            if not rows:
+                break
+
+            params = []
+            for product_id, name, short_description, description, current_brand in rows:
+                brand = matcher.first_match(name, short_description, description)
+                if brand != current_brand:
+                    params.append({"b_id": product_id, "b_brand": brand})
+
+            if params:
+                await self.db.execute(statement, params)
+                await self.db.commit()
+                changed += len(params)
+
+            last_id = rows[-1][0]
+            if len(rows) < batch_size:
+                break
+
+        logger.info(f"Brand backfill completed: {changed} Projects updated")
+        return changed
+
+    async def try_acquire_backfill_lock(self) -> bool:
+        """Try to take the cross-worker backfill lock for this session's transaction."""
+        result = await self.db.execute(
+            text("SELECT pg_try_advisory_xact_lock(:key)"),
+            {"key": BRAND_BACKFILL_LOCK_KEY}
+        )
+        return bool(result.scalar())
+
+
+async def run_brand_backfill():
+    """
+    Tag existing Projects with their detected brand.
+
+    Runs once (e.g. at startup or after editing the brand dictionary); only
+    the worker holding the advisory lock does the work.
+    """
+    from app.db.database import SessionLocal
+
+    try:
+        async with SessionLocal() as db:
+            # The xact lock is taken in its own transaction; a second session does the batched writes
+            if not await BrandService(db).try_acquire_backfill_lock():
+                logger.info("Brand backfill already running in another worker")
+                return
+            async with SessionLocal() as write_db:
+                await BrandService(write_db).backfill_brands()
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.error(f"Brand backfill failed: {e}")
+
+
+if __name__ == "__main__":
+    asyncio.run(run_brand_backfill())
@@ -3,7 +3,7 @@ Product service for AIBIN Indoor Navigation platform.
 Handles core product operations and business logic.
 """
 
-from typing import Optional, List
+from typing import Optional, List, Any
 from uuid import UUID
 from datetime import datetime
 from sqlalchemy import select, and_, or_
@@ -11,6 +11,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import Select
 
 from app.models.product import Product
+from app.services.brand_service import BrandService
 from app.schemas.product_schemas import ProductCreateRequest, ProductUpdateRequest, Projectstatus
 from app.logging.log import logger
 
@@ -18,14 +19,17 @@ from app.logging.log import logger
 class Projectservice:
     """Service for product operations following AIBIN async patterns."""
     
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, embedding_index: Optional[Any] = None):
         """
         Initialize product service.
         
         Args:
             db: Database session
+            embedding_index: Semantic index to update on writes (anything with
+                upsert_product/remove); None leaves it to the background sync
         """
         self.db = db
+        self.embedding_index = embedding_index
 
     async def create_product(
         self,
@@ -66,9 +70,11 @@ class Projectservice:
             
         # Create product with filtered data
         product = Product(**filtered_product_data)
+        product.brand = await self._detect_brand(product)
         self.db.add(product)
         await self.db.commit()
         await self.db.refresh(product)
+        self._index_product(product)
         
         # Log creation with additional info about filtered fields
         filtered_fields = set(product_data.keys()) - set(filtered_product_data.keys())
@@ -141,12 +147,17 @@ class Projectservice:
             if hasattr(product, key):
                 setattr(product, key, value)
         
+        # Re-detect the brand when the text it is detected from changed
+        if filtered_update_data.keys() & {'name', 'short_description', 'description'}:
+            product.brand = await self._detect_brand(product)
+        
         # Always update the updated_at timestamp
         product.updated_at = datetime.utcnow()
         
         # Save changes
         await self.db.commit()
         await self.db.refresh(product)
+        self._index_product(product)
         
         # Log update with additional info about filtered fields
         filtered_fields = set(update_data.keys()) - set(filtered_update_data.keys())
@@ -188,10 +199,44 @@ class Projectservice:
         
         # Save changes
         await self.db.commit()
+        if self.embedding_index is not None:
+            self.embedding_index.remove(product_id)
         
         logger.info(f"Product deleted: {product_id} (permanent: {permanent})")
         return True
 
+    async def _detect_brand(self, product: Product) -> Optional[str]:
+        """
+        Detect the product brand from its text.
+        Detection failures never fail the write; the backfill job retries.
+        
+        Args:
+            product: Product being written
+            
+        Returns:
+            Canonical brand name or None
+        """
+        try:
+            return await BrandService(self.db).detect_brand(product)
+        except Exception as e:
+            logger.warning(f"Brand detection failed for product {product.name}: {e}")
+            return product.brand
+
+    def _index_product(self, product: Product):
+        """
+        Update the semantic index for a written product.
+        Index failures never fail the write; the background sync retries.
+        
+        Args:
+            product: Committed product
+        """
+        if self.embedding_index is None:
+            return
+        try:
+            self.embedding_index.upsert_product(product)
+        except Exception as e:
+            logger.warning(f"Embedding index update failed for product {product.id}: {e}")
+
     def get_Projects_query(
         self,
         category_id: Optional[UUID] = None,
@@ -0,0 +1,223 @@
+"""
+Product summary service for AIBIN Indoor Navigation platform.
+Generates and stores Product.ai_summary in the background.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Optional, List, Dict, Any, AsyncIterator
+from sqlalchemy import select, update, and_, or_, bindparam, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.models.product import Product
+from app.agents.groq_client import GroqClient
+from app.config.config import settings
+from app.logging.log import logger
+
+
+# Advisory lock key so only one uvicorn worker refreshes summaries at a time
+SUMMARY_REFRESH_LOCK_KEY = 7_305_114_021
+
+
+class ProductSummaryService:
+    """Service for batch generation of product AI summaries."""
+
+    def __init__(self, db: AsyncSession, groq_client: GroqClient):
+        """
+        Initialize product summary service.
+
+        Args:
+            db: Database session
+            groq_client: Shared Groq client used for generation
+        """
+        self.db = db
+        self.groq_client = groq_client
+
+    async def find_stale_Projects(self, limit: int) -> List[Product]:
+        """
+        Find Projects whose AI summary is missing or older than the last update.
+
+        Args:
+            limit: Maximum number of Projects to return
+
+        Returns:
+            Projects needing a summary, oldest updates first
+        """
+        query = (
+            select(Product)
+            .options(selectinload(Product.category))
+            .where(
+                and_(
+                    Product.is_deleted == False,
+                    or_(
+                        Product.ai_summary.is_(None),
+                        Product.ai_summary_updated_at.is_(None),
+                        Product.ai_summary_updated_at < Product.updated_at
+                    )
+                )
+            )
+            .order_by(Product.updated_at.asc())
+            .limit(limit)
+        )
+        result = await self.db.execute(query)
+        return list(result.scalars().all())
+
+    async def generate_summaries(self, Projects: List[Product]) -> Dict[Any, Optional[str]]:
+        """
+        Generate summaries for a batch of Projects with bounded concurrency.
+
+        Args:
+            Projects: Projects to summarize
+
+        Returns:
+            Mapping of product ID to summary (None when generation failed)
+        """
+        Projects_data = [self._product_summary_data(product) for product in Projects]
+        summaries = await self.groq_client.generate_product_summaries(
+            Projects_data,
+            max_concurrency=settings.AI_SUMMARY_MAX_CONCURRENCY
+        )
+        return {product.id: summary for product, summary in zip(Projects, summaries)}
+
+    async def save_summaries(self, Projects: List[Product], summaries: Dict[Any, Optional[str]]) -> int:
+        """
+        Write generated summaries back with a single bulk UPDATE.
+
+        Rows edited since they were read are skipped (their updated_at no longer
+        matches) and will be picked up again as stale on the next run.
+
+        Args:
+            Projects: Projects the summaries were generated for
+            summaries: Mapping of product ID to summary
+
+        Returns:
+            Number of Projects updated
+        """
+        params = [
+            {
+                "b_id": product.id,
+                "b_seen_updated_at": product.updated_at,
+                "b_summary": summaries[product.id],
+            }
+            for product in Projects
+            if summaries.get(product.id)
+        ]
+        if not params:
+            return 0
+
+        table = Product.__table__
+        statement = (
+            update(table)
+            .where(
+                and_(
+                    table.c.id == bindparam("b_id"),
+                    table.c.updated_at == bindparam("b_seen_updated_at")
+                )
+            )
+            .values(
+                ai_summary=bindparam("b_summary"),
+                # Same UTC clock as Projectservice.update_product sets updated_at with;
+                # func.now() would be in the database's timezone
+                ai_summary_updated_at=datetime.utcnow(),
+                # Keep updated_at unchanged so the summary is not immediately stale again
+                updated_at=table.c.updated_at
+            )
+        )
+        await self.db.execute(statement, params)
+        await self.db.commit()
+
+        return len(params)
+
+    async def refresh_stale_summaries(self, batch_size: Optional[int] = None) -> int:
+        """
+        Refresh one batch of stale summaries.
+
+        Args:
+            batch_size: Number of Projects to process
+
+        Returns:
+            Number of Projects updated
+        """
+        Projects = await self.find_stale_Projects(batch_size or settings.AI_SUMMARY_BATCH_SIZE)
+        if not Projects:
+            return 0
+
+        # End the read transaction so no connection sits idle in a transaction during LLM calls
+        await self.db.commit()
+
+        summaries = await self.generate_summaries(Projects)
+        updated = await self.save_summaries(Projects, summaries)
+
+        logger.info(f"Product summaries refreshed: {updated}/{len(Projects)}")
+        return updated
+
+    def _product_summary_data(self, product: Product) -> Dict[str, Any]:
+        """Build the prompt data for a product summary."""
+        return {
+            "name": product.name,
+            "price": product.price,
+            "brand": product.brand,
+            "category": product.category.name if product.category else None,
+            "condition": product.condition.value if product.condition else None,
+        }
+
+
+@asynccontextmanager
+async def summary_refresh_lock() -> AsyncIterator[bool]:
+    """
+    Try to take the cross-worker refresh lock; yields whether it was acquired.
+
+    The session-level advisory lock is held on a dedicated connection that
+    sits outside any transaction, so batches commit independently and no
+    transaction stays open while summaries are generated.
+    """
+    from app.db.database import engine
+
+    async with engine.connect() as connection:
+        result = await connection.execute(
+            text("SELECT pg_try_advisory_lock(:key)"),
+            {"key": SUMMARY_REFRESH_LOCK_KEY}
+        )
+        acquired = bool(result.scalar())
+        await connection.commit()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                await connection.execute(
+                    text("SELECT pg_advisory_unlock(:key)"),
+                    {"key": SUMMARY_REFRESH_LOCK_KEY}
+                )
+                await connection.commit()
+
+
+async def run_summary_refresh_loop(interval_seconds: Optional[int] = None):
+    """
+    Background loop that keeps Product.ai_summary up to date.
+
+    Drains stale Projects batch by batch, then sleeps for the refresh interval.
+    Only the worker holding the advisory lock does work in a given cycle.
+    """
+    from app.db.database import SessionLocal
+    from app.agents.registry import get_agent_registry
+
+    interval = interval_seconds or settings.AI_SUMMARY_REFRESH_INTERVAL_SECONDS
+    batch_size = settings.AI_SUMMARY_BATCH_SIZE
+
+    while True:
+        try:
+            groq_client = get_agent_registry().groq_client
+            async with summary_refresh_lock() as acquired:
+                while acquired:
+                    async with SessionLocal() as db:
+                        updated = await ProductSummaryService(db, groq_client).refresh_stale_summaries(batch_size)
+                    if updated < batch_size:
+                        break
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Product summary refresh failed: {e}")
+
+        await asyncio.sleep(interval)
@@ -0,0 +1,112 @@
+"""
+Multi-pattern brand matcher for AIBIN platform.
+Aho-Corasick automaton that finds every brand alias in one pass over the text.
+"""
+
+import unicodedata
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+
+def normalize_brand_text(text: str) -> str:
+    """Lowercase and strip accents so "Hermès" and "HERMES" match the same pattern."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+class BrandMatcher:
+    """
+    Aho-Corasick matcher over brand aliases.
+
+    The automaton is compiled once from a mapping of alias to canonical brand
+    name; matching is linear in the text length regardless of how many brands
+    the dictionary holds. Matches must sit on word boundaries, so "Dior" does
+    not match inside "Diorama".
+    """
+
+    def __init__(self, patterns: Dict[str, str]):
+        """
+        Compile the automaton.
+
+        Args:
+            patterns: Mapping of alias (any casing/accents) to canonical brand name
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, str]]] = [[]]
+        self.pattern_count = 0
+
+        for alias, canonical in patterns.items():
+            normalized = normalize_brand_text(alias).strip()
+            if normalized:
+                self._add(normalized, canonical)
+        self._build_failure_links()
+
+    def _add(self, pattern: str, canonical: str):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append((len(pattern), canonical))
+        self.pattern_count += 1
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                if self._fail[next_state] == next_state:
+                    self._fail[next_state] = 0
+                # Inherit matches that end at the same position via the failure link
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find_all(self, text: str) -> List[Tuple[int, int, str]]:
+        """
+        Find every whole-word brand occurrence.
+
+        Returns:
+            (start, end, canonical brand) tuples in order of end position
+        """
+        normalized = normalize_brand_text(text)
+        matches = []
+        state = 0
+        for index, char in enumerate(normalized):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, canonical in self._output[state]:
+                start, end = index - length + 1, index + 1
+                if self._is_boundary(normalized, start - 1) and self._is_boundary(normalized, end):
+                    matches.append((start, end, canonical))
+        return matches
+
+    @staticmethod
+    def _is_boundary(text: str, index: int) -> bool:
+        return index < 0 or index >= len(text) or not text[index].isalnum()
+
+    def first_match(self, *texts: Optional[str]) -> Optional[str]:
+        """
+        Get the brand mentioned first (longest alias on ties) in the first text that mentions one.
+
+        Texts are checked in order, so a brand in the product name wins over
+        one mentioned in the description.
+        """
+        for text in texts:
+            if not text:
+                continue
+            matches = self.find_all(text)
+            if matches:
+                start, end, canonical = min(matches, key=lambda match: (match[0], -(match[1] - match[0])))
+                return canonical
+        return None
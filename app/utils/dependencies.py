@@ -3,15 +3,16 @@ Shared API dependencies for AIBIN platform.
 Provides reusable dependency functions for authentication and authorization.
 """
 
-from typing import Optional
-from fastapi import Depends, HTTPException, status
+from typing import Optional, List
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials, APIKeyHeader
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.database import get_db
 from app.services.auth_service import AuthService, TokenData
 from app.models.user import UserRole
-from app.utils.exceptions import AuthenticationError
+from app.utils.exceptions import AuthenticationError, RateLimitError
+from app.utils.rate_limiter import get_admission_controller
 from app.logging.log import logger
 from app.config.config import settings
 
@@ -154,4 +155,57 @@ async def optional_auth(
         
     except Exception as e:
         logger.warning(f"Optional auth failed: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+async def check_llm_admission(
+    request: Request,
+    current_user: Optional[TokenData],
+    interaction_types: List[str],
+    request_count: int = 1
+) -> None:
+    """
+    Admit an LLM-backed request or reject it with 429 before any LLM work is queued.
+    Checks per-user, per-IP and per-model token buckets; a batch of N prompts costs N requests,
+    and a batch larger than a request bucket's capacity is rejected with 422. With no
+    interaction types (e.g. speech synthesis) only the user and IP request buckets apply.
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    
+    admission = get_admission_controller()
+    models = sorted({admission.model_for_interaction(interaction_type) for interaction_type in interaction_types})
+    user_id = str(current_user.user_id) if current_user else None
+    client_ip = request.client.host if request.client else None
+    
+    max_request_count = admission.max_request_count(user_id, client_ip)
+    if max_request_count is not None and request_count > max_request_count:
+        # Retrying could never succeed, so this is a client error rather than a 429
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Batch of {request_count} requests exceeds the rate limit of {max_request_count} per minute"
+        )
+    
+    try:
+        await admission.admit(
+            user_id=user_id,
+            client_ip=client_ip,
+            models=models,
+            request_count=request_count
+        )
+    except RateLimitError as e:
+        retry_after = e.details.get("retry_after", 60)
+        logger.warning(f"LLM request rejected: {e.message} (retry after {retry_after}s)")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=e.message,
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+async def record_llm_usage(current_user: Optional[TokenData], tokens_used: Optional[int]) -> None:
+    """Charge the user's token bucket with the tokens a response actually used."""
+    if not settings.RATE_LIMIT_ENABLED or not current_user:
+        return
+    
+    await get_admission_controller().record_user_usage(str(current_user.user_id), tokens_used)
@@ -55,6 +55,16 @@ class AIAgentError(AIBINException):
     pass
 
 
+class BackendOverloadedError(AIAgentError):
+    """Raised when an LLM backend has no free capacity for a request."""
+    pass
+
+
+class BackendUnavailableError(AIAgentError):
+    """Raised when an LLM backend's circuit breaker is open."""
+    pass
+
+
 class GroqAPIError(ExternalServiceError):
     """Raised when Groq API calls fail."""
     pass
@@ -0,0 +1,430 @@
+"""
+Metrics utilities for AIBIN platform.
+Fixed-bucket latency and token histograms, aggregated across workers and exposed in Prometheus text format.
+"""
+
+import asyncio
+import json
+import math
+import os
+import tempfile
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Dict, Any, List, Tuple, Iterator, Sequence
+
+from app.config.config import settings
+from app.logging.log import logger
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; spans cache hits and fast paths up to slow multimodal calls
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+# Bulkhead queue waits are bounded by LLM_QUEUE_TIMEOUT_SECONDS
+QUEUE_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = tuple(float(2 ** power) for power in range(3, 16))  # 8 .. 32768
+
+# Interaction type of the agent request being served, for metrics recorded deeper in the call
+_interaction_type: ContextVar[str] = ContextVar("metrics_interaction_type", default="unknown")
+
+
+@contextmanager
+def interaction_context(interaction_type: str) -> Iterator[None]:
+    """Label metrics recorded inside the block with an interaction type."""
+    token = _interaction_type.set(interaction_type or "unknown")
+    try:
+        yield
+    finally:
+        try:
+            _interaction_type.reset(token)
+        except ValueError:
+            # Async generators may be finalized from another context
+            pass
+
+
+def current_interaction_type() -> str:
+    return _interaction_type.get()
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return f"{value:.1f}"
+    return repr(float(value))
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._series: Dict[Tuple[str, ...], float] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name) or "none") for name in self.label_names)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        self._series[key] = self._series.get(key, 0.0) + amount
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "type": self.type_name,
+            "help": self.documentation,
+            "labels": list(self.label_names),
+            "series": [[list(key), value] for key, value in self._series.items()]
+        }
+
+    @staticmethod
+    def merge(into: Dict[Tuple[str, ...], Any], snapshot: Dict[str, Any]):
+        for key, value in snapshot["series"]:
+            key = tuple(key)
+            into[key] = into.get(key, 0.0) + value
+
+    @staticmethod
+    def render(name: str, snapshot: Dict[str, Any], series: Dict[Tuple[str, ...], Any]) -> List[str]:
+        return [f"{name}{_format_labels(snapshot['labels'], key)} {_format_value(value)}" for key, value in series.items()]
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram with labels.
+
+    Observations are counted in the first bucket whose upper bound they do
+    not exceed (plus an implicit +Inf bucket), so recording is a bisection
+    and a few additions, memory is constant per label set, and per-worker
+    histograms with the same buckets merge exactly by adding counts.
+    """
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(float(bound) for bound in buckets))
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name) or "none") for name in self.label_names)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        low, high = 0, len(self.buckets)
+        while low < high:
+            middle = (low + high) // 2
+            if value <= self.buckets[middle]:
+                high = middle
+            else:
+                low = middle + 1
+        series[0][low] += 1
+        series[1] += value
+
+    def quantiles(self, quantiles: Sequence[float], **match) -> Dict[str, Optional[float]]:
+        """
+        Estimate quantiles over this worker's series whose labels match `match`.
+
+        Interpolates linearly within the bucket holding the rank, like
+        Prometheus' histogram_quantile; ranks in the +Inf bucket report the
+        largest finite bound.
+        """
+        indexes = [(self.label_names.index(name), str(value)) for name, value in match.items()]
+        counts = [0] * (len(self.buckets) + 1)
+        for key, (bucket_counts, _) in self._series.items():
+            if all(key[index] == value for index, value in indexes):
+                counts = [total + count for total, count in zip(counts, bucket_counts)]
+
+        observed = sum(counts)
+        result: Dict[str, Optional[float]] = {}
+        for quantile in quantiles:
+            label = f"p{quantile * 100:g}"
+            if observed == 0:
+                result[label] = None
+                continue
+            rank = quantile * observed
+            cumulative = 0
+            for index, count in enumerate(counts):
+                if cumulative + count >= rank and count > 0:
+                    if index == len(self.buckets):
+                        result[label] = self.buckets[-1]
+                    else:
+                        lower = self.buckets[index - 1] if index > 0 else 0.0
+                        upper = self.buckets[index]
+                        result[label] = lower + (upper - lower) * (rank - cumulative) / count
+                    break
+                cumulative += count
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "type": self.type_name,
+            "help": self.documentation,
+            "labels": list(self.label_names),
+            "buckets": list(self.buckets),
+            "series": [[list(key), list(counts), total] for key, (counts, total) in self._series.items()]
+        }
+
+    @staticmethod
+    def merge(into: Dict[Tuple[str, ...], Any], snapshot: Dict[str, Any]):
+        for key, counts, total in snapshot["series"]:
+            key = tuple(key)
+            merged = into.get(key)
+            if merged is None:
+                into[key] = [list(counts), total]
+            else:
+                merged[0] = [a + b for a, b in zip(merged[0], counts)]
+                merged[1] += total
+
+    @staticmethod
+    def render(name: str, snapshot: Dict[str, Any], series: Dict[Tuple[str, ...], Any]) -> List[str]:
+        lines = []
+        bounds = list(snapshot["buckets"]) + [math.inf]
+        for key, (counts, total) in series.items():
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                labels = _format_labels(snapshot["labels"], key, ("le", _format_value(bound)))
+                lines.append(f"{name}_bucket{labels} {cumulative}")
+            labels = _format_labels(snapshot["labels"], key)
+            lines.append(f"{name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{name}_count{labels} {cumulative}")
+        return lines
+
+
+METRIC_TYPES = {Counter.type_name: Counter, Histogram.type_name: Histogram}
+
+
+class MetricsRegistry:
+    """
+    Process-wide metrics with cross-worker aggregation.
+
+    Each uvicorn worker records into its own in-memory metrics. When
+    METRICS_MULTIPROC_DIR is set, workers periodically write a snapshot to
+    `<dir>/metrics_<pid>.json` (atomically, via rename) and a scrape served
+    by any worker merges every worker's file with its own live values, so
+    the exposition covers the whole deployment. Files of exited workers are
+    kept so counters never go backwards; empty the directory on deploy.
+    """
+
+    def __init__(self, multiproc_dir: Optional[str] = None, flush_interval: Optional[float] = None):
+        self.multiproc_dir = multiproc_dir if multiproc_dir is not None else settings.METRICS_MULTIPROC_DIR
+        self.flush_interval = flush_interval or settings.METRICS_FLUSH_INTERVAL_SECONDS
+        self.pid = os.getpid()
+        self._metrics: Dict[str, Any] = {}
+
+        # Metrics
+        self.flushes = 0
+        self.flush_failures = 0
+
+        if self.multiproc_dir:
+            os.makedirs(self.multiproc_dir, exist_ok=True)
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str]) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str],
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str):
+        return self._metrics[name]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Copy of this worker's metrics, safe to serialize off the event loop."""
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    @property
+    def _path(self) -> str:
+        return os.path.join(self.multiproc_dir, f"metrics_{self.pid}.json")
+
+    def _write(self, snapshot: Dict[str, Any]):
+        fd, temp_path = tempfile.mkstemp(dir=self.multiproc_dir, prefix=".metrics_", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as handle:
+                json.dump(snapshot, handle, separators=(",", ":"))
+            os.replace(temp_path, self._path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def _read_workers(self) -> List[Dict[str, Any]]:
+        snapshots = []
+        for filename in os.listdir(self.multiproc_dir):
+            if not (filename.startswith("metrics_") and filename.endswith(".json")):
+                continue
+            if filename == os.path.basename(self._path):
+                continue
+            try:
+                with open(os.path.join(self.multiproc_dir, filename)) as handle:
+                    snapshots.append(json.load(handle))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable metrics file {filename}: {e}")
+        return snapshots
+
+    async def flush(self):
+        """Write this worker's snapshot for other workers to aggregate."""
+        if not self.multiproc_dir:
+            return
+        try:
+            await asyncio.to_thread(self._write, self.snapshot())
+            self.flushes += 1
+        except OSError as e:
+            self.flush_failures += 1
+            logger.warning(f"Failed to write metrics snapshot: {e}")
+
+    async def run(self):
+        """Flush forever, once per interval."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def collect(self) -> Dict[str, Tuple[Dict[str, Any], Dict[Tuple[str, ...], Any]]]:
+        """Merge every worker's metrics: name -> (definition, label values -> value)."""
+        own = self.snapshot()
+        snapshots = [own]
+        if self.multiproc_dir:
+            snapshots += await asyncio.to_thread(self._read_workers)
+
+        merged: Dict[str, Tuple[Dict[str, Any], Dict[Tuple[str, ...], Any]]] = {}
+        for snapshot in snapshots:
+            for name, metric in snapshot.items():
+                definition = own.get(name, metric)
+                if definition["type"] != metric["type"] or definition.get("buckets") != metric.get("buckets"):
+                    # Written by a worker running a different metrics definition
+                    continue
+                _, series = merged.setdefault(name, (definition, {}))
+                METRIC_TYPES[metric["type"]].merge(series, metric)
+        return merged
+
+    async def render(self) -> str:
+        """Render all workers' metrics in the Prometheus text exposition format."""
+        lines = []
+        for name, (definition, series) in sorted((await self.collect()).items()):
+            lines.append(f"# HELP {name} {definition['help']}")
+            lines.append(f"# TYPE {name} {definition['type']}")
+            lines.extend(METRIC_TYPES[definition["type"]].render(name, definition, series))
+        return "\n".join(lines) + "\n"
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": True,
+            "metrics": len(self._metrics),
+            "multiprocess": bool(self.multiproc_dir),
+            "flushes": self.flushes,
+            "flush_failures": self.flush_failures
+        }
+
+
+def _create_registry() -> MetricsRegistry:
+    registry = MetricsRegistry()
+    registry.histogram(
+        "aibin_agent_request_duration_seconds",
+        "End-to-end time an agent spends serving a request.",
+        ("agent", "model", "interaction_type")
+    )
+    registry.histogram(
+        "aibin_llm_request_duration_seconds",
+        "Time an LLM backend takes to answer, excluding bulkhead queueing.",
+        ("agent", "model", "interaction_type", "outcome")
+    )
+    registry.histogram(
+        "aibin_llm_queue_wait_seconds",
+        "Time a call waited for an LLM backend bulkhead slot.",
+        ("agent", "priority"),
+        QUEUE_WAIT_BUCKETS
+    )
+    registry.counter(
+        "aibin_llm_queue_rejections_total",
+        "Calls rejected by an LLM backend bulkhead.",
+        ("agent", "reason")
+    )
+    registry.histogram(
+        "aibin_llm_tokens",
+        "Tokens per LLM call as reported by the provider.",
+        ("agent", "model", "interaction_type", "direction"),
+        TOKEN_BUCKETS
+    )
+    return registry
+
+
+_metrics_registry: Optional[MetricsRegistry] = None
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Get the process-wide metrics registry."""
+    global _metrics_registry
+    if _metrics_registry is None:
+        _metrics_registry = _create_registry()
+    return _metrics_registry
+
+
+def observe_agent_request(agent: str, model: Optional[str], interaction_type: str, seconds: float):
+    if settings.METRICS_ENABLED:
+        get_metrics_registry().get("aibin_agent_request_duration_seconds").observe(
+            seconds, agent=agent, model=model, interaction_type=interaction_type
+        )
+
+
+def observe_llm_call(agent: str, model: str, seconds: float, outcome: str, usage: Optional[Dict[str, Any]] = None):
+    """Record one backend call's latency and, when the provider reported it, its token usage."""
+    if not settings.METRICS_ENABLED:
+        return
+    registry = get_metrics_registry()
+    interaction_type = current_interaction_type()
+    registry.get("aibin_llm_request_duration_seconds").observe(
+        seconds, agent=agent, model=model, interaction_type=interaction_type, outcome=outcome
+    )
+    if usage:
+        tokens = registry.get("aibin_llm_tokens")
+        for direction in ("input", "output"):
+            count = usage.get(f"{direction}_tokens")
+            if count is not None:
+                tokens.observe(count, agent=agent, model=model, interaction_type=interaction_type, direction=direction)
+
+
+def observe_queue_wait(agent: str, priority: str, seconds: float):
+    if settings.METRICS_ENABLED:
+        get_metrics_registry().get("aibin_llm_queue_wait_seconds").observe(seconds, agent=agent, priority=priority)
+
+
+def count_queue_rejection(agent: str, reason: str):
+    if settings.METRICS_ENABLED:
+        get_metrics_registry().get("aibin_llm_queue_rejections_total").inc(agent=agent, reason=reason)
+
+
+def get_latency_percentiles(agent: str) -> Dict[str, Optional[float]]:
+    """p50/p95/p99 of an agent's request latency in this worker."""
+    if not settings.METRICS_ENABLED:
+        return {}
+    return get_metrics_registry().get("aibin_agent_request_duration_seconds").quantiles((0.5, 0.95, 0.99), agent=agent)
@@ -0,0 +1,314 @@
+"""
+Rate limiting utilities for AIBIN platform.
+Token-bucket admission control for LLM-backed endpoints.
+"""
+
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Tuple
+
+from app.config.config import settings
+from app.utils.exceptions import RateLimitError
+from app.logging.log import logger
+
+
+@dataclass
+class BucketLimit:
+    """Token bucket limit: `capacity` tokens, refilled evenly over one minute."""
+    capacity: float
+
+    @property
+    def refill_per_second(self) -> float:
+        return self.capacity / 60.0
+
+    def retry_after(self, tokens: float, cost: float) -> float:
+        """Seconds until the bucket holds `cost` tokens again."""
+        missing = max(cost - tokens, 0.0)
+        return missing / self.refill_per_second if self.refill_per_second > 0 else 60.0
+
+
+class RateLimitBackend(ABC):
+    """Storage for token-bucket state."""
+
+    @abstractmethod
+    async def try_acquire(self, key: str, limit: BucketLimit, cost: float) -> Tuple[bool, float]:
+        """
+        Take `cost` tokens if the bucket holds at least that many.
+
+        Returns:
+            Tuple of (allowed, current token balance)
+        """
+        pass
+
+    @abstractmethod
+    async def debit(self, key: str, limit: BucketLimit, amount: float) -> float:
+        """Unconditionally take `amount` tokens (the balance may go negative). Returns the balance."""
+        pass
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Per-process bucket state. Suitable for a single worker or development."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def _refill(self, key: str, limit: BucketLimit) -> float:
+        now = time.monotonic()
+        tokens, refilled_at = self._buckets.get(key, (limit.capacity, now))
+        tokens = min(limit.capacity, tokens + (now - refilled_at) * limit.refill_per_second)
+        return tokens
+
+    def _store(self, key: str, tokens: float):
+        self._buckets[key] = (tokens, time.monotonic())
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+    async def try_acquire(self, key: str, limit: BucketLimit, cost: float) -> Tuple[bool, float]:
+        tokens = self._refill(key, limit)
+        if tokens < cost:
+            return False, tokens
+        self._store(key, tokens - cost)
+        return True, tokens - cost
+
+    async def debit(self, key: str, limit: BucketLimit, amount: float) -> float:
+        tokens = self._refill(key, limit) - amount
+        self._store(key, tokens)
+        return tokens
+
+
+class PostgresRateLimitBackend(RateLimitBackend):
+    """
+    PostgreSQL-backed bucket state shared by all uvicorn workers.
+    Each acquire is a single atomic upsert that refills and consumes in place.
+    """
+
+    def __init__(self):
+        # Imported lazily so the in-memory backend never touches the database engine
+        from app.db.database import SessionLocal
+        self._session_factory = SessionLocal
+
+    def _refilled_expression(self, limit: BucketLimit):
+        from sqlalchemy import func, literal
+        from app.models.rate_limit_bucket import RateLimitBucket
+
+        elapsed = func.extract("epoch", func.now() - RateLimitBucket.refilled_at)
+        return func.least(
+            literal(limit.capacity),
+            RateLimitBucket.tokens + elapsed * literal(limit.refill_per_second)
+        )
+
+    async def try_acquire(self, key: str, limit: BucketLimit, cost: float) -> Tuple[bool, float]:
+        from sqlalchemy import select, func
+        from sqlalchemy.dialects.postgresql import insert
+        from app.models.rate_limit_bucket import RateLimitBucket
+
+        refilled = self._refilled_expression(limit)
+        statement = (
+            insert(RateLimitBucket)
+            .values(key=key, tokens=limit.capacity - cost, refilled_at=func.now())
+            .on_conflict_do_update(
+                index_elements=[RateLimitBucket.key],
+                set_={"tokens": refilled - cost, "refilled_at": func.now()},
+                where=refilled >= cost
+            )
+            .returning(RateLimitBucket.tokens)
+        )
+
+        async with self._session_factory() as db:
+            result = await db.execute(statement)
+            balance = result.scalar()
+            await db.commit()
+
+            if balance is not None:
+                return True, float(balance)
+
+            # Rejected: report the refilled balance so callers can compute Retry-After
+            result = await db.execute(select(refilled).where(RateLimitBucket.key == key))
+            current = result.scalar()
+            return False, float(current) if current is not None else 0.0
+
+    async def debit(self, key: str, limit: BucketLimit, amount: float) -> float:
+        from sqlalchemy import func
+        from sqlalchemy.dialects.postgresql import insert
+        from app.models.rate_limit_bucket import RateLimitBucket
+
+        refilled = self._refilled_expression(limit)
+        statement = (
+            insert(RateLimitBucket)
+            .values(key=key, tokens=limit.capacity - amount, refilled_at=func.now())
+            .on_conflict_do_update(
+                index_elements=[RateLimitBucket.key],
+                set_={"tokens": refilled - amount, "refilled_at": func.now()}
+            )
+            .returning(RateLimitBucket.tokens)
+        )
+
+        async with self._session_factory() as db:
+            result = await db.execute(statement)
+            balance = result.scalar()
+            await db.commit()
+            return float(balance) if balance is not None else 0.0
+
+
+class AdmissionController:
+    """
+    Admission control for LLM-backed endpoints.
+
+    Requests are admitted only when the per-user and per-IP request buckets
+    have capacity and the per-user and per-model token buckets are not in
+    debt. Token buckets are charged afterwards with the real token usage
+    reported by the model, so expensive requests slow their caller down.
+    """
+
+    def __init__(self, backend: RateLimitBackend):
+        self.backend = backend
+        self.user_requests = BucketLimit(settings.RATE_LIMIT_PER_MINUTE)
+        self.ip_requests = BucketLimit(settings.RATE_LIMIT_PER_IP_PER_MINUTE)
+        self.user_tokens = BucketLimit(settings.RATE_LIMIT_USER_TOKENS_PER_MINUTE)
+        self.model_tokens: Dict[str, BucketLimit] = {
+            settings.GROQ_MODEL: BucketLimit(settings.GROQ_TOKENS_PER_MINUTE),
+            settings.OLLAMA_MODEL: BucketLimit(settings.OLLAMA_TOKENS_PER_MINUTE),
+        }
+
+        # Metrics
+        self.admitted = 0
+        self.rejected: Dict[str, int] = {"user": 0, "ip": 0, "user_tokens": 0, "model": 0}
+        self.backend_errors = 0
+
+    @staticmethod
+    def model_for_interaction(interaction_type: str) -> str:
+        """Get the model an interaction type is served by."""
+        if interaction_type in ("voice_chat", "multimodal", "visual_analysis"):
+            return settings.OLLAMA_MODEL
+        return settings.GROQ_MODEL
+
+    async def admit(
+        self,
+        user_id: Optional[str],
+        client_ip: Optional[str],
+        models: List[str],
+        request_count: int = 1
+    ):
+        """
+        Admit a request (or a batch of `request_count` requests) or raise
+        RateLimitError with a retry_after hint.
+
+        A zero limit disables the corresponding bucket. Backend failures
+        fail open so a database hiccup never blocks traffic.
+        """
+        # Non-consuming token checks run first so a rejection does not spend request tokens;
+        # the shared IP bucket is charged before the user's own bucket
+        checks: List[Tuple[str, str, BucketLimit, float]] = []
+        for model in models:
+            limit = self.model_tokens.get(model)
+            if limit and limit.capacity > 0:
+                checks.append(("model", f"model:{model}", limit, 0.0))
+        if user_id and self.user_tokens.capacity > 0:
+            checks.append(("user_tokens", f"user_tokens:{user_id}", self.user_tokens, 0.0))
+        if client_ip and self.ip_requests.capacity > 0:
+            checks.append(("ip", f"ip:{client_ip}", self.ip_requests, float(request_count)))
+        if user_id and self.user_requests.capacity > 0:
+            checks.append(("user", f"user:{user_id}", self.user_requests, float(request_count)))
+
+        spent: List[Tuple[str, BucketLimit, float]] = []
+        for scope, key, limit, cost in checks:
+            try:
+                allowed, balance = await self.backend.try_acquire(key, limit, cost)
+            except Exception as e:
+                self.backend_errors += 1
+                logger.warning(f"Rate limit backend error for {key}: {e}")
+                continue
+
+            if not allowed:
+                self.rejected[scope] += 1
+                await self._refund(spent)
+                # Token buckets in debt need to refill back to zero before admitting
+                retry_after = limit.retry_after(balance, max(cost, 0.0))
+                raise RateLimitError(
+                    f"Rate limit exceeded for {scope}",
+                    details={"scope": scope, "retry_after": math.ceil(max(retry_after, 1.0))}
+                )
+            if cost > 0:
+                spent.append((key, limit, cost))
+
+        self.admitted += 1
+
+    async def _refund(self, spent: List[Tuple[str, BucketLimit, float]]):
+        """Give back request tokens taken by checks that passed before a later one rejected."""
+        for key, limit, cost in spent:
+            try:
+                # Reads cap the balance at capacity, so a refund never grants extra requests
+                await self.backend.debit(key, limit, -cost)
+            except Exception as e:
+                self.backend_errors += 1
+                logger.warning(f"Rate limit refund failed for {key}: {e}")
+
+    def max_request_count(self, user_id: Optional[str], client_ip: Optional[str]) -> Optional[int]:
+        """
+        Largest batch the request buckets can ever admit at once, or None when unlimited.
+        A batch costing more than a bucket's capacity would be rejected forever.
+        """
+        capacities = []
+        if user_id and self.user_requests.capacity > 0:
+            capacities.append(self.user_requests.capacity)
+        if client_ip and self.ip_requests.capacity > 0:
+            capacities.append(self.ip_requests.capacity)
+        return int(min(capacities)) if capacities else None
+
+    async def record_model_usage(self, model: str, tokens: int):
+        """Charge a model's token bucket with real usage."""
+        limit = self.model_tokens.get(model)
+        if not limit or limit.capacity <= 0 or tokens <= 0:
+            return
+        try:
+            await self.backend.debit(f"model:{model}", limit, tokens)
+        except Exception as e:
+            self.backend_errors += 1
+            logger.warning(f"Rate limit usage recording failed for model {model}: {e}")
+
+    async def record_user_usage(self, user_id: Optional[str], tokens: Optional[int]):
+        """Charge a user's token bucket with real usage."""
+        if not user_id or not tokens or self.user_tokens.capacity <= 0:
+            return
+        try:
+            await self.backend.debit(f"user_tokens:{user_id}", self.user_tokens, tokens)
+        except Exception as e:
+            self.backend_errors += 1
+            logger.warning(f"Rate limit usage recording failed for user {user_id}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get admission statistics."""
+        return {
+            "backend": self.backend.__class__.__name__,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "backend_errors": self.backend_errors
+        }
+
+
+_admission_controller: Optional[AdmissionController] = None
+
+
+def create_rate_limit_backend(backend: Optional[str] = None) -> RateLimitBackend:
+    """Create a rate limit backend for the configured backend name."""
+    backend = (backend or settings.RATE_LIMIT_BACKEND).lower()
+
+    if backend == "memory":
+        return InMemoryRateLimitBackend()
+    if backend == "postgres":
+        return PostgresRateLimitBackend()
+
+    raise ValueError(f"Unknown rate limit backend: {backend}. Must be one of: memory, postgres")
+
+
+def get_admission_controller() -> AdmissionController:
+    """Get the process-wide admission controller."""
+    global _admission_controller
+    if _admission_controller is None:
+        _admission_controller = AdmissionController(create_rate_limit_backend())
+    return _admission_controller
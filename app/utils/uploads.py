@@ -0,0 +1,188 @@
+"""
+Upload ingestion utilities for AIBIN platform.
+Streams image uploads to a spooled file with early size and type checks.
+"""
+
+import base64
+import io
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional, BinaryIO, Union
+
+from fastapi import HTTPException, UploadFile, status
+
+from app.config.config import settings
+
+
+# Magic numbers of the image formats we accept; the declared content type must agree
+IMAGE_SIGNATURES = {
+    "image/jpeg": lambda header: header.startswith(b"\xff\xd8\xff"),
+    "image/png": lambda header: header.startswith(b"\x89PNG\r\n\x1a\n"),
+    "image/webp": lambda header: header[:4] == b"RIFF" and header[8:12] == b"WEBP",
+}
+SNIFF_BYTES = 12
+
+# Base64 encodes 3 input bytes per 4 output characters; chunks stay aligned to that
+BASE64_CHUNK_BYTES = 3 * 256 * 1024
+UPLOAD_COPY_CHUNK_BYTES = 256 * 1024
+
+
+def sniff_image_type(header: bytes) -> Optional[str]:
+    """Detect the image type from its first bytes."""
+    for content_type, matches in IMAGE_SIGNATURES.items():
+        if matches(header):
+            return content_type
+    return None
+
+
+def _too_large_error() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File size must be less than {settings.MAX_FILE_SIZE / 1024 / 1024:.1f}MB"
+    )
+
+
+def _check_declared_type(content_type: Optional[str]) -> str:
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type not in settings.ALLOWED_FILE_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"File type {content_type or 'unknown'} not allowed. Allowed types: {', '.join(settings.ALLOWED_FILE_TYPES)}"
+        )
+    return content_type
+
+
+def _check_signature(header: bytes, content_type: str):
+    detected = sniff_image_type(header)
+    if detected != content_type:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"File content does not match declared type {content_type}"
+        )
+
+
+@dataclass
+class SpooledImage:
+    """
+    An uploaded image held in memory up to UPLOAD_SPOOL_THRESHOLD and in a
+    named temporary file beyond, so large images can be handed on by path.
+    """
+    file: BinaryIO
+    size: int
+    content_type: str
+    path: Optional[str] = None
+
+    def read_bytes(self) -> bytes:
+        """Read the whole image (a single copy)."""
+        self.file.seek(0)
+        return self.file.read()
+
+    def close(self):
+        self.file.close()
+
+
+async def spool_image_stream(
+    chunks: AsyncIterator[bytes],
+    content_type: Optional[str],
+    content_length: Optional[str] = None
+) -> SpooledImage:
+    """
+    Ingest a raw image body chunk by chunk.
+
+    The declared type and Content-Length are rejected before any body bytes
+    are read; the magic number is checked on the first bytes, and the upload
+    is aborted as soon as it exceeds MAX_FILE_SIZE.
+
+    Raises:
+        HTTPException: 413 for oversized bodies, 415 for disallowed or mismatched types
+    """
+    content_type = _check_declared_type(content_type)
+    if content_length and content_length.isdigit() and int(content_length) > settings.MAX_FILE_SIZE:
+        raise _too_large_error()
+
+    spool: BinaryIO = io.BytesIO()
+    path = None
+    size = 0
+    header = b""
+    try:
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            size += len(chunk)
+            if size > settings.MAX_FILE_SIZE:
+                raise _too_large_error()
+            if len(header) < SNIFF_BYTES:
+                header += chunk[:SNIFF_BYTES - len(header)]
+                if len(header) >= SNIFF_BYTES:
+                    _check_signature(header, content_type)
+            if path is None and size > settings.UPLOAD_SPOOL_THRESHOLD:
+                # Roll over to a named file: preprocessing workers open large images by path
+                spooled = tempfile.NamedTemporaryFile(prefix="upload_")
+                spooled.write(spool.getbuffer())
+                spool.close()
+                spool, path = spooled, spooled.name
+            spool.write(chunk)
+
+        if size == 0:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty image body")
+        if len(header) < SNIFF_BYTES:
+            _check_signature(header, content_type)
+        spool.flush()
+    except BaseException:
+        spool.close()
+        raise
+
+    return SpooledImage(file=spool, size=size, content_type=content_type, path=path)
+
+
+async def spool_image_upload(file: UploadFile) -> SpooledImage:
+    """
+    Validate a multipart image upload and move it into a SpooledImage.
+
+    The upload is copied chunk by chunk with the same checks as a raw body,
+    so a large file ends up with a path instead of being read into memory.
+
+    Raises:
+        HTTPException: 413 for oversized files, 415 for disallowed or mismatched types
+    """
+    async def chunks() -> AsyncIterator[bytes]:
+        while True:
+            chunk = await file.read(UPLOAD_COPY_CHUNK_BYTES)
+            if not chunk:
+                break
+            yield chunk
+
+    content_length = str(file.size) if file.size is not None else None
+    return await spool_image_stream(chunks(), file.content_type, content_length)
+
+
+def encode_base64(image: Union[bytes, str, os.PathLike]) -> str:
+    """
+    Base64-encode image bytes, or the image file at a path, in 3-byte-aligned chunks.
+
+    A file is read one chunk at a time rather than loaded whole; the encoded
+    string itself is built in memory.
+    """
+    if isinstance(image, bytes):
+        view = memoryview(image)
+        return "".join(
+            base64.b64encode(view[start:start + BASE64_CHUNK_BYTES]).decode("ascii")
+            for start in range(0, len(view), BASE64_CHUNK_BYTES)
+        )
+
+    parts = []
+    with open(image, "rb") as file:
+        while True:
+            chunk = file.read(BASE64_CHUNK_BYTES)
+            if not chunk:
+                break
+            parts.append(base64.b64encode(chunk).decode("ascii"))
+    return "".join(parts)
+
+
+def strip_data_url(image_data: str) -> str:
+    """Return the base64 payload of a data URL (or the input unchanged if it is plain base64)."""
+    if image_data.startswith("data:"):
+        return image_data.partition(",")[2]
+    return image_data
@@ -0,0 +1,72 @@
+"""
+Single-core throughput benchmark for the voice audio preprocessing stage.
+
+Run from the repository root:
+
+    python -m benchmarks.audio_preprocessing_benchmark [--seconds 10] [--repeats 20]
+"""
+
+import argparse
+import time
+from typing import Dict
+
+import numpy as np
+
+from app.agents.audio_preprocessing import preprocess_audio, to_int16
+
+
+SOURCE_RATES = (16000, 44100, 48000, 8000)
+
+
+def synthetic_voice_clip(sample_rate: int, seconds: float, seed: int = 0) -> np.ndarray:
+    """Speech-like clip: 20% quiet noise, then syllable-modulated harmonics, then quiet noise."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    voiced = sum(np.sin(2 * np.pi * 140 * harmonic * t) / harmonic for harmonic in range(1, 6))
+    syllables = np.clip(np.sin(2 * np.pi * 4 * t), 0, None)
+    speech_mask = (t > seconds * 0.2) & (t < seconds * 0.8)
+    clip = 0.3 * voiced * syllables * speech_mask + 0.002 * rng.standard_normal(len(t))
+    return to_int16(clip.astype(np.float32))
+
+
+def benchmark(seconds: float = 10.0, repeats: int = 20) -> Dict[str, Dict[str, float]]:
+    """
+    Measure single-core throughput of the preprocessing stage.
+
+    Every operation is single-threaded NumPy, so one thread of this process
+    is one core. Reports real-time factors (audio seconds processed per wall
+    second) for common client sample rates.
+    """
+    results = {}
+    for source_rate in SOURCE_RATES:
+        pcm = synthetic_voice_clip(source_rate, seconds).tobytes()
+        preprocess_audio(pcm, "pcm", source_rate)  # Warm the filter cache
+        started = time.perf_counter()
+        for _ in range(repeats):
+            result = preprocess_audio(pcm, "pcm", source_rate)
+        elapsed = (time.perf_counter() - started) / repeats
+        results[f"{source_rate}Hz"] = {
+            "seconds_per_clip": elapsed,
+            "realtime_factor": seconds / elapsed,
+            "megabytes_per_second": len(pcm) / elapsed / 1e6,
+            "speech_seconds": result.details["speech_seconds"],
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=10.0, help="Clip length in seconds")
+    parser.add_argument("--repeats", type=int, default=20, help="Timed runs per sample rate")
+    args = parser.parse_args()
+
+    for rate, stats in benchmark(args.seconds, args.repeats).items():
+        print(
+            f"{rate:>8}: {stats['seconds_per_clip'] * 1000:7.2f} ms per {args.seconds:g}s clip, "
+            f"{stats['realtime_factor']:7.0f}x real time, {stats['megabytes_per_second']:6.1f} MB/s, "
+            f"{stats['speech_seconds']:.2f}s speech kept"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Tests for audio resampling, voice activity detection and clip transcription.
+"""
+
+import numpy as np
+import pytest
+
+from app.agents.audio_preprocessing import detect_speech, preprocess_audio, resample
+from app.agents.ollama_client import OllamaClient
+from app.agents.speech_to_text import ScriptedSTTEngine
+from app.agents.voice_agent import VoiceAgent
+
+
+SAMPLE_RATE = 16000
+
+
+def tone(seconds: float, frequency: float = 220.0, rate: int = SAMPLE_RATE, amplitude: float = 0.25) -> np.ndarray:
+    t = np.arange(int(rate * seconds)) / rate
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+def silence(seconds: float, rate: int = SAMPLE_RATE) -> np.ndarray:
+    return np.zeros(int(rate * seconds), dtype=np.float32)
+
+
+def to_pcm(samples: np.ndarray) -> bytes:
+    return (samples * 32767).astype("<i2").tobytes()
+
+
+def test_resample_keeps_duration_and_frequency():
+    output = resample(tone(1.0, rate=44100), 44100, SAMPLE_RATE)
+
+    assert len(output) == SAMPLE_RATE
+    spectrum = np.abs(np.fft.rfft(output))
+    assert np.argmax(spectrum) == pytest.approx(220, abs=1)
+
+
+def test_downsampling_filters_frequencies_above_the_new_nyquist():
+    # 12 kHz is above 8 kHz Nyquist at 16 kHz; it must not alias into the band
+    output = resample(tone(0.5, frequency=12000, rate=48000), 48000, SAMPLE_RATE)
+
+    assert np.max(np.abs(output[200:-200])) < 0.01
+
+
+def test_detect_speech_finds_padded_segments():
+    samples = np.concatenate([silence(1.0), tone(0.5), silence(1.0), tone(0.5), silence(0.5)])
+
+    segments = detect_speech(samples, SAMPLE_RATE)
+
+    assert len(segments) == 2
+    # Onsets are padded by AUDIO_VAD_PADDING_MS (200 ms by default)
+    assert segments[0][0] == pytest.approx(0.8 * SAMPLE_RATE, abs=SAMPLE_RATE * 0.02)
+    assert segments[1][0] == pytest.approx(2.3 * SAMPLE_RATE, abs=SAMPLE_RATE * 0.02)
+
+
+def test_detect_speech_bridges_short_pauses_and_drops_clicks():
+    samples = np.concatenate([silence(0.5), tone(0.3), silence(0.2), tone(0.3), silence(0.5), tone(0.02), silence(0.5)])
+
+    assert len(detect_speech(samples, SAMPLE_RATE)) == 1
+
+
+def test_all_speech_clip_is_not_trimmed():
+    samples = tone(1.0)
+
+    assert detect_speech(samples, SAMPLE_RATE) == [(0, len(samples))]
+
+
+def test_preprocess_trims_silence_from_raw_pcm():
+    audio = preprocess_audio(to_pcm(np.concatenate([silence(2.0), tone(0.5), silence(2.0)])), format="pcm")
+
+    assert audio.details["input_seconds"] == pytest.approx(4.5)
+    assert audio.details["speech_seconds"] == pytest.approx(0.9, abs=0.05)
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    engine = ScriptedSTTEngine(SAMPLE_RATE, script="show me handbags", seconds_per_word=0.1)
+    monkeypatch.setattr("app.agents.voice_agent.get_stt_engine", lambda: engine)
+    return VoiceAgent(ollama_client=OllamaClient())
+
+
+async def test_clip_is_transcribed_after_trimming(agent):
+    transcript = await agent.process_audio_input(to_pcm(np.concatenate([silence(1.0), tone(0.5)])), format="pcm")
+
+    assert transcript == "show me handbags"
+
+
+async def test_silent_clip_has_an_empty_transcript(agent):
+    assert await agent.process_audio_input(to_pcm(silence(1.0)), format="pcm") == ""
+
+
+async def test_unsupported_clip_raises_instead_of_returning_a_transcript(agent):
+    with pytest.raises(ValueError, match="Unsupported audio format"):
+        await agent.process_audio_input(b"\x00\x00", format="mp3")
@@ -0,0 +1,118 @@
+"""
+Tests for the per-backend bulkhead concurrency limiter.
+"""
+
+import asyncio
+
+import pytest
+
+from app.agents.bulkhead import Bulkhead, PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL
+from app.utils.exceptions import BackendOverloadedError
+
+
+def make_bulkhead(max_concurrency: int = 1, max_queue: int = 4, queue_timeout: float = 1.0) -> Bulkhead:
+    return Bulkhead("test", max_concurrency=max_concurrency, max_queue=max_queue, queue_timeout=queue_timeout)
+
+
+async def test_admits_up_to_max_concurrency_without_queueing():
+    bulkhead = make_bulkhead(max_concurrency=2)
+
+    await bulkhead.acquire()
+    await bulkhead.acquire()
+
+    assert bulkhead.get_stats()["active"] == 2
+    assert bulkhead.queued == 0
+
+
+async def test_released_slot_goes_to_highest_priority_waiter():
+    bulkhead = make_bulkhead()
+    await bulkhead.acquire()
+
+    order = []
+
+    async def wait(priority: int, name: str):
+        async with bulkhead.slot(priority):
+            order.append(name)
+
+    waiters = [
+        asyncio.create_task(wait(PRIORITY_LOW, "low")),
+        asyncio.create_task(wait(PRIORITY_NORMAL, "normal-1")),
+        asyncio.create_task(wait(PRIORITY_HIGH, "high")),
+        asyncio.create_task(wait(PRIORITY_NORMAL, "normal-2")),
+    ]
+    await asyncio.sleep(0)
+    assert bulkhead.queue_depth == 4
+
+    bulkhead.release()
+    await asyncio.gather(*waiters)
+
+    assert order == ["high", "normal-1", "normal-2", "low"]
+    assert bulkhead.get_stats()["active"] == 0
+
+
+async def test_full_queue_rejects_immediately():
+    bulkhead = make_bulkhead(max_queue=1)
+    await bulkhead.acquire()
+    queued = asyncio.create_task(bulkhead.acquire())
+    await asyncio.sleep(0)
+
+    with pytest.raises(BackendOverloadedError) as excinfo:
+        await bulkhead.acquire()
+
+    assert excinfo.value.details["reason"] == "queue_full"
+    assert bulkhead.rejected_full == 1
+    queued.cancel()
+    await asyncio.gather(queued, return_exceptions=True)
+
+
+async def test_queue_deadline_rejects_waiter():
+    bulkhead = make_bulkhead(queue_timeout=0.01)
+    await bulkhead.acquire()
+
+    with pytest.raises(BackendOverloadedError) as excinfo:
+        await bulkhead.acquire()
+
+    assert excinfo.value.details["reason"] == "queue_timeout"
+    assert bulkhead.rejected_timeout == 1
+    assert bulkhead.queue_depth == 0
+
+
+async def test_slot_handed_over_as_deadline_fires_is_kept():
+    bulkhead = make_bulkhead(queue_timeout=0.05)
+    await bulkhead.acquire()
+
+    async def release_at_deadline():
+        await asyncio.sleep(0.05)
+        bulkhead.release()
+
+    releaser = asyncio.create_task(release_at_deadline())
+    try:
+        await bulkhead.acquire()
+    except BackendOverloadedError:
+        # The deadline won the race; the slot must then still be free for the next caller
+        await releaser
+        assert bulkhead.get_stats()["active"] == 0
+    else:
+        await releaser
+        assert bulkhead.get_stats()["active"] == 1
+    assert bulkhead.queue_depth == 0
+
+
+async def test_cancelled_waiter_passes_its_slot_on():
+    bulkhead = make_bulkhead()
+    await bulkhead.acquire()
+    cancelled = asyncio.create_task(bulkhead.acquire())
+    survivor = asyncio.create_task(bulkhead.acquire())
+    await asyncio.sleep(0)
+
+    # Hand the slot to the first waiter, then cancel it before it runs
+    bulkhead.release()
+    cancelled.cancel()
+    (outcome,) = await asyncio.gather(cancelled, return_exceptions=True)
+    if not isinstance(outcome, asyncio.CancelledError):
+        # Some Python versions let wait_for return the handed-over slot despite the
+        # cancellation; the caller then owns it and releases it as usual
+        bulkhead.release()
+
+    await asyncio.wait_for(survivor, timeout=1.0)
+    assert bulkhead.get_stats()["active"] == 1
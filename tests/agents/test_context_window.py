@@ -0,0 +1,106 @@
+"""
+Tests for token-budgeted context packing and the rolling summary.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from langchain_core.messages import AIMessage, SystemMessage
+
+from app.agents.context_window import ContextWindowManager, MESSAGE_OVERHEAD_TOKENS
+from app.agents.conversation_store import InMemoryConversationStore
+from app.schemas.ai_schemas import ConversationMessage
+
+
+STARTED = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def turn(index: int, content: str = None) -> ConversationMessage:
+    return ConversationMessage(
+        role="user" if index % 2 == 0 else "assistant",
+        content=content or f"turn {index}",
+        timestamp=STARTED + timedelta(seconds=index)
+    )
+
+
+class FakeLLMClient:
+    """The parts of LLMClient the context window uses; the model answers with a fixed summary."""
+
+    agent_name = "test"
+    history_namespace = "llm_chat"
+
+    def __init__(self):
+        self.conversation_store = InMemoryConversationStore(max_messages=50, ttl_seconds=3600)
+        self.summary_prompts = []
+
+    async def get_conversation_history(self, conversation_id, limit=None):
+        return await self.conversation_store.get_history(self.history_namespace, conversation_id, limit)
+
+    async def invoke_llm(self, messages, use_cache=True, priority=None):
+        self.summary_prompts.append(messages)
+        return AIMessage(content="User wants a black tote under $500.")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr("app.agents.context_window.settings.ENABLE_CONVERSATION_CONTEXT", True)
+    monkeypatch.setattr("app.agents.context_window.settings.CONTEXT_SUMMARY_ENABLED", True)
+    monkeypatch.setattr("app.agents.context_window.settings.CONTEXT_TOKEN_BUDGET", 10_000)
+    monkeypatch.setattr("app.agents.context_window.settings.MAX_CONVERSATION_HISTORY", 4)
+    return FakeLLMClient()
+
+
+async def add_turns(client: FakeLLMClient, count: int):
+    for index in range(count):
+        await client.conversation_store.append(client.history_namespace, "c1", turn(index))
+
+
+def test_pack_keeps_newest_turns_within_budget(client):
+    manager = ContextWindowManager(client)
+    history = [turn(index) for index in range(5)]
+    budget = sum(manager.counter.count_message(msg.content) for msg in history[-2:])
+
+    packed, overflow = manager._pack(history, budget)
+
+    assert [msg.content for msg in packed] == ["turn 3", "turn 4"]
+    assert [msg.content for msg in overflow] == ["turn 0", "turn 1", "turn 2"]
+
+
+def test_pack_truncates_a_newest_turn_larger_than_the_budget(client):
+    manager = ContextWindowManager(client)
+    history = [turn(0), turn(1, "word " * 500)]
+
+    packed, overflow = manager._pack(history, MESSAGE_OVERHEAD_TOKENS + 10)
+
+    assert len(packed) == 1 and packed[0].content.endswith("...")
+    assert manager.counter.count(packed[0].content) < 20
+    assert overflow == history
+
+
+async def test_turns_beyond_the_history_window_are_summarized(client):
+    manager = ContextWindowManager(client)
+    await add_turns(client, 6)
+
+    messages = await manager.build_messages("c1", "You are a shopping assistant.", "next", "general_chat")
+
+    # Everything fits the token budget, but only the newest 4 turns are sent verbatim
+    assert [msg.content for msg in messages[1:-1]] == ["turn 2", "turn 3", "turn 4", "turn 5"]
+    await asyncio.gather(*manager._tasks)
+    assert manager.summaries_generated == 1
+    assert "turn 0" in client.summary_prompts[0][-1].content
+    assert "turn 2" not in client.summary_prompts[0][-1].content
+
+    messages = await manager.build_messages("c1", "You are a shopping assistant.", "next", "general_chat")
+
+    assert isinstance(messages[0], SystemMessage)
+    assert "User wants a black tote under $500." in messages[0].content
+    assert len(messages) == 6
+    assert not manager._tasks
+
+
+def test_store_keeps_more_turns_than_the_prompt_window(monkeypatch):
+    monkeypatch.setattr("app.agents.conversation_store.settings.MAX_CONVERSATION_HISTORY", 10)
+    monkeypatch.setattr("app.agents.conversation_store.settings.CONVERSATION_STORE_MAX_MESSAGES", 50)
+
+    assert InMemoryConversationStore().max_messages == 50
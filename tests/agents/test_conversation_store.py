@@ -0,0 +1,87 @@
+"""
+Tests for the bounded in-memory conversation store.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.agents.conversation_store import InMemoryConversationStore, MESSAGE_OVERHEAD_BYTES
+from app.schemas.ai_schemas import ConversationMessage
+
+
+def message(content: str) -> ConversationMessage:
+    return ConversationMessage(role="user", content=content)
+
+
+def contents(history):
+    return [msg.content for msg in history]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr("app.agents.conversation_store.time", SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+async def test_history_is_a_bounded_ring_buffer():
+    store = InMemoryConversationStore(max_messages=3, ttl_seconds=0)
+    for index in range(5):
+        await store.append("llm_chat", "c1", message(f"turn {index}"))
+
+    assert contents(await store.get_history("llm_chat", "c1")) == ["turn 2", "turn 3", "turn 4"]
+    assert contents(await store.get_history("llm_chat", "c1", limit=2)) == ["turn 3", "turn 4"]
+    assert await store.get_history("llm_chat", "c1", limit=0) == []
+    assert (await store.get_stats())["total_bytes"] == 3 * (len("turn 0") + MESSAGE_OVERHEAD_BYTES)
+
+
+async def test_clear_one_namespace_or_all():
+    store = InMemoryConversationStore(max_messages=10, ttl_seconds=0)
+    for namespace in ("llm_chat", "llm_chat:summary", "voice_agent"):
+        await store.append(namespace, "c1", message(namespace))
+    await store.append("llm_chat", "c2", message("other conversation"))
+
+    await store.clear("llm_chat:summary", "c1")
+    assert await store.get_history("llm_chat:summary", "c1") == []
+    assert contents(await store.get_history("llm_chat", "c1")) == ["llm_chat"]
+
+    await store.clear(None, "c1")
+    assert await store.get_history("llm_chat", "c1") == []
+    assert await store.get_history("voice_agent", "c1") == []
+    assert contents(await store.get_history("llm_chat", "c2")) == ["other conversation"]
+
+
+async def test_least_recently_used_conversation_is_evicted():
+    store = InMemoryConversationStore(max_messages=10, ttl_seconds=0, max_conversations=2)
+    await store.append("llm_chat", "c1", message("first"))
+    await store.append("llm_chat", "c2", message("second"))
+    await store.get_history("llm_chat", "c1")
+
+    await store.append("llm_chat", "c3", message("third"))
+
+    assert await store.get_history("llm_chat", "c2") == []
+    assert contents(await store.get_history("llm_chat", "c1")) == ["first"]
+    assert store.evictions == 1
+
+
+async def test_memory_cap_evicts_oldest_conversations():
+    store = InMemoryConversationStore(max_messages=10, ttl_seconds=0, max_bytes=2 * (100 + MESSAGE_OVERHEAD_BYTES))
+    for conversation_id in ("c1", "c2", "c3"):
+        await store.append("llm_chat", conversation_id, message("x" * 100))
+
+    assert await store.count_conversations() == 2
+    assert await store.get_history("llm_chat", "c1") == []
+
+
+async def test_idle_conversations_expire(clock):
+    store = InMemoryConversationStore(max_messages=10, ttl_seconds=60)
+    await store.append("llm_chat", "c1", message("hello"))
+
+    clock.now += 30
+    assert contents(await store.get_history("llm_chat", "c1")) == ["hello"]
+
+    # Reading refreshed the conversation, so it expires 60 s after that
+    clock.now += 61
+    assert await store.get_history("llm_chat", "c1") == []
+    assert await store.count_conversations() == 0
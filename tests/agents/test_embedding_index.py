@@ -0,0 +1,101 @@
+"""
+Tests for the memory-mapped product embedding index.
+"""
+
+import uuid
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from app.agents.embedding_index import EmbeddingIndex, HashedTfidfEmbedder
+from app.models.product import Product
+
+
+CATALOG = {
+    "Black leather tote": "Structured tote bag in black calf leather",
+    "Silk scarf": "Printed silk twill scarf",
+    "Gold watch": "Automatic watch with a gold case",
+    "Canvas sneakers": "Low-top canvas sneakers",
+}
+
+
+def product(name: str, description: str = "", **fields) -> Product:
+    return Product(
+        id=fields.pop("id", uuid.uuid4()),
+        name=name,
+        description=description,
+        updated_at=datetime(2026, 1, 1),
+        is_deleted=fields.pop("is_deleted", False),
+        **fields
+    )
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = EmbeddingIndex(HashedTfidfEmbedder(dim=256), directory=str(tmp_path), initial_capacity=2)
+    yield index
+    index.close()
+
+
+@pytest.fixture
+def catalog(index):
+    products = {name: product(name, description) for name, description in CATALOG.items()}
+    for item in products.values():
+        index.upsert_product(item)
+    return products
+
+
+def test_search_ranks_the_closest_product_first(index, catalog):
+    results = index.search("leather tote bag", k=2, min_similarity=0.0)
+
+    assert results[0][0] == catalog["Black leather tote"].id
+    assert results[0][1] > results[1][1]
+    assert len(index) == 4
+    assert index.get_stats()["capacity"] >= 4
+
+
+def test_upsert_replaces_a_product_in_place(index, catalog):
+    watch = catalog["Gold watch"]
+    index.upsert_product(product("Leather watch strap", "Brown leather strap", id=watch.id))
+
+    assert len(index) == 4
+    top_ids = [product_id for product_id, _ in index.search("leather strap", k=1, min_similarity=0.0)]
+    assert top_ids == [watch.id]
+    assert not index.search("automatic gold", k=4, min_similarity=0.2)
+
+
+def test_removed_rows_are_never_returned_and_are_reused(index, catalog):
+    tote = catalog["Black leather tote"]
+    index.upsert_product(product(tote.name, is_deleted=True, id=tote.id))
+
+    assert tote.id not in [product_id for product_id, _ in index.search("leather tote", k=4, min_similarity=0.0)]
+    capacity = index.get_stats()["capacity"]
+    index.upsert_product(product("Wool coat", "Camel wool coat"))
+    assert index.get_stats()["capacity"] == capacity
+    assert len(index) == 4
+
+
+def test_unknown_words_and_empty_index_return_nothing(index):
+    assert index.search("tote") == []
+    index.upsert_product(product("Silk scarf"))
+    assert index.search("", k=5) == []
+    assert index.search("scarf", k=0) == []
+
+
+async def test_ivf_search_finds_the_same_best_match(index, monkeypatch):
+    monkeypatch.setattr("app.agents.embedding_index.settings.EMBEDDING_IVF_ENABLED", True)
+    monkeypatch.setattr("app.agents.embedding_index.settings.EMBEDDING_IVF_MIN_ROWS", 10)
+    monkeypatch.setattr("app.agents.embedding_index.settings.EMBEDDING_IVF_LISTS", 4)
+    monkeypatch.setattr("app.agents.embedding_index.settings.EMBEDDING_IVF_PROBES", 4)
+    rng = np.random.default_rng(0)
+    words = ["tote", "scarf", "watch", "sneaker", "coat", "belt", "wallet", "ring"]
+    for i in range(40):
+        index.upsert_product(product(" ".join(rng.choice(words, size=3)) + f" item{i}"))
+    expected = index.search("wallet ring item7", k=1, min_similarity=0.0)
+
+    assert index._needs_training()
+    await index._train_ivf()
+
+    assert index.search("wallet ring item7", k=1, min_similarity=0.0) == expected
+    assert index.ivf_searches == 1
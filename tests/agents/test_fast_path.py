@@ -0,0 +1,76 @@
+"""
+Tests for fast-path intent matching and price parsing.
+"""
+
+from uuid import UUID
+
+import pytest
+
+from app.agents.fast_path import FastPathRouter
+from app.schemas.ai_schemas import AIRequest
+
+
+ROUTER = FastPathRouter()
+
+
+def price_filter(message: str):
+    fast_match = ROUTER.match(message)
+    assert fast_match is not None and fast_match.intent == "price_search", message
+    return fast_match.params
+
+
+@pytest.mark.parametrize("message, intent", [
+    ("Hello!", "greeting"),
+    ("good morning there", "greeting"),
+    ("thank you so much", "thanks"),
+    ("see you later", "goodbye"),
+    ("where is the restroom", "faq"),
+])
+def test_small_talk_and_faq_intents(message, intent):
+    assert ROUTER.match(message).intent == intent
+
+
+def test_product_id_is_extracted():
+    fast_match = ROUTER.match("details for 3F2504E0-4F89-11D3-9A0C-0305E82C3301 please")
+
+    assert fast_match.intent == "product_lookup"
+    assert fast_match.params["product_id"] == UUID("3f2504e0-4f89-11d3-9a0c-0305e82c3301")
+
+
+def test_price_ranges_and_search_terms():
+    assert price_filter("show me handbags under $500") == {
+        "search_query": "handbag",
+        "min_price": None,
+        "max_price": 500.0
+    }
+    assert price_filter("watches between 2k and 1k dollars") == {
+        "search_query": "watch",
+        "min_price": 1000.0,
+        "max_price": 2000.0
+    }
+    assert price_filter("leather bags over 300 euros")["min_price"] == 300.0
+    assert price_filter("cheap scarves below 80")["max_price"] == 80.0
+
+
+@pytest.mark.parametrize("message", [
+    "a bag I can pack in under 5 minutes",   # a bare number without a price marker
+    "what bags are under $500?",             # questions need an answer, not a list
+    "shipping fees under $50",               # policy phrasing
+    "tell me about the history of the Birkin bag and why it costs so much",
+    "",
+])
+def test_messages_that_need_the_llm(message):
+    assert ROUTER.match(message) is None
+
+
+async def test_handle_answers_small_talk_and_skips_voice():
+    router = FastPathRouter()
+
+    response = await router.handle(AIRequest(message="hi", conversation_id="c1"), db=None)
+    assert response.model_used == "fast_path" and response.tokens_used == 0
+    assert response.metadata == {"fast_path": "greeting"}
+
+    assert await router.handle(AIRequest(message="hi", interaction_type="voice_chat"), db=None) is None
+    # Structured searches need a database session
+    assert await router.handle(AIRequest(message="bags under $500"), db=None) is None
+    assert router.get_stats()["fallthroughs"] == 1
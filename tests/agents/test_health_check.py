@@ -0,0 +1,55 @@
+"""
+Tests for the one-token backend health checks.
+"""
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from app.agents.groq_client import GroqClient
+from app.agents.ollama_client import OllamaClient
+
+
+class RecordingChatModel:
+    def __init__(self, error: Exception = None):
+        self.calls = 0
+        self.error = error
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return AIMessage(content="Hi")
+
+
+def test_probe_clients_are_capped_at_one_token():
+    groq = GroqClient()
+    ollama = OllamaClient()
+
+    assert groq.probe_client.max_tokens == 1
+    assert groq.client.max_tokens != 1
+    assert ollama.probe_client.num_predict == 1
+    assert ollama.client.num_predict is None
+
+
+@pytest.mark.parametrize("client_class", [GroqClient, OllamaClient])
+async def test_health_check_uses_the_capped_client_and_skips_the_cache(client_class):
+    client = client_class()
+    client.client = RecordingChatModel()
+    client.probe_client = RecordingChatModel()
+
+    await client.health_check()
+    health = await client.health_check()
+
+    assert health["status"] == "healthy"
+    assert client.probe_client.calls == 2
+    assert client.client.calls == 0
+
+
+async def test_failed_probe_is_unhealthy():
+    client = OllamaClient()
+    client.probe_client = RecordingChatModel(ConnectionError("connection refused"))
+
+    health = await client.health_check()
+
+    assert health["status"] == "unhealthy"
+    assert "connection refused" in health["error"]
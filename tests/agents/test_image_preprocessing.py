@@ -0,0 +1,93 @@
+"""
+Tests for image normalization ahead of the visual model.
+"""
+
+import base64
+import io
+
+from PIL import Image
+
+from app.agents.image_preprocessing import EXIF_ORIENTATION, ImagePreprocessor, image_dhash, normalize_image
+
+
+def encode(image: Image.Image, format: str = "JPEG", **options) -> bytes:
+    output = io.BytesIO()
+    image.save(output, format=format, **options)
+    return output.getvalue()
+
+
+def gradient(width: int, height: int) -> Image.Image:
+    image = Image.new("RGB", (width, height))
+    image.putdata([(x * 255 // width, y * 255 // height, 96) for y in range(height) for x in range(width)])
+    return image
+
+
+def test_large_photo_is_downscaled_and_reencoded():
+    original = encode(gradient(1600, 1200), quality=95)
+
+    normalized, details = normalize_image(original, max_side=400, quality=80)
+
+    with Image.open(io.BytesIO(normalized)) as image:
+        assert image.format == "JPEG" and image.size == (400, 300)
+    assert details["original_dimensions"] == [1600, 1200]
+    assert details["normalized_bytes"] < details["original_bytes"]
+    assert 0 <= details["dhash"] < 2 ** 64
+
+
+def test_small_upright_jpeg_is_returned_unchanged():
+    original = encode(gradient(200, 150), quality=60)
+
+    normalized, details = normalize_image(original, max_side=400, quality=95)
+
+    assert normalized == original
+    assert details["normalized_dimensions"] == [200, 150]
+
+
+def test_exif_orientation_is_applied():
+    exif = Image.Exif()
+    exif[EXIF_ORIENTATION] = 6  # Rotate 90 degrees clockwise to display
+    original = encode(gradient(300, 100), exif=exif.tobytes())
+
+    normalized, _ = normalize_image(original, max_side=1024, quality=85)
+
+    with Image.open(io.BytesIO(normalized)) as image:
+        assert image.size == (100, 300)
+
+
+def test_transparent_png_is_flattened_onto_white():
+    original = encode(Image.new("RGBA", (64, 64), (255, 0, 0, 0)), format="PNG")
+
+    normalized, details = normalize_image(original, max_side=1024, quality=90)
+
+    with Image.open(io.BytesIO(normalized)) as image:
+        assert image.format == "JPEG"
+        red, green, blue = image.getpixel((32, 32))
+        assert min(red, green, blue) > 245
+    assert details["original_format"] == "PNG"
+
+
+def test_base64_text_and_paths_are_accepted(tmp_path):
+    original = encode(gradient(800, 600))
+    path = tmp_path / "upload.jpg"
+    path.write_bytes(original)
+
+    from_bytes, _ = normalize_image(original, max_side=200, quality=80)
+    from_text, _ = normalize_image(base64.b64encode(original).decode("ascii"), max_side=200, quality=80)
+    from_path, details = normalize_image(path, max_side=200, quality=80)
+
+    assert from_bytes == from_text == from_path
+    assert details["original_bytes"] == len(original)
+    # The hash of the normalized image matches the one computed without normalizing
+    assert bin(details["dhash"] ^ image_dhash(original)).count("1") <= 4
+
+
+async def test_undecodable_image_falls_back_to_the_original(monkeypatch):
+    monkeypatch.setattr("app.agents.image_preprocessing.settings.IMAGE_PREPROCESS_ENABLED", True)
+    preprocessor = ImagePreprocessor(max_workers=1)
+    try:
+        result = await preprocessor.preprocess(b"not an image")
+    finally:
+        preprocessor.shutdown()
+
+    assert result.data is None and result.details["skipped"]
+    assert preprocessor.images_failed == 1
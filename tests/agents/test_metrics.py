@@ -0,0 +1,75 @@
+"""
+Tests for fixed-bucket histograms and cross-worker metrics aggregation.
+"""
+
+import pytest
+
+from app.utils.metrics import Histogram, MetricsRegistry
+
+
+def latency_histogram() -> Histogram:
+    return Histogram("latency", "Request latency.", ("agent",), buckets=(2.0, 1.0, 4.0))
+
+
+def test_observations_land_in_the_first_bucket_they_do_not_exceed():
+    histogram = latency_histogram()
+    for value in (0.5, 1.0, 1.5, 4.0, 9.0):
+        histogram.observe(value, agent="groq")
+
+    counts, total = histogram._series[("groq",)]
+    assert histogram.buckets == (1.0, 2.0, 4.0)
+    assert counts == [2, 1, 1, 1]
+    assert total == pytest.approx(16.0)
+
+
+def test_quantiles_interpolate_within_buckets():
+    histogram = latency_histogram()
+    for _ in range(50):
+        histogram.observe(0.5, agent="groq")
+        histogram.observe(1.5, agent="groq")
+    histogram.observe(30.0, agent="ollama")
+
+    assert histogram.quantiles((0.5, 0.75), agent="groq") == {"p50": 1.0, "p75": 1.5}
+    # Ranks in the +Inf bucket report the largest finite bound
+    assert histogram.quantiles((0.99,), agent="ollama") == {"p99": 4.0}
+    assert histogram.quantiles((0.5,), agent="voice") == {"p50": None}
+    assert histogram.quantiles((0.5,))["p50"] == pytest.approx(1.0, abs=0.05)
+
+
+def worker_registry(directory, pid: int, buckets=(1.0, 2.0, 4.0)) -> MetricsRegistry:
+    registry = MetricsRegistry(multiproc_dir=str(directory), flush_interval=60)
+    registry.pid = pid
+    registry.histogram("latency", "Request latency.", ("agent",), buckets)
+    registry.counter("rejections", "Rejected calls.", ("agent",))
+    return registry
+
+
+async def test_workers_merge_by_adding_counts(tmp_path):
+    first, second = worker_registry(tmp_path, 1), worker_registry(tmp_path, 2)
+    first.get("latency").observe(0.5, agent="groq")
+    first.get("rejections").inc(agent="groq")
+    second.get("latency").observe(3.0, agent="groq")
+    second.get("rejections").inc(2, agent="groq")
+    await first.flush()
+
+    merged = await second.collect()
+
+    assert merged["latency"][1][("groq",)] == [[1, 0, 1, 0], 3.5]
+    assert merged["rejections"][1][("groq",)] == 3.0
+    text = await second.render()
+    assert 'latency_bucket{agent="groq",le="2.0"} 1' in text
+    assert 'latency_bucket{agent="groq",le="+Inf"} 2' in text
+    assert 'latency_count{agent="groq"} 2' in text
+    assert 'rejections{agent="groq"} 3.0' in text
+
+
+async def test_snapshots_with_other_buckets_are_skipped(tmp_path):
+    old = worker_registry(tmp_path, 1, buckets=(0.5, 5.0))
+    old.get("latency").observe(0.1, agent="groq")
+    await old.flush()
+    current = worker_registry(tmp_path, 2)
+    current.get("latency").observe(0.1, agent="groq")
+
+    merged = await current.collect()
+
+    assert merged["latency"][1][("groq",)][0] == [1, 0, 0, 0]
@@ -0,0 +1,113 @@
+"""
+Tests for token-bucket admission control.
+"""
+
+import pytest
+
+from app.utils.exceptions import RateLimitError
+from app.utils.rate_limiter import AdmissionController, BucketLimit, InMemoryRateLimitBackend
+
+
+MODEL = "test-model"
+
+
+@pytest.fixture
+def controller(monkeypatch):
+    monkeypatch.setattr("app.utils.rate_limiter.settings.RATE_LIMIT_PER_MINUTE", 3)
+    monkeypatch.setattr("app.utils.rate_limiter.settings.RATE_LIMIT_PER_IP_PER_MINUTE", 5)
+    monkeypatch.setattr("app.utils.rate_limiter.settings.RATE_LIMIT_USER_TOKENS_PER_MINUTE", 100)
+    controller = AdmissionController(InMemoryRateLimitBackend())
+    controller.model_tokens = {MODEL: BucketLimit(1000)}
+    return controller
+
+
+async def test_bucket_takes_tokens_until_empty():
+    backend = InMemoryRateLimitBackend()
+    limit = BucketLimit(2)
+
+    assert (await backend.try_acquire("key", limit, 1))[0]
+    assert (await backend.try_acquire("key", limit, 1))[0]
+    allowed, balance = await backend.try_acquire("key", limit, 1)
+
+    assert not allowed
+    assert balance < 1
+
+
+async def test_debit_can_put_a_bucket_in_debt():
+    backend = InMemoryRateLimitBackend()
+    limit = BucketLimit(10)
+
+    assert await backend.debit("key", limit, 25) == pytest.approx(-15, abs=0.01)
+    assert not (await backend.try_acquire("key", limit, 0))[0]
+
+
+async def test_user_bucket_rejects_with_retry_after(controller):
+    for _ in range(3):
+        await controller.admit(user_id="u1", client_ip="10.0.0.1", models=[MODEL])
+
+    with pytest.raises(RateLimitError) as excinfo:
+        await controller.admit(user_id="u1", client_ip="10.0.0.1", models=[MODEL])
+
+    assert excinfo.value.details["scope"] == "user"
+    assert excinfo.value.details["retry_after"] >= 1
+    assert controller.rejected["user"] == 1
+
+
+async def test_rejection_refunds_buckets_charged_before_it(controller):
+    # Spend the user's requests, then keep trying: the IP bucket must not be drained by rejections
+    for _ in range(3):
+        await controller.admit(user_id="u1", client_ip="10.0.0.1", models=[MODEL])
+    for _ in range(3):
+        with pytest.raises(RateLimitError):
+            await controller.admit(user_id="u1", client_ip="10.0.0.1", models=[MODEL])
+
+    # Another user behind the same IP still has the two remaining IP requests
+    await controller.admit(user_id="u2", client_ip="10.0.0.1", models=[MODEL])
+    await controller.admit(user_id="u2", client_ip="10.0.0.1", models=[MODEL])
+    with pytest.raises(RateLimitError) as excinfo:
+        await controller.admit(user_id="u2", client_ip="10.0.0.1", models=[MODEL])
+    assert excinfo.value.details["scope"] == "ip"
+
+
+async def test_batch_costs_one_request_per_item(controller):
+    await controller.admit(user_id="u1", client_ip="10.0.0.1", models=[MODEL], request_count=3)
+
+    with pytest.raises(RateLimitError):
+        await controller.admit(user_id="u1", client_ip="10.0.0.1", models=[MODEL])
+
+
+async def test_max_request_count_is_smallest_request_bucket(controller):
+    assert controller.max_request_count("u1", "10.0.0.1") == 3
+    assert controller.max_request_count(None, "10.0.0.1") == 5
+    assert controller.max_request_count(None, None) is None
+
+
+async def test_user_in_token_debt_is_rejected(controller):
+    await controller.record_user_usage("u1", 150)
+
+    with pytest.raises(RateLimitError) as excinfo:
+        await controller.admit(user_id="u1", client_ip="10.0.0.1", models=[MODEL])
+
+    assert excinfo.value.details["scope"] == "user_tokens"
+
+
+async def test_model_in_token_debt_is_rejected_for_everyone(controller):
+    await controller.record_model_usage(MODEL, 1500)
+
+    with pytest.raises(RateLimitError) as excinfo:
+        await controller.admit(user_id=None, client_ip="10.0.0.2", models=[MODEL])
+
+    assert excinfo.value.details["scope"] == "model"
+
+
+async def test_backend_errors_fail_open(controller):
+    class BrokenBackend(InMemoryRateLimitBackend):
+        async def try_acquire(self, key, limit, cost):
+            raise ConnectionError("database unavailable")
+
+    controller.backend = BrokenBackend()
+
+    await controller.admit(user_id="u1", client_ip="10.0.0.1", models=[MODEL])
+
+    assert controller.admitted == 1
+    assert controller.backend_errors > 0
@@ -0,0 +1,88 @@
+"""
+Tests for vectorized recommendation scoring and top-k selection.
+"""
+
+import time
+
+import numpy as np
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.agents.recommendation_scoring import CandidateFeatures, RecommendationScorer, ScoringWeights
+from app.models.product import Product
+from app.schemas.ai_schemas import ProductRecommendationRequest
+
+
+WEIGHTS = ScoringWeights(
+    base=0.6, price_match=0.2, in_stock=0.1, featured=0.1,
+    category_match=0.15, brand_match=0.1, recency=0.0, similarity=0.3
+)
+
+
+def features(**columns) -> CandidateFeatures:
+    count = len(columns.get("price", [0.0]))
+    defaults = {
+        "price": np.zeros(count),
+        "quantity": np.zeros(count, dtype=np.int64),
+        "featured": np.zeros(count, dtype=bool),
+        "category_match": np.zeros(count, dtype=bool),
+        "brand_match": np.zeros(count, dtype=bool),
+        "created_at": np.full(count, time.time()),
+        "similarity": np.zeros(count),
+    }
+    defaults.update({name: np.asarray(values) for name, values in columns.items()})
+    return CandidateFeatures(ids=list(range(count)), **defaults)
+
+
+def test_each_feature_adds_its_weight():
+    scorer = RecommendationScorer(WEIGHTS)
+    candidates = features(
+        price=[100.0, 900.0, 100.0, 100.0],
+        quantity=[0, 0, 5, 0],
+        featured=[False, False, False, True],
+        brand_match=[False, False, True, False],
+        similarity=[0.5, 0.0, 0.0, 0.0],
+    )
+    request = ProductRecommendationRequest(message="bags", price_range={"min": 50.0, "max": 500.0})
+
+    scores = scorer.score(candidates, request)
+
+    np.testing.assert_allclose(scores, [0.6 + 0.2 + 0.15, 0.6, 0.6 + 0.2 + 0.1 + 0.1, 0.6 + 0.2 + 0.1])
+
+
+def test_recency_halves_at_the_half_life(monkeypatch):
+    monkeypatch.setattr("app.agents.recommendation_scoring.settings.RECOMMENDATION_RECENCY_HALF_LIFE_DAYS", 30)
+    scorer = RecommendationScorer(ScoringWeights(
+        base=0.0, price_match=0, in_stock=0, featured=0, category_match=0, brand_match=0, recency=1.0, similarity=0
+    ))
+    now = time.time()
+    candidates = features(price=[0.0, 0.0], created_at=[now, now - 30 * 86400])
+
+    scores = scorer.score(candidates, ProductRecommendationRequest(message="bags"))
+
+    np.testing.assert_allclose(scores, [1.0, 0.5], rtol=1e-3)
+
+
+def test_top_k_matches_a_full_sort():
+    scores = np.random.default_rng(3).random(1000)
+
+    best = RecommendationScorer.top_k(scores, 10)
+
+    assert list(best) == list(np.argsort(-scores)[:10])
+
+
+@pytest.mark.parametrize("k, expected", [(0, []), (5, [1, 2, 0]), (2, [1, 2])])
+def test_top_k_bounds_and_ties_keep_candidate_order(k, expected):
+    assert list(RecommendationScorer.top_k(np.array([0.5, 0.9, 0.9]), k)) == expected
+
+
+def test_feature_query_matches_preferred_brands_in_sql():
+    scorer = RecommendationScorer(WEIGHTS)
+    request = ProductRecommendationRequest(message="bags", brand_preferences=["Dior"], category_preferences=["Bags"])
+
+    sql = str(scorer.build_feature_query(select(Product), request).compile(dialect=postgresql.dialect()))
+
+    assert '"Projects".brand IN' in sql
+    assert "categories.name IN" in sql
+    assert "LIMIT" in sql
@@ -0,0 +1,105 @@
+"""
+Tests for the LLM response cache.
+"""
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from app.agents.response_cache import LLMResponseCache, build_cache_key, is_cache_hit
+
+
+SYSTEM = SystemMessage(content="You are a shopping assistant.")
+
+
+def response(content: str = "Try the leather tote.") -> AIMessage:
+    return AIMessage(
+        content=content,
+        usage_metadata={"input_tokens": 40, "output_tokens": 10, "total_tokens": 50}
+    )
+
+
+def make_cache(**overrides) -> LLMResponseCache:
+    options = {"ttl_seconds": 60, "max_entries": 10, "max_bytes": 10_000, "max_temperature": 0.5}
+    options.update(overrides)
+    return LLMResponseCache(**options)
+
+
+def test_key_ignores_case_and_whitespace_of_the_last_message():
+    first = build_cache_key("model", 0.0, [SYSTEM, HumanMessage(content="Show me  bags")])
+    second = build_cache_key("model", 0.0, [SYSTEM, HumanMessage(content="show me bags ")])
+
+    assert first == second
+
+
+def test_key_depends_on_model_temperature_and_history():
+    messages = [SYSTEM, HumanMessage(content="show me bags")]
+    with_history = [SYSTEM, HumanMessage(content="hi"), AIMessage(content="Hello!"), HumanMessage(content="show me bags")]
+
+    keys = {
+        build_cache_key("model", 0.0, messages),
+        build_cache_key("other-model", 0.0, messages),
+        build_cache_key("model", 0.2, messages),
+        build_cache_key("model", 0.0, with_history),
+    }
+
+    assert len(keys) == 4
+
+
+def test_image_content_is_not_cacheable():
+    image_message = HumanMessage(content=[{"type": "text", "text": "what is this?"}])
+
+    assert build_cache_key("model", 0.0, [SYSTEM, image_message]) is None
+
+
+def test_hit_reports_no_token_usage():
+    cache = make_cache()
+    cache.set("key", response())
+
+    hit = cache.get("key")
+
+    assert hit.content == "Try the leather tote."
+    assert hit.usage_metadata["total_tokens"] == 0
+    assert is_cache_hit(hit)
+    assert not is_cache_hit(response())
+
+
+def test_expired_entries_miss(monkeypatch):
+    cache = make_cache(ttl_seconds=10)
+    clock = [1000.0]
+    monkeypatch.setattr("app.agents.response_cache.time.monotonic", lambda: clock[0])
+    cache.set("key", response())
+
+    clock[0] += 11
+
+    assert cache.get("key") is None
+    assert cache.expirations == 1
+
+
+def test_evicts_least_recently_used_beyond_entry_cap():
+    cache = make_cache(max_entries=2)
+    cache.set("a", response("a"))
+    cache.set("b", response("b"))
+    cache.get("a")
+    cache.set("c", response("c"))
+
+    assert cache.get("b") is None
+    assert cache.get("a").content == "a"
+    assert cache.evictions == 1
+
+
+def test_byte_cap_evicts_and_skips_oversized_entries():
+    cache = make_cache(max_bytes=10)
+    cache.set("a", response("12345"))
+    cache.set("b", response("123456"))
+    cache.set("huge", response("x" * 11))
+
+    assert cache.get("a") is None
+    assert cache.get("b").content == "123456"
+    assert cache.get("huge") is None
+
+
+def test_high_temperature_calls_are_not_cached():
+    cache = make_cache(max_temperature=0.3)
+
+    assert cache.should_cache(0.3)
+    assert not cache.should_cache(0.7)
+    assert cache.skipped == 1
@@ -0,0 +1,166 @@
+"""
+Tests for single-flight request coalescing.
+"""
+
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.agents.llm_client import LLMClient
+from app.agents.response_cache import is_cache_hit
+from app.agents.single_flight import SingleFlight
+
+
+class SlowCall:
+    """Counts calls and blocks each one until released."""
+
+    def __init__(self, result="answer"):
+        self.result = result
+        self.calls = 0
+        self.cancelled = False
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+async def test_concurrent_callers_share_one_call():
+    flight = SingleFlight("test")
+    call = SlowCall()
+
+    callers = [asyncio.create_task(flight.do("key", call)) for _ in range(5)]
+    await asyncio.sleep(0)
+    call.release.set()
+
+    assert await asyncio.gather(*callers) == ["answer"] * 5
+    assert call.calls == 1
+    assert flight.leaders == 1
+    assert flight.coalesced == 4
+    assert flight.get_stats()["in_flight"] == 0
+
+
+async def test_followers_get_their_own_copy_of_the_result():
+    flight = SingleFlight("test")
+    call = SlowCall()
+
+    callers = [
+        asyncio.create_task(flight.do("key", call, follower_result=str.upper))
+        for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+    call.release.set()
+
+    assert await asyncio.gather(*callers) == ["answer", "ANSWER", "ANSWER"]
+
+
+async def test_different_keys_do_not_coalesce():
+    flight = SingleFlight("test")
+    call = SlowCall()
+    call.release.set()
+
+    await asyncio.gather(flight.do("a", call), flight.do("b", call))
+
+    assert call.calls == 2
+
+
+async def test_error_is_shared_and_key_is_released():
+    flight = SingleFlight("test")
+    call = SlowCall(result=RuntimeError("backend down"))
+
+    callers = [asyncio.create_task(flight.do("key", call)) for _ in range(3)]
+    await asyncio.sleep(0)
+    call.release.set()
+    results = await asyncio.gather(*callers, return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.errors == 1
+
+    retry = SlowCall()
+    retry.release.set()
+    assert await flight.do("key", retry) == "answer"
+
+
+async def test_cancelled_follower_does_not_cancel_shared_call():
+    flight = SingleFlight("test")
+    call = SlowCall()
+
+    leader = asyncio.create_task(flight.do("key", call))
+    follower = asyncio.create_task(flight.do("key", call))
+    await asyncio.sleep(0)
+
+    follower.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await follower
+
+    call.release.set()
+    assert await leader == "answer"
+    assert not call.cancelled
+
+
+async def test_call_is_cancelled_when_last_waiter_leaves():
+    flight = SingleFlight("test")
+    call = SlowCall()
+
+    callers = [asyncio.create_task(flight.do("key", call)) for _ in range(2)]
+    await asyncio.sleep(0)
+    for caller in callers:
+        caller.cancel()
+    await asyncio.gather(*callers, return_exceptions=True)
+    await asyncio.sleep(0)
+
+    assert call.cancelled
+    assert flight.abandoned_calls == 1
+    assert flight.get_stats()["in_flight"] == 0
+
+
+class SlowChatModel:
+    """Chat model stand-in that blocks until released and reports token usage."""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        await self.release.wait()
+        return AIMessage(
+            content="Try the leather tote.",
+            usage_metadata={"input_tokens": 40, "output_tokens": 10, "total_tokens": 50}
+        )
+
+
+class StubLLMClient(LLMClient):
+    async def process_request(self, request):
+        raise NotImplementedError
+
+    async def health_check(self):
+        return {}
+
+
+async def test_coalesced_llm_callers_are_not_charged_for_the_shared_call(monkeypatch):
+    monkeypatch.setattr("app.agents.llm_client.settings.LLM_SINGLE_FLIGHT_ENABLED", True)
+    monkeypatch.setattr("app.agents.llm_client.settings.LLM_CACHE_ENABLED", False)
+    monkeypatch.setattr("app.agents.llm_client.settings.LLM_BULKHEAD_ENABLED", False)
+    monkeypatch.setattr("app.agents.llm_client.settings.RATE_LIMIT_ENABLED", False)
+    client = StubLLMClient("test", "test-model", 0.0)
+    client.client = SlowChatModel()
+    messages = [HumanMessage(content="show me bags")]
+
+    callers = [asyncio.create_task(client.invoke_llm(messages)) for _ in range(3)]
+    await asyncio.sleep(0)
+    client.client.release.set()
+    responses = await asyncio.gather(*callers)
+
+    assert client.client.calls == 1
+    usage = [client.get_token_usage(response, "show me bags", response.content) for response in responses]
+    assert usage == [(50, False), (0, False), (0, False)]
+    assert [is_cache_hit(response) for response in responses] == [False, True, True]
@@ -0,0 +1,96 @@
+"""
+Tests for streaming speech-to-text with the scripted stand-in engine.
+"""
+
+import numpy as np
+import pytest
+
+from app.agents.speech_to_text import (
+    PCM_SAMPLE_WIDTH,
+    PartialStabilizer,
+    ScriptedSTTEngine,
+    StreamingTranscriber,
+    STTUnavailableError,
+    create_stt_engine,
+)
+
+
+SAMPLE_RATE = 16000
+
+
+def silence(seconds: float) -> bytes:
+    return b"\x00" * (int(SAMPLE_RATE * seconds) * PCM_SAMPLE_WIDTH)
+
+
+def tone(seconds: float, frequency: float = 220.0) -> bytes:
+    # A voiced-level tone the VAD treats as speech
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    return (8000 * np.sin(2 * np.pi * frequency * t)).astype("<i2").tobytes()
+
+
+async def test_partials_grow_one_word_per_interval():
+    engine = ScriptedSTTEngine(SAMPLE_RATE, script="show me luxury handbags", seconds_per_word=0.5)
+    transcriber = StreamingTranscriber(engine)
+
+    texts = []
+    for _ in range(4):
+        update = await transcriber.feed(tone(0.5))
+        if update:
+            texts.append(update["text"])
+
+    assert texts == ["show", "show me", "show me luxury", "show me luxury handbags"]
+    assert await transcriber.finish() == "show me luxury handbags"
+    assert transcriber.audio_seconds == pytest.approx(2.0)
+
+
+async def test_leading_silence_is_not_recognized(monkeypatch):
+    monkeypatch.setattr("app.agents.speech_to_text.settings.AUDIO_VAD_ENABLED", True)
+    engine = ScriptedSTTEngine(SAMPLE_RATE, script="show me luxury handbags", seconds_per_word=0.5)
+    transcriber = StreamingTranscriber(engine)
+
+    for _ in range(6):
+        assert await transcriber.feed(silence(0.5)) is None
+    update = await transcriber.feed(tone(0.5))
+
+    # Only the onset padding of the 3 seconds of silence reaches the engine
+    assert update["text"] == "show"
+    assert transcriber.trimmed_bytes >= SAMPLE_RATE * PCM_SAMPLE_WIDTH * 2.5
+    assert transcriber.audio_seconds == pytest.approx(3.5)
+
+
+async def test_silence_only_utterance_is_empty(monkeypatch):
+    monkeypatch.setattr("app.agents.speech_to_text.settings.AUDIO_VAD_ENABLED", True)
+    transcriber = StreamingTranscriber(ScriptedSTTEngine(SAMPLE_RATE, script="show me"))
+
+    await transcriber.feed(silence(1.5))
+
+    assert await transcriber.finish() == ""
+
+
+async def test_finish_without_audio_is_empty():
+    transcriber = StreamingTranscriber(ScriptedSTTEngine(SAMPLE_RATE))
+
+    assert await transcriber.finish() == ""
+
+
+async def test_rejects_odd_length_pcm_frames():
+    transcriber = StreamingTranscriber(ScriptedSTTEngine(SAMPLE_RATE))
+
+    with pytest.raises(ValueError):
+        await transcriber.feed(b"\x00\x00\x00")
+
+
+def test_stable_prefix_only_grows():
+    stabilizer = PartialStabilizer(stability=2)
+
+    assert stabilizer.update("show")["stable"] == ""
+    assert stabilizer.update("show me")["stable"] == "show"
+    assert stabilizer.update("show my")["stable"] == "show"
+    assert stabilizer.update("show my bags")["stable"] == "show my"
+
+
+def test_disabled_engine_fails_clearly(monkeypatch):
+    monkeypatch.setattr("app.agents.speech_to_text.settings.STT_ENGINE", "")
+
+    with pytest.raises(STTUnavailableError, match="STT_ENGINE"):
+        create_stt_engine()
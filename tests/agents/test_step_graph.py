@@ -0,0 +1,85 @@
+"""
+Tests for the agent flow step graph executor.
+"""
+
+import asyncio
+
+import pytest
+
+from app.agents.step_graph import StepGraph
+
+
+async def test_independent_steps_overlap_and_dependents_get_results():
+    started = []
+    both_running = asyncio.Event()
+
+    async def fetch(name):
+        started.append(name)
+        if len(started) == 2:
+            both_running.set()
+        # Each waits for the other, so this only finishes if they run concurrently
+        await asyncio.wait_for(both_running.wait(), timeout=1)
+        return name
+
+    async def combine(analysis, candidates):
+        return f"{analysis}+{candidates}"
+
+    graph = (
+        StepGraph("flow")
+        .add_step("analysis", lambda: fetch("analysis"), kind="llm")
+        .add_step("candidates", lambda: fetch("candidates"), kind="db")
+        .add_step("combined", combine, depends_on=("analysis", "candidates"))
+    )
+
+    result = await graph.run()
+
+    assert result["combined"] == "analysis+candidates"
+    assert result.timings["analysis"]["kind"] == "llm"
+    assert {timing["status"] for timing in result.timings.values()} == {"ok"}
+    assert result.timings["combined"]["start_offset"] >= result.timings["analysis"]["start_offset"]
+
+
+async def test_cycles_and_unknown_dependencies_are_rejected():
+    async def step(**inputs):
+        return None
+
+    cyclic = StepGraph("cyclic").add_step("a", step, depends_on=("b",)).add_step("b", step, depends_on=("a",))
+    with pytest.raises(ValueError, match="cycle"):
+        await cyclic.run()
+
+    dangling = StepGraph("dangling").add_step("a", step, depends_on=("missing",))
+    with pytest.raises(ValueError, match="unknown step 'missing'"):
+        await dangling.run()
+
+    with pytest.raises(ValueError, match="Duplicate"):
+        StepGraph("duplicate").add_step("a", step).add_step("a", step)
+
+
+async def test_failed_step_cancels_running_steps():
+    slow_cancelled = asyncio.Event()
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            slow_cancelled.set()
+            raise
+
+    async def failing():
+        await asyncio.sleep(0)
+        raise RuntimeError("database unavailable")
+
+    async def never_runs(failing):
+        return failing
+
+    graph = (
+        StepGraph("flow")
+        .add_step("slow", slow)
+        .add_step("failing", failing)
+        .add_step("after", never_runs, depends_on=("failing",))
+    )
+
+    with pytest.raises(RuntimeError, match="database unavailable"):
+        await graph.run()
+
+    assert slow_cancelled.is_set()
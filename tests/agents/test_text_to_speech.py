@@ -0,0 +1,28 @@
+"""
+Tests for cached text-to-speech with the tone stand-in engine.
+"""
+
+import pytest
+
+from app.agents.text_to_speech import TextToSpeech, TTSAudioCache, ToneTTSEngine
+
+
+@pytest.fixture
+def tts(tmp_path):
+    return TextToSpeech(engine=ToneTTSEngine(), cache=TTSAudioCache(directory=str(tmp_path)))
+
+
+async def test_repeated_phrase_is_synthesized_once(tts):
+    first = await tts.synthesize("Turn left at the escalator", "guide")
+    second = await tts.synthesize("Turn  left at the escalator ", "guide")
+
+    assert first.key == second.key
+    assert first.path == second.path
+    assert not first.cached and second.cached
+    assert tts.syntheses == 1
+
+
+@pytest.mark.parametrize("voice", ["../../etc/passwd", "en_US/lessac", "voice.onnx", "en US"])
+async def test_rejects_voice_names_that_are_not_plain_identifiers(tts, voice):
+    with pytest.raises(ValueError):
+        await tts.synthesize("Hello", voice)
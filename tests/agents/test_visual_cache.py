@@ -0,0 +1,138 @@
+"""
+Tests for the exact and perceptual-hash visual analysis cache.
+"""
+
+import io
+import random
+
+import pytest
+from langchain_core.messages import AIMessage
+from PIL import Image
+
+from app.agents.image_preprocessing import ImagePreprocessor, image_dhash
+from app.agents.ollama_client import OllamaClient
+from app.agents.visual_cache import MultiIndexHash, VisualResultCache, content_digest
+from app.agents.voice_agent import VoiceAgent
+from app.schemas.ai_schemas import VisualAnalysisRequest
+
+
+def flip_bits(value: int, *bits: int) -> int:
+    for bit in bits:
+        value ^= 1 << bit
+    return value
+
+
+def photo(width: int = 320, height: int = 240, quality: int = 90) -> bytes:
+    # A smooth gradient with a dark block: resizes and re-encodes keep its coarse structure
+    image = Image.new("RGB", (320, 240))
+    image.putdata([(x * 255 // 320, y * 255 // 240, 128) for y in range(240) for x in range(320)])
+    image.paste((0, 0, 0), (40, 40, 120, 200))
+    output = io.BytesIO()
+    image.resize((width, height)).save(output, format="JPEG", quality=quality)
+    return output.getvalue()
+
+
+def test_multi_index_hash_finds_hashes_within_the_radius():
+    index = MultiIndexHash(radius=3)
+    base = random.Random(7).getrandbits(64)
+    index.add(base, "base")
+    index.add(flip_bits(base, 0, 20, 40, 60), "too-far")
+
+    assert index.search(flip_bits(base, 1, 33, 63)) == [(3, "base")]
+    assert index.search(base) == [(0, "base")]
+
+    index.discard(base, "base")
+    assert len(index) == 1
+    assert index.search(base) == []
+
+
+def test_cache_serves_exact_and_near_duplicate_images():
+    cache = VisualResultCache(ttl_seconds=60, max_entries=10, max_distance=4)
+    cache.set("prompt", "digest-a", 0b1011, "A black leather tote.", 1.5)
+
+    assert cache.get("prompt", "digest-a")[1] == 0
+    entry, distance = cache.get("prompt", "digest-b", 0b1000)
+    assert entry.message == "A black leather tote." and distance == 2
+    assert cache.get("other prompt", "digest-a", 0b1011) == (None, None)
+    assert (cache.exact_hits, cache.near_hits, cache.misses) == (1, 1, 1)
+
+
+def test_exact_lookup_does_not_count_a_miss():
+    cache = VisualResultCache(ttl_seconds=60, max_entries=10, max_distance=4)
+
+    assert cache.get_exact("prompt", "digest-a") is None
+    assert cache.misses == 0
+
+
+def test_dhash_is_stable_across_resizes_and_reencodes():
+    original = image_dhash(photo())
+    resized = image_dhash(photo(160, 120, quality=60))
+
+    assert bin(original ^ resized).count("1") <= 6
+
+
+class ScriptedChatModel:
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        return AIMessage(content="A black leather tote.")
+
+
+class CountingPreprocessor(ImagePreprocessor):
+    def __init__(self):
+        super().__init__(max_workers=1)
+        self.preprocessed = 0
+
+    async def preprocess(self, image):
+        self.preprocessed += 1
+        return await super().preprocess(image)
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    monkeypatch.setattr("app.agents.ollama_client.settings.VISUAL_CACHE_ENABLED", True)
+    monkeypatch.setattr("app.agents.image_preprocessing.settings.IMAGE_PREPROCESS_ENABLED", False)
+    monkeypatch.setattr("app.agents.llm_client.settings.RATE_LIMIT_ENABLED", False)
+    preprocessor = CountingPreprocessor()
+    monkeypatch.setattr("app.agents.voice_agent.get_image_preprocessor", lambda: preprocessor)
+    ollama = OllamaClient()
+    ollama.client = ScriptedChatModel()
+    agent = VoiceAgent(ollama_client=ollama)
+    agent.preprocessor = preprocessor
+    yield agent
+    preprocessor.shutdown()
+
+
+def visual_request(image: bytes) -> VisualAnalysisRequest:
+    return VisualAnalysisRequest(message="What is this?", image_bytes=image, conversation_id="c1")
+
+
+async def test_repeated_image_is_answered_before_preprocessing(agent):
+    image = photo()
+    await agent.process_request(visual_request(image))
+
+    response = await agent.process_request(visual_request(image))
+
+    assert response.metadata["visual_cache"] == {"hit": "exact", "distance": 0}
+    assert agent.ollama_client.client.calls == 1
+    assert agent.preprocessor.preprocessed == 1
+
+
+async def test_near_duplicate_matches_with_preprocessing_disabled(agent):
+    await agent.process_request(visual_request(photo()))
+
+    response = await agent.process_request(visual_request(photo(160, 120, quality=60)))
+
+    assert "visual_cache" in response.metadata
+    assert agent.ollama_client.visual_cache.near_hits == 1
+    assert agent.ollama_client.client.calls == 1
+
+
+def test_digest_is_of_the_image_as_uploaded(tmp_path):
+    image = photo()
+    path = tmp_path / "upload.jpg"
+    path.write_bytes(image)
+
+    assert content_digest(path) == content_digest(image)
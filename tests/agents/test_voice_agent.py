@@ -0,0 +1,46 @@
+"""
+Tests for voice request routing through the shared Ollama client.
+"""
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from app.agents.ollama_client import OllamaClient
+from app.agents.voice_agent import VoiceAgent
+from app.schemas.ai_schemas import AIRequest
+
+
+class ScriptedChatModel:
+    def __init__(self):
+        self.prompts = []
+
+    async def ainvoke(self, messages):
+        self.prompts.append(messages[-1].content)
+        return AIMessage(content="Here are three black totes under $500.")
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    monkeypatch.setattr("app.agents.llm_client.settings.RATE_LIMIT_ENABLED", False)
+    ollama = OllamaClient()
+    ollama.client = ScriptedChatModel()
+    return VoiceAgent(ollama_client=ollama)
+
+
+@pytest.mark.parametrize("interaction_type", ["voice_chat", "multimodal", "voice_search"])
+async def test_shared_history_records_the_user_message_not_the_prompt(agent, interaction_type):
+    message = "show me black totes"
+    conversation_id = f"voice-{interaction_type}"
+    response = await agent.process_request(
+        AIRequest(message=message, interaction_type=interaction_type, conversation_id=conversation_id)
+    )
+
+    assert not response.metadata.get("error")
+    # The model saw the templated prompt...
+    assert agent.ollama_client.client.prompts[0] != message
+    # ...but the LLM history only has what the user said
+    history = await agent.ollama_client.get_conversation_history(conversation_id)
+    assert [(msg.role, msg.content) for msg in history] == [
+        ("user", message),
+        ("assistant", "Here are three black totes under $500.")
+    ]
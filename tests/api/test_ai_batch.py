@@ -0,0 +1,95 @@
+"""
+Tests for batch chat admission and NDJSON result streaming.
+"""
+
+import json
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.api import ai_routes
+from app.schemas.ai_schemas import AIRequest, AIResponse
+from app.utils.dependencies import check_llm_admission
+from app.utils.rate_limiter import AdmissionController, InMemoryRateLimitBackend
+
+
+def client_request(ip: str = "10.0.0.1") -> Request:
+    return Request({"type": "http", "method": "POST", "path": "/", "headers": [], "client": (ip, 50000)})
+
+
+@pytest.fixture(autouse=True)
+def admission(monkeypatch):
+    monkeypatch.setattr("app.utils.dependencies.settings.RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr("app.utils.rate_limiter.settings.RATE_LIMIT_PER_IP_PER_MINUTE", 5)
+    controller = AdmissionController(InMemoryRateLimitBackend())
+    monkeypatch.setattr("app.utils.rate_limiter._admission_controller", controller)
+    return controller
+
+
+async def test_batch_larger_than_ip_limit_is_rejected_without_charging():
+    with pytest.raises(HTTPException) as excinfo:
+        await check_llm_admission(client_request(), None, ["general_chat"], request_count=6)
+    assert excinfo.value.status_code == 422
+
+    # The oversized batch must not have drained the IP bucket
+    await check_llm_admission(client_request(), None, ["general_chat"], request_count=5)
+
+
+async def test_batches_are_charged_per_item():
+    await check_llm_admission(client_request(), None, ["general_chat"], request_count=3)
+
+    with pytest.raises(HTTPException) as excinfo:
+        await check_llm_admission(client_request(), None, ["general_chat"], request_count=3)
+
+    assert excinfo.value.status_code == 429
+    assert int(excinfo.value.headers["Retry-After"]) >= 1
+
+
+class NoSession:
+    async def __aenter__(self):
+        return None
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class ScriptedAIService:
+    """Answers each message with its text, or an agent error response for "fail"."""
+
+    def __init__(self, db):
+        pass
+
+    async def process_chat_request(self, request: AIRequest) -> AIResponse:
+        if request.message == "fail":
+            return AIResponse(
+                message="Sorry, something went wrong.",
+                interaction_type=request.interaction_type,
+                conversation_id="c-fail",
+                metadata={"error": True, "error_message": "backend down"}
+            )
+        return AIResponse(
+            message=request.message,
+            interaction_type=request.interaction_type,
+            conversation_id=f"c-{request.message}"
+        )
+
+
+async def test_agent_error_responses_are_reported_as_failed_items(monkeypatch):
+    monkeypatch.setattr(ai_routes, "SessionLocal", NoSession)
+    monkeypatch.setattr(ai_routes, "AIService", ScriptedAIService)
+    requests = [AIRequest(message=message) for message in ("one", "fail", "two")]
+
+    response = ai_routes._stream_batch_response(requests, concurrency=2)
+    lines = [json.loads(line) async for line in response.body_iterator]
+
+    by_index = {line["index"]: line for line in lines if "index" in line}
+    assert by_index[0]["event"] == "result" and by_index[0]["message"] == "one"
+    assert by_index[1] == {
+        "event": "error",
+        "index": 1,
+        "error_message": "backend down",
+        "conversation_id": "c-fail"
+    }
+    assert by_index[2]["event"] == "result"
+    assert lines[-1] == {"event": "done", "total": 3, "succeeded": 2, "failed": 1}
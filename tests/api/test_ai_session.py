@@ -0,0 +1,127 @@
+"""
+Tests for request dispatch on the conversation WebSocket.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.api import ai_session
+from app.api.ai_session import ConversationSession
+from app.schemas.ai_schemas import AIResponse
+from app.utils.exceptions import BackendOverloadedError
+
+
+class RecordingWebSocket:
+    client = ("10.0.0.1", 50000)
+
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, text: str):
+        self.sent.append(json.loads(text))
+
+
+class NoSession:
+    async def __aenter__(self):
+        return None
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class ScriptedAIService:
+    """Echoes chat messages; "slow" waits until cancelled and "overload" has no backend capacity."""
+
+    def __init__(self, db, registry=None):
+        pass
+
+    async def process_chat_request(self, request):
+        if request.message == "slow":
+            await asyncio.sleep(10)
+        if request.message == "overload":
+            raise BackendOverloadedError("Groq is at capacity")
+        return AIResponse(
+            message=f"{request.interaction_type}: {request.message}",
+            interaction_type=request.interaction_type,
+            conversation_id=request.conversation_id or "c-new"
+        )
+
+    async def stream_chat_request(self, request):
+        yield {"event": "token", "data": {"content": "Hi"}}
+        yield {"event": "done", "data": {"message": "Hi", "conversation_id": "c-stream", "tokens_used": 2}}
+
+
+@pytest.fixture
+def session(monkeypatch):
+    monkeypatch.setattr(ai_session, "SessionLocal", NoSession)
+    monkeypatch.setattr(ai_session, "AIService", ScriptedAIService)
+    monkeypatch.setattr("app.utils.dependencies.settings.RATE_LIMIT_ENABLED", False)
+    monkeypatch.setattr("app.api.ai_session.settings.AI_WS_MAX_IN_FLIGHT", 2)
+    return ConversationSession(RecordingWebSocket(), registry=None)
+
+
+async def settle(session: ConversationSession):
+    await asyncio.gather(*session.tasks.values(), return_exceptions=True)
+
+
+def replies(session: ConversationSession, request_id: str):
+    return [message for message in session.websocket.sent if message.get("id") == request_id]
+
+
+async def test_control_messages_and_malformed_requests(session):
+    await session.handle({"type": "ping", "id": 1})
+    await session.handle(["not", "an", "object"])
+    await session.handle({"type": "teleport", "id": "x"})
+    await session.handle({"type": "chat", "payload": {"message": "hi"}})
+    await session.handle({"type": "chat", "id": "bad", "payload": {}})
+
+    assert session.websocket.sent[0] == {"id": "1", "type": "pong"}
+    assert [message["status"] for message in session.websocket.sent[1:]] == [400, 400, 400, 422]
+
+
+async def test_chat_reply_carries_the_id_and_the_conversation_is_reused(session):
+    await session.handle({"type": "chat", "id": "a", "payload": {"message": "hello"}})
+    await settle(session)
+    await session.handle({"type": "navigation", "id": "b", "payload": {"message": "bags"}})
+    await settle(session)
+
+    first, second = replies(session, "a")[0], replies(session, "b")[0]
+    assert first["type"] == "result" and first["data"]["message"] == "general_chat: hello"
+    assert second["data"]["message"] == "product_search: bags"
+    assert second["data"]["conversation_id"] == "c-new"
+
+
+async def test_in_flight_limits_and_cancellation(session):
+    await session.handle({"type": "chat", "id": "slow-1", "payload": {"message": "slow"}})
+    await session.handle({"type": "chat", "id": "slow-1", "payload": {"message": "slow"}})
+    await session.handle({"type": "chat", "id": "slow-2", "payload": {"message": "slow"}})
+    await session.handle({"type": "chat", "id": "slow-3", "payload": {"message": "slow"}})
+
+    assert replies(session, "slow-1")[0]["status"] == 409
+    assert replies(session, "slow-3")[0]["status"] == 429
+
+    cancelled = session.tasks["slow-1"]
+    await session.handle({"type": "cancel", "id": "slow-1"})
+    await asyncio.gather(cancelled, return_exceptions=True)
+    assert replies(session, "slow-1")[-1] == {"id": "slow-1", "type": "cancelled", "found": True}
+    assert "slow-1" not in session.tasks
+
+    await session.close()
+    assert not session.tasks
+
+
+async def test_backend_overload_is_reported_per_request(session):
+    await session.handle({"type": "chat", "id": "o", "payload": {"message": "overload"}})
+    await settle(session)
+
+    assert replies(session, "o") == [{"id": "o", "type": "error", "status": 503, "detail": "Groq is at capacity"}]
+
+
+async def test_stream_frames_are_forwarded_and_set_the_conversation(session):
+    await session.handle({"type": "stream", "id": "s", "payload": {"message": "hi"}})
+    await settle(session)
+
+    assert [message["type"] for message in replies(session, "s")] == ["token", "done"]
+    assert session.conversation_id == "c-stream"
@@ -0,0 +1,91 @@
+"""
+Tests for streamed image upload ingestion.
+"""
+
+import base64
+
+import pytest
+from fastapi import HTTPException
+
+from app.utils.uploads import encode_base64, spool_image_stream
+
+
+JPEG_HEADER = b"\xff\xd8\xff\xe0" + b"\x00" * 12
+PNG_HEADER = b"\x89PNG\r\n\x1a\n" + b"\x00" * 8
+
+
+async def stream(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+@pytest.fixture(autouse=True)
+def limits(monkeypatch):
+    monkeypatch.setattr("app.utils.uploads.settings.MAX_FILE_SIZE", 1024)
+    monkeypatch.setattr("app.utils.uploads.settings.UPLOAD_SPOOL_THRESHOLD", 256)
+
+
+async def test_small_upload_stays_in_memory():
+    image = await spool_image_stream(stream(JPEG_HEADER, b"x" * 100), "image/jpeg; charset=binary")
+
+    assert image.path is None
+    assert image.size == len(JPEG_HEADER) + 100
+    assert image.read_bytes().startswith(JPEG_HEADER)
+
+
+async def test_large_upload_rolls_over_to_a_named_file():
+    image = await spool_image_stream(stream(PNG_HEADER, b"x" * 300, b"y" * 300), "image/png")
+    try:
+        assert image.path is not None
+        with open(image.path, "rb") as file:
+            assert file.read() == PNG_HEADER + b"x" * 300 + b"y" * 300
+    finally:
+        image.close()
+
+
+async def test_declared_length_over_the_limit_is_rejected_before_reading():
+    async def never_read():
+        raise AssertionError("body must not be read")
+        yield b""
+
+    with pytest.raises(HTTPException) as excinfo:
+        await spool_image_stream(never_read(), "image/jpeg", content_length="4096")
+
+    assert excinfo.value.status_code == 413
+
+
+async def test_body_over_the_limit_is_aborted_mid_stream():
+    with pytest.raises(HTTPException) as excinfo:
+        await spool_image_stream(stream(JPEG_HEADER, b"x" * 600, b"x" * 600), "image/jpeg", content_length=None)
+
+    assert excinfo.value.status_code == 413
+
+
+@pytest.mark.parametrize("content_type, body", [
+    ("application/pdf", b"%PDF-1.7" + b"\x00" * 8),
+    ("image/jpeg", PNG_HEADER),
+    ("image/png", b"\x89P"),
+])
+async def test_disallowed_or_mismatched_types_are_rejected(content_type, body):
+    with pytest.raises(HTTPException) as excinfo:
+        await spool_image_stream(stream(body), content_type)
+
+    assert excinfo.value.status_code == 415
+
+
+async def test_empty_body_is_rejected():
+    with pytest.raises(HTTPException) as excinfo:
+        await spool_image_stream(stream(b""), "image/jpeg")
+
+    assert excinfo.value.status_code == 400
+
+
+def test_chunked_base64_matches_whole_encoding(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.utils.uploads.BASE64_CHUNK_BYTES", 3 * 4)
+    data = bytes(range(256)) * 3
+    path = tmp_path / "image.bin"
+    path.write_bytes(data)
+
+    expected = base64.b64encode(data).decode("ascii")
+    assert encode_base64(data) == expected
+    assert encode_base64(path) == expected
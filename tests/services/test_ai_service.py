@@ -0,0 +1,54 @@
+"""
+Tests for AI service routing and streamed agent responses.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from app.agents.ollama_client import OllamaClient
+from app.agents.voice_agent import VoiceAgent
+from app.schemas.ai_schemas import AIRequest
+from app.services.ai_service import AIService
+
+
+class ScriptedChatModel:
+    def __init__(self, usage_metadata=None):
+        self.usage_metadata = usage_metadata
+
+    async def ainvoke(self, messages):
+        return AIMessage(content="A structured tote in black leather.", usage_metadata=self.usage_metadata)
+
+
+def service_with(chat_model) -> AIService:
+    ollama = OllamaClient()
+    ollama.client = chat_model
+    registry = SimpleNamespace(
+        groq_client=None,
+        ollama_client=ollama,
+        product_agent=None,
+        recommendation_agent=None,
+        voice_agent=VoiceAgent(ollama_client=ollama)
+    )
+    return AIService(db=None, registry=registry)
+
+
+@pytest.fixture(autouse=True)
+def no_fast_path(monkeypatch):
+    monkeypatch.setattr("app.services.ai_service.settings.FAST_PATH_ENABLED", False)
+    monkeypatch.setattr("app.agents.llm_client.settings.RATE_LIMIT_ENABLED", False)
+
+
+@pytest.mark.parametrize("usage_metadata, estimated", [
+    ({"input_tokens": 40, "output_tokens": 12, "total_tokens": 52}, False),
+    (None, True),
+])
+async def test_agent_stream_reports_whether_tokens_were_estimated(usage_metadata, estimated):
+    service = service_with(ScriptedChatModel(usage_metadata))
+    request = AIRequest(message="Describe this tote", interaction_type="multimodal", conversation_id=f"c-{estimated}")
+
+    events = [event async for event in service.stream_chat_request(request)]
+
+    assert [event["event"] for event in events] == ["token", "done"]
+    assert events[-1]["data"]["estimated_tokens"] is estimated
@@ -0,0 +1,45 @@
+"""
+Tests for the Aho-Corasick brand matcher.
+"""
+
+from app.utils.brand_matcher import BrandMatcher
+
+
+MATCHER = BrandMatcher({
+    "Dior": "Dior",
+    "Christian Dior": "Dior",
+    "Hermès": "Hermès",
+    "Louis Vuitton": "Louis Vuitton",
+    "LV": "Louis Vuitton",
+    "Saint Laurent": "Saint Laurent",
+    "Laurent": "Laurent"
+})
+
+
+def test_matches_ignore_case_and_accents():
+    assert MATCHER.first_match("HERMES Birkin 30") == "Hermès"
+    assert MATCHER.first_match("vintage hermès scarf") == "Hermès"
+
+
+def test_matches_only_whole_words():
+    assert MATCHER.first_match("Diorama table lamp") is None
+    assert MATCHER.first_match("SLV leather belt") is None
+    assert MATCHER.first_match("Lady Dior bag") == "Dior"
+    assert MATCHER.first_match("LV-monogram pouch") == "Louis Vuitton"
+
+
+def test_finds_every_occurrence_in_one_pass():
+    matches = MATCHER.find_all("Louis Vuitton trunk with a Dior scarf")
+
+    assert [canonical for _, _, canonical in matches] == ["Louis Vuitton", "Dior"]
+    assert matches[0][:2] == (0, 13)
+
+
+def test_longest_alias_wins_at_the_same_position():
+    assert MATCHER.first_match("Saint Laurent clutch") == "Saint Laurent"
+    assert MATCHER.first_match("Christian Dior perfume") == "Dior"
+
+
+def test_earlier_texts_take_precedence():
+    assert MATCHER.first_match(None, "", "Classic tote", "A Dior-inspired design") == "Dior"
+    assert MATCHER.first_match("Hermès belt", "pairs well with Dior") == "Hermès"
@@ -0,0 +1,69 @@
+"""
+Tests for background product summary generation.
+"""
+
+import uuid
+from datetime import datetime, timedelta
+
+from app.models.product import Product
+from app.services.product_summary_service import ProductSummaryService
+
+
+UPDATED = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def product(name: str = "Leather tote", **fields) -> Product:
+    return Product(id=uuid.uuid4(), name=name, price=450.0, updated_at=UPDATED, **fields)
+
+
+class RecordingSession:
+    def __init__(self):
+        self.statements = []
+        self.commits = 0
+
+    async def execute(self, statement, params=None):
+        self.statements.append((statement, params))
+
+    async def commit(self):
+        self.commits += 1
+
+
+class ScriptedGroqClient:
+    """Summarizes every product except the ones named "fail"."""
+
+    async def generate_product_summaries(self, Projects_data, max_concurrency=None):
+        return [None if data["name"] == "fail" else f"Summary of {data['name']}" for data in Projects_data]
+
+
+def test_summary_is_fresh_only_when_written_after_the_last_update():
+    assert not product().has_fresh_ai_summary
+    assert not product(ai_summary="Old", ai_summary_updated_at=UPDATED - timedelta(minutes=1)).has_fresh_ai_summary
+    assert product(ai_summary="New", ai_summary_updated_at=UPDATED).has_fresh_ai_summary
+
+
+async def test_failed_items_are_left_for_the_next_run():
+    session = RecordingSession()
+    service = ProductSummaryService(session, ScriptedGroqClient())
+    Projects = [product(), product("fail")]
+
+    summaries = await service.generate_summaries(Projects)
+    saved = await service.save_summaries(Projects, summaries)
+
+    assert summaries == {Projects[0].id: "Summary of Leather tote", Projects[1].id: None}
+    assert saved == 1
+    statement, params = session.statements[0]
+    assert [row["b_id"] for row in params] == [Projects[0].id]
+    assert session.commits == 1
+
+
+async def test_summary_timestamp_uses_the_same_utc_clock_as_updated_at():
+    session = RecordingSession()
+    service = ProductSummaryService(session, ScriptedGroqClient())
+    item = product()
+
+    await service.save_summaries([item], {item.id: "Summary"})
+
+    statement, _ = session.statements[0]
+    summarized_at = statement.compile().params["ai_summary_updated_at"]
+    assert isinstance(summarized_at, datetime)
+    assert abs(summarized_at - datetime.utcnow()) < timedelta(minutes=1)